@@ -1,24 +1,37 @@
 """Coordinator Agent that routes requests to appropriate sub-agents."""
 
+import contextvars
+import functools
 import json
+import logging
 import uuid
 import asyncio
+import queue
 import threading
-from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 from bson import ObjectId
 
 from shared.llm import llm_service
-from shared.logger import get_logger
+from shared.embeddings import embedding_service
+from shared.episodic_queue import get_episodic_queue_stats
+from shared.prompt_cache import LAYER_SESSION, LAYER_USER_MEMORY, PromptCacheStats, PromptLayer, layer_breakdown
+from shared.logger import get_logger, set_log_context
+from shared.tracing import current_trace, end_span, span, start_span, start_trace
 from shared.config import settings
+from shared.db import resolve_project_id, resolve_project_ids
+from shared.services import services
 from agents.worklog import worklog_agent
 from agents.retrieval import retrieval_agent
-from agents.mcp_agent import MCPAgent
 from utils.context_engineering import compress_tool_result
 from config.prompts import get_system_prompt, get_prompt_stats
 from memory import MemoryManager
 from memory.workflow_executor import WorkflowExecutor
 
+if TYPE_CHECKING:
+    from agents.mcp_agent import MCPAgent
+
 logger = get_logger("coordinator")
 
 
@@ -634,6 +647,48 @@ Only available when long-term memory is enabled.""",
     }
 ]
 
+# Tools with no effect on tasks or projects. Consecutive calls to these within
+# one LLM response are independent and can run concurrently; the searches'
+# action-history records are replayed on the calling thread, in block order.
+READ_ONLY_TOOLS = frozenset({
+    "get_tasks",
+    "search_tasks",
+    "get_projects",
+    "search_projects",
+    "get_tasks_by_time",
+    "get_task",
+    "get_project",
+    "get_project_by_name",
+    "get_action_history",
+    "search_knowledge",
+    "list_templates",
+    "analyze_tool_discoveries",
+})
+
+
+def _traced_turn(process: Callable) -> Callable:
+    """
+    Run CoordinatorAgent.process inside a per-turn trace.
+
+    The turn's span waterfall is attached to current_turn["spans"] for the
+    debug panel, and the trace ID to the debug dict when return_debug=True.
+    """
+    @functools.wraps(process)
+    def wrapper(self, user_message, *args, **kwargs):
+        previous_turn = self.current_turn
+        with start_trace("coordinator.process", session_id=kwargs.get("session_id") or self.session_id) as trace:
+            result = process(self, user_message, *args, **kwargs)
+        if trace is not None:
+            if self.current_turn is not None and self.current_turn is not previous_turn:
+                self.current_turn["trace_id"] = trace.trace_id
+                self.current_turn["spans"] = trace.to_debug()
+            if isinstance(result, dict) and isinstance(result.get("debug"), dict):
+                result["debug"]["trace_id"] = trace.trace_id
+        return result
+
+    return wrapper
+
+
 # System prompts are now defined in config/prompts.py
 # Use get_system_prompt(streamlined=True/False) to retrieve them
 
@@ -662,10 +717,13 @@ class CoordinatorAgent:
         self.user_id = "default_user"
         self.current_chain_id = None
         self.memory_ops = {}  # Track memory operations for debug panel
+        self._embedding_cache_start = None  # Embedding cache counters at turn start
+        self.prompt_cache_stats = PromptCacheStats()  # Per-layer prompt cache usage across turns
+        self._tool_pool: Optional[ThreadPoolExecutor] = None  # Lazy pool for read-only tool fan-out
 
         # MCP Agent (lazy initialized)
         self.db = db
-        self.mcp_agent: Optional[MCPAgent] = None
+        self.mcp_agent: Optional["MCPAgent"] = None
         self.mcp_mode_enabled = settings.mcp_mode_enabled  # Can be toggled via UI
 
         # Persistent event loop for async MCP operations
@@ -721,6 +779,7 @@ class CoordinatorAgent:
                     "error": "Database connection not available for MCP Agent"
                 }
 
+            from agents.mcp_agent import MCPAgent  # Deferred: pulls in the MCP SDK
             from shared.embeddings import embed_query
             self.mcp_agent = MCPAgent(
                 db=self.db,
@@ -736,7 +795,7 @@ class CoordinatorAgent:
 
         self.mcp_mode_enabled = True
         status = self.mcp_agent.get_status()
-        logger.info(f"🔬 MCP Mode enabled: {status}")
+        logger.info("🔬 MCP Mode enabled: %s", status)
         return {"success": True, **status}
 
     def disable_mcp_mode(self):
@@ -749,20 +808,40 @@ class CoordinatorAgent:
         """
         Build context injection section for system prompt.
 
-        Combines:
-        - Working Memory (short-term): current project/task/action
+        Returns:
+            Memory layer followed by session layer (see _build_memory_layers)
+        """
+        memory_layer, session_layer = self._build_memory_layers()
+        return memory_layer + session_layer
+
+    def _build_memory_layers(self) -> Tuple[str, str]:
+        """
+        Build the memory sections of the system prompt as two cache layers.
+
+        Memory layer (changes only when memory is written):
         - Semantic Memory (long-term): preferences
-        - Procedural Memory (long-term): rules
+        - Procedural Memory (long-term): rules, workflows
+
+        Session layer (changes every turn):
+        - Working Memory (short-term): current project/task/action
         - Disambiguation (short-term): pending selections
+
+        Returns:
+            (memory_layer, session_layer); both empty when there is no context
         """
 
         if not self.memory_config.get("context_injection"):
-            return ""
+            return "", ""
 
         if not self.session_id:
-            return ""
+            return "", ""
 
         parts = []
+        session_parts = []
+
+        # Long-term memory comes from the per-user snapshot (no Mongo reads
+        # until a memory write bumps its version)
+        snapshot = self.memory.get_memory_snapshot(self.user_id)
 
         # ═══════════════════════════════════════════════════════════════
         # WORKING MEMORY (Short-term session context)
@@ -771,19 +850,19 @@ class CoordinatorAgent:
         session_context = self.memory.read_session_context(self.session_id)
         if session_context:
             if session_context.get("current_project"):
-                parts.append(f"Current project: {session_context['current_project']}")
+                session_parts.append(f"Current project: {session_context['current_project']}")
 
             if session_context.get("current_task"):
-                parts.append(f"Current task: {session_context['current_task']}")
+                session_parts.append(f"Current task: {session_context['current_task']}")
 
             if session_context.get("last_action"):
-                parts.append(f"Last action: {session_context['last_action']}")
+                session_parts.append(f"Last action: {session_context['last_action']}")
 
         # ═══════════════════════════════════════════════════════════════
         # SEMANTIC MEMORY (Long-term preferences)
         # ═══════════════════════════════════════════════════════════════
 
-        preferences = self.memory.get_preferences(self.user_id, min_confidence=0.5)
+        preferences = [p for p in snapshot["preferences"] if (p.get("confidence") or 0) >= 0.5]
         if preferences:
             parts.append("")  # Blank line separator
             parts.append("User preferences (Semantic Memory):")
@@ -794,7 +873,7 @@ class CoordinatorAgent:
         # PROCEDURAL MEMORY (Long-term rules)
         # ═══════════════════════════════════════════════════════════════
 
-        rules = self.memory.get_rules(self.user_id, min_confidence=0.5)
+        rules = [r for r in snapshot["rules"] if (r.get("confidence") or 0) >= 0.5]
         if rules:
             parts.append("")  # Blank line separator
             parts.append("User rules (Procedural Memory):")
@@ -812,7 +891,7 @@ class CoordinatorAgent:
         # WORKFLOWS (Procedural Memory - Multi-step patterns)
         # ═══════════════════════════════════════════════════════════════
 
-        workflows = self.memory.get_workflows(self.user_id)
+        workflows = snapshot["workflows"]
         if workflows:
             parts.append("")  # Blank line separator
             parts.append("Available Workflows (Procedural Memory):")
@@ -839,30 +918,35 @@ class CoordinatorAgent:
 
         disambiguation = self.memory.get_pending_disambiguation(self.session_id)
         if disambiguation:
-            parts.append("")  # Blank line separator
-            parts.append(f"Pending selection from search \"{disambiguation.get('query', '')}\":")
+            if session_parts:
+                session_parts.append("")  # Blank line separator
+            session_parts.append(f"Pending selection from search \"{disambiguation.get('query', '')}\":")
             for r in disambiguation.get("results", []):
                 idx = r.get('index', 0) + 1
                 title = r.get('title', 'Unknown')
                 project = r.get('project', 'Unknown')
-                parts.append(f"  {idx}. {title} ({project})")
-            parts.append("User may refer to these by number (e.g., 'the first one', 'number 2').")
+                session_parts.append(f"  {idx}. {title} ({project})")
+            session_parts.append("User may refer to these by number (e.g., 'the first one', 'number 2').")
 
-        if not parts:
-            return ""
+        if not parts and not session_parts:
+            return "", ""
 
         self.memory_ops["context_injected"] = True
 
-        # Build the injection string
-        context_str = "\n".join(parts)
-
-        return f"""
+        # Long-term memory first, then the usage notes (also stable), so the
+        # whole layer stays cacheable; per-turn context goes in its own layer
+        memory_layer = ""
+        if parts:
+            context_str = "\n".join(parts).strip("\n")
+            memory_layer = f"""
 
 <memory_context>
 {context_str}
-</memory_context>
+</memory_context>"""
+
+        memory_layer += """
 
-Use this memory context to:
+Use the memory and session context to:
 - Filter queries to the current project when relevant
 - Apply user preferences (e.g., focus_project filters task queries)
 - Execute user rules when trigger words are detected
@@ -870,6 +954,17 @@ Use this memory context to:
 - Do NOT mention the memory system to the user unless asked
 """
 
+        session_layer = ""
+        if session_parts:
+            session_str = "\n".join(session_parts)
+            session_layer = f"""
+<session_context>
+{session_str}
+</session_context>
+"""
+
+        return memory_layer, session_layer
+
     def _check_rule_triggers(self, user_message: str) -> dict:
         """
         Check if user message matches any stored rule triggers.
@@ -885,30 +980,17 @@ Use this memory context to:
         if not self.memory or not self.user_id:
             return None
 
-        msg_lower = user_message.lower()
-
-        # Get rules from long-term procedural memory
-        rules = self.memory.get_rules(self.user_id, min_confidence=0.5)
-        if not rules:
+        # Compiled per-user matcher over long-term procedural memory rules
+        rule = self.memory.match_rule_trigger(self.user_id, user_message, min_confidence=0.5)
+        if not rule:
             return None
 
-        # Check each rule's trigger
-        for rule in rules:
-            trigger = rule.get("trigger_pattern", "").lower()
-            if not trigger:
-                continue
-
-            # Check if trigger appears in message
-            # Support both exact phrase and word matching
-            if trigger in msg_lower:
-                return {
-                    "matched": True,
-                    "trigger": trigger,
-                    "action": rule.get("action_type"),
-                    "original_rule": rule
-                }
-
-        return None
+        return {
+            "matched": True,
+            "trigger": rule.get("trigger_pattern", "").lower(),
+            "action": rule.get("action_type"),
+            "original_rule": rule
+        }
 
     def _extract_context_from_turn(self, user_message: str,
                                     tool_calls: list,
@@ -1227,7 +1309,7 @@ Use this memory context to:
         self.memory_ops["action_recorded"] = True
         self.memory_ops["recorded_action_type"] = action_type
 
-        logger.debug(f"Recorded action: {action_type} on {entity_type} (id={action_id})")
+        logger.debug("Recorded action: %s on %s (id=%s)", action_type, entity_type, action_id)
 
     def _can_static_tools_handle(self, intent: str, user_message: str) -> bool:
         """
@@ -1391,7 +1473,7 @@ Use this memory context to:
             return {"is_multi_step": False, "steps": []}
 
         # Use LLM to parse the steps
-        logger.info(f"Detected potential multi-step request: {user_message}")
+        logger.info("Detected potential multi-step request: %s", user_message)
 
         prompt = f"""Parse this user request into sequential steps.
 
@@ -1452,7 +1534,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
             parsed = json.loads(response_clean)
 
             if "steps" in parsed and len(parsed["steps"]) > 1:
-                logger.info(f"Parsed {len(parsed['steps'])} steps from multi-step request")
+                logger.info("Parsed %s steps from multi-step request", len(parsed['steps']))
                 return {
                     "is_multi_step": True,
                     "steps": parsed["steps"]
@@ -1462,11 +1544,11 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                 return {"is_multi_step": False, "steps": []}
 
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse multi-step response as JSON: {e}")
-            logger.error(f"Response was: {response}")
+            logger.error("Failed to parse multi-step response as JSON: %s", e)
+            logger.error("Response was: %s", response)
             return {"is_multi_step": False, "steps": []}
         except Exception as e:
-            logger.error(f"Error parsing multi-step intent: {e}")
+            logger.error("Error parsing multi-step intent: %s", e)
             return {"is_multi_step": False, "steps": []}
 
     async def _execute_multi_step(
@@ -1497,29 +1579,29 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
             "user_id": user_id
         }
 
-        logger.info(f"Executing {len(steps)} steps for multi-step workflow")
+        logger.info("Executing %s steps for multi-step workflow", len(steps))
 
         # Check if request mentions using previous research
         if "research we just did" in original_request.lower() or "recent research" in original_request.lower():
             logger.info("Request mentions previous research - checking semantic memory for recent results")
             # Search for recent Tavily research in semantic memory
             if self.memory and user_id:
-                recent_research = self.memory.get_recent_knowledge(user_id, limit=1)
+                recent_research = await asyncio.to_thread(self.memory.get_recent_knowledge, user_id, limit=1)
                 if recent_research:
                     context["research_results"] = recent_research[0].get("result") or recent_research[0].get("value", "")
                     context["research_source"] = recent_research[0].get("source", "semantic_cache")
                     context["research_query"] = recent_research[0].get("query") or recent_research[0].get("key", "")
-                    logger.info(f"✓ Found recent research: {context.get('research_query', 'unknown')[:50]}...")
+                    logger.info("✓ Found recent research: %s...", context.get('research_query', 'unknown')[:50])
 
         for i, step in enumerate(steps):
             step_num = i + 1
-            logger.info(f"Step {step_num}/{len(steps)}: {step['intent']} - {step['description']}")
+            logger.info("Step %s/%s: %s - %s", step_num, len(steps), step['intent'], step['description'])
 
             try:
                 if step["intent"] == "research":
                     # Route to MCP Agent for web search
                     if self.mcp_mode_enabled and self.mcp_agent:
-                        logger.info(f"Routing research to MCP Agent: {step['description']}")
+                        logger.info("Routing research to MCP Agent: %s", step['description'])
                         result = await self.mcp_agent.handle_request(
                             user_request=step["description"],
                             intent="research",
@@ -1538,7 +1620,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                                 "source": result.get("source"),
                                 "preview": self._truncate(str(result.get("result")), 200)
                             })
-                            logger.info(f"✓ Research completed via {result.get('source')}")
+                            logger.info("✓ Research completed via %s", result.get('source'))
                         else:
                             results.append({
                                 "step": step_num,
@@ -1546,7 +1628,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                                 "success": False,
                                 "error": result.get("error", "Research failed")
                             })
-                            logger.error(f"✗ Research failed: {result.get('error')}")
+                            logger.error("✗ Research failed: %s", result.get('error'))
                     else:
                         error_msg = "MCP mode not enabled - cannot perform research"
                         results.append({
@@ -1555,7 +1637,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                             "success": False,
                             "error": error_msg
                         })
-                        logger.warning(f"⚠️  {error_msg}")
+                        logger.warning("⚠️  %s", error_msg)
 
                 elif step["intent"] == "create_project":
                     # Check if this is a GTM project or if next step will generate tasks
@@ -1571,7 +1653,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         logger.info("Loading template from procedural memory (GTM project or task generation requested)")
 
                         # Query for GTM template by name (more reliable than trigger matching)
-                        template_doc = self.db.memory_procedural.find_one({
+                        template_doc = await asyncio.to_thread(self.db.memory_procedural.find_one, {
                             "user_id": user_id,
                             "rule_type": "template",
                             "name": "GTM Roadmap Template"
@@ -1579,7 +1661,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
 
                         if template_doc:
                             context["template"] = template_doc
-                            logger.info(f"✓ Found template: {template_doc.get('name')}")
+                            logger.info("✓ Found template: %s", template_doc.get('name'))
                         else:
                             logger.warning("⚠️  GTM template not found in procedural memory")
 
@@ -1587,8 +1669,9 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                     project_name = self._extract_project_name(step["description"], context)
 
                     # Create project via worklog agent
-                    logger.info(f"Creating project: {project_name}")
-                    project_result = self.worklog_agent._create_project(
+                    logger.info("Creating project: %s", project_name)
+                    project_result = await asyncio.to_thread(
+                        self.worklog_agent._create_project,
                         name=project_name,
                         description=step["description"],
                         context=context.get("research_results", "")[:500] if context.get("research_results") else ""
@@ -1606,7 +1689,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                             "project_id": project_result.get("project_id"),
                             "template_loaded": template is not None
                         })
-                        logger.info(f"✓ Project created: {project_name}")
+                        logger.info("✓ Project created: %s", project_name)
                     else:
                         results.append({
                             "step": step_num,
@@ -1630,7 +1713,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                             "success": False,
                             "error": error_msg
                         })
-                        logger.warning(f"⚠️  {error_msg}")
+                        logger.warning("⚠️  %s", error_msg)
                         continue
 
                     if not project or not project_id:
@@ -1641,11 +1724,11 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                             "success": False,
                             "error": error_msg
                         })
-                        logger.warning(f"⚠️  {error_msg}")
+                        logger.warning("⚠️  %s", error_msg)
                         continue
 
                     # Generate tasks from template phases
-                    logger.info(f"Generating tasks from template: {template.get('name')}")
+                    logger.info("Generating tasks from template: %s", template.get('name'))
                     tasks_created = []
                     phases_data = template.get("template", {}).get("phases", [])
 
@@ -1657,66 +1740,81 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         research_preview = str(research_results)[:200] if isinstance(research_results, str) else str(research_results)[:200]
                         task_context_base += f"\n\nProject context: {research_preview}..."
 
+                    # Collect every task first so the tailored-research LLM calls can overlap
+                    planned_tasks = []
                     for phase in phases_data:
                         phase_name = phase.get("name", "")
-                        logger.info(f"  Phase: {phase_name}")
+                        logger.info("  Phase: %s", phase_name)
 
                         for task_item in phase.get("tasks", []):
                             # Handle both formats: string (old) or dict with guiding_questions (new)
                             if isinstance(task_item, str):
-                                task_title = task_item
-                                task_context = task_context_base
+                                planned_tasks.append((phase_name, task_item, []))
                             else:
-                                task_title = task_item.get("title", "Unknown task")
-                                guiding_questions = task_item.get("guiding_questions", [])
-
-                                # If we have research and guiding questions, tailor the context
-                                if research_results and guiding_questions:
-                                    questions_text = "\n".join(f"- {q}" for q in guiding_questions)
-
-                                    # Use fast Haiku model for quick task-specific summaries
-                                    try:
-                                        from shared.llm import LLMService
-                                        fast_llm = LLMService(model="claude-3-5-haiku-20241022")  # Fast, cheap model
-
-                                        tailored_research = fast_llm.generate(
-                                            messages=[{
-                                                "role": "user",
-                                                "content": f"Extract relevant insights from this research for the task '{task_title}'. Answer these questions in 2-3 clear sentences. Be direct - no preamble, no meta-commentary, just the facts:\n\n{questions_text}\n\nResearch:\n{str(research_results)[:1200]}"
-                                            }],
-                                            max_tokens=150,  # Reduced for faster generation
-                                            temperature=0.2  # Lower temperature for concise, factual answers
-                                        )
-                                        # Clean up any remaining meta-commentary from Haiku
-                                        clean_research = tailored_research.strip()
-                                        # Remove common preambles if they snuck through
-                                        for preamble in ["Based on the research, ", "Here are the insights: ", "Here's a concise response: "]:
-                                            if clean_research.startswith(preamble):
-                                                clean_research = clean_research[len(preamble):]
-
-                                        task_context = f"{clean_research}"
-                                        logger.debug(f"    Generated tailored research for: {task_title}")
-                                    except Exception as e:
-                                        logger.warning(f"    Failed to tailor research for {task_title}: {e}")
-                                        task_context = task_context_base
-                                else:
-                                    task_context = task_context_base
-
-                            # Add phase prefix to task title for context
-                            full_title = f"[{phase_name}] {task_title}"
-
-                            task_result = self.worklog_agent._create_task(
-                                title=full_title,
-                                project_id=project_id,
-                                priority="medium",
-                                context=task_context
-                            )
+                                planned_tasks.append((
+                                    phase_name,
+                                    task_item.get("title", "Unknown task"),
+                                    task_item.get("guiding_questions", [])
+                                ))
 
-                            if task_result.get("success"):
-                                tasks_created.append(task_result["task"]["title"])
-                                logger.debug(f"    ✓ Created: {full_title}")
-                            else:
-                                logger.warning(f"    ✗ Failed to create: {full_title}")
+                    from shared.llm import LLMService
+                    fast_llm = LLMService(model="claude-3-5-haiku-20241022")  # Fast, cheap model
+                    llm_slots = asyncio.Semaphore(5)
+
+                    async def tailor_context(task_title: str, guiding_questions: List[str]) -> str:
+                        # If we have research and guiding questions, tailor the context
+                        if not (research_results and guiding_questions):
+                            return task_context_base
+
+                        questions_text = "\n".join(f"- {q}" for q in guiding_questions)
+
+                        # Use fast Haiku model for quick task-specific summaries
+                        try:
+                            async with llm_slots:
+                                tailored_research = await fast_llm.agenerate(
+                                    messages=[{
+                                        "role": "user",
+                                        "content": f"Extract relevant insights from this research for the task '{task_title}'. Answer these questions in 2-3 clear sentences. Be direct - no preamble, no meta-commentary, just the facts:\n\n{questions_text}\n\nResearch:\n{str(research_results)[:1200]}"
+                                    }],
+                                    max_tokens=150,  # Reduced for faster generation
+                                    temperature=0.2  # Lower temperature for concise, factual answers
+                                )
+                            # Clean up any remaining meta-commentary from Haiku
+                            clean_research = tailored_research.strip()
+                            # Remove common preambles if they snuck through
+                            for preamble in ["Based on the research, ", "Here are the insights: ", "Here's a concise response: "]:
+                                if clean_research.startswith(preamble):
+                                    clean_research = clean_research[len(preamble):]
+
+                            logger.debug("    Generated tailored research for: %s", task_title)
+                            return f"{clean_research}"
+                        except Exception as e:
+                            logger.warning("    Failed to tailor research for %s: %s", task_title, e)
+                            return task_context_base
+
+                    task_contexts = await asyncio.gather(*(
+                        tailor_context(task_title, guiding_questions)
+                        for _, task_title, guiding_questions in planned_tasks
+                    ))
+
+                    # Create tasks in template order
+                    for (phase_name, task_title, _), task_context in zip(planned_tasks, task_contexts):
+                        # Add phase prefix to task title for context
+                        full_title = f"[{phase_name}] {task_title}"
+
+                        task_result = await asyncio.to_thread(
+                            self.worklog_agent._create_task,
+                            title=full_title,
+                            project_id=project_id,
+                            priority="medium",
+                            context=task_context
+                        )
+
+                        if task_result.get("success"):
+                            tasks_created.append(task_result["task"]["title"])
+                            logger.debug("    ✓ Created: %s", full_title)
+                        else:
+                            logger.warning("    ✗ Failed to create: %s", full_title)
 
                     # Update template usage count
                     if tasks_created and template.get("_id"):
@@ -1729,9 +1827,9 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                                     "$set": {"last_used": datetime.utcnow()}
                                 }
                             )
-                            logger.debug(f"Incremented usage count for template: {template.get('name')}")
+                            logger.debug("Incremented usage count for template: %s", template.get('name'))
                         except Exception as e:
-                            logger.warning(f"Failed to update template usage: {e}")
+                            logger.warning("Failed to update template usage: %s", e)
 
                     results.append({
                         "step": step_num,
@@ -1742,7 +1840,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         "phases": len(phases_data),
                         "tasks_preview": tasks_created[:5]  # Preview first 5
                     })
-                    logger.info(f"✓ Generated {len(tasks_created)} tasks across {len(phases_data)} phases")
+                    logger.info("✓ Generated %s tasks across %s phases", len(tasks_created), len(phases_data))
 
                 else:
                     # Unknown step type
@@ -1753,10 +1851,10 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         "success": False,
                         "error": error_msg
                     })
-                    logger.warning(f"⚠️  {error_msg}")
+                    logger.warning("⚠️  %s", error_msg)
 
             except Exception as e:
-                logger.error(f"Error executing step {step_num}: {e}", exc_info=True)
+                logger.error("Error executing step %s: %s", step_num, e, exc_info=True)
                 results.append({
                     "step": step_num,
                     "type": step.get("intent", "unknown"),
@@ -1768,7 +1866,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
         successful_steps = [r for r in results if r.get("success")]
         all_success = len(successful_steps) == len(steps)
 
-        logger.info(f"Multi-step execution complete: {len(successful_steps)}/{len(steps)} steps successful")
+        logger.info("Multi-step execution complete: %s/%s steps successful", len(successful_steps), len(steps))
 
         return {
             "success": all_success,
@@ -1964,7 +2062,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
         # Check if this is from cache and has a summary
         if mcp_result.get("source") == "knowledge_cache" and mcp_result.get("summary"):
             formatted_result = mcp_result.get("summary")
-            logger.debug(f"Using cached summary ({len(formatted_result)} chars)")
+            logger.debug("Using cached summary (%s chars)", len(formatted_result))
         else:
             # Use full result content
             if isinstance(result_content, list):
@@ -1985,6 +2083,12 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
             }
         }
 
+    def _embedding_cache_turn_stats(self) -> Optional[Dict[str, Any]]:
+        """Embedding cache hits/misses accumulated since the start of this turn."""
+        if embedding_service.cache is None:
+            return None
+        return embedding_service.cache.stats_since(self._embedding_cache_start)
+
     def _get_available_tools(self) -> List[Dict]:
         """Get tools available based on current settings.
 
@@ -2014,11 +2118,144 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
         Returns:
             Tuple of (tool_result, debug_info)
         """
+        result, debug_info, turn_record = self._run_tool(tool_name, tool_input)
+
+        # Also append to current turn if we're tracking it
+        if self.current_turn is not None:
+            self.current_turn["tool_calls"].append(turn_record)
+
+        return result, debug_info
+
+    def _execute_tool_blocks(self, tool_blocks: List[Any]) -> List[tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Execute the tool_use blocks of one LLM response.
+
+        Runs of consecutive read-only tools are fanned out on a bounded worker
+        pool; any mutating tool acts as a barrier and runs on its own, in order.
+        Results and current_turn records keep the original block order.
+
+        Args:
+            tool_blocks: tool_use content blocks from the LLM response
+
+        Returns:
+            List of (tool_result, debug_info) tuples, one per block, in order
+        """
         import time
 
-        logger.info(f"Executing tool: {tool_name} with input: {tool_input}")
+        wall_start = time.time()
+        parallel = self.optimizations.get("parallel_tools", True) and settings.tool_max_parallel > 1
+        outcomes: List[Optional[tuple]] = [None] * len(tool_blocks)
+
+        # Resolve every project name in this response with one query
+        project_names = {
+            b.input.get("project_name") for b in tool_blocks
+            if isinstance(b.input, dict) and isinstance(b.input.get("project_name"), str)
+        }
+        if len(project_names) > 1:
+            try:
+                resolve_project_ids(project_names)
+            except Exception as e:
+                logger.warning("Project name prefetch failed: %s", e)
+
+        i = 0
+        while i < len(tool_blocks):
+            j = i + 1
+            if parallel and tool_blocks[i].name in READ_ONLY_TOOLS:
+                while j < len(tool_blocks) and tool_blocks[j].name in READ_ONLY_TOOLS:
+                    j += 1
+
+            if j - i > 1:
+                logger.info("Running %s read-only tools concurrently: %s", j - i, [b.name for b in tool_blocks[i:j]])
+                pool = self._get_tool_pool()
+                # Each tool runs in a copy of this context so its logs keep the turn/session IDs
+                pending_records: List[List[Dict[str, Any]]] = [[] for _ in range(j - i)]
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._run_tool, b.name, b.input, records)
+                    for b, records in zip(tool_blocks[i:j], pending_records)
+                ]
+                for k, future in enumerate(futures):
+                    outcomes[i + k] = future.result()
+                for records in pending_records:
+                    for record in records:
+                        self._record_action(**record)
+            else:
+                outcomes[i] = self._run_tool(tool_blocks[i].name, tool_blocks[i].input)
+            i = j
+
+        if self.current_turn is not None:
+            for _, _, turn_record in outcomes:
+                self.current_turn["tool_calls"].append(turn_record)
+            self.current_turn["tool_wall_ms"] = (
+                self.current_turn.get("tool_wall_ms", 0) + int((time.time() - wall_start) * 1000)
+            )
+
+        return [(result, debug_info) for result, debug_info, _ in outcomes]
+
+    def _resolve_project_name(self, project_name: str) -> Optional[str]:
+        """
+        Resolve a project name from tool input to a project ID.
+
+        Exact (case-insensitive) names come from the name -> id map in
+        shared/db.py; anything else goes through fuzzy_match_project.
+
+        Args:
+            project_name: Project name as given by the LLM
+
+        Returns:
+            Project ID as string, or None if nothing matched
+        """
+        project_id = resolve_project_id(project_name)
+        if project_id:
+            return str(project_id)
+
+        try:
+            match = self.retrieval_agent.fuzzy_match_project(project_name).get("match")
+        except Exception as e:
+            logger.warning("Fuzzy project match failed for '%s': %s", project_name, e)
+            return None
+        return str(match["_id"]) if match else None
+
+    def _get_tool_pool(self) -> ThreadPoolExecutor:
+        """Get the worker pool used for concurrent read-only tool calls."""
+        if self._tool_pool is None:
+            self._tool_pool = ThreadPoolExecutor(
+                max_workers=settings.tool_max_parallel,
+                thread_name_prefix="coordinator-tool"
+            )
+        return self._tool_pool
+
+    def close(self) -> None:
+        """Release the tool worker pool (the coordinator stays usable; a new pool is built on demand)."""
+        pool, self._tool_pool = self._tool_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _run_tool(
+        self,
+        tool_name: str,
+        tool_input: Dict[str, Any],
+        pending_records: Optional[List[Dict[str, Any]]] = None
+    ) -> tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Run a tool without touching current_turn.
+
+        Safe to call from worker threads for READ_ONLY_TOOLS when
+        pending_records is given: action-history records (which write memory
+        and update memory_ops) are appended to it for the caller to replay with
+        _record_action instead of being written here.
+
+        Args:
+            tool_name: Name of the tool to execute
+            tool_input: Tool input parameters
+            pending_records: Collects _record_action kwargs instead of recording
 
-        start_time = time.time()
+        Returns:
+            Tuple of (tool_result, debug_info, current_turn tool_calls record)
+        """
+
+        logger.info("Executing tool: %s with input: %s", tool_name, tool_input)
+
+        tool_span = start_span(f"tool.{tool_name}", kind="tool")
         error_msg = None
         result = None
 
@@ -2030,15 +2267,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                 priority = tool_input.get("priority")
 
                 # Convert project_name to project_id if provided
-                project_id = None
-                if project_name:
-                    from shared.db import get_collection, PROJECTS_COLLECTION
-                    projects_collection = get_collection(PROJECTS_COLLECTION)
-                    project_doc = projects_collection.find_one(
-                        {"name": {"$regex": f"^{project_name}$", "$options": "i"}}
-                    )
-                    if project_doc:
-                        project_id = str(project_doc["_id"])
+                project_id = self._resolve_project_name(project_name) if project_name else None
 
                 # Call worklog agent's direct method (bypasses LLM)
                 result = self.worklog_agent._list_tasks(
@@ -2058,15 +2287,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                 project_name = tool_input.get("project_name")
 
                 # Convert project_name to project_id if provided
-                project_id = None
-                if project_name:
-                    from shared.db import get_collection, PROJECTS_COLLECTION
-                    projects_collection = get_collection(PROJECTS_COLLECTION)
-                    project_doc = projects_collection.find_one(
-                        {"name": {"$regex": f"^{project_name}$", "$options": "i"}}
-                    )
-                    if project_doc:
-                        project_id = str(project_doc["_id"])
+                project_id = self._resolve_project_name(project_name) if project_name else None
 
                 tasks = self.retrieval_agent.hybrid_search_tasks(
                     query,
@@ -2190,17 +2411,18 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                 due_date = tool_input.get("due_date")
                 blockers = tool_input.get("blockers")
 
-                # Look up project by name
-                projects = self.retrieval_agent.hybrid_search_projects(project_name, limit=1)
+                # Look up project by name (exact name first, then hybrid search)
+                project_id = resolve_project_id(project_name)
+                if not project_id:
+                    projects = self.retrieval_agent.hybrid_search_projects(project_name, limit=1)
+                    project_id = projects[0]["_id"] if projects else None
 
-                if not projects:
+                if not project_id:
                     result = {
                         "success": False,
                         "error": f"Project not found: '{project_name}'. Use search_projects or get_projects to see available projects."
                     }
                 else:
-                    project_id = projects[0]["_id"]
-
                     # Create task via worklog agent
                     result = self.worklog_agent._create_task(
                         title=title,
@@ -2227,9 +2449,12 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                 # Look up project if moving to different project
                 project_id = None
                 if project_name:
-                    projects = self.retrieval_agent.hybrid_search_projects(project_name, limit=1)
-                    if projects:
-                        project_id = str(projects[0]["_id"])
+                    project_id = resolve_project_id(project_name)
+                    if not project_id:
+                        projects = self.retrieval_agent.hybrid_search_projects(project_name, limit=1)
+                        project_id = projects[0]["_id"] if projects else None
+                    if project_id:
+                        project_id = str(project_id)
                     else:
                         result = {
                             "success": False,
@@ -2513,7 +2738,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         "count": len(formatted_templates)
                     }
 
-                    logger.info(f"📋 Listed {len(formatted_templates)} templates for user {self.user_id}")
+                    logger.info("📋 Listed %s templates for user %s", len(formatted_templates), self.user_id)
 
             elif tool_name == "search_knowledge":
                 # Search cached knowledge from semantic memory
@@ -2533,12 +2758,18 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         limit=limit
                     )
 
+                    # Search returns headers only; read full results just for hits without a summary
+                    payloads = self.memory.get_knowledge_payloads([
+                        item["_id"] for item in knowledge_results
+                        if not (item.get("value") or item.get("summary")) and "_id" in item
+                    ])
+
                     # Format results for display
                     formatted_results = []
                     for item in knowledge_results:
                         # Handle both formats: knowledge base (key/value) and Tavily cache (query/result)
                         topic = item.get("key") or item.get("query", "")
-                        content = item.get("value") or item.get("result") or item.get("summary", "")
+                        content = item.get("value") or item.get("summary") or payloads.get(item.get("_id")) or ""
                         cached_at = item.get("created_at") or item.get("fetched_at", "")
 
                         formatted_results.append({
@@ -2559,7 +2790,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         "message": f"Found {len(formatted_results)} cached knowledge entries" if formatted_results else "No cached knowledge found for this query"
                     }
 
-                    logger.info(f"🔍 Searched knowledge cache: '{query}' → {len(formatted_results)} results")
+                    logger.info("🔍 Searched knowledge cache: '%s' → %s results", query, len(formatted_results))
 
             elif tool_name == "analyze_tool_discoveries":
                 # Analyze tool discovery patterns
@@ -2587,7 +2818,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                         "period_days": days
                     }
 
-                    logger.info(f"📊 Analyzed tool discoveries for {days} days")
+                    logger.info("📊 Analyzed tool discoveries for %s days", days)
 
             else:
                 result = {"success": False, "error": f"Unknown tool: {tool_name}"}
@@ -2710,7 +2941,7 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
 
                 # Record searches
                 elif tool_name in ["search_tasks", "search_projects"]:
-                    self._record_action(
+                    record = dict(
                         action_type="search",
                         entity_type="search",
                         entity={
@@ -2721,31 +2952,28 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                             "results_count": len(result.get("tasks", result.get("projects", [])))
                         }
                     )
+                    if pending_records is not None:
+                        pending_records.append(record)
+                    else:
+                        self._record_action(**record)
 
         except Exception as e:
-            logger.error(f"Tool execution error: {e}", exc_info=True)
+            logger.error("Tool execution error: %s", e, exc_info=True)
             error_msg = str(e)
             result = {"success": False, "error": str(e)}
+            tool_span.error = error_msg
 
         finally:
             # Always calculate duration, even on error
-            duration_ms = int((time.time() - start_time) * 1000)
+            end_span(tool_span)
+            duration_ms = tool_span.duration_ms
 
             # Use new summarize method for consistent output summary
             output_summary = self._summarize_output(result)
 
-            # Capture latency breakdown from agents
-            breakdown = {}
-
-            # Check if retrieval agent has timings
-            if hasattr(self.retrieval_agent, 'last_query_timings') and self.retrieval_agent.last_query_timings:
-                breakdown.update(self.retrieval_agent.last_query_timings)
-                self.retrieval_agent.last_query_timings = {}  # Reset
-
-            # Check if worklog agent has timings
-            if hasattr(self.worklog_agent, 'last_query_timings') and self.worklog_agent.last_query_timings:
-                breakdown.update(self.worklog_agent.last_query_timings)
-                self.worklog_agent.last_query_timings = {}  # Reset
+            # Latency breakdown from the embedding/MongoDB/LLM spans under this tool
+            trace = current_trace()
+            breakdown = trace.breakdown(tool_span) if trace else {}
 
             # Calculate processing overhead (Python, serialization, etc.)
             if breakdown:
@@ -2764,21 +2992,20 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
                 "error": error_msg
             }
 
-            # Also append to current turn if we're tracking it
-            if self.current_turn is not None:
-                self.current_turn["tool_calls"].append({
-                    "name": tool_name,
-                    "input": tool_input,
-                    "output": output_summary,
-                    "duration_ms": duration_ms,
-                    "breakdown": breakdown if breakdown else None,  # Include latency breakdown
-                    "success": result.get("success", False) if result else False,
-                    "error": error_msg
-                })
+            turn_record = {
+                "name": tool_name,
+                "input": tool_input,
+                "output": output_summary,
+                "duration_ms": duration_ms,
+                "breakdown": breakdown if breakdown else None,  # Include latency breakdown
+                "success": result.get("success", False) if result else False,
+                "error": error_msg
+            }
 
-            return result, debug_info
+            return result, debug_info, turn_record
 
-    def process(self, user_message: str, conversation_history: Optional[List[Dict[str, Any]]] = None, input_type: str = "text", turn_number: int = 1, optimizations: Optional[Dict[str, bool]] = None, return_debug: bool = False, session_id: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    @_traced_turn
+    def process(self, user_message: str, conversation_history: Optional[List[Dict[str, Any]]] = None, input_type: str = "text", turn_number: int = 1, optimizations: Optional[Dict[str, bool]] = None, return_debug: bool = False, session_id: Optional[str] = None, on_text: Optional[Callable[[str], None]] = None) -> Union[str, Dict[str, Any]]:
         """
         Process a user message using Claude's native tool use.
 
@@ -2792,6 +3019,8 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
             optimizations: Optional dict of optimization toggles (compress_results, streamlined_prompt, prompt_caching)
             return_debug: If True, return dict with response and debug info instead of just response string
             session_id: Optional session ID for memory isolation
+            on_text: Optional callback receiving LLM text chunks as they stream in
+                (used by process_stream; tool-use turns stream, other paths don't)
 
         Returns:
             If return_debug=False: Agent's response string (default, backwards compatible)
@@ -2814,13 +3043,21 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
             "memory_write_ms": 0
         }
 
-        # Set session if provided
+        # Set session if provided (prompt cache totals are per conversation)
         if session_id:
+            if session_id != self.session_id:
+                self.prompt_cache_stats = PromptCacheStats()
             self.session_id = session_id
 
         # Start new chain for this request
         self.current_chain_id = str(uuid.uuid4())
 
+        # Tag every log record of this request (LOG_FORMAT=json includes them)
+        set_log_context(turn_id=self.current_chain_id, turn=turn_number, session_id=self.session_id)
+
+        # Snapshot embedding cache counters so the debug panel can show per-turn savings
+        self._embedding_cache_start = embedding_service.cache.snapshot() if embedding_service.cache else None
+
         # Set session on agents if session_id provided and shared memory enabled
         if session_id and self.optimizations.get("memory_shared"):
             retrieval_agent.set_session(session_id)
@@ -2832,16 +3069,18 @@ Now parse the actual user request above. Respond with ONLY the JSON, no other te
         prompt_stats = get_prompt_stats(streamlined)
 
         # BUILD CONTEXT-ENHANCED PROMPT
-        import time
-        read_start = time.time()
+        read_span = start_span("memory.read_context", kind="memory")
 
+        # Memory goes in separate cache layers after the static instructions
+        # so per-turn context doesn't invalidate the cached prefix
+        memory_layer, session_layer = "", ""
         if self.memory_config.get("context_injection") and self.memory:
-            context_injection = self._build_context_injection()
-            if context_injection:
-                system_prompt += context_injection
-                logger.info(f"📊 Context injected into system prompt")
+            memory_layer, session_layer = self._build_memory_layers()
+            if memory_layer or session_layer:
+                logger.info("📊 Context injected into system prompt")
 
-        self.memory_ops["memory_read_ms"] = (time.time() - read_start) * 1000
+        end_span(read_span)
+        self.memory_ops["memory_read_ms"] = read_span.duration_ns / 1e6
 
         # CHECK FOR RULE TRIGGERS (TTL-R)
         rule_match = None
@@ -2856,9 +3095,9 @@ User's message matched rule: "{rule_match['trigger']}" → {rule_match['action']
 Execute the rule action: {rule_match['action']}
 </rule_triggered>
 """
-                system_prompt += rule_directive
+                session_layer += rule_directive
                 self.memory_ops["rule_triggered"] = rule_match['trigger']
-                logger.info(f"🔔 Rule triggered: '{rule_match['trigger']}' → {rule_match['action']}")
+                logger.info("🔔 Rule triggered: '%s' → %s", rule_match['trigger'], rule_match['action'])
 
         # ═══════════════════════════════════════════════════════════════
         # WORKFLOW MATCHING: Check for multi-step procedural patterns
@@ -2877,7 +3116,7 @@ Execute the rule action: {rule_match['action']}
                 match_type = workflow_match.get("match_type", "unknown")
                 match_score = workflow_match.get("match_score", 0)
                 workflow_name = workflow_match.get("name", "Unknown Workflow")
-                logger.info(f"🔄 Workflow matched ({match_type}, score={match_score:.2f}): '{workflow_name}'")
+                logger.info("🔄 Workflow matched (%s, score=%.2f): '%s'", match_type, match_score, workflow_name)
 
                 # Execute workflow programmatically using WorkflowExecutor
                 tool_registry = self._build_tool_registry()
@@ -2924,7 +3163,7 @@ Execute the rule action: {rule_match['action']}
                         }
 
                 except Exception as e:
-                    logger.exception(f"Workflow execution failed: {e}")
+                    logger.exception("Workflow execution failed: %s", e)
                     # Fall through to normal LLM processing
                     workflow_match = None
 
@@ -2935,10 +3174,11 @@ Execute the rule action: {rule_match['action']}
         multi_step = self._classify_multi_step_intent(user_message)
 
         if multi_step["is_multi_step"]:
-            logger.info(f"🔄 Detected multi-step request with {len(multi_step['steps'])} steps")
+            logger.info("🔄 Detected multi-step request with %s steps", len(multi_step['steps']))
 
             # Execute multi-step workflow
             import asyncio
+            import time
             workflow_start = time.time()
             result = asyncio.run(self._execute_multi_step(
                 steps=multi_step["steps"],
@@ -2993,7 +3233,7 @@ Execute the rule action: {rule_match['action']}
         # ═══════════════════════════════════════════════════════════════
 
         intent = self._classify_intent(user_message)
-        logger.info(f"📊 Classified intent: {intent}")
+        logger.info("📊 Classified intent: %s", intent)
 
         # Initialize current turn for tracking (needed for both MCP and normal paths)
         self.current_turn = {
@@ -3006,16 +3246,17 @@ Execute the rule action: {rule_match['action']}
             "tokens_in": 0,
             "tokens_out": 0,
             "cache_hit": False,
-            "tools_called": []
+            "tools_called": [],
+            "tool_wall_ms": 0
         }
 
         # Check if this request needs EXTERNAL MCP tools (Tier 4)
         if not self._can_static_tools_handle(intent, user_message):
-            logger.info(f"📊 Intent '{intent}' requires external MCP tools, checking if MCP mode enabled...")
+            logger.info("📊 Intent '%s' requires external MCP tools, checking if MCP mode enabled...", intent)
 
             # MCP mode check - only required for EXTERNAL tool discovery (Tier 4)
             if not self.mcp_mode_enabled:
-                logger.warning(f"📊 MCP mode disabled, falling back to local search for intent: {intent}")
+                logger.warning("📊 MCP mode disabled, falling back to local search for intent: %s", intent)
 
                 # Fallback: Search local data instead of failing
                 if intent in ["web_search", "research", "find_information"]:
@@ -3025,7 +3266,7 @@ Execute the rule action: {rule_match['action']}
                     # This will search tasks, projects, and cached knowledge
                     # Intent changes to "unknown" so it uses Tier 3 (LLM + built-in tools)
                     intent = "search_tasks"  # Fallback to local search
-                    logger.info(f"📊 Fallback: Changed intent from web_search to search_tasks")
+                    logger.info("📊 Fallback: Changed intent from web_search to search_tasks")
 
                     # Let it proceed to LLM with built-in tools below
                     # The LLM will call search_tasks, search_projects, and search_knowledge
@@ -3063,7 +3304,7 @@ Execute the rule action: {rule_match['action']}
         # Only route to MCP if mode is enabled AND intent requires it
         if not self._can_static_tools_handle(intent, user_message) and self.mcp_mode_enabled:
             # Route to MCP Agent
-            logger.info(f"🔬 Routing to MCP Agent (intent: {intent})")
+            logger.info("🔬 Routing to MCP Agent (intent: %s)", intent)
 
             try:
                 # Ensure MCP agent is initialized
@@ -3094,7 +3335,7 @@ Execute the rule action: {rule_match['action']}
                 # Format MCP result for user
                 formatted = self._format_mcp_response(mcp_result)
 
-                logger.info(f"🔬 MCP Agent result: success={mcp_result.get('success')}, source={mcp_result.get('source')}")
+                logger.info("🔬 MCP Agent result: success=%s, source=%s", mcp_result.get('success'), mcp_result.get('source'))
 
                 # Track MCP tool call in current_turn for debug panel
                 if self.current_turn:
@@ -3144,6 +3385,7 @@ Execute the rule action: {rule_match['action']}
                     })
                     self.current_turn["tools_called"].append(mcp_tool_name)
                     self.current_turn["total_duration_ms"] = mcp_result.get("execution_time_ms", 0)
+                    self.current_turn["embedding_cache"] = self._embedding_cache_turn_stats()
 
                 if return_debug:
                     return {
@@ -3158,7 +3400,7 @@ Execute the rule action: {rule_match['action']}
                     return formatted["response"]
 
             except Exception as e:
-                logger.error(f"🔬 MCP Agent error: {e}", exc_info=True)
+                logger.error("🔬 MCP Agent error: %s", e, exc_info=True)
                 error_response = f"MCP Agent encountered an error: {str(e)}"
 
                 if return_debug:
@@ -3188,11 +3430,11 @@ Execute the rule action: {rule_match['action']}
 
         logger.info("=" * 80)
         logger.info("=== NEW REQUEST ===")
-        logger.info(f"Input type: {input_type}")
-        logger.info(f"User message: {user_message[:200]}...")
-        logger.info(f"History length: {len(conversation_history) if conversation_history else 0}")
-        logger.info(f"📊 Prompt: {prompt_stats['type']} ({prompt_stats['word_count']} words, ~{int(prompt_stats['estimated_tokens'])} tokens)")
-        logger.info(f"📊 Caching: {'enabled' if cache_prompts else 'disabled'}")
+        logger.info("Input type: %s", input_type)
+        logger.info("User message: %s...", user_message[:200])
+        logger.info("History length: %s", len(conversation_history) if conversation_history else 0)
+        logger.info("📊 Prompt: %s (%s words, ~%s tokens)", prompt_stats['type'], prompt_stats['word_count'], int(prompt_stats['estimated_tokens']))
+        logger.info("📊 Caching: %s", 'enabled' if cache_prompts else 'disabled')
 
         # Reset old debug info (kept for backwards compatibility)
         self.last_debug_info = []
@@ -3206,17 +3448,27 @@ Execute the rule action: {rule_match['action']}
         # Get available tools based on settings
         available_tools = self._get_available_tools()
 
+        # Layered system prompt: tools → instructions → user memory → session
+        prompt_layers = [
+            PromptLayer(LAYER_USER_MEMORY, memory_layer),
+            PromptLayer(LAYER_SESSION, session_layer, cache=False)
+        ]
+        prompt_breakdown = layer_breakdown(available_tools, system_prompt, prompt_layers, cache_prompts)
+        turn_prompt_cache = PromptCacheStats()
+
         # Use Claude's native tool use - TIME THIS CALL
         import time
         logger.info("=" * 80)
         logger.info("=== INITIAL LLM CALL (DECIDE ACTION) ===")
-        logger.info(f"📊 Turn {turn_number}")
-        logger.info(f"📊 Sending {len(available_tools)} tools to LLM")
-        logger.info(f"📊 Tool names: {', '.join([t['name'] for t in available_tools])}")
-        logger.info(f"📊 Messages count: {len(messages)}")
-        logger.info(f"📊 Last message roles: {[m.get('role') for m in messages[-5:]]}")
-        logger.info(f"📊 Last message preview: {str(messages[-1].get('content', ''))[:150]}...")
-        logger.info(f"📊 System prompt length: {len(system_prompt)} chars")
+        logger.info("📊 Turn %s", turn_number)
+        logger.info("📊 Sending %s tools to LLM", len(available_tools))
+        # Request details are only built when DEBUG is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Tool names: %s", ', '.join([t['name'] for t in available_tools]))
+            logger.debug("📊 Messages count: %s", len(messages))
+            logger.debug("📊 Last message roles: %s", [m.get('role') for m in messages[-5:]])
+            logger.debug("📊 Last message preview: %s...", str(messages[-1].get('content', ''))[:150])
+            logger.debug("📊 System prompt length: %s chars", len(system_prompt) + len(memory_layer) + len(session_layer))
         logger.info("=" * 80)
 
         # Detect if this is an action request that requires tool use
@@ -3229,17 +3481,33 @@ Execute the rule action: {rule_match['action']}
             llm_kwargs['tool_choice'] = {"type": "any"}  # Force tool use
             logger.info("🔧 Forcing tool use for action/query request")
 
-        llm_start = time.time()
-        response = self.llm.generate_with_tools(
-            messages=messages,
-            tools=available_tools,
-            system=system_prompt,
-            max_tokens=4096,
-            temperature=0.3,
-            cache_prompts=cache_prompts,
-            **llm_kwargs
-        )
-        llm_duration = int((time.time() - llm_start) * 1000)
+        # When streaming, text from a response that goes on to call tools is
+        # forwarded too; later responses start on a new paragraph after it
+        stream_state = {"needs_break": False}
+
+        def stream_text(text: str):
+            if stream_state["needs_break"]:
+                on_text("\n\n")
+                stream_state["needs_break"] = False
+            on_text(text)
+
+        def call_llm(**params):
+            if on_text is None:
+                return self.llm.generate_with_tools(**params)
+            return self.llm.generate_with_tools_stream(on_text=stream_text, **params)
+
+        with span("llm.decide_action", kind="llm") as llm_span:
+            response = call_llm(
+                messages=messages,
+                tools=available_tools,
+                system=system_prompt,
+                system_layers=prompt_layers,
+                max_tokens=4096,
+                temperature=0.3,
+                cache_prompts=cache_prompts,
+                **llm_kwargs
+            )
+        llm_duration = llm_span.duration_ms
 
         # Capture token usage
         if hasattr(response, 'usage'):
@@ -3248,26 +3516,28 @@ Execute the rule action: {rule_match['action']}
             cache_read = getattr(response.usage, 'cache_read_input_tokens', 0)
             if cache_read > 0:
                 self.current_turn["cache_hit"] = True
+            turn_prompt_cache.record(response.usage, prompt_breakdown)
 
         # DEBUG: Check response
         logger.info("=" * 80)
         logger.info("=== INITIAL LLM RESPONSE ===")
-        logger.info(f"📊 Stop reason: {response.stop_reason}")
-        logger.info(f"📊 Content blocks: {len(response.content)}")
-        logger.info(f"📊 Content types: {[b.type for b in response.content]}")
+        logger.info("📊 Stop reason: %s", response.stop_reason)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Content blocks: %s", len(response.content))
+            logger.debug("📊 Content types: %s", [b.type for b in response.content])
 
         tool_use_blocks = [b for b in response.content if hasattr(b, 'type') and b.type == 'tool_use']
-        logger.info(f"📊 Tool use blocks: {len(tool_use_blocks)}")
+        logger.info("📊 Tool use blocks: %s", len(tool_use_blocks))
 
         if tool_use_blocks:
-            logger.info(f"📊 ✅ Tools called: {[b.name for b in tool_use_blocks]}")
+            logger.info("📊 ✅ Tools called: %s", [b.name for b in tool_use_blocks])
         else:
             # Log why no tool was called - check the text response
             text_blocks = [b.text for b in response.content if hasattr(b, 'text')]
             if text_blocks:
-                logger.warning(f"📊 ❌ NO TOOLS CALLED - LLM responded with text only")
-                logger.warning(f"📊 Text response: {text_blocks[0][:300]}...")
-            logger.warning(f"📊 ⚠️  CRITICAL: LLM should call tools but didn't!")
+                logger.warning("📊 ❌ NO TOOLS CALLED - LLM responded with text only")
+                logger.warning("📊 Text response: %s...", text_blocks[0][:300])
+            logger.warning("📊 ⚠️  CRITICAL: LLM should call tools but didn't!")
         logger.info("=" * 80)
 
         # Track the initial LLM call
@@ -3275,7 +3545,7 @@ Execute the rule action: {rule_match['action']}
             "purpose": "decide_action",
             "duration_ms": llm_duration
         })
-        logger.info(f"LLM decide_action took {llm_duration}ms")
+        logger.info("LLM decide_action took %sms", llm_duration)
 
         # Handle tool calls in a loop until Claude is done
         max_iterations = 10
@@ -3283,40 +3553,39 @@ Execute the rule action: {rule_match['action']}
 
         while response.stop_reason == "tool_use" and iteration < max_iterations:
             iteration += 1
-            logger.info(f"Tool use iteration {iteration}")
+            logger.info("Tool use iteration %s", iteration)
 
             # Extract tool calls from response
+            tool_blocks = [b for b in response.content if b.type == "tool_use"]
+            for content_block in tool_blocks:
+                logger.info("Tool call: %s", content_block.name)
+                logger.debug("Tool input: %s", content_block.input)
+
+            # Execute the tools (read-only runs concurrently) and get result + debug info
+            executed = self._execute_tool_blocks(tool_blocks)
+
             tool_results = []
-            for content_block in response.content:
-                if content_block.type == "tool_use":
-                    tool_name = content_block.name
-                    tool_input = content_block.input
-                    tool_use_id = content_block.id
-
-                    logger.info(f"Tool call: {tool_name}")
-                    logger.debug(f"Tool input: {tool_input}")
-
-                    # Execute the tool and get result + debug info
-                    result, debug_info = self._execute_tool(tool_name, tool_input)
-
-                    # Add iteration number to debug info
-                    debug_info["iteration"] = iteration
-                    debug_info["index"] = len(self.last_debug_info) + 1
-
-                    # Store debug info
-                    self.last_debug_info.append(debug_info)
-
-                    # Apply compression if enabled (before serialization)
-                    compress = self.optimizations.get("compress_results", True)
-                    compressed_result = compress_tool_result(tool_name, result, compress=compress)
-
-                    # Add tool result (convert ObjectIds to strings first)
-                    serializable_result = convert_objectids_to_str(compressed_result)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": json.dumps(serializable_result)
-                    })
+            for content_block, (result, debug_info) in zip(tool_blocks, executed):
+                tool_name = content_block.name
+
+                # Add iteration number to debug info
+                debug_info["iteration"] = iteration
+                debug_info["index"] = len(self.last_debug_info) + 1
+
+                # Store debug info
+                self.last_debug_info.append(debug_info)
+
+                # Apply compression if enabled (before serialization)
+                compress = self.optimizations.get("compress_results", True)
+                compressed_result = compress_tool_result(tool_name, result, compress=compress)
+
+                # Add tool result (convert ObjectIds to strings first)
+                serializable_result = convert_objectids_to_str(compressed_result)
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": content_block.id,
+                    "content": json.dumps(serializable_result)
+                })
 
             # Add assistant message with tool use
             messages.append({
@@ -3332,24 +3601,28 @@ Execute the rule action: {rule_match['action']}
 
             # Get next response from Claude - TIME THIS CALL
             logger.info("=" * 80)
-            logger.info(f"=== FOLLOW-UP LLM CALL (ITERATION {iteration}) ===")
-            logger.info(f"📊 Sending tool results back to LLM")
-            logger.info(f"📊 Sending {len(available_tools)} tools to LLM")
-            logger.info(f"📊 Messages count: {len(messages)}")
-            logger.info(f"📊 Last message roles: {[m.get('role') for m in messages[-5:]]}")
-            logger.info(f"📊 Tool results count: {len(tool_results)}")
+            logger.info("=== FOLLOW-UP LLM CALL (ITERATION %s) ===", iteration)
+            logger.info("📊 Sending tool results back to LLM")
+            logger.info("📊 Tool results count: %s", len(tool_results))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📊 Sending %s tools to LLM", len(available_tools))
+                logger.debug("📊 Messages count: %s", len(messages))
+                logger.debug("📊 Last message roles: %s", [m.get('role') for m in messages[-5:]])
             logger.info("=" * 80)
 
-            llm_start = time.time()
-            response = self.llm.generate_with_tools(
-                messages=messages,
-                tools=available_tools,
-                system=system_prompt,
-                max_tokens=4096,
-                temperature=0.3,
-                cache_prompts=cache_prompts
-            )
-            llm_duration = int((time.time() - llm_start) * 1000)
+            stream_state["needs_break"] = any(getattr(b, "text", None) for b in response.content)
+
+            with span("llm.tool_followup", kind="llm") as llm_span:
+                response = call_llm(
+                    messages=messages,
+                    tools=available_tools,
+                    system=system_prompt,
+                    system_layers=prompt_layers,
+                    max_tokens=4096,
+                    temperature=0.3,
+                    cache_prompts=cache_prompts
+                )
+            llm_duration = llm_span.duration_ms
 
             # Capture token usage
             if hasattr(response, 'usage'):
@@ -3358,12 +3631,14 @@ Execute the rule action: {rule_match['action']}
                 cache_read = getattr(response.usage, 'cache_read_input_tokens', 0)
                 if cache_read > 0:
                     self.current_turn["cache_hit"] = True
+                turn_prompt_cache.record(response.usage, prompt_breakdown)
 
             logger.info("=" * 80)
-            logger.info(f"=== FOLLOW-UP LLM RESPONSE (ITERATION {iteration}) ===")
-            logger.info(f"📊 Stop reason: {response.stop_reason}")
-            logger.info(f"📊 Content blocks: {len(response.content)}")
-            logger.info(f"📊 Content types: {[b.type for b in response.content]}")
+            logger.info("=== FOLLOW-UP LLM RESPONSE (ITERATION %s) ===", iteration)
+            logger.info("📊 Stop reason: %s", response.stop_reason)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📊 Content blocks: %s", len(response.content))
+                logger.debug("📊 Content types: %s", [b.type for b in response.content])
             logger.info("=" * 80)
 
             # Track this LLM call
@@ -3371,7 +3646,7 @@ Execute the rule action: {rule_match['action']}
                 "purpose": "format_response",
                 "duration_ms": llm_duration
             })
-            logger.info(f"LLM format_response took {llm_duration}ms")
+            logger.info("LLM format_response took %sms", llm_duration)
 
         # Extract final text response
         final_text = ""
@@ -3381,20 +3656,33 @@ Execute the rule action: {rule_match['action']}
 
         # Calculate total duration for this turn (LLM + tools)
         if self.current_turn is not None:
-            # Sum tool time
+            # Sum tool time (wall-clock is lower when read-only tools ran concurrently)
             tool_time = sum(tc["duration_ms"] for tc in self.current_turn["tool_calls"])
+            tool_wall_time = self.current_turn.get("tool_wall_ms") or tool_time
 
             # Sum LLM time
             llm_time = sum(lc["duration_ms"] for lc in self.current_turn["llm_calls"])
 
-            # Total = LLM + tools
+            # Total = LLM + tools (wall-clock)
             self.current_turn["llm_time_ms"] = llm_time
-            self.current_turn["total_duration_ms"] = tool_time + llm_time
+            self.current_turn["tool_time_ms"] = tool_time
+            self.current_turn["tool_wall_ms"] = tool_wall_time
+            self.current_turn["total_duration_ms"] = tool_wall_time + llm_time
+
+            self.current_turn["embedding_cache"] = self._embedding_cache_turn_stats()
+            self.current_turn["episodic_queue"] = get_episodic_queue_stats()
+
+            # Per-layer prompt cache usage, plus running totals for the conversation
+            self.prompt_cache_stats.merge(turn_prompt_cache)
+            self.current_turn["prompt_cache"] = {
+                **turn_prompt_cache.to_dict(),
+                "session_hit_rate": self.prompt_cache_stats.to_dict()["hit_rate"]
+            }
 
-            logger.info(f"Turn complete: LLM={llm_time}ms, Tools={tool_time}ms, Total={self.current_turn['total_duration_ms']}ms")
+            logger.info("Turn complete: LLM=%sms, Tools=%sms wall (%sms summed), Total=%sms", llm_time, tool_wall_time, tool_time, self.current_turn['total_duration_ms'])
 
         # UPDATE SESSION CONTEXT FROM TURN
-        write_start = time.time()
+        write_span = start_span("memory.update_session", kind="memory")
 
         if self.memory_config.get("short_term") and self.session_id and self.memory:
             # Extract context updates from this turn
@@ -3411,9 +3699,10 @@ Execute the rule action: {rule_match['action']}
                     self.user_id
                 )
                 self.memory_ops["context_updated"] = True
-                logger.info(f"📊 Session context updated with {len(context_updates)} fields")
+                logger.info("📊 Session context updated with %s fields", len(context_updates))
 
-        self.memory_ops["memory_write_ms"] = (time.time() - write_start) * 1000
+        end_span(write_span)
+        self.memory_ops["memory_write_ms"] = write_span.duration_ns / 1e6
 
         logger.info("Request processing complete")
         logger.info("=" * 80)
@@ -3439,11 +3728,15 @@ Execute the rule action: {rule_match['action']}
                     "tokens_out": self.current_turn.get("tokens_out", 0),
                     "llm_time_ms": self.current_turn.get("llm_time_ms", 0),
                     "tool_time_ms": sum(tc["duration_ms"] for tc in self.current_turn.get("tool_calls", [])),
+                    "tool_wall_time_ms": self.current_turn.get("tool_wall_ms", 0),
                     "cache_hit": self.current_turn.get("cache_hit", False),
                     "tools_called": [tc["name"] for tc in self.current_turn.get("tool_calls", [])],
                     "embedding_time_ms": embedding_time,
                     "mongodb_time_ms": mongodb_time,
                     "processing_time_ms": processing_time,
+                    "embedding_cache": self.current_turn.get("embedding_cache"),
+                    "episodic_queue": self.current_turn.get("episodic_queue"),
+                    "prompt_cache": self.current_turn.get("prompt_cache"),
                     "memory_ops": self.memory_ops
                 }
             }
@@ -3452,80 +3745,123 @@ Execute the rule action: {rule_match['action']}
 
     def process_stream(self, user_message: str, conversation_history: Optional[List[Dict[str, Any]]] = None, input_type: str = "text", turn_number: int = 1, optimizations: Optional[Dict[str, bool]] = None, session_id: Optional[str] = None):
         """
-        Process a user message and stream the response word-by-word.
+        Process a user message and stream the response as the LLM produces it.
 
-        This provides a streaming UX by:
-        1. Executing all tool calls normally (synchronous)
-        2. Streaming the final text response word-by-word
+        process() runs on a worker thread with an on_text callback; tool-use
+        iterations execute as usual and LLM text chunks are forwarded as they
+        arrive from the API. Paths that don't stream (slash-like shortcuts,
+        MCP, multi-step workflows) yield their full response as one chunk.
 
         Args:
             Same as process()
 
         Yields:
-            Tuples of (text_chunk, debug_info) where debug_info is only populated on the last chunk
+            Tuples of (text_chunk, debug_info) where debug_info is only populated
+            on the last chunk and includes ttft_ms (time to first token) and
+            response, the final response exactly as process() returns it
+            (streamed chunks may also contain text emitted before tool calls)
         """
         import time as time_module
 
-        # Get the full response first (with all tool execution)
-        result = self.process(
-            user_message=user_message,
-            conversation_history=conversation_history,
-            input_type=input_type,
-            turn_number=turn_number,
-            optimizations=optimizations,
-            return_debug=True,
-            session_id=session_id
-        )
+        start = time_module.time()
+        chunks: "queue.Queue" = queue.Queue()
+        done = object()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = self.process(
+                    user_message=user_message,
+                    conversation_history=conversation_history,
+                    input_type=input_type,
+                    turn_number=turn_number,
+                    optimizations=optimizations,
+                    return_debug=True,
+                    session_id=session_id,
+                    on_text=chunks.put
+                )
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                chunks.put(done)
+
+        worker = threading.Thread(target=run, name="coordinator-stream", daemon=True)
+        worker.start()
+
+        ttft_ms = None
+        streamed = False
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                break
+            if not chunk:
+                continue
+            if ttft_ms is None:
+                ttft_ms = int((time_module.time() - start) * 1000)
+            streamed = True
+            yield (chunk, None)
+
+        worker.join()
+        if "error" in outcome:
+            raise outcome["error"]
 
         # Extract response and debug info
+        result = outcome.get("result")
         if isinstance(result, dict):
             response_text = result.get("response", "")
             debug_info = result.get("debug", {})
         else:
-            response_text = result
+            response_text = result or ""
             debug_info = {}
 
-        # Stream the response word-by-word
-        words = response_text.split(' ')
-        for i, word in enumerate(words):
-            # Add space after word (except for last word)
-            chunk = word + (' ' if i < len(words) - 1 else '')
+        if ttft_ms is None:
+            ttft_ms = int((time_module.time() - start) * 1000)
+        debug_info["ttft_ms"] = ttft_ms
+        debug_info["response"] = response_text
+        if self.current_turn is not None:
+            self.current_turn["ttft_ms"] = ttft_ms
 
-            # Yield chunk with debug info only on last chunk
-            if i == len(words) - 1:
-                yield (chunk, debug_info)
-            else:
-                yield (chunk, None)
+        # Nothing streamed (non-LLM path): deliver the full response with the debug info
+        yield ("" if streamed else response_text, debug_info)
 
-            # Small delay for visual effect (optional)
-            time_module.sleep(0.01)
 
+# ═══════════════════════════════════════════════════════════════════
+# GLOBAL INSTANCES (built on first use - see shared/services.py)
+# ═══════════════════════════════════════════════════════════════════
 
-# Global coordinator instance with memory manager
-try:
-    from memory import MemoryManager
-    from shared.db import MongoDB
-    from shared.embeddings import embed_query
+def _build_memory_manager() -> Optional[MemoryManager]:
+    """Connect to MongoDB and build the shared memory manager, or None if unavailable."""
+    try:
+        from shared.db import check_schema_version, get_db
+        from shared.embeddings import embed_query
 
-    # Create memory manager with embedding function
-    mongodb = MongoDB()
-    db = mongodb.get_database()
+        db = get_db()
+        # One round trip: verifies the connection and that init_db.py has run
+        check_schema_version(db)
 
-    # Use embed_query function for embeddings
-    memory_manager = MemoryManager(
-        db=db,
-        embedding_fn=embed_query
-    )
+        # Use embed_query function for embeddings
+        return MemoryManager(db=db, embedding_fn=embed_query)
+    except Exception as e:
+        logger.warning("⚠️  Failed to initialize memory manager: %s", e)
+        return None
+
+
+def _build_coordinator() -> CoordinatorAgent:
+    """Build the global coordinator, sharing the memory manager with all agents."""
+    manager = services.get("memory_manager")
+    if manager is None:
+        logger.warning("Coordinator running without memory support")
+        return CoordinatorAgent(memory_manager=None, db=None)
 
     # Share memory manager with all agents
-    retrieval_agent.memory = memory_manager
-    worklog_agent.memory = memory_manager
+    retrieval_agent.memory = manager
+    worklog_agent.memory = manager
 
-    coordinator = CoordinatorAgent(memory_manager=memory_manager, db=db)
     logger.info("✅ Coordinator initialized with memory manager and database")
     logger.info("✅ Retrieval and Worklog agents have shared memory access")
-    logger.info(f"✅ MCP mode available: {settings.mcp_available}")
-except Exception as e:
-    logger.warning(f"⚠️  Failed to initialize memory manager: {e}")
-    logger.warning("Coordinator running without memory support")
-    coordinator = CoordinatorAgent(memory_manager=None, db=None)
+    logger.info("✅ MCP mode available: %s", settings.mcp_available)
+    return CoordinatorAgent(memory_manager=manager, db=manager.db)
+
+
+memory_manager = services.register("memory_manager", _build_memory_manager)
+coordinator = services.register("coordinator", _build_coordinator)
@@ -29,6 +29,7 @@ from memory.manager import MemoryManager
 from shared.config import settings
 from shared.llm import LLMService
 from shared.logger import get_logger
+from shared.tracing import span
 
 logger = get_logger("mcp_agent")
 
@@ -57,6 +58,7 @@ class MCPAgent:
         """
         self.db = db
         self.memory = memory_manager
+        self.embed = embedding_fn
         self.discovery_store = ToolDiscoveryStore(db, embedding_fn=embedding_fn)
         self.llm = LLMService(model=model)
 
@@ -83,13 +85,13 @@ class MCPAgent:
             try:
                 await self._connect_tavily()
             except Exception as e:
-                logger.error(f"Failed to connect to Tavily MCP: {e}")
+                logger.error("Failed to connect to Tavily MCP: %s", e)
         else:
             logger.warning("Tavily API key not configured, skipping Tavily connection")
 
         self._initialized = True
         status = self.get_status()
-        logger.info(f"MCP Agent initialized: {status}")
+        logger.info("MCP Agent initialized: %s", status)
         return status
 
     async def _connect_tavily(self):
@@ -102,7 +104,7 @@ class MCPAgent:
             logger.info("✅ Using Tavily MCP via stdio (local NPX)")
             return
         except Exception as e:
-            logger.warning(f"Stdio connection failed: {e}")
+            logger.warning("Stdio connection failed: %s", e)
             logger.info("Falling back to SSE (remote)...")
 
         # Fall back to SSE (remote) if stdio fails
@@ -140,7 +142,7 @@ class MCPAgent:
             logger.debug("Initializing MCP session (sending initialize request)...")
             try:
                 result = await asyncio.wait_for(session.initialize(), timeout=10.0)
-                logger.debug(f"MCP initialize result: {result}")
+                logger.debug("MCP initialize result: %s", result)
             except asyncio.TimeoutError:
                 logger.error("Timeout waiting for initialize response from Tavily MCP server")
                 raise
@@ -159,15 +161,15 @@ class MCPAgent:
 
             tool_names = [t['name'] for t in self.available_tools['tavily']]
             logger.info(
-                f"✅ Connected to Tavily MCP (stdio): {len(self.available_tools['tavily'])} tools discovered"
+                "✅ Connected to Tavily MCP (stdio): %s tools discovered", len(self.available_tools['tavily'])
             )
-            logger.info(f"Tavily tools: {tool_names}")
+            logger.info("Tavily tools: %s", tool_names)
 
         except asyncio.TimeoutError:
             logger.error("❌ Timeout during Tavily stdio initialization (>10s)")
             raise Exception("Tavily MCP session initialization timed out")
         except Exception as e:
-            logger.error(f"❌ Error connecting to Tavily via stdio: {e}", exc_info=True)
+            logger.error("❌ Error connecting to Tavily via stdio: %s", e, exc_info=True)
             raise
 
     async def _connect_tavily_sse(self):
@@ -201,12 +203,12 @@ class MCPAgent:
 
             tool_names = [t['name'] for t in self.available_tools['tavily']]
             logger.info(
-                f"✅ Connected to Tavily MCP (SSE): {len(self.available_tools['tavily'])} tools discovered"
+                "✅ Connected to Tavily MCP (SSE): %s tools discovered", len(self.available_tools['tavily'])
             )
-            logger.info(f"Tavily tools: {tool_names}")
+            logger.info("Tavily tools: %s", tool_names)
 
         except Exception as e:
-            logger.error(f"❌ Error connecting to Tavily via SSE: {e}")
+            logger.error("❌ Error connecting to Tavily via SSE: %s", e)
             raise
 
     def get_status(self) -> Dict[str, Any]:
@@ -274,24 +276,46 @@ class MCPAgent:
                 "source": "failed"
             }
 
-        # 0. Check semantic memory cache FIRST (before making external calls)
-        cache_check_info = None
-        if user_id and self.memory:
-            cache_check_start = time.time()
-            logger.debug(f"🔍 Checking semantic cache for user '{user_id}' query: '{user_request[:80]}...'")
-            cached_knowledge = self.memory.search_knowledge(
+        # Embed the request once; both lookups and the writes below reuse it
+        request_embedding = await self._embed_request(user_request)
+
+        # 0. Check semantic memory cache FIRST (before making external calls).
+        #    The discovery lookup runs alongside it; its usage is only recorded
+        #    if the discovery is actually reused.
+        check_cache = bool(user_id and self.memory)
+        lookups = [
+            asyncio.to_thread(
+                self.discovery_store.find_similar_discovery,
+                user_request,
+                similarity_threshold=0.85,
+                require_success=True,
+                query_embedding=request_embedding,
+                record_usage=False
+            )
+        ]
+        if check_cache:
+            logger.debug("🔍 Checking semantic cache for user '%s' query: '%s...'", user_id, user_request[:80])
+            lookups.append(asyncio.to_thread(
+                self.memory.find_cached_knowledge,
                 user_id=user_id,
                 query=user_request,
-                limit=3
-            )
-            cache_check_time = int((time.time() - cache_check_start) * 1000)
+                query_embedding=request_embedding
+            ))
+
+        cache_check_start = time.time()
+        lookup_results = await asyncio.gather(*lookups)
+        cache_check_time = int((time.time() - cache_check_start) * 1000)
+        previous = lookup_results[0]
+
+        cache_check_info = None
+        if check_cache:
+            best_match = lookup_results[1]
 
             # If we have a high-confidence cache hit, return it
-            if cached_knowledge and len(cached_knowledge) > 0:
-                best_match = cached_knowledge[0]
+            if best_match:
                 cache_score = best_match.get("score", 0)
-                cache_threshold = 0.75  # Exact matches score ~0.86, avoid false hits on unrelated knowledge
-                logger.debug(f"📊 Best cache match score: {cache_score:.3f} (threshold: {cache_threshold})")
+                cache_threshold = 0.75  # Repeated queries hit the hash lookup (1.0), paraphrases score ~0.86
+                logger.debug("📊 Best cache match score: %.3f (threshold: %s)", cache_score, cache_threshold)
 
                 if cache_score >= cache_threshold:
                     logger.info(
@@ -302,16 +326,18 @@ class MCPAgent:
 
                     # Use summary if available, otherwise full results
                     summary = best_match.get("summary")
-                    result_content = best_match.get("result", "")
 
                     if summary:
                         # Return summary (already pre-computed during caching)
                         cached_results = [summary]
-                        logger.debug(f"Returning cached summary ({len(summary)} chars)")
+                        logger.debug("Returning cached summary (%s chars)", len(summary))
                     else:
-                        # No summary available, return full results
+                        # No summary available: read the full results of this hit only
+                        result_content = await asyncio.to_thread(
+                            self.memory.get_knowledge_payload, best_match["_id"]
+                        ) or ""
                         cached_results = [result_content]
-                        logger.debug(f"No summary available, returning full results ({len(result_content)} chars)")
+                        logger.debug("No summary available, returning full results (%s chars)", len(result_content))
 
                     return {
                         "success": True,
@@ -338,7 +364,7 @@ class MCPAgent:
                         "time_ms": cache_check_time
                     }
             else:
-                logger.debug(f"No cache results found for query: '{user_request[:80]}...'")
+                logger.debug("No cache results found for query: '%s...'", user_request[:80])
                 cache_check_info = {
                     "checked": True,
                     "hit": False,
@@ -352,15 +378,10 @@ class MCPAgent:
             if not self.memory:
                 logger.debug("Skipping cache check: no memory manager available")
 
-        # 1. Check for similar previous discovery
-        previous = self.discovery_store.find_similar_discovery(
-            user_request,
-            similarity_threshold=0.85,
-            require_success=True
-        )
-
+        # 1. Reuse a similar previous discovery (looked up above)
         if previous and previous.get("success"):
-            logger.info(f"Reusing previous discovery for: '{user_request[:50]}...'")
+            logger.info("Reusing previous discovery for: '%s...'", user_request[:50])
+            await asyncio.to_thread(self.discovery_store.record_usage, previous)
             result = await self._execute_solution(previous["solution"])
             result_dict = {
                 "success": result.get("success", False),
@@ -378,7 +399,7 @@ class MCPAgent:
             return result_dict
 
         # 2. Figure out new solution using LLM
-        logger.info(f"Figuring out solution for: '{user_request[:50]}...'")
+        logger.info("Figuring out solution for: '%s...'", user_request[:50])
         solution = await self._figure_out_solution(user_request, intent, context)
 
         if not solution or solution.get("error"):
@@ -394,14 +415,16 @@ class MCPAgent:
         success = result.get("success", False)
 
         # 4. Log the discovery to MongoDB
-        discovery_id = self.discovery_store.log_discovery(
+        discovery_id = await asyncio.to_thread(
+            self.discovery_store.log_discovery,
             user_request=user_request,
             intent=intent,
             solution=solution,
             result_preview=self._truncate_result(result.get("content")),
             success=success,
             execution_time_ms=execution_time,
-            user_id=user_id
+            user_id=user_id,
+            request_embedding=request_embedding
         )
         logger.info(
             f"Logged discovery {discovery_id}: "
@@ -425,12 +448,14 @@ class MCPAgent:
                     summary = await self._summarize_search_results(result_text, user_request)
 
                 # Cache the knowledge with both full results and summary
-                self.memory.cache_knowledge(
+                await asyncio.to_thread(
+                    self.memory.cache_knowledge,
                     user_id=user_id,
                     query=user_request,
                     results=result_text,
                     summary=summary,
-                    source=f"mcp_{solution['mcp_server']}"
+                    source=f"mcp_{solution['mcp_server']}",
+                    embedding=request_embedding
                 )
                 logger.info(
                     f"🆕 Cached new knowledge from {solution['mcp_server']} "
@@ -439,7 +464,7 @@ class MCPAgent:
                 )
             except Exception as e:
                 # Don't fail the request if caching fails
-                logger.error(f"Failed to cache knowledge: {e}")
+                logger.error("Failed to cache knowledge: %s", e)
 
         result_dict = {
             "success": success,
@@ -459,6 +484,21 @@ class MCPAgent:
 
         return result_dict
 
+    async def _embed_request(self, user_request: str) -> Optional[List[float]]:
+        """
+        Embed the request once for the lookups and writes in handle_request.
+
+        Returns:
+            Embedding vector, or None (each step then embeds on its own)
+        """
+        if not self.embed:
+            return None
+        try:
+            return await asyncio.to_thread(self.embed, user_request)
+        except Exception as e:
+            logger.warning("Failed to embed request: %s", e)
+            return None
+
     async def _summarize_search_results(self, search_results: str, query: str) -> str:
         """
         Summarize search results to extract key insights.
@@ -490,16 +530,16 @@ Search Results:
                 temperature=0.3
             )
 
-            summary = response.get("content", "")
+            summary = response
 
             # Add note about full results being cached
             summary += "\n\n*💾 Full search results cached for reference*"
 
-            logger.info(f"📝 Summarized {len(search_results)} chars → {len(summary)} chars")
+            logger.info("📝 Summarized %s chars → %s chars", len(search_results), len(summary))
             return summary
 
         except Exception as e:
-            logger.error(f"Failed to summarize search results: {e}")
+            logger.error("Failed to summarize search results: %s", e)
             # Fallback to truncated results if summarization fails
             return search_results[:1500] + "\n\n...(truncated)"
 
@@ -546,7 +586,7 @@ If this request cannot be handled by any available tool:
 {{"error": "No suitable tool found"}}"""
 
         try:
-            response = self.llm.generate(
+            response = await self.llm.agenerate(
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
                 temperature=0.0  # Deterministic for tool selection
@@ -563,15 +603,15 @@ If this request cannot be handled by any available tool:
                 text = text.strip()
 
             solution = json.loads(text)
-            logger.debug(f"LLM solution: {solution}")
+            logger.debug("LLM solution: %s", solution)
             return solution
 
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM solution response: {e}")
-            logger.error(f"Response was: {response}")
+            logger.error("Failed to parse LLM solution response: %s", e)
+            logger.error("Response was: %s", response)
             return {"error": "Failed to parse solution"}
         except Exception as e:
-            logger.error(f"Error figuring out solution: {e}")
+            logger.error("Error figuring out solution: %s", e)
             return {"error": str(e)}
 
     async def _execute_solution(self, solution: Dict[str, Any]) -> Dict[str, Any]:
@@ -611,20 +651,21 @@ If this request cannot be handled by any available tool:
         """
         session = self.mcp_clients.get(server_name)
         if not session:
-            logger.error(f"Server '{server_name}' not connected")
+            logger.error("Server '%s' not connected", server_name)
             return {
                 "success": False,
                 "error": f"Server '{server_name}' not connected"
             }
 
-        logger.info(f"Executing MCP tool: {server_name}/{tool_name} with args: {arguments}")
+        logger.info("Executing MCP tool: %s/%s with args: %s", server_name, tool_name, arguments)
 
         try:
             # Call tool with timeout
-            result = await asyncio.wait_for(
-                session.call_tool(name=tool_name, arguments=arguments),
-                timeout=timeout_seconds
-            )
+            with span(f"mcp.{server_name}/{tool_name}", kind="mcp"):
+                result = await asyncio.wait_for(
+                    session.call_tool(name=tool_name, arguments=arguments),
+                    timeout=timeout_seconds
+                )
 
             # Extract content from result
             content = []
@@ -637,7 +678,7 @@ If this request cannot be handled by any available tool:
                     content.append(str(item))
 
             logger.info(
-                f"MCP tool {server_name}/{tool_name} returned {len(content)} content items"
+                "MCP tool %s/%s returned %s content items", server_name, tool_name, len(content)
             )
 
             return {
@@ -647,13 +688,13 @@ If this request cannot be handled by any available tool:
             }
 
         except asyncio.TimeoutError:
-            logger.error(f"MCP tool call timed out: {server_name}/{tool_name}")
+            logger.error("MCP tool call timed out: %s/%s", server_name, tool_name)
             return {
                 "success": False,
                 "error": f"Tool call timed out after {timeout_seconds}s"
             }
         except Exception as e:
-            logger.error(f"MCP tool call failed: {server_name}/{tool_name} - {e}", exc_info=True)
+            logger.error("MCP tool call failed: %s/%s - %s", server_name, tool_name, e, exc_info=True)
             return {
                 "success": False,
                 "error": str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
@@ -7,14 +7,18 @@ from rapidfuzz import fuzz
 
 from shared.llm import llm_service
 from shared.logger import get_logger
+from shared.tracing import span
 from shared.embeddings import embed_query as embedding_embed_query
 from shared.db import (
+    build_activity_pipeline,
     get_collection,
     get_project as db_get_project,
+    ACTIVITY_COLLECTION,
     TASKS_COLLECTION,
     PROJECTS_COLLECTION,
 )
 from shared.models import Task, Project
+from shared.vector_index import vector_search
 
 logger = get_logger("retrieval")
 
@@ -25,7 +29,6 @@ class RetrievalAgent:
     def __init__(self, memory_manager=None):
         self.llm = llm_service
         self.tools = self._define_tools()
-        self.last_query_timings = {}  # Track latency breakdown for debug panel
         self.memory = memory_manager  # Shared memory for agent handoffs
         self.session_id = None  # Current session ID for handoffs
 
@@ -340,7 +343,7 @@ class RetrievalAgent:
             ]
 
             try:
-                task_results = list(tasks_collection.aggregate(pipeline))
+                task_results = vector_search(tasks_collection, pipeline)
                 for task in task_results:
                     task["_id"] = str(task["_id"])
                     task["project_id"] = str(task["project_id"]) if task.get("project_id") else None
@@ -379,7 +382,7 @@ class RetrievalAgent:
             ]
 
             try:
-                project_results = list(projects_collection.aggregate(pipeline))
+                project_results = vector_search(projects_collection, pipeline)
                 for project in project_results:
                     project["_id"] = str(project["_id"])
                     project["type"] = "project"
@@ -421,26 +424,17 @@ class RetrievalAgent:
             "projects": []
         }
 
-        # Search tasks with activity on this date
-        tasks_collection = get_collection(TASKS_COLLECTION)
-
-        # Build match condition
-        match_condition = {
-            "activity_log.timestamp": {
-                "$gte": target_date,
-                "$lt": next_day
-            }
-        }
+        # Tasks and projects with activity on this date, from the activity_events index
+        events_collection = get_collection(ACTIVITY_COLLECTION)
 
+        task_match = None
         if not include_incomplete:
             # Only include tasks that were completed on this date
-            match_condition["completed_at"] = {
-                "$gte": target_date,
-                "$lt": next_day
-            }
+            task_match = {"completed_at": {"$gte": target_date, "$lt": next_day}}
 
-        pipeline = [
-            {"$match": match_condition},
+        pipeline = build_activity_pipeline(
+            "task", since=target_date, until=next_day, entity_match=task_match, include_events=True
+        ) + [
             {
                 "$project": {
                     "_id": 1,
@@ -450,65 +444,36 @@ class RetrievalAgent:
                     "project_id": 1,
                     "created_at": 1,
                     "completed_at": 1,
-                    "activity_log": {
-                        "$filter": {
-                            "input": "$activity_log",
-                            "as": "log",
-                            "cond": {
-                                "$and": [
-                                    {"$gte": ["$$log.timestamp", target_date]},
-                                    {"$lt": ["$$log.timestamp", next_day]}
-                                ]
-                            }
-                        }
-                    }
+                    "activity_log": "$activity_events",
+                    "first_activity_at": 1
                 }
             },
-            {"$sort": {"activity_log.timestamp": 1}}
+            {"$sort": {"first_activity_at": 1}}
         ]
 
-        task_results = list(tasks_collection.aggregate(pipeline))
+        task_results = list(events_collection.aggregate(pipeline))
         for task in task_results:
             task["_id"] = str(task["_id"])
             task["project_id"] = str(task["project_id"]) if task.get("project_id") else None
         results["tasks"] = task_results
 
-        # Search projects with activity on this date
-        projects_collection = get_collection(PROJECTS_COLLECTION)
-
-        pipeline = [
-            {
-                "$match": {
-                    "activity_log.timestamp": {
-                        "$gte": target_date,
-                        "$lt": next_day
-                    }
-                }
-            },
+        pipeline = build_activity_pipeline(
+            "project", since=target_date, until=next_day, include_events=True
+        ) + [
             {
                 "$project": {
                     "_id": 1,
                     "name": 1,
                     "description": 1,
                     "status": 1,
-                    "activity_log": {
-                        "$filter": {
-                            "input": "$activity_log",
-                            "as": "log",
-                            "cond": {
-                                "$and": [
-                                    {"$gte": ["$$log.timestamp", target_date]},
-                                    {"$lt": ["$$log.timestamp", next_day]}
-                                ]
-                            }
-                        }
-                    }
+                    "activity_log": "$activity_events",
+                    "first_activity_at": 1
                 }
             },
-            {"$sort": {"activity_log.timestamp": 1}}
+            {"$sort": {"first_activity_at": 1}}
         ]
 
-        project_results = list(projects_collection.aggregate(pipeline))
+        project_results = list(events_collection.aggregate(pipeline))
         for project in project_results:
             project["_id"] = str(project["_id"])
         results["projects"] = project_results
@@ -536,19 +501,15 @@ class RetrievalAgent:
         # Parse date
         start_date = self._parse_date(since_date)
 
-        tasks_collection = get_collection(TASKS_COLLECTION)
-
-        # Build match condition
-        match_condition = {
-            "status": {"$ne": "done"},
-            "activity_log.timestamp": {"$gte": start_date}
-        }
+        # Build match condition on the task
+        match_condition = {"status": {"$ne": "done"}}
 
         if project_id:
             match_condition["project_id"] = ObjectId(project_id)
 
-        pipeline = [
-            {"$match": match_condition},
+        pipeline = build_activity_pipeline(
+            "task", since=start_date, entity_match=match_condition, include_events=True
+        ) + [
             {
                 "$project": {
                     "_id": 1,
@@ -559,19 +520,13 @@ class RetrievalAgent:
                     "project_id": 1,
                     "created_at": 1,
                     "last_worked_on": 1,
-                    "recent_activity": {
-                        "$filter": {
-                            "input": "$activity_log",
-                            "as": "log",
-                            "cond": {"$gte": ["$$log.timestamp", start_date]}
-                        }
-                    }
+                    "recent_activity": "$activity_events"
                 }
             },
             {"$sort": {"last_worked_on": -1}}
         ]
 
-        task_results = list(tasks_collection.aggregate(pipeline))
+        task_results = list(get_collection(ACTIVITY_COLLECTION).aggregate(pipeline))
         for task in task_results:
             task["_id"] = str(task["_id"])
             task["project_id"] = str(task["project_id"]) if task.get("project_id") else None
@@ -640,41 +595,39 @@ class RetrievalAgent:
             (stats["done"] / stats["total"] * 100) if stats["total"] > 0 else 0
         )
 
-        # Get recent activity
-        activity_filter = {}
-        if since_date:
-            start_date = self._parse_date(since_date)
-            activity_filter = {"activity_log.timestamp": {"$gte": start_date}}
-
         # Get tasks with recent activity
-        match_condition = {"project_id": project_oid}
-        if since_date:
-            match_condition.update(activity_filter)
-
-        recent_tasks_pipeline = [
-            {"$match": match_condition},
+        recent_tasks_stages = [
             {
                 "$project": {
                     "_id": 1,
                     "title": 1,
                     "status": 1,
                     "last_worked_on": 1,
-                    "activity_log": 1 if not since_date else {
-                        "$filter": {
-                            "input": "$activity_log",
-                            "as": "log",
-                            "cond": {"$gte": ["$$log.timestamp", start_date]}
-                        }
-                    }
+                    "activity_log": 1,
+                    "activity_count": 1
                 }
             },
             {"$sort": {"last_worked_on": -1}},
             {"$limit": 20}
         ]
 
-        recent_tasks = list(tasks_collection.aggregate(recent_tasks_pipeline))
+        if since_date:
+            # Activity since the date comes from the activity_events index
+            start_date = self._parse_date(since_date)
+            recent_tasks_stages[0]["$project"]["activity_log"] = "$activity_events"
+            recent_tasks_stages[0]["$project"]["activity_count"] = {"$size": "$activity_events"}
+            recent_tasks_pipeline = build_activity_pipeline(
+                "task", since=start_date, entity_match={"project_id": project_oid}, include_events=True
+            ) + recent_tasks_stages
+            recent_tasks = list(get_collection(ACTIVITY_COLLECTION).aggregate(recent_tasks_pipeline))
+        else:
+            recent_tasks_pipeline = [{"$match": {"project_id": project_oid}}] + recent_tasks_stages
+            recent_tasks = list(tasks_collection.aggregate(recent_tasks_pipeline))
+
         for task in recent_tasks:
             task["_id"] = str(task["_id"])
+            # activity_log on the task is a capped tail; activity_count is the total
+            task["activity_count"] = max(task.get("activity_count") or 0, len(task.get("activity_log", [])))
 
         # Build result
         result = {
@@ -691,7 +644,7 @@ class RetrievalAgent:
             },
             "statistics": stats,
             "recent_tasks": recent_tasks,
-            "recent_activity_count": sum(len(task.get("activity_log", [])) for task in recent_tasks)
+            "recent_activity_count": sum(task["activity_count"] for task in recent_tasks)
         }
 
         if since_date:
@@ -890,13 +843,13 @@ class RetrievalAgent:
                 - confidence: Score 0.0-1.0
                 - alternatives: List of other candidates if ambiguous
         """
-        logger.info(f"fuzzy_match_task: reference='{reference}', project_hint={project_hint}, threshold={threshold}")
+        logger.info("fuzzy_match_task: reference='%s', project_hint=%s, threshold=%s", reference, project_hint, threshold)
         tasks_collection = get_collection(TASKS_COLLECTION)
 
         # Get query embedding for semantic search
-        logger.debug(f"Generating embedding for: '{reference}'")
+        logger.debug("Generating embedding for: '%s'", reference)
         query_embedding = embedding_embed_query(reference)
-        logger.debug(f"Embedding generated: {len(query_embedding)} dimensions")
+        logger.debug("Embedding generated: %s dimensions", len(query_embedding))
 
         # Build base match condition
         match_condition = {"is_test": {"$ne": True}}  # Always exclude test data
@@ -937,12 +890,12 @@ class RetrievalAgent:
 
         try:
             logger.debug("Executing vector search pipeline...")
-            candidates = list(tasks_collection.aggregate(pipeline))
-            logger.info(f"Vector search returned {len(candidates)} candidate(s)")
+            candidates = vector_search(tasks_collection, pipeline)
+            logger.info("Vector search returned %s candidate(s)", len(candidates))
             for i, c in enumerate(candidates[:3]):
-                logger.debug(f"  Candidate {i+1}: '{c.get('title', 'N/A')}' (vector_score={c.get('vector_score', 0.0):.3f})")
+                logger.debug("  Candidate %s: '%s' (vector_score=%.3f)", i+1, c.get('title', 'N/A'), c.get('vector_score', 0.0))
         except Exception as e:
-            logger.error(f"Vector search failed: {e}", exc_info=True)
+            logger.error("Vector search failed: %s", e, exc_info=True)
             return {
                 "match": None,
                 "confidence": 0.0,
@@ -951,7 +904,7 @@ class RetrievalAgent:
             }
 
         if not candidates:
-            logger.warning(f"No candidates found for reference '{reference}'")
+            logger.warning("No candidates found for reference '%s'", reference)
             return {
                 "match": None,
                 "confidence": 0.0,
@@ -971,7 +924,7 @@ class RetrievalAgent:
             # Combined score (weighted average: 60% vector, 40% text)
             combined_score = (0.6 * vector_score) + (0.4 * text_score)
 
-            logger.debug(f"  '{task['title'][:40]}...' → vector={vector_score:.3f}, text={text_score:.3f}, combined={combined_score:.3f}")
+            logger.debug("  '%s...' → vector=%.3f, text=%.3f, combined=%.3f", task['title'][:40], vector_score, text_score, combined_score)
 
             task["_id"] = str(task["_id"])
             task["project_id"] = str(task["project_id"]) if task.get("project_id") else None
@@ -987,18 +940,18 @@ class RetrievalAgent:
         best_match = scored_candidates[0]
         best_confidence = best_match["confidence"]
 
-        logger.info(f"Best match: '{best_match['title']}' (confidence={best_confidence:.3f}, threshold={threshold})")
+        logger.info("Best match: '%s' (confidence=%.3f, threshold=%s)", best_match['title'], best_confidence, threshold)
 
         # Check if best match meets threshold
         if best_confidence >= threshold:
-            logger.info(f"✓ Match found above threshold!")
+            logger.info("✓ Match found above threshold!")
             # Check if there are close alternatives (within 0.1 of best)
             alternatives = [
                 task for task in scored_candidates[1:4]
                 if task["confidence"] >= threshold and (best_confidence - task["confidence"]) <= 0.1
             ]
             if alternatives:
-                logger.debug(f"Found {len(alternatives)} close alternative(s)")
+                logger.debug("Found %s close alternative(s)", len(alternatives))
 
             return {
                 "match": best_match,
@@ -1006,7 +959,7 @@ class RetrievalAgent:
                 "alternatives": alternatives
             }
         else:
-            logger.warning(f"✗ No match above threshold (best={best_confidence:.3f} < {threshold})")
+            logger.warning("✗ No match above threshold (best=%.3f < %s)", best_confidence, threshold)
             # No match above threshold, return top candidates
             return {
                 "match": None,
@@ -1032,11 +985,11 @@ class RetrievalAgent:
                 - confidence: Score 0.0-1.0
                 - alternatives: List of other candidates if ambiguous
         """
-        logger.info(f"fuzzy_match_project: reference='{reference}', threshold={threshold}")
+        logger.info("fuzzy_match_project: reference='%s', threshold=%s", reference, threshold)
         projects_collection = get_collection(PROJECTS_COLLECTION)
 
         # Get query embedding for semantic search
-        logger.debug(f"Generating embedding for project reference: '{reference}'")
+        logger.debug("Generating embedding for project reference: '%s'", reference)
         query_embedding = embedding_embed_query(reference)
 
         # Vector search pipeline
@@ -1066,10 +1019,10 @@ class RetrievalAgent:
 
         try:
             logger.debug("Executing project vector search...")
-            candidates = list(projects_collection.aggregate(pipeline))
-            logger.info(f"Vector search returned {len(candidates)} project candidate(s)")
+            candidates = vector_search(projects_collection, pipeline)
+            logger.info("Vector search returned %s project candidate(s)", len(candidates))
         except Exception as e:
-            logger.error(f"Project vector search failed: {e}", exc_info=True)
+            logger.error("Project vector search failed: %s", e, exc_info=True)
             return {
                 "match": None,
                 "confidence": 0.0,
@@ -1078,7 +1031,7 @@ class RetrievalAgent:
             }
 
         if not candidates:
-            logger.warning(f"No project candidates found for reference '{reference}'")
+            logger.warning("No project candidates found for reference '%s'", reference)
             return {
                 "match": None,
                 "confidence": 0.0,
@@ -1098,7 +1051,7 @@ class RetrievalAgent:
             # Combined score (weighted average: 60% vector, 40% text)
             combined_score = (0.6 * vector_score) + (0.4 * text_score)
 
-            logger.debug(f"  '{project['name'][:40]}...' → vector={vector_score:.3f}, text={text_score:.3f}, combined={combined_score:.3f}")
+            logger.debug("  '%s...' → vector=%.3f, text=%.3f, combined=%.3f", project['name'][:40], vector_score, text_score, combined_score)
 
             project["_id"] = str(project["_id"])
             project["confidence"] = combined_score
@@ -1113,11 +1066,11 @@ class RetrievalAgent:
         best_match = scored_candidates[0]
         best_confidence = best_match["confidence"]
 
-        logger.info(f"Best project match: '{best_match['name']}' (confidence={best_confidence:.3f})")
+        logger.info("Best project match: '%s' (confidence=%.3f)", best_match['name'], best_confidence)
 
         # Check if best match meets threshold
         if best_confidence >= threshold:
-            logger.info(f"✓ Project match found above threshold!")
+            logger.info("✓ Project match found above threshold!")
             # Check if there are close alternatives (within 0.1 of best)
             alternatives = [
                 proj for proj in scored_candidates[1:4]
@@ -1130,7 +1083,7 @@ class RetrievalAgent:
                 "alternatives": alternatives
             }
         else:
-            logger.warning(f"✗ No project match above threshold (best={best_confidence:.3f} < {threshold})")
+            logger.warning("✗ No project match above threshold (best=%.3f < %s)", best_confidence, threshold)
             # No match above threshold, return top candidates
             return {
                 "match": None,
@@ -1160,18 +1113,12 @@ class RetrievalAgent:
         Returns:
             List of task dicts with _id, title, context, status, priority, assignee, project_id, project_name, score
         """
-        import time
-
-        logger.info(f"hybrid_search_tasks: query='{query}', limit={limit}, status={status}, priority={priority}, project_id={project_id}, assignee={assignee}")
-
-        # Track timings for debug panel
-        timings = {}
+        logger.info("hybrid_search_tasks: query='%s', limit=%s, status=%s, priority=%s, project_id=%s, assignee=%s", query, limit, status, priority, project_id, assignee)
 
         # Time embedding generation
-        start = time.time()
-        query_embedding = embedding_embed_query(query)
-        timings["embedding_generation"] = int((time.time() - start) * 1000)
-        logger.debug(f"Query embedding generated: {len(query_embedding)} dimensions ({timings['embedding_generation']}ms)")
+        with span("retrieval.hybrid_search_tasks.embed", kind="embedding") as embed_span:
+            query_embedding = embedding_embed_query(query)
+        logger.debug("Query embedding generated: %s dimensions (%sms)", len(query_embedding), embed_span.duration_ms)
 
         # Build hybrid search pipeline
         # Use higher multiplier (10x) to get more results before post-filtering
@@ -1272,27 +1219,19 @@ class RetrievalAgent:
         # Execute search
         try:
             # Time MongoDB query execution
-            start = time.time()
-            tasks_collection = get_collection(TASKS_COLLECTION)
-            results = list(tasks_collection.aggregate(pipeline))
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-            # Calculate processing overhead
-            timings["processing"] = max(0, timings.get("total", 0) - timings["embedding_generation"] - timings["mongodb_query"])
-
-            # Store timings for coordinator to access
-            self.last_query_timings = timings
+            with span("retrieval.hybrid_search_tasks.query", kind="mongodb") as db_span:
+                tasks_collection = get_collection(TASKS_COLLECTION)
+                results = list(tasks_collection.aggregate(pipeline))
 
-            logger.info(f"Hybrid search returned {len(results)} task(s) (embed: {timings['embedding_generation']}ms, db: {timings['mongodb_query']}ms)")
+            logger.info("Hybrid search returned %s task(s) (embed: %sms, db: %sms)", len(results), embed_span.duration_ms, db_span.duration_ms)
 
             # Log top results
             for i, task in enumerate(results[:3], 1):
-                logger.debug(f"  {i}. '{task['title'][:50]}...' (score={task.get('score', 0):.3f})")
+                logger.debug("  %s. '%s...' (score=%.3f)", i, task['title'][:50], task.get('score', 0))
 
             return results
         except Exception as e:
-            logger.error(f"Hybrid search failed: {e}", exc_info=True)
-            self.last_query_timings = timings  # Store even on error
+            logger.error("Hybrid search failed: %s", e, exc_info=True)
             return []
 
     def hybrid_search_projects(self, query: str, limit: int = 5) -> list:
@@ -1306,18 +1245,12 @@ class RetrievalAgent:
         Returns:
             List of project dicts with _id, name, description, context, status, stakeholders, score
         """
-        import time
-
-        logger.info(f"hybrid_search_projects: query='{query}', limit={limit}")
-
-        # Track timings for debug panel
-        timings = {}
+        logger.info("hybrid_search_projects: query='%s', limit=%s", query, limit)
 
         # Time embedding generation
-        start = time.time()
-        query_embedding = embedding_embed_query(query)
-        timings["embedding_generation"] = int((time.time() - start) * 1000)
-        logger.debug(f"Query embedding generated: {len(query_embedding)} dimensions ({timings['embedding_generation']}ms)")
+        with span("retrieval.hybrid_search_projects.embed", kind="embedding") as embed_span:
+            query_embedding = embedding_embed_query(query)
+        logger.debug("Query embedding generated: %s dimensions (%sms)", len(query_embedding), embed_span.duration_ms)
 
         # Build hybrid search pipeline
         pipeline = [
@@ -1382,24 +1315,19 @@ class RetrievalAgent:
         # Execute search
         try:
             # Time MongoDB query execution
-            start = time.time()
-            projects_collection = get_collection(PROJECTS_COLLECTION)
-            results = list(projects_collection.aggregate(pipeline))
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-            # Store timings for coordinator to access
-            self.last_query_timings = timings
+            with span("retrieval.hybrid_search_projects.query", kind="mongodb") as db_span:
+                projects_collection = get_collection(PROJECTS_COLLECTION)
+                results = list(projects_collection.aggregate(pipeline))
 
-            logger.info(f"Hybrid search returned {len(results)} project(s) (embed: {timings['embedding_generation']}ms, db: {timings['mongodb_query']}ms)")
+            logger.info("Hybrid search returned %s project(s) (embed: %sms, db: %sms)", len(results), embed_span.duration_ms, db_span.duration_ms)
 
             # Log top results
             for i, proj in enumerate(results[:3], 1):
-                logger.debug(f"  {i}. '{proj['name'][:50]}...' (score={proj.get('score', 0):.3f})")
+                logger.debug("  %s. '%s...' (score=%.3f)", i, proj['name'][:50], proj.get('score', 0))
 
             return results
         except Exception as e:
-            logger.error(f"Hybrid search failed: {e}", exc_info=True)
-            self.last_query_timings = timings  # Store even on error
+            logger.error("Hybrid search failed: %s", e, exc_info=True)
             return []
 
     def vector_search_tasks(self, query: str, limit: int = 5) -> list:
@@ -1414,17 +1342,11 @@ class RetrievalAgent:
         Returns:
             List of task dicts with _id, title, context, status, project_id, score
         """
-        import time
-
-        logger.info(f"vector_search_tasks: query='{query}', limit={limit}")
-
-        # Track timings
-        timings = {}
+        logger.info("vector_search_tasks: query='%s', limit=%s", query, limit)
 
         # Time embedding generation
-        start = time.time()
-        query_embedding = embedding_embed_query(query)
-        timings["embedding_generation"] = int((time.time() - start) * 1000)
+        with span("retrieval.vector_search_tasks.embed", kind="embedding") as embed_span:
+            query_embedding = embedding_embed_query(query)
 
         # Build vector search pipeline
         pipeline = [
@@ -1467,19 +1389,15 @@ class RetrievalAgent:
 
         # Execute search
         try:
-            start = time.time()
-            tasks_collection = get_collection(TASKS_COLLECTION)
-            results = list(tasks_collection.aggregate(pipeline))
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-            self.last_query_timings = timings
+            with span("retrieval.vector_search_tasks.query", kind="mongodb") as db_span:
+                tasks_collection = get_collection(TASKS_COLLECTION)
+                results = vector_search(tasks_collection, pipeline)
 
-            logger.info(f"Vector search returned {len(results)} task(s) (embed: {timings['embedding_generation']}ms, db: {timings['mongodb_query']}ms)")
+            logger.info("Vector search returned %s task(s) (embed: %sms, db: %sms)", len(results), embed_span.duration_ms, db_span.duration_ms)
 
             return results
         except Exception as e:
-            logger.error(f"Vector search failed: {e}", exc_info=True)
-            self.last_query_timings = timings
+            logger.error("Vector search failed: %s", e, exc_info=True)
             return []
 
     def text_search_tasks(self, query: str, limit: int = 5) -> list:
@@ -1494,12 +1412,7 @@ class RetrievalAgent:
         Returns:
             List of task dicts with _id, title, context, status, project_id, score
         """
-        import time
-
-        logger.info(f"text_search_tasks: query='{query}', limit={limit}")
-
-        # Track timings (no embedding for text search)
-        timings = {"embedding_generation": 0}
+        logger.info("text_search_tasks: query='%s', limit=%s", query, limit)
 
         # Build text search pipeline
         pipeline = [
@@ -1544,19 +1457,15 @@ class RetrievalAgent:
 
         # Execute search
         try:
-            start = time.time()
-            tasks_collection = get_collection(TASKS_COLLECTION)
-            results = list(tasks_collection.aggregate(pipeline))
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
+            with span("retrieval.text_search_tasks.query", kind="mongodb") as db_span:
+                tasks_collection = get_collection(TASKS_COLLECTION)
+                results = list(tasks_collection.aggregate(pipeline))
 
-            self.last_query_timings = timings
-
-            logger.info(f"Text search returned {len(results)} task(s) (db: {timings['mongodb_query']}ms)")
+            logger.info("Text search returned %s task(s) (db: %sms)", len(results), db_span.duration_ms)
 
             return results
         except Exception as e:
-            logger.error(f"Text search failed: {e}", exc_info=True)
-            self.last_query_timings = timings
+            logger.error("Text search failed: %s", e, exc_info=True)
             return []
 
     def vector_search_projects(self, query: str, limit: int = 5) -> list:
@@ -1570,17 +1479,11 @@ class RetrievalAgent:
         Returns:
             List of project dicts with _id, name, description, context, status, score
         """
-        import time
-
-        logger.info(f"vector_search_projects: query='{query}', limit={limit}")
-
-        # Track timings
-        timings = {}
+        logger.info("vector_search_projects: query='%s', limit=%s", query, limit)
 
         # Time embedding generation
-        start = time.time()
-        query_embedding = embedding_embed_query(query)
-        timings["embedding_generation"] = int((time.time() - start) * 1000)
+        with span("retrieval.vector_search_projects.embed", kind="embedding") as embed_span:
+            query_embedding = embedding_embed_query(query)
 
         # Build vector search pipeline
         pipeline = [
@@ -1607,19 +1510,15 @@ class RetrievalAgent:
 
         # Execute search
         try:
-            start = time.time()
-            projects_collection = get_collection(PROJECTS_COLLECTION)
-            results = list(projects_collection.aggregate(pipeline))
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
+            with span("retrieval.vector_search_projects.query", kind="mongodb") as db_span:
+                projects_collection = get_collection(PROJECTS_COLLECTION)
+                results = vector_search(projects_collection, pipeline)
 
-            self.last_query_timings = timings
-
-            logger.info(f"Vector search returned {len(results)} project(s) (embed: {timings['embedding_generation']}ms, db: {timings['mongodb_query']}ms)")
+            logger.info("Vector search returned %s project(s) (embed: %sms, db: %sms)", len(results), embed_span.duration_ms, db_span.duration_ms)
 
             return results
         except Exception as e:
-            logger.error(f"Vector search failed: {e}", exc_info=True)
-            self.last_query_timings = timings
+            logger.error("Vector search failed: %s", e, exc_info=True)
             return []
 
     def text_search_projects(self, query: str, limit: int = 5) -> list:
@@ -1633,12 +1532,7 @@ class RetrievalAgent:
         Returns:
             List of project dicts with _id, name, description, context, status, score
         """
-        import time
-
-        logger.info(f"text_search_projects: query='{query}', limit={limit}")
-
-        # Track timings (no embedding for text search)
-        timings = {"embedding_generation": 0}
+        logger.info("text_search_projects: query='%s', limit=%s", query, limit)
 
         # Build text search pipeline
         pipeline = [
@@ -1667,19 +1561,15 @@ class RetrievalAgent:
 
         # Execute search
         try:
-            start = time.time()
-            projects_collection = get_collection(PROJECTS_COLLECTION)
-            results = list(projects_collection.aggregate(pipeline))
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-            self.last_query_timings = timings
+            with span("retrieval.text_search_projects.query", kind="mongodb") as db_span:
+                projects_collection = get_collection(PROJECTS_COLLECTION)
+                results = list(projects_collection.aggregate(pipeline))
 
-            logger.info(f"Text search returned {len(results)} project(s) (db: {timings['mongodb_query']}ms)")
+            logger.info("Text search returned %s project(s) (db: %sms)", len(results), db_span.duration_ms)
 
             return results
         except Exception as e:
-            logger.error(f"Text search failed: {e}", exc_info=True)
-            self.last_query_timings = timings
+            logger.error("Text search failed: %s", e, exc_info=True)
             return []
 
     def get_tasks_by_activity(
@@ -1691,7 +1581,7 @@ class RetrievalAgent:
         limit: int = 50
     ) -> list:
         """
-        Query tasks based on activity_log timestamps.
+        Query tasks based on activity event timestamps.
 
         Args:
             since: Start date for activity (inclusive)
@@ -1703,58 +1593,38 @@ class RetrievalAgent:
         Returns:
             List of task dicts matching the activity criteria
         """
-        import time
-
-        logger.info(f"get_tasks_by_activity: since={since}, until={until}, activity_type={activity_type}, status={status}")
-
-        # Track timings for debug panel
-        timings = {}
+        logger.info("get_tasks_by_activity: since=%s, until=%s, activity_type=%s, status=%s", since, until, activity_type, status)
 
-        # Build query
+        # Build query on the task itself
         query = {}
 
         if status:
             query["status"] = status
 
-        # Build activity_log query with $elemMatch
-        if since or until or activity_type:
-            elem_match = {}
-
-            if activity_type:
-                elem_match["action"] = activity_type
-
-            if since or until:
-                timestamp_query = {}
-                if since:
-                    timestamp_query["$gte"] = since
-                if until:
-                    timestamp_query["$lt"] = until
-                elem_match["timestamp"] = timestamp_query
-
-            query["activity_log"] = {"$elemMatch": elem_match}
-
-        logger.debug(f"Activity query: {query}")
+        logger.debug("Activity query: %s", query)
 
         try:
             # Time MongoDB query execution
-            start = time.time()
-            tasks_collection = get_collection(TASKS_COLLECTION)
-            results = list(
-                tasks_collection.find(query, {"embedding": 0})
-                .sort("activity_log.timestamp", -1)
-                .limit(limit)
-            )
-            timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-            # Store timings for coordinator to access
-            self.last_query_timings = timings
-
-            logger.info(f"Activity query returned {len(results)} task(s) (db: {timings['mongodb_query']}ms)")
+            with span("retrieval.get_tasks_by_activity.query", kind="mongodb") as db_span:
+                if since or until or activity_type:
+                    # Range scan over activity_events, most recently active tasks first
+                    pipeline = build_activity_pipeline(
+                        "task", since=since, until=until, action=activity_type, entity_match=query
+                    ) + [{"$limit": limit}]
+                    results = list(get_collection(ACTIVITY_COLLECTION).aggregate(pipeline))
+                else:
+                    tasks_collection = get_collection(TASKS_COLLECTION)
+                    results = list(
+                        tasks_collection.find(query, {"embedding": 0})
+                        .sort("updated_at", -1)
+                        .limit(limit)
+                    )
+
+            logger.info("Activity query returned %s task(s) (db: %sms)", len(results), db_span.duration_ms)
 
             return results
         except Exception as e:
-            logger.error(f"Activity query failed: {e}", exc_info=True)
-            self.last_query_timings = timings  # Store even on error
+            logger.error("Activity query failed: %s", e, exc_info=True)
             return []
 
     def process(self, user_message: str, conversation_history: Optional[List[Dict[str, Any]]] = None) -> str:
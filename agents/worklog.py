@@ -6,7 +6,8 @@ from bson import ObjectId
 
 from shared.llm import llm_service
 from shared.logger import get_logger
-from shared.embeddings import embed_document
+from shared.tracing import span
+from shared.reembed import compute_embedding, plan_reembed, schedule_reembed
 from shared.db import (
     create_task as db_create_task,
     update_task as db_update_task,
@@ -33,7 +34,6 @@ class WorklogAgent:
     def __init__(self, memory_manager=None):
         self.llm = llm_service
         self.tools = self._define_tools()
-        self.last_query_timings = {}  # Track latency breakdown for debug panel
         self.memory = memory_manager  # Shared memory for agent handoffs
         self.session_id = None  # Current session ID for handoffs
 
@@ -518,8 +518,6 @@ class WorklogAgent:
         due_date: Optional[str] = None
     ) -> Dict[str, Any]:
         """Create a new task."""
-        from shared.embeddings import build_task_embedding_text
-
         # Parse due_date if provided
         parsed_due_date = None
         if due_date:
@@ -539,9 +537,7 @@ class WorklogAgent:
         )
 
         # Generate embedding from comprehensive task data
-        task_doc = task.model_dump(by_alias=True)
-        embedding_text = build_task_embedding_text(task_doc)
-        task.embedding = embed_document(embedding_text)
+        task.embedding, task.embedding_hash = compute_embedding("task", task.model_dump(by_alias=True))
 
         # Create in database
         task_id = db_create_task(task, action_note=f"Task created: {title}")
@@ -567,11 +563,6 @@ class WorklogAgent:
         due_date: Optional[str] = None
     ) -> Dict[str, Any]:
         """Update an existing task."""
-        import time
-
-        # Track timings for debug panel
-        timings = {}
-
         task_oid = ObjectId(task_id)
         current_task = db_get_task(task_oid)
 
@@ -614,28 +605,17 @@ class WorklogAgent:
             updates["due_date"] = parsed_due_date
             changes.append(f"due date set to {parsed_due_date.strftime('%Y-%m-%d') if parsed_due_date else 'none'}")
 
-        # Re-generate embedding if any content fields changed
-        if any(field is not None for field in [title, context, assignee, blockers, due_date]):
-            from shared.embeddings import build_task_embedding_text
-            start = time.time()
-
-            # Build updated task document for embedding
-            updated_task_doc = current_task.model_dump(by_alias=True)
-            updated_task_doc.update(updates)
-
-            embedding_text = build_task_embedding_text(updated_task_doc)
-            updates["embedding"] = embed_document(embedding_text)
-            timings["embedding_generation"] = int((time.time() - start) * 1000)
+        # Re-embed only if the canonical embedding text changed
+        with span("worklog._update_task.embed", kind="embedding"):
+            updates.update(plan_reembed("task", current_task.model_dump(by_alias=True), updates))
 
         # Time MongoDB update operation
         action_note = "; ".join(changes) if changes else "Task updated"
-        start = time.time()
-        success = db_update_task(task_oid, updates, "updated", action_note)
-        updated_task = db_get_task(task_oid)
-        timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-        # Store timings for coordinator to access
-        self.last_query_timings = timings
+        with span("worklog._update_task.query", kind="mongodb"):
+            success = db_update_task(task_oid, updates, "updated", action_note)
+            if updates.get("embedding_stale"):
+                schedule_reembed("task", task_oid)
+            updated_task = db_get_task(task_oid)
 
         return {
             "success": success,
@@ -648,11 +628,6 @@ class WorklogAgent:
         completion_note: Optional[str] = None
     ) -> Dict[str, Any]:
         """Mark a task as completed."""
-        import time
-
-        # Track timings for debug panel
-        timings = {}
-
         task_oid = ObjectId(task_id)
 
         updates = {
@@ -663,13 +638,9 @@ class WorklogAgent:
         action_note = completion_note if completion_note else "Task completed"
 
         # Time MongoDB update operation
-        start = time.time()
-        success = db_update_task(task_oid, updates, "completed", action_note)
-        updated_task = db_get_task(task_oid)
-        timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-        # Store timings for coordinator to access
-        self.last_query_timings = timings
+        with span("worklog._complete_task.query", kind="mongodb"):
+            success = db_update_task(task_oid, updates, "completed", action_note)
+            updated_task = db_get_task(task_oid)
 
         return {
             "success": success,
@@ -684,8 +655,6 @@ class WorklogAgent:
         stakeholders: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """Create a new project."""
-        from shared.embeddings import build_project_embedding_text
-
         # Create project model
         project = Project(
             name=name,
@@ -695,9 +664,7 @@ class WorklogAgent:
         )
 
         # Generate embedding from comprehensive project data
-        project_doc = project.model_dump(by_alias=True)
-        embedding_text = build_project_embedding_text(project_doc)
-        project.embedding = embed_document(embedding_text)
+        project.embedding, project.embedding_hash = compute_embedding("project", project.model_dump(by_alias=True))
 
         # Create in database
         project_id = db_create_project(project, action_note=f"Project created: {name}")
@@ -749,20 +716,9 @@ class WorklogAgent:
             updates["status"] = status
             changes.append(f"status changed to '{status}'")
 
-        # Re-generate embedding if any content fields changed
-        if any(field is not None for field in [name, description, context, stakeholders]):
-            from shared.embeddings import build_project_embedding_text
-
-            # Build updated project document for embedding
-            updated_project_doc = current_project.model_dump(by_alias=True)
-            updated_project_doc.update(updates)
-
-            embedding_text = build_project_embedding_text(updated_project_doc)
-            updates["embedding"] = embed_document(embedding_text)
-
-        # Update in database
+        # Update in database, re-embedding only if the embedding text changed
         action_note = "; ".join(changes) if changes else "Project updated"
-        success = db_update_project(project_oid, updates, "updated", action_note)
+        success = self._update_with_embedding("project", current_project, updates, "updated", action_note)
 
         # Return updated project
         updated_project = db_get_project(project_oid)
@@ -785,6 +741,10 @@ class WorklogAgent:
         else:  # project
             success = add_project_note(target_oid, note)
 
+        # Notes (task) and updates (project) are part of the embedding text
+        if success:
+            schedule_reembed(target_type, target_oid, mark_stale=True)
+
         return {
             "success": success,
             "message": f"Note added to {target_type}"
@@ -800,34 +760,22 @@ class WorklogAgent:
         target_oid = ObjectId(target_id)
 
         if target_type == "task":
-            # Get current task to regenerate embedding
+            # Get current task to check whether the embedding text changes
             current_task = db_get_task(target_oid)
             if not current_task:
                 return {"success": False, "error": "Task not found"}
 
-            embedding_text = f"{current_task.title}\n{context}".strip()
-            embedding = embed_document(embedding_text)
-
-            success = db_update_task(
-                target_oid,
-                {"context": context, "embedding": embedding},
-                "context_added",
-                "Context updated"
+            success = self._update_with_embedding(
+                "task", current_task, {"context": context}, "context_added", "Context updated"
             )
         else:  # project
-            # Get current project to regenerate embedding
+            # Get current project to check whether the embedding text changes
             current_project = db_get_project(target_oid)
             if not current_project:
                 return {"success": False, "error": "Project not found"}
 
-            embedding_text = f"{current_project.name}\n{current_project.description}".strip()
-            embedding = embed_document(embedding_text)
-
-            success = db_update_project(
-                target_oid,
-                {"context": context, "embedding": embedding},
-                "context_added",
-                "Context updated"
+            success = self._update_with_embedding(
+                "project", current_project, {"context": context}, "context_added", "Context updated"
             )
 
         return {
@@ -839,6 +787,8 @@ class WorklogAgent:
         """Add a decision to a project."""
         project_oid = ObjectId(project_id)
         success = add_project_decision(project_oid, decision)
+        if success:
+            schedule_reembed("project", project_oid, mark_stale=True)
 
         return {
             "success": success,
@@ -849,6 +799,8 @@ class WorklogAgent:
         """Add a method/technology to a project."""
         project_oid = ObjectId(project_id)
         success = add_project_method(project_oid, method)
+        if success:
+            schedule_reembed("project", project_oid, mark_stale=True)
 
         return {
             "success": success,
@@ -868,8 +820,9 @@ class WorklogAgent:
         if blocker not in current_blockers:
             current_blockers.append(blocker)
 
-            success = db_update_task(
-                task_oid,
+            success = self._update_with_embedding(
+                "task",
+                task,
                 {"blockers": current_blockers},
                 "blocker_added",
                 f"Blocker added: {blocker}"
@@ -899,8 +852,9 @@ class WorklogAgent:
         if blocker in current_blockers:
             current_blockers.remove(blocker)
 
-            success = db_update_task(
-                task_oid,
+            success = self._update_with_embedding(
+                "task",
+                task,
                 {"blockers": current_blockers},
                 "blocker_removed",
                 f"Blocker removed: {blocker}"
@@ -930,8 +884,9 @@ class WorklogAgent:
         if stakeholder not in current_stakeholders:
             current_stakeholders.append(stakeholder)
 
-            success = db_update_project(
-                project_oid,
+            success = self._update_with_embedding(
+                "project",
+                project,
                 {"stakeholders": current_stakeholders},
                 "stakeholder_added",
                 f"Stakeholder added: {stakeholder}"
@@ -966,8 +921,9 @@ class WorklogAgent:
         current_updates = project.updates or []
         current_updates.append(new_update)
 
-        success = db_update_project(
-            project_oid,
+        success = self._update_with_embedding(
+            "project",
+            project,
             {"updates": current_updates},
             "update_added",
             f"Status update added"
@@ -979,6 +935,34 @@ class WorklogAgent:
             "update": new_update
         }
 
+    def _update_with_embedding(
+        self,
+        entity_type: Literal["task", "project"],
+        current: Any,
+        updates: Dict[str, Any],
+        action: str,
+        action_note: str
+    ) -> bool:
+        """
+        Update a task or project, re-embedding only if its embedding text changed.
+
+        Args:
+            entity_type: "task" or "project"
+            current: Task or Project model before the update
+            updates: Fields to set
+            action: Action for the activity log
+            action_note: Note for the activity log
+
+        Returns:
+            True if the update was applied
+        """
+        updates.update(plan_reembed(entity_type, current.model_dump(by_alias=True), updates))
+        write = db_update_task if entity_type == "task" else db_update_project
+        success = write(current.id, updates, action, action_note)
+        if updates.get("embedding_stale"):
+            schedule_reembed(entity_type, current.id)
+        return success
+
     def _parse_due_date(self, due_date_str: str) -> Optional[datetime]:
         """Parse a due date string into a datetime object.
 
@@ -1031,7 +1015,7 @@ class WorklogAgent:
             return parser.parse(due_date_str, fuzzy=True)
 
         except Exception as e:
-            logger.warning(f"Failed to parse due date '{due_date_str}': {e}")
+            logger.warning("Failed to parse due date '%s': %s", due_date_str, e)
             return None
 
     def _list_tasks(
@@ -1042,11 +1026,6 @@ class WorklogAgent:
         limit: int = 20
     ) -> Dict[str, Any]:
         """List tasks with optional filters."""
-        import time
-
-        # Track timings for debug panel
-        timings = {}
-
         collection = get_collection(TASKS_COLLECTION)
 
         # Build query
@@ -1059,13 +1038,9 @@ class WorklogAgent:
             query["priority"] = priority
 
         # Time MongoDB query execution
-        start = time.time()
-        cursor = collection.find(query, {"embedding": 0}).sort("created_at", -1).limit(limit)
-        tasks = [Task(**doc) for doc in cursor]
-        timings["mongodb_query"] = int((time.time() - start) * 1000)
-
-        # Store timings for coordinator to access
-        self.last_query_timings = timings
+        with span("worklog._list_tasks.query", kind="mongodb"):
+            cursor = collection.find(query, {"embedding": 0}).sort("created_at", -1).limit(limit)
+            tasks = [Task(**doc) for doc in cursor]
 
         return {
             "success": True,
@@ -1147,9 +1122,9 @@ class WorklogAgent:
         Returns:
             dict with success status and updated entity
         """
-        logger.info(f"apply_voice_update: task_id={task_id}, project_id={project_id}")
-        logger.debug(f"Updates: {updates}")
-        logger.debug(f"Voice log summary: {voice_log_entry.get('summary', 'N/A')}")
+        logger.info("apply_voice_update: task_id=%s, project_id=%s", task_id, project_id)
+        logger.debug("Updates: %s", updates)
+        logger.debug("Voice log summary: %s", voice_log_entry.get('summary', 'N/A'))
 
         if not task_id and not project_id:
             logger.warning("apply_voice_update called without task_id or project_id")
@@ -1160,12 +1135,12 @@ class WorklogAgent:
 
         # Process task update
         if task_id:
-            logger.info(f"Applying voice update to task {task_id}")
+            logger.info("Applying voice update to task %s", task_id)
             task_oid = ObjectId(task_id)
             current_task = db_get_task(task_oid)
 
             if not current_task:
-                logger.error(f"Task {task_id} not found")
+                logger.error("Task %s not found", task_id)
                 return {"success": False, "error": "Task not found"}
 
             # Build update dict
@@ -1174,7 +1149,7 @@ class WorklogAgent:
 
             # Update status if provided
             if "status" in updates:
-                logger.info(f"Updating task status: {current_task.status} → {updates['status']}")
+                logger.info("Updating task status: %s → %s", current_task.status, updates['status'])
                 update_fields["status"] = updates["status"]
                 changes.append(f"status changed to '{updates['status']}'")
                 if updates["status"] == "done":
@@ -1191,34 +1166,32 @@ class WorklogAgent:
                 update_fields["context"] = new_context
                 changes.append("context updated")
 
-                # Regenerate embedding
-                embedding_text = f"{current_task.title}\n{new_context}".strip()
-                update_fields["embedding"] = embed_document(embedding_text)
-
-            # Create voice activity log entry
-            from shared.models import ActivityLogEntry
-            log_entry = ActivityLogEntry(
-                action="voice_update",
-                note=voice_log_entry.get("summary", "Voice update"),
-                summary=voice_log_entry.get("summary"),
-                raw_transcript=voice_log_entry.get("raw_transcript"),
-                extracted=voice_log_entry.get("extracted")
-            )
-
-            # Add to activity log
-            if "activity_log" not in update_fields:
-                update_fields["activity_log"] = current_task.activity_log
-            update_fields["activity_log"].append(log_entry)
+                # Re-embed if the canonical embedding text changed
+                update_fields.update(plan_reembed("task", current_task.model_dump(by_alias=True), update_fields))
 
-            # Apply updates
-            action_note = "; ".join(changes) if changes else "Voice update applied"
-            db_update_task(task_oid, update_fields, "voice_update", action_note)
+            # Apply updates; the voice details go on the activity entry
+            action_note = "; ".join(changes) if changes else voice_log_entry.get("summary", "Voice update applied")
+            db_update_task(
+                task_oid,
+                update_fields,
+                "voice_update",
+                action_note,
+                activity_fields={
+                    "summary": voice_log_entry.get("summary"),
+                    "raw_transcript": voice_log_entry.get("raw_transcript"),
+                    "extracted": voice_log_entry.get("extracted")
+                }
+            )
 
             # Add notes separately if provided
             if "notes_to_add" in updates:
                 for note in updates["notes_to_add"]:
                     add_task_note(task_oid, note)
 
+            # Context and notes feed the embedding; queued jobs re-check the hash
+            if update_fields.get("embedding_stale") or updates.get("notes_to_add"):
+                schedule_reembed("task", task_oid, mark_stale=not update_fields.get("embedding_stale"))
+
             # Return updated task
             updated_task = db_get_task(task_oid)
             return {
@@ -1254,34 +1227,32 @@ class WorklogAgent:
                 update_fields["context"] = new_context
                 changes.append("context updated")
 
-                # Regenerate embedding
-                embedding_text = f"{current_project.name}\n{current_project.description}".strip()
-                update_fields["embedding"] = embed_document(embedding_text)
-
-            # Create voice activity log entry
-            from shared.models import ActivityLogEntry
-            log_entry = ActivityLogEntry(
-                action="voice_update",
-                note=voice_log_entry.get("summary", "Voice update"),
-                summary=voice_log_entry.get("summary"),
-                raw_transcript=voice_log_entry.get("raw_transcript"),
-                extracted=voice_log_entry.get("extracted")
-            )
+                # Re-embed if the canonical embedding text changed
+                update_fields.update(plan_reembed("project", current_project.model_dump(by_alias=True), update_fields))
 
-            # Add to activity log
-            if "activity_log" not in update_fields:
-                update_fields["activity_log"] = current_project.activity_log
-            update_fields["activity_log"].append(log_entry)
-
-            # Apply updates
-            action_note = "; ".join(changes) if changes else "Voice update applied"
-            db_update_project(project_oid, update_fields, "voice_update", action_note)
+            # Apply updates; the voice details go on the activity entry
+            action_note = "; ".join(changes) if changes else voice_log_entry.get("summary", "Voice update applied")
+            db_update_project(
+                project_oid,
+                update_fields,
+                "voice_update",
+                action_note,
+                activity_fields={
+                    "summary": voice_log_entry.get("summary"),
+                    "raw_transcript": voice_log_entry.get("raw_transcript"),
+                    "extracted": voice_log_entry.get("extracted")
+                }
+            )
 
             # Add notes separately if provided
             if "notes_to_add" in updates:
                 for note in updates["notes_to_add"]:
                     add_project_note(project_oid, note)
 
+            # Context and updates feed the embedding; queued jobs re-check the hash
+            if update_fields.get("embedding_stale") or updates.get("notes_to_add"):
+                schedule_reembed("project", project_oid, mark_stale=not update_fields.get("embedding_stale"))
+
             # Return updated project
             updated_project = db_get_project(project_oid)
             return {
@@ -1325,8 +1296,7 @@ class WorklogAgent:
         )
 
         # Generate embedding
-        embedding_text = f"{title}\n{full_context}".strip()
-        task.embedding = embed_document(embedding_text)
+        task.embedding, task.embedding_hash = compute_embedding("task", task.model_dump(by_alias=True))
 
         # Add voice creation log entry
         from shared.models import ActivityLogEntry
@@ -1357,7 +1327,7 @@ class WorklogAgent:
         if not task:
             return None
 
-        task_dict = task.model_dump(exclude={"embedding"})  # Exclude large embedding
+        task_dict = task.model_dump(exclude={"embedding", "embedding_hash"})  # Exclude large embedding
         task_dict["_id"] = str(task.id) if task.id else None
         task_dict["project_id"] = str(task.project_id) if task.project_id else None
         return task_dict
@@ -1367,7 +1337,7 @@ class WorklogAgent:
         if not project:
             return None
 
-        project_dict = project.model_dump(exclude={"embedding"})  # Exclude large embedding
+        project_dict = project.model_dump(exclude={"embedding", "embedding_hash"})  # Exclude large embedding
         project_dict["_id"] = str(project.id) if project.id else None
         return project_dict
 
@@ -1457,7 +1427,7 @@ Always use the tools to perform actual operations - don't just describe what you
             llm_kwargs = {}
             if iteration == 1 and requires_tool:
                 llm_kwargs['tool_choice'] = {"type": "any"}  # Force the model to use a tool
-                logger.info(f"🔧 Forcing tool use for action request: {user_message[:50]}")
+                logger.info("🔧 Forcing tool use for action request: %s", user_message[:50])
 
             # Call Claude with tools
             response = self.llm.generate_with_tools(
@@ -1468,7 +1438,7 @@ Always use the tools to perform actual operations - don't just describe what you
                 **llm_kwargs
             )
 
-            logger.info(f"📊 Response stop_reason: {response.stop_reason}")
+            logger.info("📊 Response stop_reason: %s", response.stop_reason)
 
             # Check if we're done (no tool use)
             if response.stop_reason == "end_turn":
@@ -0,0 +1,513 @@
+"""Offline latency benchmark with deterministic local stand-ins.
+
+Runs the agents against seeded demo data (scripts/demo/seed_demo_data.py) in
+mongomock or a throwaway local mongod, with the hash embedder and scripted
+LLM from evals/fakes.py in place of Voyage AI and Anthropic. Nothing leaves
+the machine, so the numbers measure this codebase and are stable enough to
+gate regressions in CI.
+
+Stages:
+- retrieval: task and project vector search (local vector index)
+- context_injection: memory layers of the system prompt
+- tool_execution: each recorded read-only tool call through the coordinator
+- memory_write: session context update + episodic action record
+- turn: full coordinator.process() replaying each transcript
+- cold_import: importing agents.coordinator and shared.db in a fresh
+  interpreter (startup must stay lazy: no clients, indexes or services)
+
+Each stage reports p50/p95/p99 latency and peak memory allocated per call
+(tracemalloc, measured in a separate pass so it doesn't skew timings), and
+is compared against evals/baselines/benchmark.json.
+
+Usage:
+    python -m evals.benchmark                       # compare to baseline
+    python -m evals.benchmark --iterations 200 --stages retrieval turn
+    python -m evals.benchmark --update-baseline     # after intended changes
+    python -m evals.benchmark --mongodb-uri mongodb://localhost:27017
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from evals.fakes import (
+    AsyncHashEmbedder,
+    HashEmbedder,
+    ScriptedLLM,
+    load_transcripts,
+    mongomock_local_runner,
+    open_benchmark_db,
+)
+
+STAGES = ("retrieval", "context_injection", "tool_execution", "memory_write", "turn", "cold_import")
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "benchmark.json"
+
+# Allowed slowdown over the baseline before a stage counts as regressed
+DEFAULT_TOLERANCE = 0.25
+
+# Absolute slack on top of the tolerance; sub-millisecond stages jitter
+# by more than 25% between runs on the same machine
+MIN_REGRESSION_MS = 0.5
+MIN_REGRESSION_KB = 16.0
+
+RETRIEVAL_QUERIES = (
+    "voice agent latency",
+    "memory engineering blog post",
+    "developer day slides",
+    "debugging the integration",
+)
+
+BENCHMARK_SESSION = "benchmark-session"
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Each cold_import sample is a fresh interpreter; a handful is enough
+COLD_IMPORT_RUNS = 5
+
+COLD_IMPORT_PROBE = """
+import time
+start = time.perf_counter()
+import agents.coordinator
+import shared.db
+print(time.perf_counter() - start)
+"""
+
+
+@dataclass
+class StageResult:
+    """Latency and allocation statistics for one stage."""
+    stage: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    alloc_peak_kb: float = 0.0  # Median per-call tracemalloc peak
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class BenchmarkReport:
+    """Results of one benchmark run."""
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+    backend: str = "mongomock"
+    python: str = field(default_factory=platform.python_version)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    def to_dict(self) -> dict:
+        return {
+            "backend": self.backend,
+            "python": self.python,
+            "created_at": self.created_at,
+            "stages": {name: result.to_dict() for name, result in self.stages.items()},
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# STATISTICS
+# ═══════════════════════════════════════════════════════════════════
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        samples: Measurements (any order)
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The smallest sample with at least pct% of samples at or below it
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil without floats
+    return ordered[min(int(rank), len(ordered)) - 1]
+
+
+def summarize(stage: str, samples_ms: Sequence[float], alloc_kb: Sequence[float] = ()) -> StageResult:
+    """
+    Reduce raw samples to a StageResult.
+
+    Args:
+        stage: Stage name
+        samples_ms: Per-call latencies
+        alloc_kb: Per-call allocation peaks
+
+    Returns:
+        StageResult rounded to 3 decimals
+    """
+    return StageResult(
+        stage=stage,
+        iterations=len(samples_ms),
+        p50_ms=round(percentile(samples_ms, 50), 3),
+        p95_ms=round(percentile(samples_ms, 95), 3),
+        p99_ms=round(percentile(samples_ms, 99), 3),
+        mean_ms=round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else 0.0,
+        alloc_peak_kb=round(percentile(alloc_kb, 50), 1),
+    )
+
+
+def compare_to_baseline(
+    report: BenchmarkReport,
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """
+    Find stages that got slower or allocate more than the baseline.
+
+    p50 and p95 are gated; p99 is reported but too noisy at CI iteration
+    counts to fail a build on.
+
+    Args:
+        report: Current run
+        baseline: Stored report (BenchmarkReport.to_dict())
+        tolerance: Allowed relative increase (0.25 = 25%)
+
+    Returns:
+        One message per regressed metric (empty when within budget)
+    """
+    regressions = []
+    baseline_stages = baseline.get("stages", {})
+    for name, result in report.stages.items():
+        base = baseline_stages.get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            current, previous = getattr(result, metric), base[metric]
+            if current > previous * (1 + tolerance) + MIN_REGRESSION_MS:
+                regressions.append(
+                    f"{name} {metric}: {current:.2f}ms vs baseline {previous:.2f}ms "
+                    f"(+{(current / previous - 1) * 100 if previous else 100:.0f}%)"
+                )
+        current, previous = result.alloc_peak_kb, base.get("alloc_peak_kb", 0.0)
+        if previous and current > previous * (1 + tolerance) + MIN_REGRESSION_KB:
+            regressions.append(f"{name} alloc_peak_kb: {current:.1f}KB vs baseline {previous:.1f}KB")
+    return regressions
+
+
+# ═══════════════════════════════════════════════════════════════════
+# ENVIRONMENT
+# ═══════════════════════════════════════════════════════════════════
+
+@contextlib.contextmanager
+def _override_settings(**values: Any) -> Iterator[None]:
+    from shared.config import settings
+
+    saved = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+@dataclass
+class BenchmarkContext:
+    """Seeded database and agents wired to the local stand-ins."""
+    db: Any
+    coordinator: Any
+    memory: Any
+    embedder: HashEmbedder
+    llm: ScriptedLLM
+    transcripts: List[Dict[str, Any]]
+    user_id: str
+
+
+@contextlib.contextmanager
+def benchmark_environment(
+    mongodb_uri: Optional[str] = None,
+    transcripts: Optional[Sequence[str]] = None
+) -> Iterator[BenchmarkContext]:
+    """
+    Seed a local database and route the agents to the stand-ins.
+
+    Args:
+        mongodb_uri: Local mongod to use instead of mongomock
+        transcripts: Transcript names to replay (default: all)
+
+    Yields:
+        BenchmarkContext; everything is restored on exit
+    """
+    from agents.coordinator import CoordinatorAgent
+    from memory import MemoryManager
+    from scripts.demo.seed_demo_data import DEMO_USER_ID, seed_all
+    from shared.db import mongodb
+    from shared.embeddings import EmbeddingService, embed_query
+    from shared.llm import LLMService
+    from shared.services import services
+    from shared.vector_index import get_vector_index_registry, reset_vector_index_registry
+
+    recorded = load_transcripts(transcripts)
+    db = open_benchmark_db(mongodb_uri)
+    embedder = HashEmbedder()
+    scripted = ScriptedLLM(recorded)
+    # No embedding cache: every call pays the (local) embedding cost
+    embedding = EmbeddingService(client=embedder, async_client=AsyncHashEmbedder(embedder))
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(_override_settings(
+            vector_index_mode="local",  # $vectorSearch needs Atlas
+            trace_export_path="",
+        ))
+        # The registry captures its mode and keys indexes by collection name:
+        # rebuild it for the seeded database, and again from settings on exit
+        reset_vector_index_registry()
+        stack.callback(reset_vector_index_registry)
+        registry = get_vector_index_registry()
+        if registry is not None and not mongodb_uri:
+            # mongomock lacks operators the server follow-up pipeline uses
+            registry.local_runner = mongomock_local_runner
+        stack.enter_context(mongodb.use_database(db))
+        stack.enter_context(services.override(
+            llm_service=LLMService(client=scripted),
+            embedding_service=embedding,
+        ))
+        memory = MemoryManager(db, embed_query)
+        stack.enter_context(services.override(memory_manager=memory))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_all(db, clean=True)
+
+        coordinator = CoordinatorAgent(memory_manager=memory, db=db)
+        coordinator.set_session(BENCHMARK_SESSION, DEMO_USER_ID)
+        yield BenchmarkContext(db, coordinator, memory, embedder, scripted, recorded, DEMO_USER_ID)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# STAGES
+# ═══════════════════════════════════════════════════════════════════
+
+def _stage_operations(ctx: BenchmarkContext) -> Dict[str, Callable[[], Any]]:
+    """One zero-argument callable per stage; each call is one sample."""
+    from agents.coordinator import READ_ONLY_TOOLS
+    from agents.retrieval import retrieval_agent
+
+    queries = itertools.cycle(RETRIEVAL_QUERIES)
+    tool_calls = itertools.cycle([
+        (block["name"], block["input"])
+        for transcript in ctx.transcripts
+        for response in transcript["responses"]
+        for block in response["content"]
+        if block["type"] == "tool_use" and block["name"] in READ_ONLY_TOOLS
+    ])
+    transcripts = itertools.cycle(ctx.transcripts)
+    counter = itertools.count(1)
+
+    def retrieval():
+        query = next(queries)
+        retrieval_agent.vector_search_tasks(query, limit=5)
+        retrieval_agent.vector_search_projects(query, limit=3)
+
+    def tool_execution():
+        name, tool_input = next(tool_calls)
+        ctx.coordinator._run_tool(name, dict(tool_input))
+
+    def memory_write():
+        n = next(counter)
+        ctx.memory.update_session_context(
+            BENCHMARK_SESSION, {"current_project": "Project Alpha", "last_action": f"benchmark-{n}"}, ctx.user_id
+        )
+        ctx.memory.record_action(
+            ctx.user_id, BENCHMARK_SESSION, "update", "task",
+            {"title": f"Benchmark task {n % 10}", "project_name": "Project Alpha"},
+            metadata={"field": "status", "new_value": "in_progress"}
+        )
+
+    def turn():
+        transcript = next(transcripts)
+        ctx.coordinator.process(transcript["user_message"], turn_number=next(counter), session_id=BENCHMARK_SESSION)
+
+    return {
+        "retrieval": retrieval,
+        "context_injection": ctx.coordinator._build_memory_layers,
+        "tool_execution": tool_execution,
+        "memory_write": memory_write,
+        "turn": turn,
+    }
+
+
+def measure(operation: Callable[[], Any], iterations: int, warmup: int = 3) -> List[float]:
+    """
+    Time repeated calls.
+
+    Args:
+        operation: Zero-argument callable
+        iterations: Timed calls
+        warmup: Untimed calls first (imports, index builds, caches)
+
+    Returns:
+        Per-call latency in milliseconds
+    """
+    for _ in range(warmup):
+        operation()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        operation()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return samples
+
+
+def measure_cold_import(runs: int) -> List[float]:
+    """
+    Time importing the coordinator in fresh interpreters.
+
+    Args:
+        runs: Number of subprocesses
+
+    Returns:
+        Per-run import latency in milliseconds (interpreter startup excluded)
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_IMPORT_PROBE],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True, timeout=120
+        )
+        samples.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return samples
+
+
+def measure_allocations(operation: Callable[[], Any], iterations: int) -> List[float]:
+    """
+    Peak memory allocated per call, in KB (tracemalloc).
+
+    Args:
+        operation: Zero-argument callable
+        iterations: Calls to measure
+
+    Returns:
+        Per-call peak above the pre-call level
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_benchmark(
+    iterations: int = 50,
+    alloc_iterations: int = 10,
+    stages: Sequence[str] = STAGES,
+    mongodb_uri: Optional[str] = None,
+    transcripts: Optional[Sequence[str]] = None
+) -> BenchmarkReport:
+    """
+    Run the selected stages against the local stand-ins.
+
+    Args:
+        iterations: Timed calls per stage
+        alloc_iterations: Calls per stage under tracemalloc (0 skips)
+        stages: Stage names (see STAGES)
+        mongodb_uri: Local mongod to use instead of mongomock
+        transcripts: Transcript names to replay (default: all)
+
+    Returns:
+        BenchmarkReport
+    """
+    report = BenchmarkReport(backend="mongod" if mongodb_uri else "mongomock")
+    in_process = [stage for stage in stages if stage != "cold_import"]
+    if in_process:
+        with benchmark_environment(mongodb_uri, transcripts) as ctx:
+            operations = _stage_operations(ctx)
+            for stage in in_process:
+                samples = measure(operations[stage], iterations)
+                allocations = measure_allocations(operations[stage], alloc_iterations) if alloc_iterations else []
+                report.stages[stage] = summarize(stage, samples, allocations)
+    if "cold_import" in stages:
+        report.stages["cold_import"] = summarize(
+            "cold_import", measure_cold_import(min(iterations, COLD_IMPORT_RUNS))
+        )
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════════
+
+def format_report(report: BenchmarkReport, baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Render the report as a table, with the baseline p95 when available."""
+    base_stages = (baseline or {}).get("stages", {})
+    lines = [
+        f"{'stage':<18} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'alloc KB':>9} {'base p95':>9}",
+        "-" * 68,
+    ]
+    for name, r in report.stages.items():
+        base = base_stages.get(name, {}).get("p95_ms")
+        base_text = f"{base:>9.2f}" if base is not None else f"{'-':>9}"
+        lines.append(
+            f"{name:<18} {r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.p99_ms:>9.2f} {r.alloc_peak_kb:>9.1f} {base_text}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline latency benchmark (no network)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per stage")
+    parser.add_argument("--alloc-iterations", type=int, default=10, help="Calls per stage under tracemalloc (0 skips)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--transcripts", nargs="+", help="Transcript names to replay (default: all)")
+    parser.add_argument("--mongodb-uri", help="Local mongod instead of mongomock (database is dropped)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.iterations, args.alloc_iterations, args.stages, args.mongodb_uri, args.transcripts)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+
+    print(format_report(report, baseline))
+    if args.output:
+        args.output.write_text(json.dumps(report.to_dict(), indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report.to_dict(), indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  ✗ {message}")
+        return 1
+
+    print(f"\n✓ Within {args.tolerance * 100:.0f}% of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Deterministic local stand-ins for Voyage AI, Anthropic and MongoDB Atlas.
+
+Used by the offline benchmark (evals/benchmark.py) so latency numbers measure
+this codebase rather than the network:
+
+- HashEmbedder: feature-hashing embedder with Voyage's embed() interface.
+  Texts sharing words get similar vectors, so vector search still ranks.
+- ScriptedLLM: Anthropic messages.create() stand-in replaying recorded
+  tool-use transcripts (evals/transcripts/*.json).
+- open_benchmark_db(): mongomock by default, or a local mongod by URI.
+- mongomock_local_runner(): local vector search follow-up for mongomock.
+"""
+
+import hashlib
+import json
+import math
+import re
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+TRANSCRIPTS_DIR = Path(__file__).parent / "transcripts"
+
+BENCHMARK_DATABASE = "flow_companion_benchmark"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# EMBEDDINGS
+# ═══════════════════════════════════════════════════════════════════
+
+class HashEmbedder:
+    """Voyage-compatible client returning hashed bag-of-words vectors."""
+
+    def __init__(self, dimensions: int = 1024):
+        """
+        Args:
+            dimensions: Vector size (1024 matches voyage-3 and the Atlas indexes)
+        """
+        self.dimensions = dimensions
+        self.calls = 0
+        self.texts = 0
+
+    def embed_one(self, text: str) -> List[float]:
+        """
+        Embed one text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length vector; the same text always gives the same vector
+        """
+        vector = [0.0] * self.dimensions
+        tokens = _TOKEN.findall(text.lower()) or [""]
+        for token in tokens:
+            digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed(self, texts: List[str], model: str = None, input_type: str = None) -> SimpleNamespace:
+        """Same call shape and result as voyageai.Client.embed."""
+        self.calls += 1
+        self.texts += len(texts)
+        return SimpleNamespace(embeddings=[self.embed_one(text) for text in texts])
+
+
+class AsyncHashEmbedder:
+    """voyageai.AsyncClient counterpart of HashEmbedder."""
+
+    def __init__(self, embedder: HashEmbedder):
+        self.embedder = embedder
+
+    async def embed(self, texts: List[str], model: str = None, input_type: str = None) -> SimpleNamespace:
+        return self.embedder.embed(texts, model, input_type)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# LLM
+# ═══════════════════════════════════════════════════════════════════
+
+def load_transcripts(names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Load recorded tool-use transcripts.
+
+    Each file holds {"name", "user_message", "responses": [...]}, where every
+    response is {"content": [text/tool_use blocks], "stop_reason", "usage"}.
+
+    Args:
+        names: Transcript names (file stems) to load (default: all)
+
+    Returns:
+        Transcripts sorted by name
+    """
+    paths = sorted(TRANSCRIPTS_DIR.glob("*.json"))
+    if names:
+        paths = [p for p in paths if p.stem in names]
+    return [json.loads(p.read_text()) for p in paths]
+
+
+def _user_text(message: Dict[str, Any]) -> Optional[str]:
+    """The text of a user message, or None for tool_result messages."""
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list) and content and all(isinstance(b, dict) and b.get("type") == "text" for b in content):
+        return "".join(b["text"] for b in content)
+    return None
+
+
+class ScriptedLLM:
+    """Anthropic client stand-in that replays recorded transcripts.
+
+    The transcript is chosen by the latest user text message and the step by
+    the number of assistant messages after it, so replay is stateless and
+    safe to share between threads. Calls without tools (multi-step parsing,
+    summaries) get `completion` back as plain text.
+    """
+
+    def __init__(self, transcripts: Sequence[Dict[str, Any]], completion: str = "{}"):
+        """
+        Args:
+            transcripts: Transcripts from load_transcripts()
+            completion: Text returned for calls without tools
+        """
+        self.transcripts = {t["user_message"]: t for t in transcripts}
+        self.completion = completion
+        self.messages = self  # client.messages.create(...)
+        self.calls = 0
+
+    def create(self, **params: Any) -> SimpleNamespace:
+        """Same call shape as anthropic.Anthropic().messages.create."""
+        self.calls += 1
+        model = params.get("model", "scripted")
+        if not params.get("tools"):
+            return self._response(model, [{"type": "text", "text": self.completion}], "end_turn", {})
+
+        messages = params["messages"]
+        start = max(i for i, m in enumerate(messages) if m["role"] == "user" and _user_text(m) is not None)
+        user_message = _user_text(messages[start])
+        transcript = self.transcripts.get(user_message)
+        if transcript is None:
+            raise KeyError(f"No recorded transcript for user message {user_message!r}")
+
+        step = sum(1 for m in messages[start:] if m["role"] == "assistant")
+        responses = transcript["responses"]
+        if step >= len(responses):
+            return self._response(model, [{"type": "text", "text": "Done."}], "end_turn", {})
+        recorded = responses[step]
+        return self._response(model, recorded["content"], recorded.get("stop_reason", "end_turn"),
+                              recorded.get("usage", {}), step)
+
+    @staticmethod
+    def _response(model: str, content: List[Dict[str, Any]], stop_reason: str,
+                  usage: Dict[str, int], step: int = 0) -> SimpleNamespace:
+        blocks = []
+        for i, block in enumerate(content):
+            if block["type"] == "tool_use":
+                blocks.append(SimpleNamespace(type="tool_use", id=f"toolu_{step}_{i}",
+                                              name=block["name"], input=dict(block.get("input", {}))))
+            else:
+                blocks.append(SimpleNamespace(type="text", text=block["text"]))
+        return SimpleNamespace(
+            id=f"msg_scripted_{step}",
+            type="message",
+            role="assistant",
+            model=model,
+            content=blocks,
+            stop_reason=stop_reason,
+            usage=SimpleNamespace(
+                input_tokens=usage.get("input_tokens", 0),
+                output_tokens=usage.get("output_tokens", 0),
+                cache_read_input_tokens=usage.get("cache_read_input_tokens", 0),
+                cache_creation_input_tokens=usage.get("cache_creation_input_tokens", 0),
+            ),
+        )
+
+
+# ═══════════════════════════════════════════════════════════════════
+# DATABASE
+# ═══════════════════════════════════════════════════════════════════
+
+def open_benchmark_db(uri: Optional[str] = None):
+    """
+    Open an empty database for the benchmark.
+
+    Args:
+        uri: MongoDB URI of a local mongod (default: in-memory mongomock)
+
+    Returns:
+        Database handle (dropped first when it's a real server)
+
+    Raises:
+        RuntimeError: If no URI is given and mongomock isn't installed
+    """
+    if uri:
+        from pymongo import MongoClient
+
+        client = MongoClient(uri)
+        client.drop_database(BENCHMARK_DATABASE)
+        return client[BENCHMARK_DATABASE]
+
+    try:
+        import mongomock
+    except ImportError as e:
+        raise RuntimeError("Install mongomock (pip install mongomock) or pass --mongodb-uri") from e
+    return mongomock.MongoClient()[BENCHMARK_DATABASE]
+
+
+def mongomock_local_runner(collection, hits: List[Tuple[Hashable, float]], stages: List[dict]) -> List[dict]:
+    """
+    Run a local vector search's follow-up stages on mongomock.
+
+    mongomock implements neither $indexOfArray nor $unset, which the server
+    pipeline in VectorIndexRegistry._local_search uses to attach and drop the
+    score, so the score is attached and dropped in Python around the stages.
+
+    The stages run through mongomock.aggregate.process_pipeline, which is not
+    public API (hence the exact pin in requirements.txt). Copying the hits
+    into a scratch collection and calling aggregate() instead would deep-copy
+    every stored vector per call and dominate the retrieval stage timings.
+
+    Args:
+        collection: mongomock Collection
+        hits: (_id, score) pairs, best first
+        stages: Follow-up stages reading the score from SCORE_FIELD
+
+    Returns:
+        Aggregation results
+    """
+    from mongomock.aggregate import process_pipeline
+
+    from shared.vector_index import SCORE_FIELD
+
+    scores = dict(hits)
+    docs = list(collection.find({"_id": {"$in": list(scores)}}))
+    for doc in docs:
+        doc[SCORE_FIELD] = scores[doc["_id"]]
+    docs.sort(key=lambda doc: doc[SCORE_FIELD], reverse=True)
+
+    results = list(process_pipeline(docs, collection.database, stages, None))
+    for doc in results:
+        doc.pop(SCORE_FIELD, None)
+    return results
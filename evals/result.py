@@ -10,6 +10,7 @@ class ConfigResult:
     """Result of a single test with one configuration."""
     config_key: str
     latency_ms: int = 0
+    ttft_ms: Optional[int] = None  # Time to first streamed token
     llm_time_ms: Optional[int] = None
     tool_time_ms: Optional[int] = None
     embedding_time_ms: Optional[int] = None
@@ -21,12 +22,18 @@ class ConfigResult:
     tools_called: List[str] = field(default_factory=list)
     response: str = ""
     error: Optional[str] = None
+    retries: int = 0  # Rate-limited attempts before this result
     result: str = "pending"  # pending | pass | partial | fail
     rating: int = 0
 
     def to_dict(self) -> dict:
         return asdict(self)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConfigResult":
+        """Rebuild a result saved with to_dict (unknown keys are ignored)."""
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
 
 @dataclass
 class TestComparison:
@@ -115,6 +122,7 @@ class ComparisonRun:
         """Compute aggregate summaries per config."""
         for config_key in self.configs_compared:
             latencies = []
+            ttfts = []
             tokens_in = []
             tokens_out = []
             llm_times = []
@@ -126,6 +134,8 @@ class ComparisonRun:
                 if config_key in test.results_by_config:
                     result = test.results_by_config[config_key]
                     latencies.append(result.latency_ms)
+                    if result.ttft_ms is not None:
+                        ttfts.append(result.ttft_ms)
                     if result.tokens_in:
                         tokens_in.append(result.tokens_in)
                     if result.tokens_out:
@@ -140,6 +150,7 @@ class ComparisonRun:
 
             self.summary_by_config[config_key] = {
                 "avg_latency_ms": round(sum(latencies) / len(latencies)) if latencies else 0,
+                "avg_ttft_ms": round(sum(ttfts) / len(ttfts)) if ttfts else 0,
                 "avg_tokens_in": round(sum(tokens_in) / len(tokens_in)) if tokens_in else 0,
                 "avg_tokens_out": round(sum(tokens_out) / len(tokens_out)) if tokens_out else 0,
                 "avg_llm_time_ms": round(sum(llm_times) / len(llm_times)) if llm_times else 0,
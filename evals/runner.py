@@ -1,35 +1,121 @@
-"""Test runner for multi-config comparisons."""
-
+"""Test runner for multi-config comparisons.
+
+Tests that share conversation history (a test and everything that
+`depends_on` it) form a chain. Each chain runs once per config, in order and
+with its own history, so with `workers` > 1 chains fan out across isolated
+coordinator instances while multi-turn tests still see the turns they depend
+on. Rate-limited LLM calls back off (all workers pause together, since the
+limit is per API key), and with `persist` every finished result is saved as
+it lands so a crashed run can be resumed by run_id.
+"""
+
+import queue
+import random
+import threading
 import time
-from typing import List, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 from evals.test_suite import TestQuery, InputType, TEST_SUITE, get_test_by_id
 from evals.result import ConfigResult, TestComparison, ComparisonRun
 from evals.configs import get_optimizations
+from evals import storage
+from shared.config import settings
+from shared.logger import get_logger
+
+logger = get_logger("evals.runner")
+
+# Too Many Requests, and Anthropic's "overloaded" status
+RATE_LIMIT_STATUS_CODES = {429, 529}
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an LLM/embedding error is a rate limit worth retrying."""
+    if getattr(error, "status_code", None) in RATE_LIMIT_STATUS_CODES:
+        return True
+    return type(error).__name__ in ("RateLimitError", "OverloadedError")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The server's Retry-After hint in seconds, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+def build_chains(tests: List[TestQuery]) -> List[List[TestQuery]]:
+    """
+    Group tests into chains that share conversation history.
+
+    A test joins the chain of the test it depends on when that test is part
+    of the run; otherwise it starts a new chain with empty history.
+
+    Args:
+        tests: Tests in suite order
+
+    Returns:
+        Chains in order of their first test, each in suite order
+    """
+    chains: List[List[TestQuery]] = []
+    chain_of: Dict[int, List[TestQuery]] = {}
+    for test in tests:
+        chain = chain_of.get(test.depends_on) if test.depends_on is not None else None
+        if chain is None:
+            chain = []
+            chains.append(chain)
+        chain.append(test)
+        chain_of[test.id] = chain
+    return chains
 
 
 class ComparisonRunner:
     """Runs tests across multiple configurations."""
 
-    def __init__(self, coordinator, progress_callback: Callable = None):
+    def __init__(
+        self,
+        coordinator,
+        progress_callback: Callable = None,
+        coordinator_factory: Optional[Callable] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff_seconds: Optional[float] = None
+    ):
         """
         Args:
             coordinator: The coordinator agent instance
-            progress_callback: Optional callback(current, total, message)
+            progress_callback: Optional callback(current, total, message), always
+                called from the thread that called run_comparison()
+            coordinator_factory: Builds one coordinator per parallel worker
+                (default: a fresh CoordinatorAgent sharing `coordinator`'s memory)
+            max_retries: Retries for a rate-limited test (default: EVAL_MAX_RETRIES)
+            retry_backoff_seconds: First retry delay when the server gives no
+                Retry-After, doubling per attempt (default: EVAL_RETRY_BACKOFF_SECONDS)
         """
         self.coordinator = coordinator
         self.progress_callback = progress_callback
-        self.conversation_history = []
-
-    def clear_history(self):
-        """Clear conversation history."""
-        self.conversation_history = []
+        self.coordinator_factory = coordinator_factory or self._clone_coordinator
+        self.max_retries = settings.eval_max_retries if max_retries is None else max_retries
+        self.retry_backoff_seconds = (
+            settings.eval_retry_backoff_seconds if retry_backoff_seconds is None else retry_backoff_seconds
+        )
+
+        # Shared by all workers: a rate limit applies to the whole API key
+        self._cooldown_lock = threading.Lock()
+        self._cooldown_until = 0.0
+        self._worker_state = threading.local()
+        self._worker_coordinators: List[Any] = []
+        self._worker_coordinators_lock = threading.Lock()
 
     def run_comparison(
         self,
         config_keys: List[str],
         test_ids: Optional[List[int]] = None,
-        skip_voice: bool = True
+        skip_voice: bool = True,
+        workers: Optional[int] = None,
+        persist: bool = False,
+        resume_run_id: Optional[str] = None
     ) -> ComparisonRun:
         """
         Run all tests across multiple configurations.
@@ -38,6 +124,11 @@ class ComparisonRunner:
             config_keys: List of config keys to compare
             test_ids: Optional specific test IDs (default: all)
             skip_voice: Skip voice tests
+            workers: Chains run at once, each worker with its own coordinator;
+                1 runs everything on `coordinator` (default: EVAL_WORKERS)
+            persist: Save each result to MongoDB as it finishes (see evals/storage.py)
+            resume_run_id: Continue a persisted run: chains whose results were all
+                saved without errors are reused, the rest run again (implies persist)
 
         Returns:
             ComparisonRun with all results
@@ -48,62 +139,176 @@ class ComparisonRunner:
         else:
             tests = [t for t in TEST_SUITE if not (skip_voice and t.input_type == InputType.VOICE)]
 
-        # Create run
-        run = ComparisonRun(configs_compared=config_keys)
-
-        total_ops = len(tests) * len(config_keys)
-        current_op = 0
+        workers = max(1, settings.eval_workers if workers is None else workers)
+        persist = persist or resume_run_id is not None
 
-        # For each test, run across all configs
-        for test in tests:
-            comparison = TestComparison(
+        # Create run
+        run = ComparisonRun(run_id=resume_run_id or "", configs_compared=config_keys)
+        comparisons = {
+            test.id: TestComparison(
                 test_id=test.id,
                 query=test.query,
                 section=test.section.value,
                 input_type=test.input_type.value,
                 expected=test.expected
             )
+            for test in tests
+        }
+        run.tests = list(comparisons.values())
+
+        saved = storage.load_partial_results(resume_run_id) if resume_run_id else {}
+        if persist:
+            try:
+                storage.start_comparison_run(run)
+            except Exception as e:
+                logger.warning("Eval results won't be saved as they finish: %s", e)
+                persist = False
 
-            for config_key in config_keys:
-                current_op += 1
-                if self.progress_callback:
-                    self.progress_callback(
-                        current_op, total_ops,
-                        f"Test #{test.id} with {config_key}"
-                    )
+        total_ops = len(tests) * len(config_keys)
+        current_op = 0
 
-                # Get optimizations for this config
-                optimizations = get_optimizations(config_key)
+        # One unit of work per chain and config; reuse fully saved units when resuming
+        units: List[Tuple[List[TestQuery], str]] = []
+        for chain in build_chains(tests):
+            for config_key in config_keys:
+                previous = [saved.get(test.id, {}).get(config_key) for test in chain]
+                if all(doc and not doc.get("error") for doc in previous):
+                    for test, doc in zip(chain, previous):
+                        comparisons[test.id].add_result(config_key, ConfigResult.from_dict(doc))
+                    current_op += len(chain)
+                else:
+                    units.append((chain, config_key))
+
+        def record(test: TestQuery, config_key: str, result: ConfigResult):
+            nonlocal current_op
+            current_op += 1
+            comparisons[test.id].add_result(config_key, result)
+            if persist:
+                try:
+                    storage.save_partial_result(run.run_id, test.id, config_key, result)
+                except Exception as e:
+                    logger.warning("Failed to save result of test #%s with %s: %s", test.id, config_key, e)
+            if self.progress_callback:
+                self.progress_callback(
+                    current_op, total_ops,
+                    f"Test #{test.id} with {config_key}"
+                )
 
-                # Run the test
-                result = self._run_single_test(test, optimizations, config_key)
-                comparison.add_result(config_key, result)
+        if workers == 1 or len(units) <= 1:
+            for chain, config_key in units:
+                self._run_chain(chain, config_key, self.coordinator, record)
+        else:
+            self._run_parallel(run.run_id, units, workers, record)
 
-            run.tests.append(comparison)
+        # Keep the selected config order regardless of completion order
+        for comparison in run.tests:
+            comparison.results_by_config = {
+                key: comparison.results_by_config[key]
+                for key in config_keys if key in comparison.results_by_config
+            }
 
         # Compute summaries
         run.compute_summaries()
 
         return run
 
+    def _run_parallel(
+        self,
+        run_id: str,
+        units: List[Tuple[List[TestQuery], str]],
+        workers: int,
+        record: Callable
+    ):
+        """Run chains on a worker pool, recording results on this thread."""
+        finished: "queue.Queue" = queue.Queue()
+        done = object()
+
+        def run_unit(chain: List[TestQuery], config_key: str):
+            try:
+                session_id = f"{run_id}-{config_key}-t{chain[0].id}"
+                self._run_chain(
+                    chain, config_key, self._worker_coordinator(),
+                    lambda test, key, result: finished.put((test, key, result)),
+                    session_id=session_id
+                )
+            finally:
+                finished.put(done)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eval-worker") as pool:
+            futures = [pool.submit(run_unit, chain, config_key) for chain, config_key in units]
+            remaining = len(futures)
+            while remaining:
+                item = finished.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    record(*item)
+            try:
+                for future in futures:
+                    future.result()  # Surface unexpected worker errors
+            finally:
+                self._close_worker_coordinators()
+
+    def _worker_coordinator(self):
+        """This worker thread's own coordinator (built on first use)."""
+        coordinator = getattr(self._worker_state, "coordinator", None)
+        if coordinator is None:
+            coordinator = self.coordinator_factory()
+            self._worker_state.coordinator = coordinator
+            with self._worker_coordinators_lock:
+                self._worker_coordinators.append(coordinator)
+        return coordinator
+
+    def _close_worker_coordinators(self):
+        """Release the per-worker coordinators' resources (their tool pools)."""
+        with self._worker_coordinators_lock:
+            coordinators, self._worker_coordinators = self._worker_coordinators, []
+        for coordinator in coordinators:
+            close = getattr(coordinator, "close", None)
+            if close is not None:
+                close()
+
+    def _clone_coordinator(self):
+        """A fresh coordinator sharing the base coordinator's memory and database."""
+        base = self.coordinator
+        if base is None:
+            return None
+        clone = type(base)(memory_manager=base.memory, db=base.db)
+        clone.user_id = base.user_id
+        clone.memory_config = dict(base.memory_config)
+        return clone
+
+    def _run_chain(
+        self,
+        chain: List[TestQuery],
+        config_key: str,
+        coordinator,
+        on_result: Callable,
+        session_id: Optional[str] = None
+    ):
+        """Run a chain of dependent tests with one config and a fresh history."""
+        optimizations = get_optimizations(config_key)
+        history: List[dict] = []
+        for test in chain:
+            result = self._run_single_test(test, optimizations, config_key, coordinator, history, session_id)
+            on_result(test, config_key, result)
+
     def _run_single_test(
         self,
         test: TestQuery,
         optimizations: dict,
-        config_key: str
+        config_key: str,
+        coordinator,
+        history: List[dict],
+        session_id: Optional[str] = None
     ) -> ConfigResult:
         """Run a single test with given optimizations."""
-
-        # Reset history for non-dependent tests
-        if test.depends_on is None:
-            self.clear_history()
-
         if test.input_type == InputType.SLASH:
-            return self._run_slash_test(test, config_key)
+            return self._run_slash_test(test, config_key, coordinator)
         else:
-            return self._run_llm_test(test, optimizations, config_key)
+            return self._run_llm_test(test, optimizations, config_key, coordinator, history, session_id)
 
-    def _run_slash_test(self, test: TestQuery, config_key: str) -> ConfigResult:
+    def _run_slash_test(self, test: TestQuery, config_key: str, coordinator) -> ConfigResult:
         """Run slash command (no LLM, no optimizations apply)."""
         start_time = time.time()
 
@@ -119,7 +324,7 @@ class ComparisonRunner:
                     result="fail"
                 )
 
-            executor = SlashCommandExecutor(self.coordinator)
+            executor = SlashCommandExecutor(coordinator)
             result_data = executor.execute(parsed)
 
             latency_ms = int((time.time() - start_time) * 1000)
@@ -144,53 +349,90 @@ class ComparisonRunner:
         self,
         test: TestQuery,
         optimizations: dict,
-        config_key: str
+        config_key: str,
+        coordinator,
+        history: List[dict],
+        session_id: Optional[str] = None
     ) -> ConfigResult:
-        """Run LLM test with given optimizations."""
-        start_time = time.time()
-
-        if not self.coordinator:
+        """Run LLM test with given optimizations, retrying when rate limited."""
+        if not coordinator:
             return ConfigResult(
                 config_key=config_key,
                 error="No coordinator",
                 result="fail"
             )
 
-        try:
-            response_data = self.coordinator.process(
-                user_message=test.query,
-                conversation_history=self.conversation_history,
-                optimizations=optimizations,
-                return_debug=True
-            )
-
-            latency_ms = int((time.time() - start_time) * 1000)
-            response_text = response_data.get("response", "")
-            debug_info = response_data.get("debug", {})
+        attempt = 0
+        while True:
+            self._wait_for_cooldown()
+            # Time each attempt on its own so backoff isn't counted as latency
+            start_time = time.time()
+            try:
+                # Stream so time-to-first-token is measured the way users see it;
+                # the chunks are only timed, the response is process()'s final text
+                debug_info = {}
+                ttft_ms = None
+                for chunk, chunk_debug in coordinator.process_stream(
+                    user_message=test.query,
+                    conversation_history=history,
+                    optimizations=optimizations,
+                    session_id=session_id
+                ):
+                    if chunk and ttft_ms is None:
+                        ttft_ms = int((time.time() - start_time) * 1000)
+                    if chunk_debug:
+                        debug_info = chunk_debug
+
+                latency_ms = int((time.time() - start_time) * 1000)
+                response_text = (debug_info.get("response") or "").strip()
+
+                # Update history for dependent tests
+                history.append({"role": "user", "content": test.query})
+                history.append({"role": "assistant", "content": response_text})
 
-            # Update history for dependent tests
-            self.conversation_history.append({"role": "user", "content": test.query})
-            self.conversation_history.append({"role": "assistant", "content": response_text})
+                return ConfigResult(
+                    config_key=config_key,
+                    latency_ms=latency_ms,
+                    ttft_ms=ttft_ms if ttft_ms is not None else latency_ms,
+                    llm_time_ms=debug_info.get("llm_time_ms"),
+                    tool_time_ms=debug_info.get("tool_time_ms"),
+                    embedding_time_ms=debug_info.get("embedding_time_ms"),
+                    mongodb_time_ms=debug_info.get("mongodb_time_ms"),
+                    processing_time_ms=debug_info.get("processing_time_ms"),
+                    tokens_in=debug_info.get("tokens_in"),
+                    tokens_out=debug_info.get("tokens_out"),
+                    cache_hit=debug_info.get("cache_hit", False),
+                    tools_called=debug_info.get("tools_called", []),
+                    response=response_text[:500] if response_text else "",
+                    retries=attempt,
+                    result="pass"  # TODO: Auto-evaluate based on expected
+                )
+            except Exception as e:
+                if is_rate_limited(e) and attempt < self.max_retries:
+                    self._back_off(e, attempt)
+                    attempt += 1
+                    continue
+                return ConfigResult(
+                    config_key=config_key,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    error=str(e),
+                    retries=attempt,
+                    result="fail"
+                )
 
-            return ConfigResult(
-                config_key=config_key,
-                latency_ms=latency_ms,
-                llm_time_ms=debug_info.get("llm_time_ms"),
-                tool_time_ms=debug_info.get("tool_time_ms"),
-                embedding_time_ms=debug_info.get("embedding_time_ms"),
-                mongodb_time_ms=debug_info.get("mongodb_time_ms"),
-                processing_time_ms=debug_info.get("processing_time_ms"),
-                tokens_in=debug_info.get("tokens_in"),
-                tokens_out=debug_info.get("tokens_out"),
-                cache_hit=debug_info.get("cache_hit", False),
-                tools_called=debug_info.get("tools_called", []),
-                response=response_text[:500] if response_text else "",
-                result="pass"  # TODO: Auto-evaluate based on expected
-            )
-        except Exception as e:
-            return ConfigResult(
-                config_key=config_key,
-                latency_ms=int((time.time() - start_time) * 1000),
-                error=str(e),
-                result="fail"
-            )
+    def _back_off(self, error: Exception, attempt: int):
+        """Pause every worker for Retry-After, or exponential backoff with jitter."""
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = self.retry_backoff_seconds * (2 ** attempt) * random.uniform(1.0, 1.25)
+        with self._cooldown_lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    def _wait_for_cooldown(self):
+        """Block until no rate-limit cooldown is in effect."""
+        while True:
+            with self._cooldown_lock:
+                remaining = self._cooldown_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
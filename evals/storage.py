@@ -1,10 +1,16 @@
-"""MongoDB storage for eval comparison runs."""
+"""MongoDB storage for eval comparison runs.
+
+A run in progress is a document with status "running" and a
+`partial_results.<test_id>.<config_key>` entry per finished result, written
+as each result lands. save_comparison_run() replaces it with the complete
+run (status "complete").
+"""
 
 from datetime import datetime
-from typing import Optional, List
-from bson import ObjectId
+from typing import Dict, Optional, List
+from pymongo import ReturnDocument
 
-from evals.result import ComparisonRun
+from evals.result import ComparisonRun, ConfigResult
 
 
 def get_evals_collection():
@@ -18,17 +24,80 @@ def save_comparison_run(run: ComparisonRun) -> str:
     """
     Save a comparison run to MongoDB.
 
+    Replaces the run's in-progress document (and its partial results) when
+    there is one.
+
     Returns:
-        The inserted document ID
+        The document ID
     """
     collection = get_evals_collection()
 
     doc = run.to_dict()
-    doc["_id"] = ObjectId()
+    doc["status"] = "complete"
     doc["saved_at"] = datetime.utcnow()
 
-    result = collection.insert_one(doc)
-    return str(result.inserted_id)
+    saved = collection.find_one_and_replace(
+        {"run_id": run.run_id},
+        doc,
+        projection={"_id": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return str(saved["_id"])
+
+
+def start_comparison_run(run: ComparisonRun) -> None:
+    """Create the in-progress document for a run (kept as is when resuming)."""
+    collection = get_evals_collection()
+    collection.update_one(
+        {"run_id": run.run_id},
+        {"$setOnInsert": {
+            "run_id": run.run_id,
+            "timestamp": run.timestamp,
+            "configs_compared": run.configs_compared,
+            "status": "running",
+            "partial_results": {},
+            "saved_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+
+def save_partial_result(run_id: str, test_id: int, config_key: str, result: ConfigResult) -> None:
+    """Save one finished test result of a run in progress."""
+    collection = get_evals_collection()
+    collection.update_one(
+        {"run_id": run_id},
+        {"$set": {
+            f"partial_results.{test_id}.{config_key}": result.to_dict(),
+            "saved_at": datetime.utcnow()
+        }}
+    )
+
+
+def load_partial_results(run_id: str) -> Dict[int, Dict[str, dict]]:
+    """
+    Load the results saved so far for a run in progress.
+
+    Returns:
+        {test_id: {config_key: ConfigResult dict}} (empty if none were saved)
+    """
+    collection = get_evals_collection()
+    doc = collection.find_one({"run_id": run_id}, {"partial_results": 1})
+    partial = (doc or {}).get("partial_results") or {}
+    return {int(test_id): results for test_id, results in partial.items()}
+
+
+def list_incomplete_runs(limit: int = 5) -> List[dict]:
+    """List runs that were started but never saved complete, newest first."""
+    collection = get_evals_collection()
+
+    runs = collection.find(
+        {"status": "running"},
+        {"run_id": 1, "timestamp": 1, "configs_compared": 1}
+    ).sort("timestamp", -1).limit(limit)
+
+    return list(runs)
 
 
 def load_comparison_run(run_id: str) -> Optional[dict]:
@@ -38,17 +107,17 @@ def load_comparison_run(run_id: str) -> Optional[dict]:
 
 
 def load_latest_run() -> Optional[dict]:
-    """Load the most recent comparison run."""
+    """Load the most recent complete comparison run."""
     collection = get_evals_collection()
-    return collection.find_one(sort=[("timestamp", -1)])
+    return collection.find_one({"status": {"$ne": "running"}}, sort=[("timestamp", -1)])
 
 
 def list_comparison_runs(limit: int = 20) -> List[dict]:
-    """List recent comparison runs (summary only)."""
+    """List recent complete comparison runs (summary only)."""
     collection = get_evals_collection()
 
     runs = collection.find(
-        {},
+        {"status": {"$ne": "running"}},
         {
             "run_id": 1,
             "timestamp": 1,
@@ -26,7 +26,8 @@ st.set_page_config(
 from evals.configs import EVAL_CONFIGS, DEFAULT_SELECTED
 from evals.runner import ComparisonRunner
 from evals.result import ComparisonRun, TestComparison, ConfigResult
-from evals.storage import save_comparison_run, list_comparison_runs, load_comparison_run
+from evals.storage import save_comparison_run, list_comparison_runs, load_comparison_run, list_incomplete_runs
+from shared.config import settings
 
 # Import coordinator
 from agents.coordinator import coordinator
@@ -189,6 +190,10 @@ def init_session_state():
         st.session_state.selected_configs = DEFAULT_SELECTED.copy()
     if "coordinator" not in st.session_state:
         st.session_state.coordinator = None
+    if "eval_workers" not in st.session_state:
+        st.session_state.eval_workers = settings.eval_workers
+    if "resume_run" not in st.session_state:
+        st.session_state.resume_run = None
 
 
 def init_coordinator():
@@ -245,6 +250,25 @@ def render_config_section():
         else:
             st.caption(f"{len(selected)} configs selected")
 
+    st.session_state.eval_workers = st.slider(
+        "Parallel workers",
+        min_value=1, max_value=8,
+        value=st.session_state.eval_workers,
+        help="Test chains run at once, each on its own coordinator. Use 1 for sequential runs."
+    )
+
+    # Offer to finish a run that was interrupted (results are saved as they finish)
+    try:
+        interrupted = list_incomplete_runs(limit=1)
+    except Exception:
+        interrupted = []
+    if interrupted:
+        pending = interrupted[0]
+        configs = ", ".join(pending.get("configs_compared", []))
+        if st.button(f"♻️ Resume {pending['run_id']} ({configs})"):
+            st.session_state.resume_run = pending
+            st.session_state.run_comparison = True
+
 
 def render_summary_section():
     """Render summary metrics cards comparing baseline to best."""
@@ -338,7 +362,7 @@ def format_metric_value(value, metric_field):
     if value is None:
         return "-"
 
-    if metric_field in ["latency_ms", "llm_time_ms", "tool_time_ms"]:
+    if metric_field in ["latency_ms", "ttft_ms", "llm_time_ms", "tool_time_ms"]:
         # Time metrics - show in ms or s
         if value >= 1000:
             return f"{value/1000:.1f}s"
@@ -371,7 +395,7 @@ def render_matrix_section():
         return
 
     # Metric selector toggle
-    metric_options = ["Latency", "Tokens In", "Tokens Out", "LLM Time", "Tool Time"]
+    metric_options = ["Latency", "TTFT", "Tokens In", "Tokens Out", "LLM Time", "Tool Time"]
     selected_metric_name = st.radio(
         "Select metric to display:",
         options=metric_options,
@@ -382,6 +406,7 @@ def render_matrix_section():
     # Map display name to field name
     metric_field_map = {
         "Latency": "latency_ms",
+        "TTFT": "ttft_ms",
         "Tokens In": "tokens_in",
         "Tokens Out": "tokens_out",
         "LLM Time": "llm_time_ms",
@@ -1090,8 +1115,10 @@ def render_search_mode_comparison(run: ComparisonRun):
 
 
 def run_comparison():
-    """Execute comparison across selected configs."""
-    configs = st.session_state.selected_configs
+    """Execute comparison across selected configs (or resume an interrupted run)."""
+    resume_run = st.session_state.resume_run
+    st.session_state.resume_run = None
+    configs = resume_run["configs_compared"] if resume_run else st.session_state.selected_configs
     coordinator = st.session_state.coordinator
 
     if not coordinator:
@@ -1110,7 +1137,13 @@ def run_comparison():
     runner = ComparisonRunner(coordinator, progress_callback=update_progress)
 
     try:
-        run = runner.run_comparison(configs, skip_voice=True)
+        run = runner.run_comparison(
+            configs,
+            skip_voice=True,
+            workers=st.session_state.eval_workers,
+            persist=True,
+            resume_run_id=resume_run["run_id"] if resume_run else None
+        )
         st.session_state.comparison_run = run
 
         # Save to MongoDB
@@ -1261,6 +1294,7 @@ def load_saved_run(run_id: str):
                     result = ConfigResult(
                         config_key=result_dict["config_key"],
                         latency_ms=result_dict.get("latency_ms", 0),
+                        ttft_ms=result_dict.get("ttft_ms"),
                         llm_time_ms=result_dict.get("llm_time_ms"),
                         tool_time_ms=result_dict.get("tool_time_ms"),
                         embedding_time_ms=result_dict.get("embedding_time_ms"),
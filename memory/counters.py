@@ -0,0 +1,169 @@
+"""
+Materialized memory and tool-discovery counters.
+
+The stats panels used to count documents and run $group aggregations over
+the memory collections on every rerun. Instead, the writers in
+MemoryManager and ToolDiscoveryStore $inc one small document per scope in
+the memory_counters collection, and the panels read that document:
+
+    {_id: "user:<user_id>", episodic, semantic, procedural,
+     knowledge, knowledge_fresh, actions: {<action_type>: n},
+     stale_at, reconciled_at}
+
+    {_id: "tool_discoveries", total, successful, failed, promoted,
+     times_used, servers: {<mcp_server>: uses}, tools: {<tool>: uses},
+     reconciled_at}
+
+Writes that bypass these classes (seed scripts, TTL expiry, manual cleanup)
+make the counts drift, so a read rebuilds the document from the true counts
+when it is missing, older than MEMORY_COUNTERS_RECONCILE_SECONDS, or past its
+stale_at (e.g. when the next cached knowledge entry expires).
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from shared.config import settings
+from shared.logger import get_logger
+
+logger = get_logger("counters")
+
+COUNTERS_COLLECTION = "memory_counters"
+
+# Scope of the (global) tool discovery counters
+DISCOVERY_COUNTERS_ID = "tool_discoveries"
+
+# Field-name-safe stand-ins for "." and "$" in counter keys (server, tool and action names)
+_KEY_ESCAPES = {".": "．", "$": "＄"}
+
+
+def user_counters_id(user_id: str) -> str:
+    """Counter document _id for a user's memory counts."""
+    return f"user:{user_id}"
+
+
+def encode_counter_key(name: Any) -> str:
+    """Make a name usable as a counter field name (no "." or "$")."""
+    key = str(name)
+    for char, escape in _KEY_ESCAPES.items():
+        key = key.replace(char, escape)
+    return key
+
+
+def decode_counter_key(key: str) -> str:
+    """Reverse encode_counter_key()."""
+    for char, escape in _KEY_ESCAPES.items():
+        key = key.replace(escape, char)
+    return key
+
+
+def decode_counter_map(counts: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Decode a {encoded name: count} map, dropping zero counts."""
+    return {decode_counter_key(k): v for k, v in (counts or {}).items() if v}
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Compare datetimes read back from MongoDB (naive UTC) with aware ones."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class CounterStore:
+    """$inc-maintained counter documents with periodic reconciliation"""
+
+    def __init__(self, db, reconcile_seconds: float = None):
+        """
+        Initialize the counter store.
+
+        Args:
+            db: MongoDB database instance
+            reconcile_seconds: Rebuild a counter document from the true counts
+                once it is this old (default: MEMORY_COUNTERS_RECONCILE_SECONDS)
+        """
+        self.collection = db[COUNTERS_COLLECTION]
+        self.reconcile_seconds = (
+            settings.memory_counters_reconcile_seconds
+            if reconcile_seconds is None else reconcile_seconds
+        )
+
+    def increment(
+        self,
+        counters_id: str,
+        counts: Dict[str, int],
+        values: Dict[str, Any] = None,
+        earliest: Dict[str, datetime] = None
+    ) -> None:
+        """
+        Apply one write's deltas to a counter document.
+
+        A missing document is created holding just these deltas; it has no
+        reconciled_at, so the next read rebuilds it.
+
+        Args:
+            counters_id: Counter document _id
+            counts: {field: delta} for $inc (dotted paths allowed)
+            values: {field: value} for $set
+            earliest: {field: datetime} for $min (e.g. stale_at)
+        """
+        update = {"$inc": counts}
+        if values:
+            update["$set"] = values
+        if earliest:
+            update["$min"] = earliest
+
+        try:
+            self.collection.update_one({"_id": counters_id}, update, upsert=True)
+        except PyMongoError as e:
+            # Counters are advisory; the next reconcile repairs them
+            logger.warning(f"Failed to update counters {counters_id}: {e}")
+
+    def read(self, counters_id: str, rebuild: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Read a counter document, reconciling it first if it is stale.
+
+        Args:
+            counters_id: Counter document _id
+            rebuild: Computes the true counts (same shape as the document)
+
+        Returns:
+            Counter document
+        """
+        doc = self.collection.find_one({"_id": counters_id})
+        if self._is_stale(doc):
+            doc = self.reconcile(counters_id, rebuild)
+        return doc
+
+    def reconcile(self, counters_id: str, rebuild: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Replace a counter document with freshly computed counts.
+
+        An $inc landing between the rebuild and the replace is lost; the
+        drift lasts until the next reconcile.
+
+        Args:
+            counters_id: Counter document _id
+            rebuild: Computes the true counts
+
+        Returns:
+            The new counter document
+        """
+        doc = rebuild()
+        doc["_id"] = counters_id
+        doc["reconciled_at"] = datetime.utcnow()
+        self.collection.replace_one({"_id": counters_id}, doc, upsert=True)
+        return doc
+
+    def _is_stale(self, doc: Optional[Dict[str, Any]]) -> bool:
+        """Whether a counter document must be rebuilt before it is used."""
+        if not doc or not isinstance(doc.get("reconciled_at"), datetime):
+            return True
+
+        now = datetime.utcnow()
+        if _utc_naive(doc["reconciled_at"]) <= now - timedelta(seconds=self.reconcile_seconds):
+            return True
+
+        stale_at = doc.get("stale_at")
+        return isinstance(stale_at, datetime) and _utc_naive(stale_at) <= now
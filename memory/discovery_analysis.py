@@ -5,12 +5,38 @@ Analyzes patterns in MCP tool discoveries to generate actionable suggestions
 for new features, Atlas optimizations, and template candidates.
 
 This showcases the "agents teaching developers what to build" narrative.
+
+Counts and breakdowns are computed server-side in one $facet aggregation.
+Tool and index suggestions need the requests themselves, so successful
+discoveries are streamed in batches (sorted by reuse) and folded into
+bounded accumulators; request_embedding vectors are never read otherwise.
 """
 
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
 from collections import defaultdict
 
+import numpy as np
+
+# Successful discoveries read per batch while clustering requests
+STREAM_BATCH_SIZE = 500
+
+# Cosine similarity for two requests (same server and tool) to be one pattern
+CLUSTER_SIMILARITY = 0.85
+
+# Request patterns tracked at once; later requests matching none are skipped
+MAX_CLUSTERS = 500
+
+# Reuse, summed over a request pattern, that makes it a built-in tool candidate
+TOOL_CANDIDATE_MIN_USES = 3
+
+# Repeatedly failing discoveries reported as critical feature gaps
+MAX_REPEATED_FAILURES = 10
+
+# Pipeline expressions shared by the $facet branches
+_INTENT = {"$ifNull": ["$intent", "unknown"]}
+_SUCCEEDED = {"$eq": ["$success", True]}
+
 
 def analyze_discoveries(
     db,
@@ -42,10 +68,10 @@ def analyze_discoveries(
     if user_id:
         query_filter["user_id"] = user_id
 
-    # Get all discoveries in range
-    discoveries = list(db.tool_discoveries.find(query_filter))
+    # Counts and breakdowns in one aggregation
+    facets = _aggregate_facets(db, query_filter)
 
-    if not discoveries:
+    if not facets["total"]:
         return {
             "summary": {
                 "total_discoveries": 0,
@@ -58,12 +84,20 @@ def analyze_discoveries(
             "feature_gaps": []
         }
 
+    # One streamed pass over successful discoveries
+    clusters = RequestClusters()
+    search_patterns = defaultdict(int)
+    for batch in _stream_successful(db, query_filter):
+        clusters.add_batch(batch)
+        for disc in batch:
+            _count_argument_patterns(disc.get("solution", {}).get("arguments", {}), search_patterns)
+
     # Analyze patterns
-    summary = _analyze_summary(discoveries, days)
-    suggested_tools = _suggest_new_tools(discoveries)
-    atlas_optimizations = _suggest_atlas_optimizations(discoveries)
+    summary = _analyze_summary(facets, days)
+    suggested_tools = _suggest_new_tools(clusters)
+    atlas_optimizations = _suggest_atlas_optimizations(search_patterns)
     template_candidates = _suggest_templates(db, user_id, days)
-    feature_gaps = _identify_feature_gaps(discoveries)
+    feature_gaps = _identify_feature_gaps(facets)
 
     return {
         "summary": summary,
@@ -74,118 +108,321 @@ def analyze_discoveries(
     }
 
 
-def _analyze_summary(discoveries: List[Dict], days: int) -> Dict[str, Any]:
+def _aggregate_facets(db, query_filter: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute totals and breakdowns server-side in one $facet pipeline.
+
+    Returns:
+        {total, successful, total_reuses, by_intent, by_server, most_reused,
+         failed_by_intent, repeated_failures}
+    """
+    pipeline = [
+        {"$match": query_filter},
+        {"$project": {
+            "user_request": 1,
+            "intent": 1,
+            "success": 1,
+            "times_used": 1,
+            "mcp_server": "$solution.mcp_server"
+        }},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "successful": {"$sum": {"$cond": [_SUCCEEDED, 1, 0]}},
+                    "total_reuses": {"$sum": "$times_used"}
+                }}
+            ],
+            "by_intent": [
+                {"$group": {"_id": _INTENT, "count": {"$sum": 1}}}
+            ],
+            "by_server": [
+                {"$group": {"_id": {"$ifNull": ["$mcp_server", "unknown"]}, "count": {"$sum": 1}}}
+            ],
+            "most_reused": [
+                {"$match": {"times_used": {"$gt": 1}}},
+                {"$sort": {"times_used": -1}},
+                {"$limit": 3}
+            ],
+            "failed_by_intent": [
+                {"$match": {"success": {"$ne": True}}},
+                {"$group": {
+                    "_id": _INTENT,
+                    "count": {"$sum": 1},
+                    "first_request": {"$first": "$user_request"},
+                    "last_request": {"$last": "$user_request"}
+                }},
+                {"$match": {"count": {"$gte": 2}}}
+            ],
+            "repeated_failures": [
+                {"$match": {"success": {"$ne": True}, "times_used": {"$gte": 3}}},
+                {"$sort": {"times_used": -1}},
+                {"$limit": MAX_REPEATED_FAILURES}
+            ]
+        }}
+    ]
+
+    result = next(iter(db.tool_discoveries.aggregate(pipeline)), {})
+    totals = (result.get("totals") or [{}])[0]
+
+    return {
+        "total": totals.get("total", 0),
+        "successful": totals.get("successful", 0),
+        "total_reuses": totals.get("total_reuses", 0),
+        "by_intent": {g["_id"]: g["count"] for g in result.get("by_intent", [])},
+        "by_server": {g["_id"]: g["count"] for g in result.get("by_server", [])},
+        "most_reused": result.get("most_reused", []),
+        "failed_by_intent": result.get("failed_by_intent", []),
+        "repeated_failures": result.get("repeated_failures", [])
+    }
+
+
+def _stream_successful(db, query_filter: Dict[str, Any]):
+    """
+    Yield successful discoveries in batches, most reused first.
+
+    Only the fields needed for clustering and argument patterns are read.
+    """
+    cursor = db.tool_discoveries.find(
+        {**query_filter, "success": True},
+        {
+            "user_request": 1,
+            "intent": 1,
+            "times_used": 1,
+            "execution_time_ms": 1,
+            "request_embedding": 1,
+            "solution.mcp_server": 1,
+            "solution.tool_used": 1,
+            "solution.arguments": 1
+        }
+    ).sort("times_used", -1).batch_size(STREAM_BATCH_SIZE)
+
+    batch = []
+    for disc in cursor:
+        batch.append(disc)
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RequestClusters:
+    """
+    Greedy clustering of similar requests, fed one batch at a time.
+
+    A request joins the pattern (same MCP server and tool) whose leading
+    request is most similar by embedding, if at least CLUSTER_SIMILARITY,
+    or whose request text is identical when there is no embedding.
+    Otherwise it starts a new pattern, up to MAX_CLUSTERS. Batches arrive
+    most reused first, so the leader is a pattern's most reused request.
+    """
+
+    def __init__(self, similarity: float = CLUSTER_SIMILARITY, max_clusters: int = MAX_CLUSTERS):
+        self.similarity = similarity
+        self.max_clusters = max_clusters
+        self.clusters: List[Dict[str, Any]] = []
+
+        # Embedded leaders: unit vectors, (server, tool) group and cluster index
+        self._vectors: Optional[np.ndarray] = None
+        self._groups: List[int] = []
+        self._members: List[int] = []
+        self._group_ids: Dict[tuple, int] = {}
+        self._dimensions: Optional[int] = None
+
+        # Leaders without embeddings: (server, tool, request text) -> cluster index
+        self._by_text: Dict[tuple, int] = {}
+
+    def add_batch(self, discoveries: List[Dict[str, Any]]) -> None:
+        """Assign a batch of discoveries to patterns."""
+        embedded, vectors = [], []
+        for disc in discoveries:
+            embedding = disc.get("request_embedding")
+            if self._dimensions is None and embedding:
+                self._dimensions = len(embedding)
+            if embedding and len(embedding) == self._dimensions:
+                embedded.append(disc)
+                vectors.append(embedding)
+            else:
+                self._add_by_text(disc)
+
+        if not embedded:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        groups = np.array([self._group_id(disc) for disc in embedded])
+
+        # Best existing leader per request, in one matrix product
+        best = np.full(len(embedded), -1)
+        if self._vectors is not None:
+            scores = vectors @ self._vectors.T
+            scores[groups[:, None] != np.asarray(self._groups)[None, :]] = -np.inf
+            top = scores.argmax(axis=1)
+            matched = scores[np.arange(len(embedded)), top] >= self.similarity
+            best[matched] = top[matched]
+
+        # Requests matching no earlier leader: compare with this batch's new leaders
+        new_vectors, new_groups, new_members = [], [], []
+        for i, disc in enumerate(embedded):
+            if best[i] >= 0:
+                self._join(self._members[best[i]], disc)
+                continue
+
+            if new_vectors:
+                scores = np.asarray(new_vectors) @ vectors[i]
+                scores[np.asarray(new_groups) != groups[i]] = -np.inf
+                top = int(scores.argmax())
+                if scores[top] >= self.similarity:
+                    self._join(new_members[top], disc)
+                    continue
+
+            index = self._start(disc)
+            if index is not None:
+                new_vectors.append(vectors[i])
+                new_groups.append(groups[i])
+                new_members.append(index)
+
+        if new_vectors:
+            new_vectors = np.asarray(new_vectors)
+            self._vectors = new_vectors if self._vectors is None else np.vstack([self._vectors, new_vectors])
+            self._groups.extend(int(g) for g in new_groups)
+            self._members.extend(new_members)
+
+    def _group_id(self, disc: Dict[str, Any]) -> int:
+        """Integer id of a discovery's (server, tool)."""
+        solution = disc.get("solution", {})
+        key = (solution.get("mcp_server", ""), solution.get("tool_used", ""))
+        return self._group_ids.setdefault(key, len(self._group_ids))
+
+    def _add_by_text(self, disc: Dict[str, Any]) -> None:
+        """Cluster a discovery without an embedding by exact request text."""
+        solution = disc.get("solution", {})
+        key = (
+            solution.get("mcp_server", ""),
+            solution.get("tool_used", ""),
+            " ".join(disc.get("user_request", "").lower().split())
+        )
+        if key in self._by_text:
+            self._join(self._by_text[key], disc)
+            return
+
+        index = self._start(disc)
+        if index is not None:
+            self._by_text[key] = index
+
+    def _start(self, disc: Dict[str, Any]) -> Optional[int]:
+        """Start a pattern led by this discovery (None when at capacity)."""
+        if len(self.clusters) >= self.max_clusters:
+            return None
+
+        solution = disc.get("solution", {})
+        self.clusters.append({
+            "request": disc.get("user_request", ""),
+            "intent": disc.get("intent", "unknown"),
+            "mcp_server": solution.get("mcp_server", ""),
+            "tool": solution.get("tool_used", ""),
+            "discoveries": 0,
+            "times_used": 0,
+            "latency_ms_total": 0
+        })
+        index = len(self.clusters) - 1
+        self._join(index, disc)
+        return index
+
+    def _join(self, index: int, disc: Dict[str, Any]) -> None:
+        """Add a discovery's usage to a pattern."""
+        cluster = self.clusters[index]
+        cluster["discoveries"] += 1
+        cluster["times_used"] += disc.get("times_used", 0)
+        cluster["latency_ms_total"] += disc.get("execution_time_ms", 0) or 0
+
+
+def _analyze_summary(facets: Dict[str, Any], days: int) -> Dict[str, Any]:
     """Generate summary statistics."""
-    total = len(discoveries)
-    successful = sum(1 for d in discoveries if d.get("success", False))
-    failed = total - successful
-
-    # Group by intent
-    by_intent = defaultdict(int)
-    for d in discoveries:
-        intent = d.get("intent", "unknown")
-        by_intent[intent] += 1
-
-    # Group by MCP server
-    by_server = defaultdict(int)
-    for d in discoveries:
-        server = d.get("solution", {}).get("mcp_server", "unknown")
-        by_server[server] += 1
-
-    # Find most reused
-    most_reused = sorted(
-        discoveries,
-        key=lambda d: d.get("times_used", 0),
-        reverse=True
-    )[:3]
-
-    # Calculate total reuse count
-    total_reuses = sum(d.get("times_used", 0) for d in discoveries)
+    total = facets["total"]
+    successful = facets["successful"]
 
     return {
         "total_discoveries": total,
         "successful": successful,
-        "failed": failed,
+        "failed": total - successful,
         "success_rate": round(successful / total * 100, 1) if total > 0 else 0,
         "period_days": days,
-        "by_intent": dict(by_intent),
-        "by_server": dict(by_server),
-        "total_reuses": total_reuses,
+        "by_intent": facets["by_intent"],
+        "by_server": facets["by_server"],
+        "total_reuses": facets["total_reuses"],
         "most_reused": [
             {
                 "request": d.get("user_request", "")[:60] + "...",
                 "times_used": d.get("times_used", 0),
                 "intent": d.get("intent", "unknown")
             }
-            for d in most_reused if d.get("times_used", 0) > 1
+            for d in facets["most_reused"]
         ]
     }
 
 
-def _suggest_new_tools(discoveries: List[Dict]) -> List[Dict[str, Any]]:
+def _suggest_new_tools(clusters: RequestClusters) -> List[Dict[str, Any]]:
     """
     Suggest new built-in tools based on repeated successful patterns.
 
-    Logic: If a discovery has been reused 3+ times, it's a candidate for
-    becoming a built-in tool.
+    Logic: If similar requests solved by the same MCP tool have been used
+    3+ times in total, the pattern is a candidate for becoming a built-in tool.
     """
     suggestions = []
 
-    # Find high-reuse discoveries
+    # Find high-reuse patterns
     candidates = [
-        d for d in discoveries
-        if d.get("times_used", 0) >= 3 and d.get("success", False)
+        c for c in clusters.clusters
+        if c["times_used"] >= TOOL_CANDIDATE_MIN_USES
     ]
 
     # Sort by reuse count
-    candidates.sort(key=lambda d: d.get("times_used", 0), reverse=True)
+    candidates.sort(key=lambda c: c["times_used"], reverse=True)
 
-    for disc in candidates[:5]:  # Top 5 candidates
-        solution = disc.get("solution", {})
+    for cluster in candidates[:5]:  # Top 5 candidates
         suggestions.append({
-            "request_pattern": disc.get("user_request", "")[:80],
-            "intent": disc.get("intent", "unknown"),
-            "times_used": disc.get("times_used", 0),
+            "request_pattern": cluster["request"][:80],
+            "intent": cluster["intent"],
+            "times_used": cluster["times_used"],
+            "similar_requests": cluster["discoveries"],
             "current_solution": {
-                "mcp_server": solution.get("mcp_server", ""),
-                "tool": solution.get("tool_used", "")
+                "mcp_server": cluster["mcp_server"],
+                "tool": cluster["tool"]
             },
-            "suggestion": f"Consider adding a built-in tool for '{disc.get('intent', 'this pattern')}' "
+            "suggestion": f"Consider adding a built-in tool for '{cluster['intent'] or 'this pattern'}' "
                          f"to avoid repeated MCP calls",
-            "avg_latency_ms": disc.get("execution_time_ms", 0)
+            "avg_latency_ms": round(cluster["latency_ms_total"] / cluster["discoveries"])
         })
 
     return suggestions
 
 
-def _suggest_atlas_optimizations(discoveries: List[Dict]) -> List[Dict[str, Any]]:
+def _count_argument_patterns(args: Dict[str, Any], search_patterns: Dict[str, int]) -> None:
+    """Count the search and filter patterns in one successful tool call's arguments."""
+    # Look for search/query patterns
+    if "query" in args or "search" in args:
+        search_patterns["text_search"] += 1
+
+    # Look for filter patterns
+    args_text = str(args).lower()
+    for key in ["assignee", "status", "priority", "tags"]:
+        if key in args_text:
+            search_patterns[f"filter_{key}"] += 1
+
+
+def _suggest_atlas_optimizations(search_patterns: Dict[str, int]) -> List[Dict[str, Any]]:
     """
     Suggest Atlas optimizations based on query patterns.
 
     Logic: Look for patterns in tool arguments that suggest missing indexes
-    or collection structures.
+    or collection structures (counted by _count_argument_patterns).
     """
     suggestions = []
 
-    # Analyze tool arguments for patterns
-    search_patterns = defaultdict(int)
-
-    for disc in discoveries:
-        if not disc.get("success", False):
-            continue
-
-        solution = disc.get("solution", {})
-        args = solution.get("arguments", {})
-
-        # Look for search/query patterns
-        if "query" in args or "search" in args:
-            search_patterns["text_search"] += 1
-
-        # Look for filter patterns
-        for key in ["assignee", "status", "priority", "tags"]:
-            if key in str(args).lower():
-                search_patterns[f"filter_{key}"] += 1
-
     # Generate suggestions based on patterns
     if search_patterns.get("text_search", 0) >= 3:
         suggestions.append({
@@ -228,7 +465,10 @@ def _suggest_templates(db, user_id: Optional[str], days: int) -> List[Dict[str,
     if user_id:
         query_filter["user_id"] = user_id
 
-    actions = list(db.memory_episodic.find(query_filter).limit(100))
+    actions = list(db.memory_episodic.find(
+        query_filter,
+        {"session_id": 1, "action_type": 1}
+    ).limit(100))
 
     # Look for repeated sequences
     # Group by session and find common patterns
@@ -259,7 +499,7 @@ def _suggest_templates(db, user_id: Optional[str], days: int) -> List[Dict[str,
     return suggestions[:3]  # Top 3 candidates
 
 
-def _identify_feature_gaps(discoveries: List[Dict]) -> List[Dict[str, Any]]:
+def _identify_feature_gaps(facets: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Identify feature gaps based on failed discoveries or missing functionality.
 
@@ -267,39 +507,31 @@ def _identify_feature_gaps(discoveries: List[Dict]) -> List[Dict[str, Any]]:
     """
     gaps = []
 
-    # Group failed discoveries by intent
-    failed_by_intent = defaultdict(list)
-    for disc in discoveries:
-        if not disc.get("success", False):
-            intent = disc.get("intent", "unknown")
-            failed_by_intent[intent].append(disc)
-
-    # Create gap suggestions
-    for intent, failed_discs in failed_by_intent.items():
-        if len(failed_discs) >= 2:  # Multiple failures for same intent
-            gaps.append({
-                "intent": intent,
-                "failure_count": len(failed_discs),
-                "example_requests": [
-                    d.get("user_request", "")[:60] + "..."
-                    for d in failed_discs[:2]
-                ],
-                "suggestion": f"Multiple failures for '{intent}' intent. "
-                             "This functionality may be missing or unreliable.",
-                "severity": "high" if len(failed_discs) >= 3 else "medium"
-            })
+    # Multiple failures for the same intent (grouped server-side)
+    for group in facets["failed_by_intent"]:
+        intent, failure_count = group["_id"], group["count"]
+        gaps.append({
+            "intent": intent,
+            "failure_count": failure_count,
+            "example_requests": [
+                (request or "")[:60] + "..."
+                for request in (group.get("first_request"), group.get("last_request"))
+            ],
+            "suggestion": f"Multiple failures for '{intent}' intent. "
+                         "This functionality may be missing or unreliable.",
+            "severity": "high" if failure_count >= 3 else "medium"
+        })
 
     # Also look for single high-impact failures
-    for disc in discoveries:
-        if not disc.get("success", False) and disc.get("times_used", 0) >= 3:
-            # User tried this multiple times but it kept failing
-            gaps.append({
-                "intent": disc.get("intent", "unknown"),
-                "failure_count": disc.get("times_used", 0),
-                "example_requests": [disc.get("user_request", "")[:60] + "..."],
-                "suggestion": f"User attempted this {disc.get('times_used', 0)} times without success. "
-                             "High-priority feature gap.",
-                "severity": "critical"
-            })
+    for disc in facets["repeated_failures"]:
+        # User tried this multiple times but it kept failing
+        gaps.append({
+            "intent": disc.get("intent", "unknown"),
+            "failure_count": disc.get("times_used", 0),
+            "example_requests": [disc.get("user_request", "")[:60] + "..."],
+            "suggestion": f"User attempted this {disc.get('times_used', 0)} times without success. "
+                         "High-priority feature gap.",
+            "severity": "critical"
+        })
 
     return gaps
@@ -18,8 +18,24 @@ from typing import Optional, Dict, List, Any, Callable
 from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.collection import Collection
 from bson import ObjectId
+import hashlib
+import threading
+import time
 import uuid
 
+from memory.counters import CounterStore, decode_counter_map, encode_counter_key, user_counters_id
+from memory.trigger_matcher import KeywordMatcher, PatternMatcher
+from memory.working_store import (
+    AGENT as WORKING_AGENT,
+    DISAMBIGUATION as WORKING_DISAMBIGUATION,
+    HANDOFF as WORKING_HANDOFF,
+    SESSION as WORKING_SESSION,
+    build_working_store,
+)
+from shared.embedding_cache import normalize_text
+from shared.tracing import traced
+from shared.vector_index import invalidate_vector_index, sync_vector_write, vector_search
+
 # Memory type constants
 LONG_TERM_TYPES = {
     "episodic": "action",      # What happened (existing action_history)
@@ -27,126 +43,115 @@ LONG_TERM_TYPES = {
     "procedural": "rule"        # How to act (learned rules/workflows)
 }
 
+# Raw knowledge-cache payloads, one per memory_semantic knowledge header (same _id)
+KNOWLEDGE_PAYLOADS_COLLECTION = "knowledge_payloads"
+
+# Knowledge header fields; never includes the embedding or the raw payload
+KNOWLEDGE_HEADER_FIELDS = {
+    "key": 1,
+    "value": 1,
+    "tags": 1,
+    "confidence": 1,
+    "query": 1,
+    "summary": 1,
+    "source": 1,
+    "payload_chars": 1,
+    "times_accessed": 1,
+    "created_at": 1,
+    "fetched_at": 1,
+    "expires_at": 1,
+}
+
+
+def knowledge_query_hash(query: str) -> str:
+    """
+    Hash a knowledge-cache query for the exact-match lookup.
+
+    Args:
+        query: Search query text
+
+    Returns:
+        SHA-256 hex digest of the whitespace-normalized, case-folded query
+    """
+    return hashlib.sha256(normalize_text(query).casefold().encode("utf-8")).hexdigest()
+
 
 class MemoryManager:
-    def __init__(self, db, embedding_fn: Callable = None):
+    def __init__(self, db, embedding_fn: Callable = None, working_store=None):
         """
         Initialize memory manager.
 
         Args:
             db: MongoDB database instance
             embedding_fn: Function to generate embeddings (optional)
+            working_store: Working-memory store (default: from settings, see
+                memory/working_store.py)
         """
         self.db = db
         self.embed = embedding_fn
+        self.working = working_store or build_working_store()
+
+        # Compiled rule/workflow triggers: (user_id, kind, ...) -> (built_at, matcher)
+        self._trigger_matchers: Dict[tuple, tuple] = {}
+        self._trigger_lock = threading.Lock()
+
+        # Per-user preferences/rules/workflows snapshot for context injection;
+        # every semantic/procedural write through this manager bumps the version
+        self._memory_versions: Dict[str, int] = {}
+        self._memory_snapshots: Dict[str, Dict] = {}
+        self._snapshot_lock = threading.Lock()
+
         self._setup_collections()
 
     def _setup_collections(self):
-        """Create collections and indexes."""
-        from pymongo.errors import OperationFailure
+        """Bind the memory collections.
 
+        No commands are sent to the server here; indexes are created once by
+        scripts/setup/init_db.py (see SCHEMA_VERSION in shared/db.py).
+        """
         # ═══════════════════════════════════════════════════════════════
-        # WORKING MEMORY (In-memory session state - not persisted)
+        # WORKING MEMORY (session state in self.working - see working_store.py)
         # ═══════════════════════════════════════════════════════════════
-        # Session context, handoffs, and disambiguation now handled in-memory
-        # No database collection needed
-        self._session_contexts = {}  # session_id -> context dict
-        self._agent_working = {}  # (session_id, agent_id) -> working memory dict
-        self._handoffs = {}  # handoff_id -> handoff dict
-        self._disambiguations = {}  # session_id -> disambiguation dict
+        # Session context, agent working memory, handoffs and disambiguation
+        # live in a bounded store: in-process by default, or a MongoDB TTL
+        # collection shared by several app processes
 
         # ═══════════════════════════════════════════════════════════════
         # EPISODIC MEMORY (persistent - actions and events)
         # ═══════════════════════════════════════════════════════════════
         self.episodic = self.db.memory_episodic
 
-        # Indexes for actions/events
-        try:
-            self.episodic.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        except OperationFailure:
-            pass
-        try:
-            self.episodic.create_index([("user_id", ASCENDING), ("action_type", ASCENDING)])
-        except OperationFailure:
-            pass
-        try:
-            self.episodic.create_index([("user_id", ASCENDING), ("source_agent", ASCENDING)])
-        except OperationFailure:
-            pass
-        try:
-            self.episodic.create_index([
-                ("entity_type", ASCENDING),
-                ("entity_id", ASCENDING),
-                ("generated_at", DESCENDING)
-            ])
-        except OperationFailure:
-            pass
-
         # ═══════════════════════════════════════════════════════════════
         # SEMANTIC MEMORY (persistent - knowledge cache and preferences)
         # ═══════════════════════════════════════════════════════════════
         self.semantic = self.db.memory_semantic
-
-        # Indexes for knowledge and preferences
-        try:
-            self.semantic.create_index([
-                ("user_id", ASCENDING),
-                ("semantic_type", ASCENDING),
-                ("key", ASCENDING)
-            ])
-        except OperationFailure:
-            pass
-        try:
-            self.semantic.create_index([("user_id", ASCENDING), ("query", ASCENDING)])
-        except OperationFailure:
-            pass
-        try:
-            self.semantic.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
-        except OperationFailure:
-            pass
+        self.knowledge_payloads = self.db[KNOWLEDGE_PAYLOADS_COLLECTION]
 
         # ═══════════════════════════════════════════════════════════════
         # PROCEDURAL MEMORY (persistent - workflow patterns and rules)
         # ═══════════════════════════════════════════════════════════════
         self.procedural = self.db.memory_procedural
 
-        # Indexes
-        try:
-            self.procedural.create_index([
-                ("user_id", ASCENDING),
-                ("rule_type", ASCENDING),
-                ("trigger_pattern", ASCENDING)
-            ])
-        except OperationFailure:
-            pass
-        try:
-            self.procedural.create_index([
-                ("user_id", ASCENDING),
-                ("times_used", DESCENDING),
-                ("success_rate", DESCENDING)
-            ])
-        except OperationFailure:
-            pass
-        try:
-            # Vector index for semantic workflow search
-            self.procedural.create_index([("embedding", ASCENDING)])
-        except OperationFailure:
-            pass
+        # ═══════════════════════════════════════════════════════════════
+        # COUNTERS (per-user counts for the stats panels - see counters.py)
+        # ═══════════════════════════════════════════════════════════════
+        self.counters = CounterStore(self.db)
 
     # ═══════════════════════════════════════════════════════════════════
     # WORKING MEMORY: SESSION CONTEXT (In-Memory)
     # ═══════════════════════════════════════════════════════════════════
 
     def read_session_context(self, session_id: str) -> Optional[Dict]:
-        """Read session-level context from in-memory storage."""
-        session_data = self._session_contexts.get(session_id, {})
+        """Read session-level context from working memory."""
+        session_data = self.working.get(WORKING_SESSION, session_id) or {}
         return session_data.get("context")
 
     def update_session_context(self, session_id: str, updates: Dict,
                                user_id: str = None) -> None:
-        """Merge updates into session context (in-memory)."""
+        """Merge updates into session context (working memory)."""
         # Get existing context
-        existing = self.read_session_context(session_id) or {}
+        record = self.working.get(WORKING_SESSION, session_id)
+        existing = (record or {}).get("context") or {}
 
         # Deep merge
         for key, value in updates.items():
@@ -157,60 +162,59 @@ class MemoryManager:
             else:
                 existing[key] = value
 
-        # Store in memory
-        if session_id not in self._session_contexts:
-            self._session_contexts[session_id] = {
+        # Store in working memory
+        if record is None:
+            record = {
                 "session_id": session_id,
                 "user_id": user_id,
                 "created_at": datetime.utcnow()
             }
 
-        self._session_contexts[session_id]["context"] = existing
-        self._session_contexts[session_id]["updated_at"] = datetime.utcnow()
+        record["context"] = existing
+        record["updated_at"] = datetime.utcnow()
+        self.working.put(WORKING_SESSION, session_id, session_id, record)
 
     def clear_session_context(self, session_id: str) -> None:
-        """Clear session context from in-memory storage."""
-        if session_id in self._session_contexts:
-            del self._session_contexts[session_id]
+        """Clear session context from working memory."""
+        self.working.delete(WORKING_SESSION, session_id)
 
     # ═══════════════════════════════════════════════════════════════════
     # WORKING MEMORY: AGENT WORKING MEMORY (In-Memory)
     # ═══════════════════════════════════════════════════════════════════
 
     def read_agent_working(self, session_id: str, agent_id: str) -> Optional[Dict]:
-        """Read agent's working memory from in-memory storage."""
-        key = (session_id, agent_id)
-        agent_data = self._agent_working.get(key, {})
+        """Read agent's working memory from working memory storage."""
+        agent_data = self.working.get(WORKING_AGENT, (session_id, agent_id)) or {}
         return agent_data.get("working")
 
     def update_agent_working(self, session_id: str, agent_id: str,
                             updates: Dict) -> None:
-        """Update agent's working memory in in-memory storage."""
+        """Update agent's working memory in working memory storage."""
         key = (session_id, agent_id)
 
         # Get existing working memory
-        existing = self.read_agent_working(session_id, agent_id) or {}
+        record = self.working.get(WORKING_AGENT, key)
+        existing = (record or {}).get("working") or {}
 
         # Apply updates
         for k, v in updates.items():
             existing[k] = v
 
         # Store back
-        if key not in self._agent_working:
-            self._agent_working[key] = {
+        if record is None:
+            record = {
                 "session_id": session_id,
                 "agent_id": agent_id,
                 "created_at": datetime.utcnow()
             }
 
-        self._agent_working[key]["working"] = existing
-        self._agent_working[key]["updated_at"] = datetime.utcnow()
+        record["working"] = existing
+        record["updated_at"] = datetime.utcnow()
+        self.working.put(WORKING_AGENT, key, session_id, record)
 
     def clear_agent_working(self, session_id: str, agent_id: str) -> None:
-        """Clear agent's working memory from in-memory storage."""
-        key = (session_id, agent_id)
-        if key in self._agent_working:
-            del self._agent_working[key]
+        """Clear agent's working memory from working memory storage."""
+        self.working.delete(WORKING_AGENT, (session_id, agent_id))
 
     # ═══════════════════════════════════════════════════════════════════
     # WORKING MEMORY: DISAMBIGUATION (In-Memory)
@@ -218,7 +222,7 @@ class MemoryManager:
 
     def store_disambiguation(self, session_id: str, query: str,
                             results: List[Dict], source_agent: str) -> None:
-        """Store search results for disambiguation in in-memory storage."""
+        """Store search results for disambiguation in working memory."""
         now = datetime.utcnow()
 
         # Add index to each result
@@ -226,7 +230,7 @@ class MemoryManager:
             {"index": i, **r} for i, r in enumerate(results[:5])
         ]
 
-        self._disambiguations[session_id] = {
+        self.working.put(WORKING_DISAMBIGUATION, session_id, session_id, {
             "session_id": session_id,
             "query": query,
             "results": indexed_results,
@@ -234,11 +238,11 @@ class MemoryManager:
             "source_agent": source_agent,
             "created_at": now,
             "updated_at": now
-        }
+        })
 
     def resolve_disambiguation(self, session_id: str, index: int) -> Optional[Dict]:
-        """Resolve disambiguation by index from in-memory storage."""
-        disambiguation = self._disambiguations.get(session_id)
+        """Resolve disambiguation by index from working memory."""
+        disambiguation = self.working.get(WORKING_DISAMBIGUATION, session_id)
 
         if not disambiguation:
             return None
@@ -250,14 +254,16 @@ class MemoryManager:
         selected = results[index]
 
         # Mark as resolved
-        disambiguation["awaiting_selection"] = False
-        disambiguation["selected_index"] = index
+        self.working.update(WORKING_DISAMBIGUATION, session_id, {
+            "awaiting_selection": False,
+            "selected_index": index
+        })
 
         return selected
 
     def get_pending_disambiguation(self, session_id: str) -> Optional[Dict]:
-        """Get pending disambiguation if any from in-memory storage."""
-        disambiguation = self._disambiguations.get(session_id)
+        """Get pending disambiguation if any from working memory."""
+        disambiguation = self.working.get(WORKING_DISAMBIGUATION, session_id)
         if disambiguation and disambiguation.get("awaiting_selection"):
             return disambiguation
         return None
@@ -304,6 +310,12 @@ class MemoryManager:
         }
 
         result = self.episodic.insert_one(doc)
+        sync_vector_write(self.episodic.name, result.inserted_id, doc)
+
+        counts = {"episodic": 1}
+        if action_type:
+            counts[f"actions.{encode_counter_key(action_type)}"] = 1
+        self.counters.increment(user_counters_id(user_id), counts)
         return str(result.inserted_id)
 
     def _build_embedding_text(self, action_type: str, entity_type: str,
@@ -509,7 +521,7 @@ class MemoryManager:
 
         # Execute search
         try:
-            results = list(self.episodic.aggregate(pipeline))
+            results = vector_search(self.episodic, pipeline)
 
             # Convert ObjectIds to strings
             for doc in results:
@@ -693,7 +705,7 @@ class MemoryManager:
                       handoff_type: str, payload: Dict,
                       chain_id: str = None, parent_handoff_id: str = None,
                       priority: str = "normal") -> str:
-        """Write a handoff for another agent to in-memory storage."""
+        """Write a handoff for another agent to working memory."""
 
         handoff_id = str(uuid.uuid4())
         chain_id = chain_id or str(uuid.uuid4())
@@ -702,7 +714,7 @@ class MemoryManager:
         # Calculate sequence in chain
         sequence = 1
         if parent_handoff_id:
-            parent = self._handoffs.get(parent_handoff_id)
+            parent = self.working.get(WORKING_HANDOFF, parent_handoff_id)
             if parent:
                 sequence = parent.get("sequence", 0) + 1
 
@@ -724,7 +736,7 @@ class MemoryManager:
             "consumed_at": None
         }
 
-        self._handoffs[handoff_id] = doc
+        self.working.put(WORKING_HANDOFF, handoff_id, session_id, doc)
         return handoff_id
 
     # ═══════════════════════════════════════════════════════════════════
@@ -733,16 +745,13 @@ class MemoryManager:
 
     def read_handoff(self, session_id: str, target_agent: str,
                      handoff_type: str = None, consume: bool = True) -> Optional[Dict]:
-        """Read a handoff from in-memory storage (optionally consuming it)."""
-
-        # Filter matching handoffs
-        matching = [
-            h for h in self._handoffs.values()
-            if h["session_id"] == session_id
-            and h["target_agent"] == target_agent
-            and h["status"] == "pending"
-            and (handoff_type is None or h["handoff_type"] == handoff_type)
-        ]
+        """Read a handoff from working memory (optionally consuming it)."""
+
+        # Pending handoffs for this agent (indexed by session + target agent)
+        filters = {"target_agent": target_agent, "status": "pending"}
+        if handoff_type is not None:
+            filters["handoff_type"] = handoff_type
+        matching = self.working.find(WORKING_HANDOFF, session_id, **filters)
 
         if not matching:
             return None
@@ -756,20 +765,18 @@ class MemoryManager:
         doc = matching[0]
 
         if consume:
-            doc["status"] = "consumed"
-            doc["consumed_at"] = datetime.utcnow()
+            consumed = {"status": "consumed", "consumed_at": datetime.utcnow()}
+            self.working.update(WORKING_HANDOFF, doc["handoff_id"], consumed)
+            doc.update(consumed)
 
         return doc
 
     def read_all_pending(self, session_id: str, target_agent: str) -> List[Dict]:
-        """Read all pending handoffs for an agent from in-memory storage (without consuming)."""
+        """Read all pending handoffs for an agent from working memory (without consuming)."""
 
-        matching = [
-            h for h in self._handoffs.values()
-            if h["session_id"] == session_id
-            and h["target_agent"] == target_agent
-            and h["status"] == "pending"
-        ]
+        matching = self.working.find(
+            WORKING_HANDOFF, session_id, target_agent=target_agent, status="pending"
+        )
 
         # Sort by priority (descending) then created_at (ascending)
         priority_order = {"high": 3, "normal": 2, "low": 1}
@@ -780,26 +787,23 @@ class MemoryManager:
         return matching
 
     def check_pending(self, session_id: str, target_agent: str) -> bool:
-        """Check if there are pending handoffs in in-memory storage."""
-        return any(
-            h["session_id"] == session_id
-            and h["target_agent"] == target_agent
-            and h["status"] == "pending"
-            for h in self._handoffs.values()
-        )
+        """Check if there are pending handoffs in working memory."""
+        return self.working.count(
+            WORKING_HANDOFF, session_id, target_agent=target_agent, status="pending"
+        ) > 0
 
     # ═══════════════════════════════════════════════════════════════════
     # WORKING MEMORY: CHAIN OPERATIONS (In-Memory)
     # ═══════════════════════════════════════════════════════════════════
 
     def get_chain(self, chain_id: str) -> List[Dict]:
-        """Get all handoffs in a chain from in-memory storage."""
-        matching = [h for h in self._handoffs.values() if h["chain_id"] == chain_id]
+        """Get all handoffs in a chain from working memory."""
+        matching = self.working.find(WORKING_HANDOFF, chain_id=chain_id)
         matching.sort(key=lambda h: h["sequence"])
         return matching
 
     def get_chain_status(self, chain_id: str) -> Dict:
-        """Get status summary for a chain from in-memory storage."""
+        """Get status summary for a chain from working memory."""
         handoffs = self.get_chain(chain_id)
 
         return {
@@ -816,10 +820,8 @@ class MemoryManager:
         }
 
     def mark_error(self, handoff_id: str, error: str) -> None:
-        """Mark a handoff as errored in in-memory storage."""
-        if handoff_id in self._handoffs:
-            self._handoffs[handoff_id]["status"] = "error"
-            self._handoffs[handoff_id]["error"] = error
+        """Mark a handoff as errored in working memory."""
+        self.working.update(WORKING_HANDOFF, handoff_id, {"status": "error", "error": error})
 
     # ═══════════════════════════════════════════════════════════════════
     # LONG-TERM: SEMANTIC MEMORY (Preferences)
@@ -865,6 +867,7 @@ class MemoryManager:
                 },
                 "$inc": {"times_used": 1}}
             )
+            self.invalidate_memory_snapshot(user_id)
             return str(existing["_id"])
 
         # Create new preference
@@ -881,6 +884,8 @@ class MemoryManager:
             "updated_at": now
         }
         result = self.semantic.insert_one(doc)
+        self.counters.increment(user_counters_id(user_id), {"semantic": 1})
+        self.invalidate_memory_snapshot(user_id)
         return str(result.inserted_id)
 
     def get_preferences(self, user_id: str, min_confidence: float = 0.0) -> list:
@@ -933,6 +938,9 @@ class MemoryManager:
             "semantic_type": "preference",
             "key": key
         })
+        if result.deleted_count:
+            self.counters.increment(user_counters_id(user_id), {"semantic": -1})
+            self.invalidate_memory_snapshot(user_id)
         return result.deleted_count > 0
 
     # ═══════════════════════════════════════════════════════════════════
@@ -980,6 +988,8 @@ class MemoryManager:
                 },
                 "$inc": {"times_used": 1}}
             )
+            self.invalidate_trigger_matchers(user_id)
+            self.invalidate_memory_snapshot(user_id)
             return str(existing["_id"])
 
         # Create new rule
@@ -995,6 +1005,9 @@ class MemoryManager:
             "updated_at": now
         }
         result = self.procedural.insert_one(doc)
+        self.counters.increment(user_counters_id(user_id), {"procedural": 1})
+        self.invalidate_trigger_matchers(user_id)
+        self.invalidate_memory_snapshot(user_id)
         return str(result.inserted_id)
 
     def get_rules(self, user_id: str, min_confidence: float = 0.0) -> list:
@@ -1063,36 +1076,92 @@ class MemoryManager:
         Returns:
             Matching workflow or None
         """
-        import re
+        workflow = self._get_workflow_matcher(user_id).match(user_message)
+        if workflow is None:
+            return None
 
-        # Get all workflows for this user
-        workflows = self.procedural.find({
-            "user_id": user_id,
-            "rule_type": "workflow"
-        })
+        # Update last_used timestamp
+        self.procedural.update_one(
+            {"_id": workflow["_id"]},
+            {
+                "$set": {"last_used": datetime.utcnow()},
+                "$inc": {"times_used": 1}
+            }
+        )
+        # Usage counters only; the snapshot picks them up on its TTL or next real write
+        workflow = dict(workflow)
+        workflow["_id"] = str(workflow["_id"])
+        return workflow
 
-        # Check each workflow's trigger pattern
-        for workflow in workflows:
-            trigger_pattern = workflow.get("trigger_pattern", "")
-            if trigger_pattern:
-                try:
-                    if re.search(trigger_pattern, user_message, re.IGNORECASE):
-                        # Update last_used timestamp
-                        from datetime import datetime
-                        self.procedural.update_one(
-                            {"_id": workflow["_id"]},
-                            {
-                                "$set": {"last_used": datetime.utcnow()},
-                                "$inc": {"times_used": 1}
-                            }
-                        )
-                        workflow["_id"] = str(workflow["_id"])
-                        return workflow
-                except re.error:
-                    # Invalid regex pattern, skip
-                    continue
+    def match_rule_trigger(self, user_id: str, user_message: str,
+                           min_confidence: float = 0.5) -> Optional[dict]:
+        """
+        Find the rule whose trigger phrase appears in the user's message.
 
-        return None
+        Rules are checked in get_rules() priority order (most used first).
+
+        Args:
+            user_id: User identifier
+            user_message: User's input text
+            min_confidence: Minimum rule confidence
+
+        Returns:
+            Matching rule document or None
+        """
+        matcher = self._get_trigger_matcher(
+            (user_id, "rules", min_confidence),
+            lambda: KeywordMatcher([
+                (rule.get("trigger_pattern", ""), rule)
+                for rule in self.get_rules(user_id, min_confidence=min_confidence)
+            ])
+        )
+        rule = matcher.match(user_message)
+        return dict(rule) if rule is not None else None
+
+    def invalidate_trigger_matchers(self, user_id: str = None) -> None:
+        """
+        Drop compiled rule/workflow matchers so they rebuild on next use.
+
+        Args:
+            user_id: Only this user's matchers (default: all users)
+        """
+        with self._trigger_lock:
+            for key in list(self._trigger_matchers):
+                if user_id is None or key[0] == user_id:
+                    del self._trigger_matchers[key]
+
+    def _get_workflow_matcher(self, user_id: str) -> PatternMatcher:
+        """Compiled trigger_pattern regexes of the user's workflows."""
+        return self._get_trigger_matcher(
+            (user_id, "workflows"),
+            lambda: PatternMatcher([
+                (workflow.get("trigger_pattern", ""), workflow)
+                for workflow in self.procedural.find({
+                    "user_id": user_id,
+                    "rule_type": "workflow"
+                })
+            ])
+        )
+
+    def _get_trigger_matcher(self, key: tuple, build: Callable):
+        """
+        Get a cached matcher, building it on a miss or after the TTL.
+
+        Writes through this manager invalidate matchers immediately; the TTL
+        picks up procedural documents written by other processes.
+        """
+        from shared.config import settings
+
+        now = time.monotonic()
+        with self._trigger_lock:
+            cached = self._trigger_matchers.get(key)
+            if cached is not None and now - cached[0] < settings.trigger_cache_ttl_seconds:
+                return cached[1]
+
+        matcher = build()
+        with self._trigger_lock:
+            self._trigger_matchers[key] = (now, matcher)
+        return matcher
 
     def search_workflows_semantic(
         self,
@@ -1116,34 +1185,12 @@ class MemoryManager:
         Returns:
             Best matching workflow or None
         """
-        import re
-        from datetime import datetime
-
         # STEP 1: Try regex pattern matching (fast, precise)
-        workflows = list(self.procedural.find({
-            "user_id": user_id,
-            "rule_type": "workflow"
-        }))
-
-        for workflow in workflows:
-            trigger_pattern = workflow.get("trigger_pattern", "")
-            if trigger_pattern:
-                try:
-                    if re.search(trigger_pattern, user_message, re.IGNORECASE):
-                        # Update usage stats
-                        self.procedural.update_one(
-                            {"_id": workflow["_id"]},
-                            {
-                                "$set": {"last_used": datetime.utcnow()},
-                                "$inc": {"times_used": 1}
-                            }
-                        )
-                        workflow["_id"] = str(workflow["_id"])
-                        workflow["match_type"] = "regex"
-                        workflow["match_score"] = 1.0
-                        return workflow
-                except re.error:
-                    continue
+        workflow = self.get_workflow_for_pattern(user_id, user_message)
+        if workflow is not None:
+            workflow["match_type"] = "regex"
+            workflow["match_score"] = 1.0
+            return workflow
 
         # STEP 2: Fall back to vector similarity search
         if not self.embed:
@@ -1174,7 +1221,7 @@ class MemoryManager:
             }
         ]
 
-        results = list(self.procedural.aggregate(pipeline))
+        results = vector_search(self.procedural, pipeline)
 
         if results and results[0].get("score", 0) >= min_score:
             best_match = results[0]
@@ -1216,11 +1263,13 @@ class MemoryManager:
         if doc:
             doc["_id"] = str(doc["_id"])
 
-            # Increment usage
+            # Increment usage (changes rule priority order)
             self.procedural.update_one(
                 {"_id": ObjectId(doc["_id"])},
                 {"$inc": {"times_used": 1}, "$set": {"updated_at": datetime.utcnow()}}
             )
+            self.invalidate_trigger_matchers(user_id)
+            self.invalidate_memory_snapshot(user_id)
 
         return doc
 
@@ -1230,6 +1279,11 @@ class MemoryManager:
             "user_id": user_id,
             "trigger_pattern": trigger.lower().strip()
         })
+        if result.deleted_count:
+            self.counters.increment(user_counters_id(user_id), {"procedural": -1})
+            invalidate_vector_index(self.procedural.name)
+            self.invalidate_trigger_matchers(user_id)
+            self.invalidate_memory_snapshot(user_id)
         return result.deleted_count > 0
 
     def get_procedural_rule(
@@ -1331,7 +1385,7 @@ class MemoryManager:
             }
         ]
 
-        results = list(self.procedural.aggregate(pipeline))
+        results = vector_search(self.procedural, pipeline)
 
         # Convert ObjectIds to strings
         for r in results:
@@ -1360,6 +1414,67 @@ class MemoryManager:
             "action_summary": self.get_activity_summary(user_id, time_range="this_week")
         }
 
+    # ═══════════════════════════════════════════════════════════════════
+    # LONG-TERM: MEMORY SNAPSHOT (Context injection)
+    # ═══════════════════════════════════════════════════════════════════
+
+    @traced("memory.get_memory_snapshot", kind="memory")
+    def get_memory_snapshot(self, user_id: str) -> Dict:
+        """
+        Get the user's preferences, rules and workflows, memoized per version.
+
+        The snapshot is rebuilt only after a semantic/procedural write through
+        this manager (which bumps the user's version) or after the TTL, which
+        picks up writes made by other processes. Treat it as read-only.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            {
+                "version": int,
+                "preferences": [...],  # get_preferences(), highest confidence first
+                "rules": [...],        # get_rules(), most used first
+                "workflows": [...]     # get_workflows(), most used first
+            }
+        """
+        from shared.config import settings
+
+        now = time.monotonic()
+        with self._snapshot_lock:
+            version = self._memory_versions.get(user_id, 0)
+            cached = self._memory_snapshots.get(user_id)
+            if (cached is not None and cached["version"] == version
+                    and now - cached["built_at"] < settings.memory_snapshot_ttl_seconds):
+                return cached
+
+        snapshot = {
+            "version": version,
+            "built_at": now,
+            "preferences": self.get_preferences(user_id),
+            "rules": self.get_rules(user_id),
+            "workflows": self.get_workflows(user_id)
+        }
+
+        with self._snapshot_lock:
+            # Don't cache a snapshot that a concurrent write already made stale
+            if self._memory_versions.get(user_id, 0) == version:
+                self._memory_snapshots[user_id] = snapshot
+        return snapshot
+
+    def invalidate_memory_snapshot(self, user_id: str = None) -> None:
+        """
+        Bump the memory version so the next snapshot is rebuilt.
+
+        Args:
+            user_id: Only this user's snapshot (default: all users)
+        """
+        with self._snapshot_lock:
+            user_ids = [user_id] if user_id is not None else list(self._memory_snapshots)
+            for uid in user_ids:
+                self._memory_versions[uid] = self._memory_versions.get(uid, 0) + 1
+                self._memory_snapshots.pop(uid, None)
+
     # ═══════════════════════════════════════════════════════════════════
     # LONG-TERM: KNOWLEDGE CACHE (Semantic Memory - Knowledge)
     # ═══════════════════════════════════════════════════════════════════
@@ -1371,14 +1486,19 @@ class MemoryManager:
         results: any,
         source: str = "tavily",
         summary: str = None,
-        freshness_days: int = 7
+        freshness_days: int = 7,
+        embedding: List[float] = None
     ) -> str:
         """
         Cache search/research results as knowledge.
 
-        Stored in memory_semantic with:
-        - memory_type: "semantic"
-        - semantic_type: "knowledge"
+        Stored in two parts sharing one _id:
+        - memory_semantic header (memory_type "semantic", semantic_type
+          "knowledge"): query, query_hash, summary, embedding and dates;
+          this is all that lookups read
+        - knowledge_payloads: the full results, read only for a chosen hit
+
+        Both carry expires_at, which TTL indexes use to delete the entry.
 
         Args:
             user_id: User identifier
@@ -1387,15 +1507,16 @@ class MemoryManager:
             source: Source of knowledge (e.g., "tavily", "mcp")
             summary: Optional pre-computed summary (for display)
             freshness_days: Days until cache expires (default 7)
+            embedding: Precomputed query embedding (skips the embedding call)
 
         Returns:
             Inserted document ID as string
         """
         now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(days=freshness_days)
 
         # Generate embedding for semantic search
-        embedding = None
-        if self.embed:
+        if embedding is None and self.embed:
             try:
                 embedding = self.embed(query)
             except Exception as e:
@@ -1403,63 +1524,95 @@ class MemoryManager:
                 logger = get_logger("memory")
                 logger.warning(f"Failed to generate embedding for knowledge cache: {e}")
 
+        knowledge_id = ObjectId()
+
+        # Payload first, so a header never points at a missing payload
+        self.knowledge_payloads.insert_one({
+            "_id": knowledge_id,
+            "user_id": user_id,
+            "result": results,  # Full results for reference
+            "expires_at": expires_at
+        })
+
         doc = {
+            "_id": knowledge_id,
             "user_id": user_id,
             "memory_type": "semantic",
             "semantic_type": "knowledge",
             "query": query,
-            "result": results,  # Full results for reference
+            "query_hash": knowledge_query_hash(query),
             "summary": summary,  # Concise summary for display
             "source": source,
+            "payload_chars": len(results) if isinstance(results, str) else None,
             "embedding": embedding,
             "fetched_at": now,
-            "expires_at": now + timedelta(days=freshness_days),
+            "expires_at": expires_at,
             "times_accessed": 0,
             "created_at": now
         }
 
-        result = self.semantic.insert_one(doc)
-        return str(result.inserted_id)
+        self.semantic.insert_one(doc)
+        sync_vector_write(self.semantic.name, knowledge_id, doc)
+        self.counters.increment(
+            user_counters_id(user_id),
+            {"semantic": 1, "knowledge": 1, "knowledge_fresh": 1},
+            earliest={"stale_at": expires_at}
+        )
+        return str(knowledge_id)
 
-    def get_cached_knowledge(
+    @traced("memory.find_cached_knowledge", kind="memory")
+    def find_cached_knowledge(
         self,
         user_id: str,
         query: str,
-        max_age_days: int = 7,
-        similarity_threshold: float = 0.85
+        query_embedding: List[float] = None,
+        fresh_only: bool = True
     ) -> Optional[dict]:
         """
-        Find cached knowledge matching the query via vector search.
-
-        Returns None if:
-        - No similar query found
-        - Found but expired
-        - No embedding function available
+        Find the best cached knowledge header for a query.
 
-        If found and fresh:
-        - Increments times_accessed
-        - Returns the document
+        An exact match on the normalized query hash is tried first (score
+        1.0, no vector search). Otherwise the closest entry by vector search
+        is returned with its similarity score, whatever the score, so
+        callers apply their own threshold. Payloads are not read; see
+        get_knowledge_payloads().
 
         Args:
             user_id: User identifier
             query: Search query
-            max_age_days: Maximum age in days (default 7)
-            similarity_threshold: Minimum similarity score (default 0.85)
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            fresh_only: Ignore entries past expires_at
 
         Returns:
-            Cached knowledge document or None
+            Header document with "score" and "match" ("exact" or "vector"), or None
         """
-        if not self.embed:
-            return None
-
         now = datetime.now(timezone.utc)
+        base_filter = {
+            "user_id": user_id,
+            "memory_type": "semantic",
+            "semantic_type": "knowledge"
+        }
+        freshness = {"expires_at": {"$gt": now}} if fresh_only else {}
 
-        try:
-            query_embedding = self.embed(query)
-        except Exception:
-            return None
+        # 1. Exact (normalized) query: one indexed find_one
+        doc = self.semantic.find_one(
+            {**base_filter, **freshness, "query_hash": knowledge_query_hash(query)},
+            KNOWLEDGE_HEADER_FIELDS,
+            sort=[("fetched_at", DESCENDING)]
+        )
+        if doc:
+            doc.update(score=1.0, match="exact")
+            return doc
+
+        # 2. Closest entry by vector search
+        if query_embedding is None:
+            if not self.embed:
+                return None
+            try:
+                query_embedding = self.embed(query)
+            except Exception:
+                return None
 
-        # Vector search on knowledge entries
         pipeline = [
             {
                 "$vectorSearch": {
@@ -1468,29 +1621,22 @@ class MemoryManager:
                     "queryVector": query_embedding,
                     "numCandidates": 20,
                     "limit": 5,
-                    "filter": {
-                        "user_id": user_id,
-                        "memory_type": "semantic",
-                        "semantic_type": "knowledge"
-                    }
+                    "filter": base_filter
                 }
             },
             {
-                "$addFields": {
+                "$project": {
+                    **KNOWLEDGE_HEADER_FIELDS,
                     "score": {"$meta": "vectorSearchScore"}
                 }
-            },
-            {
-                "$match": {
-                    "score": {"$gte": similarity_threshold},
-                    "expires_at": {"$gt": now}
-                }
-            },
-            {"$limit": 1}
+            }
         ]
+        if freshness:
+            pipeline.append({"$match": freshness})
+        pipeline.append({"$limit": 1})
 
         try:
-            results = list(self.semantic.aggregate(pipeline))
+            results = vector_search(self.semantic, pipeline)
         except Exception as e:
             from shared.logger import get_logger
             logger = get_logger("memory")
@@ -1501,43 +1647,121 @@ class MemoryManager:
             return None
 
         doc = results[0]
+        doc["match"] = "vector"
+        return doc
+
+    def get_knowledge_payloads(self, knowledge_ids: List[Any]) -> Dict[ObjectId, Any]:
+        """
+        Read the full results of knowledge entries in one query.
+
+        Args:
+            knowledge_ids: Header _ids (ObjectId or string)
+
+        Returns:
+            Full results by header _id; entries cached before payloads were
+            split out are read from their header's "result" field
+        """
+        ids = [kid if isinstance(kid, ObjectId) else ObjectId(kid) for kid in knowledge_ids]
+        if not ids:
+            return {}
+
+        payloads = {
+            doc["_id"]: doc.get("result")
+            for doc in self.knowledge_payloads.find({"_id": {"$in": ids}}, {"result": 1})
+        }
+
+        legacy = [kid for kid in ids if kid not in payloads]
+        if legacy:
+            for doc in self.semantic.find({"_id": {"$in": legacy}, "result": {"$exists": True}}, {"result": 1}):
+                payloads[doc["_id"]] = doc["result"]
+
+        return payloads
+
+    def get_knowledge_payload(self, knowledge_id: Any) -> Any:
+        """Full results of one knowledge entry (None if it no longer exists)."""
+        knowledge_id = knowledge_id if isinstance(knowledge_id, ObjectId) else ObjectId(knowledge_id)
+        return self.get_knowledge_payloads([knowledge_id]).get(knowledge_id)
+
+    def get_cached_knowledge(
+        self,
+        user_id: str,
+        query: str,
+        max_age_days: int = 7,
+        similarity_threshold: float = 0.85,
+        query_embedding: List[float] = None
+    ) -> Optional[dict]:
+        """
+        Find fresh cached knowledge matching the query.
+
+        Returns None if:
+        - No similar query found
+        - Found but expired
+        - No exact match and no embedding function available
+
+        If found and fresh:
+        - Increments times_accessed
+        - Returns the header with its full results under "result"
+
+        Args:
+            user_id: User identifier
+            query: Search query
+            max_age_days: Maximum age in days (default 7)
+            similarity_threshold: Minimum similarity score (default 0.85)
+            query_embedding: Precomputed query embedding (skips the embedding call)
+
+        Returns:
+            Cached knowledge document or None
+        """
+        doc = self.find_cached_knowledge(user_id, query, query_embedding=query_embedding)
+        if not doc or doc["score"] < similarity_threshold:
+            return None
 
         # Increment access count
         self.semantic.update_one(
             {"_id": doc["_id"]},
             {
                 "$inc": {"times_accessed": 1},
-                "$set": {"last_accessed": now}
+                "$set": {"last_accessed": datetime.now(timezone.utc)}
             }
         )
 
+        doc["result"] = self.get_knowledge_payload(doc["_id"])
         return doc
 
+    @traced("memory.search_knowledge", kind="memory")
     def search_knowledge(
         self,
         user_id: str,
         query: str,
-        limit: int = 5
+        limit: int = 5,
+        query_embedding: List[float] = None,
+        include_payload: bool = False
     ) -> List[dict]:
         """
-        Semantic search over all cached knowledge (regardless of age).
-        Useful for "what do you know about X" queries.
+        Semantic search over cached knowledge that hasn't been expired out
+        by the TTL index yet. Useful for "what do you know about X" queries.
+
+        Only headers are read; pass include_payload, or call
+        get_knowledge_payloads() for the hits you use, to get full results.
 
         Args:
             user_id: User identifier
             query: Search query
             limit: Maximum results to return (default 5)
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            include_payload: Attach full results to every hit under "result"
 
         Returns:
-            List of knowledge documents with similarity scores
+            List of knowledge headers with similarity scores
         """
-        if not self.embed:
-            return []
+        if query_embedding is None:
+            if not self.embed:
+                return []
 
-        try:
-            query_embedding = self.embed(query)
-        except Exception:
-            return []
+            try:
+                query_embedding = self.embed(query)
+            except Exception:
+                return []
 
         # Use vector search for semantic similarity matching
         # Vector search alone provides excellent cache hit rates (0.86+ scores for exact matches)
@@ -1558,31 +1782,24 @@ class MemoryManager:
             },
             {
                 "$project": {
-                    "key": 1,
-                    "value": 1,
-                    "tags": 1,
-                    "confidence": 1,
-                    "query": 1,
-                    "result": 1,
-                    "summary": 1,
-                    "source": 1,
-                    "times_accessed": 1,
-                    "created_at": 1,
-                    "fetched_at": 1,
-                    "score": {"$meta": "vectorSearchScore"},
-                    "_id": 0
+                    **KNOWLEDGE_HEADER_FIELDS,
+                    "score": {"$meta": "vectorSearchScore"}
                 }
             }
         ]
 
         try:
-            return list(self.semantic.aggregate(pipeline))
+            results = vector_search(self.semantic, pipeline)
         except Exception as e:
             from shared.logger import get_logger
             logger = get_logger("memory")
             logger.warning(f"Vector search failed for knowledge: {e}")
             return []
 
+        if include_payload:
+            self._attach_knowledge_payloads(results)
+        return results
+
     def get_recent_knowledge(self, user_id: str, limit: int = 5) -> List[dict]:
         """
         Get most recent knowledge entries (sorted by fetch/creation date).
@@ -1593,16 +1810,24 @@ class MemoryManager:
             limit: Maximum results (default 5)
 
         Returns:
-            List of recent knowledge documents
+            List of recent knowledge documents, with full results under "result"
         """
-        return list(self.semantic.find({
+        docs = list(self.semantic.find({
             "user_id": user_id,
             "memory_type": "semantic",
             "semantic_type": "knowledge"
-        }).sort([
+        }, KNOWLEDGE_HEADER_FIELDS).sort([
             ("fetched_at", -1),
             ("created_at", -1)
         ]).limit(limit))
+        self._attach_knowledge_payloads(docs)
+        return docs
+
+    def _attach_knowledge_payloads(self, docs: List[dict]) -> None:
+        """Set "result" on knowledge headers from their payloads (one query)."""
+        payloads = self.get_knowledge_payloads([doc["_id"] for doc in docs if "_id" in doc])
+        for doc in docs:
+            doc["result"] = payloads.get(doc.get("_id"))
 
     def clear_knowledge_cache(self, user_id: str) -> int:
         """
@@ -1619,11 +1844,19 @@ class MemoryManager:
             "memory_type": "semantic",
             "semantic_type": "knowledge"
         })
+        self.knowledge_payloads.delete_many({"user_id": user_id})
+        if result.deleted_count:
+            self.counters.increment(
+                user_counters_id(user_id),
+                {"semantic": -result.deleted_count},
+                values={"knowledge": 0, "knowledge_fresh": 0}
+            )
+            invalidate_vector_index(self.semantic.name)
         return result.deleted_count
 
     def get_knowledge_stats(self, user_id: str) -> dict:
         """
-        Get knowledge cache statistics.
+        Get knowledge cache statistics (from the user's memory counters).
 
         Args:
             user_id: User identifier
@@ -1631,21 +1864,13 @@ class MemoryManager:
         Returns:
             Dict with total, fresh, and expired counts
         """
-        now = datetime.now(timezone.utc)
-
-        total = self.semantic.count_documents({
-            "user_id": user_id,
-            "memory_type": "semantic",
-            "semantic_type": "knowledge"
-        })
-
-        fresh = self.semantic.count_documents({
-            "user_id": user_id,
-            "memory_type": "semantic",
-            "semantic_type": "knowledge",
-            "expires_at": {"$gt": now}
-        })
+        return self._knowledge_stats(self.get_memory_counts(user_id))
 
+    @staticmethod
+    def _knowledge_stats(counts: Dict) -> dict:
+        """Knowledge cache stats from a memory counters document."""
+        total = counts.get("knowledge", 0)
+        fresh = counts.get("knowledge_fresh", 0)
         return {
             "total": total,
             "fresh": fresh,
@@ -1700,8 +1925,46 @@ class MemoryManager:
         }
 
         result = self.episodic.insert_one(doc)
+        self.counters.increment(user_counters_id(user_id), {"episodic": 1})
+        self._set_latest_summary_pointer(entity_type, entity_id, result.inserted_id, doc)
         return str(result.inserted_id)
 
+    def _set_latest_summary_pointer(
+        self,
+        entity_type: str,
+        entity_id: ObjectId,
+        summary_id: ObjectId,
+        doc: Dict
+    ) -> None:
+        """
+        Denormalize the newest summary onto its task/project document.
+
+        Lists that already load the entity (e.g. the sidebar) read the summary
+        from it instead of querying memory_episodic. An older summary stored
+        late never replaces a newer pointer.
+        """
+        # Import here to avoid circular imports
+        from shared.db import PROJECTS_COLLECTION, TASKS_COLLECTION, invalidate_projects_with_tasks_cache
+
+        collection = {"task": TASKS_COLLECTION, "project": PROJECTS_COLLECTION}.get(entity_type)
+        if not collection:
+            return
+
+        self.db[collection].update_one(
+            {
+                "_id": entity_id,
+                "latest_episodic_summary.generated_at": {"$not": {"$gt": doc["generated_at"]}}
+            },
+            {"$set": {"latest_episodic_summary": {
+                "summary_id": summary_id,
+                "summary": doc["summary"],
+                "activity_count": doc["activity_count"],
+                "generated_at": doc["generated_at"]
+            }}}
+        )
+        invalidate_projects_with_tasks_cache()
+
+    @traced("memory.get_latest_episodic_summary", kind="memory")
     def get_latest_episodic_summary(
         self,
         entity_type: str,
@@ -1737,6 +2000,45 @@ class MemoryManager:
 
         return doc
 
+    @traced("memory.get_latest_episodic_summaries", kind="memory")
+    def get_latest_episodic_summaries(
+        self,
+        entity_type: str,
+        entity_ids: List[Any]
+    ) -> Dict[str, Dict]:
+        """
+        Get the most recent episodic summary for many tasks or projects at once.
+
+        One aggregation ($match + $sort + $group/$first) served by the
+        entity_summary_lookup index, instead of a find_one per entity.
+
+        Args:
+            entity_type: "task" or "project"
+            entity_ids: ObjectIds (or their string form) of tasks or projects
+
+        Returns:
+            Latest summary document by entity ID string; entities without a
+            summary are left out
+        """
+        ids = list({eid if isinstance(eid, ObjectId) else ObjectId(eid) for eid in entity_ids})
+        if not ids:
+            return {}
+
+        pipeline = [
+            {"$match": {"entity_type": entity_type, "entity_id": {"$in": ids}}},
+            {"$sort": {"entity_type": 1, "entity_id": 1, "generated_at": -1}},
+            {"$group": {"_id": "$entity_id", "latest": {"$first": "$$ROOT"}}},
+            {"$replaceRoot": {"newRoot": "$latest"}},
+        ]
+
+        summaries = {}
+        for doc in self.episodic.aggregate(pipeline):
+            doc["_id"] = str(doc["_id"])
+            doc["entity_id"] = str(doc["entity_id"])
+            summaries[doc["entity_id"]] = doc
+
+        return summaries
+
     def get_all_episodic_summaries(
         self,
         entity_type: str,
@@ -1782,35 +2084,18 @@ class MemoryManager:
     def get_memory_stats(self, session_id: str, user_id: str) -> Dict:
         """Get memory statistics including all memory types."""
 
-        # Working memory counts (in-memory)
-        session_count = 1 if session_id in self._session_contexts else 0
-        agent_working_count = sum(1 for k in self._agent_working.keys() if k[0] == session_id)
-        disambiguation_count = 1 if session_id in self._disambiguations else 0
-        handoff_pending = sum(
-            1 for h in self._handoffs.values()
-            if h["session_id"] == session_id and h["status"] == "pending"
-        )
+        # Working memory counts (indexed by session)
+        session_count = 1 if self.working.get(WORKING_SESSION, session_id) else 0
+        agent_working_count = self.working.count(WORKING_AGENT, session_id)
+        disambiguation_count = 1 if self.working.get(WORKING_DISAMBIGUATION, session_id) else 0
+        handoff_pending = self.working.count(WORKING_HANDOFF, session_id, status="pending")
         working_memory_count = session_count + agent_working_count + disambiguation_count
 
-        # Long-term breakdown by memory_type
-        episodic_count = self.episodic.count_documents({
-            "user_id": user_id
-        })
-
-        semantic_count = self.semantic.count_documents({
-            "user_id": user_id
-        })
-
-        # Procedural workflows and rules (from dedicated collection)
-        procedural_count = self.procedural.count_documents({
-            "user_id": user_id
-        })
-
-        # Knowledge cache stats
-        knowledge_stats = self.get_knowledge_stats(user_id)
-
-        # Action counts (episodic only)
-        action_counts = self._get_action_counts(user_id)
+        # Long-term counts from one counters document (see memory/counters.py)
+        counts = self.get_memory_counts(user_id)
+        episodic_count = counts.get("episodic", 0)
+        semantic_count = counts.get("semantic", 0)
+        procedural_count = counts.get("procedural", 0)
 
         return {
             "working_memory_count": working_memory_count,
@@ -1823,10 +2108,60 @@ class MemoryManager:
                 "procedural_memory": procedural_count,
                 "handoffs_pending": handoff_pending
             },
-            "knowledge_cache": knowledge_stats,
-            "action_counts": action_counts
+            "knowledge_cache": self._knowledge_stats(counts),
+            "action_counts": decode_counter_map(counts.get("actions"))
         }
 
+    def get_memory_counts(self, user_id: str) -> Dict:
+        """
+        Get a user's long-term memory counters.
+
+        Kept up to date by every write through this manager and rebuilt
+        from the collections when stale (see memory/counters.py).
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Counters document: episodic, semantic, procedural, knowledge,
+            knowledge_fresh and actions ({encoded action_type: count})
+        """
+        return self.counters.read(user_counters_id(user_id), lambda: self._count_memory(user_id))
+
+    def reconcile_memory_counts(self, user_id: str) -> Dict:
+        """Rebuild a user's memory counters from the collections now."""
+        return self.counters.reconcile(user_counters_id(user_id), lambda: self._count_memory(user_id))
+
+    def _count_memory(self, user_id: str) -> Dict:
+        """Count a user's long-term memory from the collections."""
+        now = datetime.now(timezone.utc)
+        knowledge_query = {
+            "user_id": user_id,
+            "memory_type": "semantic",
+            "semantic_type": "knowledge"
+        }
+        fresh_query = {**knowledge_query, "expires_at": {"$gt": now}}
+
+        counts = {
+            "episodic": self.episodic.count_documents({"user_id": user_id}),
+            "semantic": self.semantic.count_documents({"user_id": user_id}),
+            "procedural": self.procedural.count_documents({"user_id": user_id}),
+            "knowledge": self.semantic.count_documents(knowledge_query),
+            "knowledge_fresh": self.semantic.count_documents(fresh_query),
+            "actions": {
+                encode_counter_key(action_type): count
+                for action_type, count in self._get_action_counts(user_id).items()
+            }
+        }
+
+        # knowledge_fresh is only right until the next entry expires
+        next_expiry = self.semantic.find_one(
+            fresh_query, {"expires_at": 1}, sort=[("expires_at", ASCENDING)]
+        )
+        if next_expiry:
+            counts["stale_at"] = next_expiry["expires_at"]
+        return counts
+
     def _get_action_counts(self, user_id: str) -> Dict[str, int]:
         """Get counts by action type (episodic memory only)."""
         pipeline = [
@@ -1839,39 +2174,12 @@ class MemoryManager:
         return {r["_id"]: r["count"] for r in results if r["_id"]}
 
     def clear_session(self, session_id: str) -> Dict[str, int]:
-        """Clear all memory for a session from in-memory storage (for testing/demo reset)."""
-        # Clear session contexts
-        session_deleted = 0
-        if session_id in self._session_contexts:
-            del self._session_contexts[session_id]
-            session_deleted = 1
-
-        # Clear agent working memory
-        agent_deleted = 0
-        keys_to_delete = [k for k in self._agent_working.keys() if k[0] == session_id]
-        for key in keys_to_delete:
-            del self._agent_working[key]
-            agent_deleted += 1
-
-        # Clear disambiguation
-        disambiguation_deleted = 0
-        if session_id in self._disambiguations:
-            del self._disambiguations[session_id]
-            disambiguation_deleted = 1
-
-        # Clear handoffs
-        handoff_deleted = 0
-        handoff_ids_to_delete = [
-            hid for hid, h in self._handoffs.items()
-            if h["session_id"] == session_id
-        ]
-        for hid in handoff_ids_to_delete:
-            del self._handoffs[hid]
-            handoff_deleted += 1
+        """Clear all working memory for a session (for testing/demo reset)."""
+        deleted = self.working.clear_session(session_id)
 
         return {
-            "session_contexts_deleted": session_deleted,
-            "agent_working_deleted": agent_deleted,
-            "disambiguation_deleted": disambiguation_deleted,
-            "handoffs_deleted": handoff_deleted
+            "session_contexts_deleted": deleted[WORKING_SESSION],
+            "agent_working_deleted": deleted[WORKING_AGENT],
+            "disambiguation_deleted": deleted[WORKING_DISAMBIGUATION],
+            "handoffs_deleted": deleted[WORKING_HANDOFF]
         }
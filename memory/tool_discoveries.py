@@ -16,12 +16,19 @@ Example flow:
 
 from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument
 from pymongo.collection import Collection
 from pymongo.errors import OperationFailure
 from bson import ObjectId
 
+from memory.counters import (
+    DISCOVERY_COUNTERS_ID,
+    CounterStore,
+    decode_counter_map,
+    encode_counter_key,
+)
 from shared.logger import get_logger
+from shared.vector_index import sync_vector_delete, sync_vector_write, vector_search
 
 logger = get_logger("tool_discoveries")
 
@@ -40,6 +47,7 @@ class ToolDiscoveryStore:
         self.db = db
         self.collection: Collection = db["tool_discoveries"]
         self.embed = embedding_fn
+        self.counters = CounterStore(db)
         self._ensure_indexes()
 
     def _ensure_indexes(self):
@@ -118,7 +126,8 @@ class ToolDiscoveryStore:
         result_preview: Any,
         success: bool,
         execution_time_ms: int,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        request_embedding: Optional[List[float]] = None
     ) -> str:
         """
         Log a newly discovered solution.
@@ -131,6 +140,8 @@ class ToolDiscoveryStore:
             success: Whether the tool call succeeded
             execution_time_ms: How long the tool took to execute
             user_id: Optional user identifier
+            request_embedding: Precomputed embedding of user_request (skips
+                the embedding call)
 
         Schema:
         {
@@ -161,8 +172,7 @@ class ToolDiscoveryStore:
         now = datetime.now(timezone.utc)
 
         # Generate embedding for semantic matching
-        request_embedding = None
-        if self.embed:
+        if request_embedding is None and self.embed:
             try:
                 request_embedding = self.embed(user_request)
             except Exception as e:
@@ -205,8 +215,14 @@ class ToolDiscoveryStore:
             discovery_doc["user_id"] = user_id
 
         result = self.collection.insert_one(discovery_doc)
+        sync_vector_write(self.collection.name, result.inserted_id, discovery_doc)
         discovery_id = str(result.inserted_id)
 
+        counts = self._usage_counts(discovery_doc, 1)
+        counts["total"] = 1
+        counts["successful" if success else "failed"] = 1
+        self.counters.increment(DISCOVERY_COUNTERS_ID, counts)
+
         logger.info(
             f"Logged discovery {discovery_id}: {solution['mcp_server']}.{solution['tool_used']} "
             f"for intent '{intent}' (success={success}, {execution_time_ms}ms)"
@@ -218,7 +234,9 @@ class ToolDiscoveryStore:
         self,
         user_request: str,
         similarity_threshold: float = 0.85,
-        require_success: bool = True
+        require_success: bool = True,
+        query_embedding: Optional[List[float]] = None,
+        record_usage: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Find a previously discovered solution for a similar request.
@@ -228,24 +246,29 @@ class ToolDiscoveryStore:
             user_request: Current user request to match against
             similarity_threshold: Minimum cosine similarity (0.0-1.0)
             require_success: Only return successful discoveries
+            query_embedding: Precomputed embedding of user_request (skips
+                the embedding call)
+            record_usage: Record the match as a use; pass False to look up
+                speculatively and call record_usage() once it is reused
 
         Returns:
             Discovery document if found, None otherwise
 
-        Side effects:
+        Side effects (if record_usage):
             - Increments times_used on the matched discovery
             - Updates last_used timestamp
         """
-        if not self.embed:
-            logger.warning("No embedding function available for similarity search")
-            return None
+        if query_embedding is None:
+            if not self.embed:
+                logger.warning("No embedding function available for similarity search")
+                return None
 
-        # Generate embedding for user request
-        try:
-            query_embedding = self.embed(user_request)
-        except Exception as e:
-            logger.error(f"Failed to generate query embedding: {e}")
-            return None
+            # Generate embedding for user request
+            try:
+                query_embedding = self.embed(user_request)
+            except Exception as e:
+                logger.error(f"Failed to generate query embedding: {e}")
+                return None
 
         # Vector search pipeline
         # Note: Requires Atlas vector search index named "discovery_vector_index"
@@ -285,7 +308,7 @@ class ToolDiscoveryStore:
         pipeline.append({"$limit": 1})
 
         try:
-            results = list(self.collection.aggregate(pipeline))
+            results = vector_search(self.collection, pipeline)
 
             if not results:
                 logger.debug(f"No similar discovery found for: '{user_request[:50]}...'")
@@ -300,17 +323,8 @@ class ToolDiscoveryStore:
                 f"{discovery['solution']['mcp_server']}.{discovery['solution']['tool_used']}"
             )
 
-            # Increment usage and update timestamp
-            self.collection.update_one(
-                {"_id": discovery_id},
-                {
-                    "$inc": {"times_used": 1},
-                    "$set": {"last_used": datetime.now(timezone.utc)}
-                }
-            )
-
-            # Update the returned doc to reflect new usage
-            discovery["times_used"] += 1
+            if record_usage:
+                self.record_usage(discovery)
 
             return discovery
 
@@ -319,12 +333,47 @@ class ToolDiscoveryStore:
             logger.info("Falling back to exact match search")
 
             # Fallback: exact text match on user_request
-            return self._exact_match_fallback(user_request, require_success)
+            return self._exact_match_fallback(user_request, require_success, record_usage)
+
+    def record_usage(self, discovery: Dict[str, Any]) -> None:
+        """
+        Record that a discovery was reused.
+
+        Increments times_used (in MongoDB and on the passed document) and
+        updates last_used.
+
+        Args:
+            discovery: Discovery document returned by find_similar_discovery
+        """
+        self.collection.update_one(
+            {"_id": discovery["_id"]},
+            {
+                "$inc": {"times_used": 1},
+                "$set": {"last_used": datetime.now(timezone.utc)}
+            }
+        )
+
+        self.counters.increment(DISCOVERY_COUNTERS_ID, self._usage_counts(discovery, 1))
+
+        # Update the returned doc to reflect new usage
+        discovery["times_used"] = discovery.get("times_used", 0) + 1
+
+    @staticmethod
+    def _usage_counts(discovery: Dict[str, Any], uses: int) -> Dict[str, int]:
+        """Counter deltas for `uses` uses of a discovery (total and per server/tool)."""
+        solution = discovery.get("solution") or {}
+        counts = {"times_used": uses}
+        if solution.get("mcp_server"):
+            counts[f"servers.{encode_counter_key(solution['mcp_server'])}"] = uses
+        if solution.get("tool_used"):
+            counts[f"tools.{encode_counter_key(solution['tool_used'])}"] = uses
+        return counts
 
     def _exact_match_fallback(
         self,
         user_request: str,
-        require_success: bool = True
+        require_success: bool = True,
+        record_usage: bool = True
     ) -> Optional[Dict[str, Any]]:
         """Fallback to exact text matching when vector search unavailable"""
         query = {"user_request": user_request}
@@ -337,15 +386,8 @@ class ToolDiscoveryStore:
         )
 
         if discovery:
-            # Increment usage
-            self.collection.update_one(
-                {"_id": discovery["_id"]},
-                {
-                    "$inc": {"times_used": 1},
-                    "$set": {"last_used": datetime.now(timezone.utc)}
-                }
-            )
-            discovery["times_used"] += 1
+            if record_usage:
+                self.record_usage(discovery)
             logger.info(f"Exact match found: {discovery['_id']}")
 
         return discovery
@@ -398,17 +440,23 @@ class ToolDiscoveryStore:
             True if successful, False otherwise
         """
         try:
-            result = self.collection.update_one(
+            before = self.collection.find_one_and_update(
                 {"_id": ObjectId(discovery_id)},
                 {
                     "$set": {
                         "promoted_to_static": True,
                         "developer_notes": notes
                     }
-                }
+                },
+                projection={"promoted_to_static": 1, "developer_notes": 1},
+                return_document=ReturnDocument.BEFORE
             )
 
-            if result.modified_count > 0:
+            newly_promoted = before is not None and not before.get("promoted_to_static")
+            if newly_promoted:
+                self.counters.increment(DISCOVERY_COUNTERS_ID, {"promoted": 1})
+
+            if newly_promoted or (before is not None and before.get("developer_notes") != notes):
                 logger.info(f"Marked discovery {discovery_id} as promoted")
                 return True
             else:
@@ -451,6 +499,9 @@ class ToolDiscoveryStore:
         """
         Return statistics for UI/dashboard.
 
+        Reads the discovery counters document, rebuilt from the collection
+        when stale (see memory/counters.py).
+
         Returns:
             {
                 total_discoveries: int,
@@ -462,58 +513,64 @@ class ToolDiscoveryStore:
                 most_used_tool: str
             }
         """
-        total = self.collection.count_documents({})
-        successful = self.collection.count_documents({"success": True})
-        failed = self.collection.count_documents({"success": False})
-        promoted = self.collection.count_documents({"promoted_to_static": True})
+        counts = self.counters.read(DISCOVERY_COUNTERS_ID, self._count_discoveries)
 
-        # Calculate average uses
-        pipeline = [
-            {"$group": {
-                "_id": None,
-                "avg_uses": {"$avg": "$times_used"}
-            }}
-        ]
-        avg_result = list(self.collection.aggregate(pipeline))
-        avg_uses = avg_result[0]["avg_uses"] if avg_result else 0.0
-
-        # Find most used MCP server
-        server_pipeline = [
-            {"$group": {
-                "_id": "$solution.mcp_server",
-                "count": {"$sum": "$times_used"}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 1}
-        ]
-        server_result = list(self.collection.aggregate(server_pipeline))
-        most_used_server = server_result[0]["_id"] if server_result else "None"
+        total = counts.get("total", 0)
+        avg_uses = counts.get("times_used", 0) / total if total else 0.0
 
-        # Find most used tool
-        tool_pipeline = [
-            {"$group": {
-                "_id": "$solution.tool_used",
-                "count": {"$sum": "$times_used"}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 1}
-        ]
-        tool_result = list(self.collection.aggregate(tool_pipeline))
-        most_used_tool = tool_result[0]["_id"] if tool_result else "None"
+        servers = decode_counter_map(counts.get("servers"))
+        tools = decode_counter_map(counts.get("tools"))
 
         stats = {
             "total_discoveries": total,
-            "successful": successful,
-            "failed": failed,
-            "promoted": promoted,
+            "successful": counts.get("successful", 0),
+            "failed": counts.get("failed", 0),
+            "promoted": counts.get("promoted", 0),
             "avg_uses": round(avg_uses, 2),
-            "most_used_server": most_used_server,
-            "most_used_tool": most_used_tool
+            "most_used_server": max(servers, key=servers.get) if servers else "None",
+            "most_used_tool": max(tools, key=tools.get) if tools else "None"
         }
 
         logger.debug(f"Discovery stats: {stats}")
         return stats
 
+    def reconcile_stats(self) -> Dict[str, Any]:
+        """Rebuild the discovery counters from the collection now."""
+        return self.counters.reconcile(DISCOVERY_COUNTERS_ID, self._count_discoveries)
+
+    def _count_discoveries(self) -> Dict[str, Any]:
+        """Count discoveries from the collection (one aggregation)."""
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "server": "$solution.mcp_server",
+                    "tool": "$solution.tool_used"
+                },
+                "total": {"$sum": 1},
+                "successful": {"$sum": {"$cond": [{"$eq": ["$success", True]}, 1, 0]}},
+                "failed": {"$sum": {"$cond": [{"$eq": ["$success", False]}, 1, 0]}},
+                "promoted": {"$sum": {"$cond": [{"$eq": ["$promoted_to_static", True]}, 1, 0]}},
+                "times_used": {"$sum": "$times_used"}
+            }}
+        ]
+
+        counts = {"total": 0, "successful": 0, "failed": 0, "promoted": 0,
+                  "times_used": 0, "servers": {}, "tools": {}}
+        for group in self.collection.aggregate(pipeline):
+            for field in ("total", "successful", "failed", "promoted", "times_used"):
+                counts[field] += group.get(field) or 0
+
+            uses = group.get("times_used") or 0
+            server, tool = group["_id"].get("server"), group["_id"].get("tool")
+            if server:
+                key = encode_counter_key(server)
+                counts["servers"][key] = counts["servers"].get(key, 0) + uses
+            if tool:
+                key = encode_counter_key(tool)
+                counts["tools"][key] = counts["tools"].get(key, 0) + uses
+
+        return counts
+
     def get_discoveries_by_server(self, mcp_server: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get discoveries for a specific MCP server.
@@ -561,9 +618,22 @@ class ToolDiscoveryStore:
             True if deleted, False otherwise
         """
         try:
-            result = self.collection.delete_one({"_id": ObjectId(discovery_id)})
+            deleted = self.collection.find_one_and_delete(
+                {"_id": ObjectId(discovery_id)},
+                projection={"solution": 1, "success": 1, "promoted_to_static": 1, "times_used": 1}
+            )
+
+            if deleted is not None:
+                sync_vector_delete(self.collection.name, ObjectId(discovery_id))
+
+                counts = self._usage_counts(deleted, -(deleted.get("times_used") or 0))
+                counts["total"] = -1
+                if deleted.get("success") is not None:
+                    counts["successful" if deleted["success"] else "failed"] = -1
+                if deleted.get("promoted_to_static"):
+                    counts["promoted"] = -1
+                self.counters.increment(DISCOVERY_COUNTERS_ID, counts)
 
-            if result.deleted_count > 0:
                 logger.info(f"Deleted discovery {discovery_id}")
                 return True
             else:
@@ -0,0 +1,157 @@
+"""
+Compiled trigger matchers for procedural memory.
+
+Rules fire when their trigger phrase appears in the user's message; workflows
+fire when their trigger_pattern regex matches it. Both used to be evaluated by
+loading every procedural document for the user and testing them one at a time
+on each turn. The matchers here are built once per user and cached by
+MemoryManager until a procedural write invalidates them.
+
+- KeywordMatcher: Aho-Corasick automaton over literal triggers. One pass over
+  the message finds every trigger it contains.
+- PatternMatcher: all regexes combined into a single alternation used as a
+  prefilter. Only on a hit are the (precompiled) patterns tried in order, so
+  the first pattern in priority order still wins.
+"""
+
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from shared.logger import get_logger
+
+logger = get_logger("trigger_matcher")
+
+# Backreferences change meaning once patterns are combined (group numbers shift)
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class KeywordMatcher:
+    """Aho-Corasick matcher for literal, case-insensitive trigger phrases."""
+
+    def __init__(self, entries: Sequence[Tuple[str, Any]]):
+        """
+        Build the automaton.
+
+        Args:
+            entries: (keyword, payload) pairs in priority order; empty
+                keywords are ignored
+        """
+        self._payloads: List[Any] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for keyword, payload in entries:
+            keyword = (keyword or "").lower()
+            if not keyword:
+                continue
+            self._add(keyword, len(self._payloads))
+            self._payloads.append(payload)
+
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def _add(self, keyword: str, index: int) -> None:
+        node = 0
+        for char in keyword:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][char] = child
+            node = child
+        self._out[node].append(index)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def match(self, text: str) -> Optional[Any]:
+        """
+        Find the highest-priority keyword contained in text.
+
+        Args:
+            text: Message to scan
+
+        Returns:
+            Payload of the matching keyword, or None
+        """
+        best = None
+        node = 0
+        for char in text.lower():
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._out[node]:
+                found = min(self._out[node])
+                if best is None or found < best:
+                    best = found
+                    if best == 0:
+                        break
+        return None if best is None else self._payloads[best]
+
+
+class PatternMatcher:
+    """Precompiled regex triggers with a combined-alternation prefilter."""
+
+    def __init__(self, entries: Sequence[Tuple[str, Any]], flags: int = re.IGNORECASE):
+        """
+        Compile the patterns.
+
+        Args:
+            entries: (pattern, payload) pairs in priority order; empty and
+                invalid patterns are skipped
+            flags: Regex flags for every pattern
+        """
+        self._patterns: List[Tuple[re.Pattern, Any]] = []
+        for pattern, payload in entries:
+            if not pattern:
+                continue
+            try:
+                self._patterns.append((re.compile(pattern, flags), payload))
+            except re.error as e:
+                logger.debug("Skipping invalid trigger pattern %r: %s", pattern, e)
+
+        self._combined: Optional[re.Pattern] = None
+        sources = [compiled.pattern for compiled, _ in self._patterns]
+        if sources and not any(_BACKREFERENCE.search(source) for source in sources):
+            try:
+                self._combined = re.compile("|".join(f"(?:{source})" for source in sources), flags)
+            except re.error:
+                # e.g. duplicate group names or inline flags; test patterns one by one
+                self._combined = None
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def match(self, text: str) -> Optional[Any]:
+        """
+        Find the first pattern (in priority order) that matches text.
+
+        Args:
+            text: Message to test
+
+        Returns:
+            Payload of the matching pattern, or None
+        """
+        if not self._patterns:
+            return None
+        if self._combined is not None and not self._combined.search(text):
+            return None
+        for compiled, payload in self._patterns:
+            if compiled.search(text):
+                return payload
+        return None
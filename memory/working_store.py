@@ -0,0 +1,413 @@
+"""
+Working-memory store for MemoryManager.
+
+Working memory (session context, agent working memory, disambiguation and
+handoffs) is short-lived per-session state. It used to live in plain dicts on
+the manager that were never pruned, and handoff lookups scanned every handoff
+in the process. Records now go through a store keyed by (kind, key) and owned
+by a session:
+
+- InProcessWorkingStore (default): per-session idle TTL, LRU eviction beyond
+  a session cap, a per-session handoff cap, and secondary indexes so handoff
+  lookups by session/target agent/chain don't scan everything.
+- MongoWorkingStore: one document per record in a TTL collection, so several
+  Streamlit workers can share session state. Writes extend the whole
+  session's expiry.
+
+Both return plain dicts. Callers persist changes with put() / update(); the
+in-process store may hand back the stored object itself, the MongoDB store
+returns copies.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional
+
+from shared.logger import get_logger
+
+logger = get_logger("working_store")
+
+WORKING_MEMORY_COLLECTION = "memory_working"
+
+# Record kinds
+SESSION = "session"
+AGENT = "agent"
+DISAMBIGUATION = "disambiguation"
+HANDOFF = "handoff"
+KINDS = (SESSION, AGENT, DISAMBIGUATION, HANDOFF)
+
+
+class InProcessWorkingStore:
+    """Bounded in-process working memory with TTL/LRU eviction by session."""
+
+    def __init__(self, ttl_seconds: float = 7200, max_sessions: int = 1000,
+                 max_handoffs_per_session: int = 200):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: Evict a session after this long without a write
+                (0 disables expiry)
+            max_sessions: Evict least recently used sessions beyond this
+            max_handoffs_per_session: Drop the oldest handoffs beyond this,
+                resolved ones first
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_handoffs_per_session = max(1, max_handoffs_per_session)
+
+        self._lock = threading.RLock()
+        self._records: Dict[tuple, Dict] = {}  # (kind, key) -> doc
+        self._owner: Dict[tuple, str] = {}  # (kind, key) -> session_id
+        self._sessions: "OrderedDict[str, Dict[str, set]]" = OrderedDict()  # LRU: session_id -> kind -> keys
+        self._touched: Dict[str, float] = {}  # session_id -> last write (monotonic)
+        self._by_target: Dict[tuple, set] = {}  # (session_id, target_agent) -> handoff keys
+        self._by_chain: Dict[str, set] = {}  # chain_id -> handoff keys
+        self._last_sweep = time.monotonic()
+        self._evicted = {"expired": 0, "lru": 0, "handoff_cap": 0}
+
+    # ═══════════════════════════════════════════════════════════════
+    # READS
+    # ═══════════════════════════════════════════════════════════════
+
+    def get(self, kind: str, key: Hashable) -> Optional[Dict]:
+        """Return the record, or None if missing or its session expired."""
+        with self._lock:
+            session_id = self._owner.get((kind, key))
+            if session_id is None or self._expire_if_stale(session_id):
+                return None
+            return self._records.get((kind, key))
+
+    def find(self, kind: str, session_id: str = None, **equals) -> List[Dict]:
+        """
+        Return records of a kind, optionally by session and field values.
+
+        Handoff lookups by session + target_agent and by chain_id use
+        secondary indexes; other filters scan only the session's records.
+
+        Args:
+            kind: Record kind
+            session_id: Owning session (None = all sessions)
+            **equals: Field/value pairs the record must match
+
+        Returns:
+            Matching records (unordered)
+        """
+        with self._lock:
+            if session_id is not None and self._expire_if_stale(session_id):
+                return []
+
+            if kind == HANDOFF and "chain_id" in equals:
+                keys = self._by_chain.get(equals["chain_id"], set())
+            elif kind == HANDOFF and session_id is not None and "target_agent" in equals:
+                keys = self._by_target.get((session_id, equals["target_agent"]), set())
+            elif session_id is not None:
+                keys = self._sessions.get(session_id, {}).get(kind, set())
+            else:
+                keys = [key for record_kind, key in self._records if record_kind == kind]
+
+            results = []
+            for key in list(keys):
+                doc = self._records.get((kind, key))
+                if doc is None:
+                    continue
+                if session_id is not None and self._owner.get((kind, key)) != session_id:
+                    continue
+                if self._expire_if_stale(self._owner[(kind, key)]):
+                    continue
+                if all(doc.get(field) == value for field, value in equals.items()):
+                    results.append(doc)
+            return results
+
+    def count(self, kind: str, session_id: str = None, **equals) -> int:
+        """Number of records find() would return."""
+        return len(self.find(kind, session_id, **equals))
+
+    # ═══════════════════════════════════════════════════════════════
+    # WRITES
+    # ═══════════════════════════════════════════════════════════════
+
+    def put(self, kind: str, key: Hashable, session_id: str, doc: Dict) -> None:
+        """Insert or replace a record owned by session_id."""
+        with self._lock:
+            self._sweep()
+            self._expire_if_stale(session_id)
+            self._unindex(kind, key)
+            self._records[(kind, key)] = doc
+            self._owner[(kind, key)] = session_id
+            self._sessions.setdefault(session_id, {}).setdefault(kind, set()).add(key)
+            if kind == HANDOFF:
+                self._by_target.setdefault((session_id, doc.get("target_agent")), set()).add(key)
+                if doc.get("chain_id"):
+                    self._by_chain.setdefault(doc["chain_id"], set()).add(key)
+                self._enforce_handoff_cap(session_id)
+            self._touch(session_id)
+            self._enforce_session_cap()
+
+    def update(self, kind: str, key: Hashable, fields: Dict[str, Any]) -> bool:
+        """Set fields on an existing record. Returns False if it doesn't exist."""
+        with self._lock:
+            doc = self.get(kind, key)
+            if doc is None:
+                return False
+            doc.update(fields)
+            self._touch(self._owner[(kind, key)])
+            return True
+
+    def delete(self, kind: str, key: Hashable) -> bool:
+        """Remove a record. Returns True if it existed."""
+        with self._lock:
+            return self._unindex(kind, key)
+
+    def clear_session(self, session_id: str) -> Dict[str, int]:
+        """Remove every record of a session. Returns deleted counts by kind."""
+        with self._lock:
+            return self._drop_session(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Record counts, session count and eviction counters."""
+        with self._lock:
+            counts = dict.fromkeys(KINDS, 0)
+            for kind, _ in self._records:
+                counts[kind] = counts.get(kind, 0) + 1
+            return {"backend": "memory", "sessions": len(self._sessions), "records": counts, "evicted": dict(self._evicted)}
+
+    # ═══════════════════════════════════════════════════════════════
+    # EVICTION
+    # ═══════════════════════════════════════════════════════════════
+
+    def _touch(self, session_id: str) -> None:
+        self._touched[session_id] = time.monotonic()
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+
+    def _expire_if_stale(self, session_id: str) -> bool:
+        """Drop the session if its TTL has passed. Returns True if dropped."""
+        if not self.ttl_seconds:
+            return False
+        touched = self._touched.get(session_id)
+        if touched is None or time.monotonic() - touched < self.ttl_seconds:
+            return False
+        self._drop_session(session_id)
+        self._evicted["expired"] += 1
+        return True
+
+    def _sweep(self) -> None:
+        """Expire idle sessions, at most every tenth of the TTL."""
+        if not self.ttl_seconds:
+            return
+        now = time.monotonic()
+        if now - self._last_sweep < self.ttl_seconds / 10:
+            return
+        self._last_sweep = now
+        # Sessions are in LRU order, so the idle ones are at the front
+        for session_id in list(self._sessions):
+            if not self._expire_if_stale(session_id):
+                break
+
+    def _enforce_session_cap(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            session_id = next(iter(self._sessions))
+            self._drop_session(session_id)
+            self._evicted["lru"] += 1
+
+    def _enforce_handoff_cap(self, session_id: str) -> None:
+        keys = self._sessions.get(session_id, {}).get(HANDOFF, set())
+        excess = len(keys) - self.max_handoffs_per_session
+        if excess <= 0:
+            return
+        # Resolved handoffs go first, then the oldest pending ones
+        ordered = sorted(
+            keys,
+            key=lambda k: (self._records[(HANDOFF, k)].get("status") == "pending",
+                           self._records[(HANDOFF, k)].get("created_at") or datetime.min)
+        )
+        for key in ordered[:excess]:
+            self._unindex(HANDOFF, key)
+            self._evicted["handoff_cap"] += 1
+
+    def _drop_session(self, session_id: str) -> Dict[str, int]:
+        deleted = dict.fromkeys(KINDS, 0)
+        for kind, keys in list(self._sessions.get(session_id, {}).items()):
+            for key in list(keys):
+                if self._unindex(kind, key):
+                    deleted[kind] += 1
+        self._sessions.pop(session_id, None)
+        self._touched.pop(session_id, None)
+        return deleted
+
+    def _unindex(self, kind: str, key: Hashable) -> bool:
+        """Remove a record and its index entries. Returns True if it existed."""
+        doc = self._records.pop((kind, key), None)
+        session_id = self._owner.pop((kind, key), None)
+        if doc is None:
+            return False
+
+        kinds = self._sessions.get(session_id)
+        if kinds is not None:
+            kinds.get(kind, set()).discard(key)
+        if kind == HANDOFF:
+            target_keys = self._by_target.get((session_id, doc.get("target_agent")))
+            if target_keys is not None:
+                target_keys.discard(key)
+                if not target_keys:
+                    del self._by_target[(session_id, doc.get("target_agent"))]
+            chain_keys = self._by_chain.get(doc.get("chain_id"))
+            if chain_keys is not None:
+                chain_keys.discard(key)
+                if not chain_keys:
+                    del self._by_chain[doc.get("chain_id")]
+        return True
+
+
+class MongoWorkingStore:
+    """Working memory shared across processes via a MongoDB TTL collection."""
+
+    def __init__(self, collection=None, ttl_seconds: float = 7200):
+        """
+        Initialize the store.
+
+        The TTL and query indexes are created by scripts/setup/init_db.py
+        (create_working_memory_indexes), never at runtime.
+
+        Args:
+            collection: Collection to use (default: resolved lazily from shared.db)
+            ttl_seconds: Record expiry after its last write (the rest of the
+                session stays alive at least half as long); enforced by a TTL
+                index on expires_at and checked on read
+        """
+        self._collection = collection
+        self.ttl_seconds = ttl_seconds
+        self._extended_until: Dict[str, datetime] = {}  # session_id -> expiry set by our last refresh
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        """Resolve the collection on first use."""
+        if self._collection is None:
+            from shared.db import get_collection
+            self._collection = get_collection(WORKING_MEMORY_COLLECTION)
+        return self._collection
+
+    @staticmethod
+    def _record_id(kind: str, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return kind + ":" + "\x1f".join(str(part) for part in parts)
+
+    def _fresh(self) -> Dict:
+        """Filter excluding records the TTL monitor hasn't removed yet."""
+        return {"expires_at": {"$gt": datetime.utcnow()}}
+
+    def get(self, kind: str, key: Hashable) -> Optional[Dict]:
+        """Return the record, or None if missing or expired."""
+        record = self.collection.find_one({"_id": self._record_id(kind, key), **self._fresh()})
+        return record["doc"] if record else None
+
+    def find(self, kind: str, session_id: str = None, **equals) -> List[Dict]:
+        """Return records of a kind, optionally by session and field values."""
+        query = {"kind": kind, **self._fresh()}
+        if session_id is not None:
+            query["session_id"] = session_id
+        for field, value in equals.items():
+            query[f"doc.{field}"] = value
+        return [record["doc"] for record in self.collection.find(query)]
+
+    def count(self, kind: str, session_id: str = None, **equals) -> int:
+        """Number of records find() would return."""
+        query = {"kind": kind, **self._fresh()}
+        if session_id is not None:
+            query["session_id"] = session_id
+        for field, value in equals.items():
+            query[f"doc.{field}"] = value
+        return self.collection.count_documents(query)
+
+    def put(self, kind: str, key: Hashable, session_id: str, doc: Dict) -> None:
+        """Insert or replace a record and extend its session's expiry."""
+        expires_at = self._expires_at()
+        self.collection.replace_one(
+            {"_id": self._record_id(kind, key)},
+            {"kind": kind, "session_id": session_id, "doc": doc, "expires_at": expires_at},
+            upsert=True
+        )
+        self._extend_session(session_id, expires_at)
+
+    def update(self, kind: str, key: Hashable, fields: Dict[str, Any]) -> bool:
+        """Set fields on an existing record and extend its session's expiry. Returns False if it doesn't exist."""
+        expires_at = self._expires_at()
+        record = self.collection.find_one_and_update(
+            {"_id": self._record_id(kind, key), **self._fresh()},
+            {"$set": {
+                **{f"doc.{field}": value for field, value in fields.items()},
+                "expires_at": expires_at
+            }},
+            projection={"session_id": 1}
+        )
+        if record is None:
+            return False
+        self._extend_session(record["session_id"], expires_at)
+        return True
+
+    def _expires_at(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+
+    def _extend_session(self, session_id: str, expires_at: datetime) -> None:
+        """
+        Keep every record of a session alive after a write to one of them.
+
+        The written record already carries the new expiry, so the session-wide
+        update_many only runs once less than half the TTL is left since this
+        process last refreshed the session. Refreshes by other processes only
+        push expiry later, so skipping based on our own is safe.
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            extended_until = self._extended_until.get(session_id)
+            if extended_until is not None and extended_until - now >= timedelta(seconds=self.ttl_seconds / 2):
+                return
+            # Forget sessions that have expired since
+            self._extended_until = {sid: until for sid, until in self._extended_until.items() if until > now}
+            self._extended_until[session_id] = expires_at
+        self.collection.update_many({"session_id": session_id}, {"$set": {"expires_at": expires_at}})
+
+    def delete(self, kind: str, key: Hashable) -> bool:
+        """Remove a record. Returns True if it existed."""
+        return self.collection.delete_one({"_id": self._record_id(kind, key)}).deleted_count > 0
+
+    def clear_session(self, session_id: str) -> Dict[str, int]:
+        """Remove every record of a session. Returns deleted counts by kind."""
+        with self._lock:
+            self._extended_until.pop(session_id, None)
+        deleted = dict.fromkeys(KINDS, 0)
+        for kind in KINDS:
+            deleted[kind] = self.collection.delete_many({"session_id": session_id, "kind": kind}).deleted_count
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Record counts by kind."""
+        counts = {kind: self.count(kind) for kind in KINDS}
+        return {"backend": "mongodb", "records": counts}
+
+
+def build_working_store():
+    """
+    Build the working-memory store from settings.
+
+    Returns:
+        MongoWorkingStore when WORKING_MEMORY_BACKEND=mongodb, otherwise
+        InProcessWorkingStore
+    """
+    from shared.config import settings
+
+    backend = (settings.working_memory_backend or "memory").lower()
+    if backend == "mongodb":
+        return MongoWorkingStore(ttl_seconds=settings.working_memory_ttl_seconds)
+    if backend != "memory":
+        logger.warning(f"Unknown WORKING_MEMORY_BACKEND '{backend}', using in-process store")
+
+    return InProcessWorkingStore(
+        ttl_seconds=settings.working_memory_ttl_seconds,
+        max_sessions=settings.working_memory_max_sessions,
+        max_handoffs_per_session=settings.working_memory_max_handoffs_per_session
+    )
@@ -67,10 +67,13 @@ import seed_demo_data
 COLLECTIONS_TO_CLEAR = [
     "projects",
     "tasks",
+    "activity_events",
     "memory_episodic",
     "memory_semantic",
+    "knowledge_payloads",
     "memory_procedural",
     "tool_discoveries",
+    "memory_counters",
 ]
 
 # Demo user ID (must match seed_demo_data.py)
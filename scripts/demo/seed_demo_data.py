@@ -73,8 +73,9 @@ from typing import List, Dict, Any
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from shared.db import MongoDB
+from shared.models import normalize_project_name
 from memory.manager import MemoryManager
-from shared.embeddings import embed_document, build_task_embedding_text, build_project_embedding_text
+from shared.embeddings import embed_document, build_task_embedding_text, build_project_embedding_text, embedding_text_hash
 from bson import ObjectId
 
 # =============================================================================
@@ -2080,6 +2081,7 @@ def seed_projects(db, clean: bool = False, skip_embeddings: bool = False) -> int
 
             try:
                 project["embedding"] = embed_document(searchable_text)
+                project["embedding_hash"] = embedding_text_hash(searchable_text)
 
                 # Verify embedding dimension (should be 1024 for Voyage AI)
                 if len(project["embedding"]) != 1024:
@@ -2090,6 +2092,7 @@ def seed_projects(db, clean: bool = False, skip_embeddings: bool = False) -> int
                 print(f"  ⚠️  Failed to generate embedding: {e}")
                 print(f"      Continuing without embedding for: {project['name']}")
 
+        project["name_key"] = normalize_project_name(project["name"])
         db.projects.insert_one(project)
         print(f"  ✓ Inserted: {project['name']} ({project['status']})")
         inserted_count += 1
@@ -2139,6 +2142,7 @@ def seed_tasks(db, clean: bool = False, skip_embeddings: bool = False) -> int:
 
             try:
                 task["embedding"] = embed_document(searchable_text)
+                task["embedding_hash"] = embedding_text_hash(searchable_text)
 
                 # Verify embedding dimension (should be 1024 for Voyage AI)
                 if len(task["embedding"]) != 1024:
@@ -2409,8 +2413,9 @@ def seed_episodic_summaries(db) -> int:
                 }
                 db.tasks.update_one(
                     {"_id": task_doc["_id"]},
-                    {"$push": {"activity_log": activity_entry}}
+                    {"$push": {"activity_log": activity_entry}, "$inc": {"activity_count": 1}}
                 )
+                db.activity_events.insert_one({"entity_type": "task", "entity_id": task_doc["_id"], **activity_entry})
                 # Reload task
                 task_doc = db.tasks.find_one({"_id": task_doc["_id"]})
                 task = Task(**task_doc)
@@ -2424,7 +2429,7 @@ def seed_episodic_summaries(db) -> int:
                 entity_type="task",
                 entity_id=task.id,
                 summary=summary,
-                activity_count=len(task.activity_log),
+                activity_count=task.total_activity,
                 entity_title=task.title,
                 entity_status=task.status
             )
@@ -2460,7 +2465,7 @@ def seed_episodic_summaries(db) -> int:
                 entity_type="project",
                 entity_id=project.id,
                 summary=summary,
-                activity_count=len(project.activity_log) if project.activity_log else 0,
+                activity_count=project.total_activity,
                 entity_title=project.name,
                 entity_status=project.status
             )
@@ -2494,6 +2499,7 @@ def clear_collections(db, collections: List[str] = None) -> Dict[str, int]:
             "tasks",
             "memory_episodic",
             "memory_semantic",
+            "knowledge_payloads",
             "memory_procedural",
             "tool_discoveries"
         ]
@@ -2509,6 +2515,9 @@ def clear_collections(db, collections: List[str] = None) -> Dict[str, int]:
             print(f"  ⚠️  Error clearing {collection_name}: {e}")
             results[collection_name] = 0
 
+    # Stats counters are rebuilt from the seeded collections on next read
+    db.memory_counters.delete_many({})
+
     return results
 
 
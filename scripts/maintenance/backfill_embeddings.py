@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Task/Project Embedding Backfill Script
+
+Re-embeds tasks and projects whose stored embedding_hash doesn't match the
+hash of their canonical embedding text: documents without a vector, documents
+created before embedding hashes existed, and documents edited outside the app.
+Documents that are already current are skipped without an embedding call.
+
+Usage:
+    python scripts/maintenance/backfill_embeddings.py --dry-run        # Count mismatched documents
+    python scripts/maintenance/backfill_embeddings.py                  # Re-embed tasks and projects
+    python scripts/maintenance/backfill_embeddings.py --only task      # Tasks only
+    python scripts/maintenance/backfill_embeddings.py --force          # Re-embed everything
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.logger import get_logger
+from shared.reembed import backfill_embeddings
+
+logger = get_logger("backfill_embeddings")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-embed tasks and projects whose embedding is out of date",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--only", choices=["task", "project"],
+                       help="Only backfill one entity type")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Count mismatched documents without embedding")
+    parser.add_argument("--force", action="store_true",
+                       help="Re-embed every document, even if its hash matches")
+    parser.add_argument("--batch-size", type=int, default=64,
+                       help="Documents per embedding request (default: 64)")
+
+    args = parser.parse_args()
+
+    entity_types = [args.only] if args.only else ["task", "project"]
+    mode = "DRY RUN - " if args.dry_run else ""
+    logger.info(f"{mode}Backfilling embeddings for: {', '.join(entity_types)}")
+
+    results = backfill_embeddings(
+        entity_types=entity_types,
+        force=args.force,
+        dry_run=args.dry_run,
+        batch_size=args.batch_size
+    )
+
+    for entity_type, counts in results.items():
+        logger.info(
+            f"  {entity_type}: {counts['scanned']} scanned, {counts['current']} current, "
+            f"{counts['mismatched']} mismatched, {counts['embedded']} re-embedded"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
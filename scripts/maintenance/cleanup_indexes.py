@@ -48,6 +48,7 @@ PHASE_2_REMOVALS = {
     "tasks": [
         "idx_status",                       # Low cardinality, covered by idx_project_status
         "idx_priority",                     # Low cardinality, covered by idx_status_priority
+        "activity_log.timestamp_-1",        # Multikey; temporal queries use activity_events
     ],
     "projects": [
         "idx_status",                       # Low cardinality, covered by idx_user_status
@@ -322,7 +323,7 @@ Phase 1 (8 indexes from memory_long_term):
   - Removes single-field indexes covered by compounds
   - Recommended first step
 
-Phase 2 (3 additional indexes from tasks and projects):
+Phase 2 (4 additional indexes from tasks and projects):
   - Removes low-cardinality indexes
   - Requires validation after Phase 1
         """
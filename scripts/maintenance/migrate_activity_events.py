@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Activity Event Migration Script
+
+Copies the embedded activity_log arrays of tasks and projects into the
+activity_events collection, then trims each array to the most recent
+ACTIVITY_TAIL_SIZE entries, sets activity_count and marks the document
+activity_migrated. Until a document is marked, the app appends to its
+activity_log without trimming it.
+
+Safe to re-run: events are upserted on (entity_type, entity_id, timestamp,
+action), so entries already written by the app or by a previous run are not
+duplicated, and activity_count is recomputed from the collection.
+
+Usage:
+    python scripts/maintenance/migrate_activity_events.py --dry-run    # Count entries to migrate
+    python scripts/maintenance/migrate_activity_events.py              # Migrate tasks and projects
+    python scripts/maintenance/migrate_activity_events.py --only task  # Tasks only
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from pymongo import UpdateOne
+
+from shared.config import settings
+from shared.db import get_db, ACTIVITY_COLLECTION, TASKS_COLLECTION, PROJECTS_COLLECTION
+from shared.logger import get_logger
+
+logger = get_logger("migrate_activity_events")
+
+ENTITY_COLLECTIONS = {"task": TASKS_COLLECTION, "project": PROJECTS_COLLECTION}
+
+
+def migrate_entity(db, entity_type: str, doc: dict, tail_size: int, dry_run: bool = False) -> int:
+    """
+    Move one task/project's activity_log into activity_events.
+
+    Args:
+        db: Database
+        entity_type: "task" or "project"
+        doc: Document with _id and activity_log
+        tail_size: Entries to keep on the document
+        dry_run: Only count entries
+
+    Returns:
+        Number of activity entries on the document
+    """
+    entries = doc.get("activity_log") or []
+    if dry_run:
+        return len(entries)
+
+    events = db[ACTIVITY_COLLECTION]
+    if not entries:
+        db[ENTITY_COLLECTIONS[entity_type]].update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"activity_migrated": True}}
+        )
+        return 0
+
+    operations = []
+    for entry in entries:
+        key = {
+            "entity_type": entity_type,
+            "entity_id": doc["_id"],
+            "timestamp": entry.get("timestamp"),
+            "action": entry.get("action"),
+        }
+        fields = {field: value for field, value in entry.items() if field not in key}
+        operations.append(UpdateOne(key, {"$setOnInsert": fields}, upsert=True))
+    events.bulk_write(operations, ordered=False)
+
+    activity_count = events.count_documents({"entity_type": entity_type, "entity_id": doc["_id"]})
+    db[ENTITY_COLLECTIONS[entity_type]].update_one(
+        {"_id": doc["_id"]},
+        {
+            "$set": {"activity_count": activity_count, "activity_migrated": True},
+            "$push": {"activity_log": {"$each": [], "$slice": -tail_size}}
+        }
+    )
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move task/project activity_log arrays into the activity_events collection",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--only", choices=["task", "project"],
+                       help="Only migrate one entity type")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Count entries without writing")
+    parser.add_argument("--tail-size", type=int, default=settings.activity_tail_size,
+                       help=f"Entries to keep on each document (default: {settings.activity_tail_size})")
+
+    args = parser.parse_args()
+
+    db = get_db()
+    entity_types = [args.only] if args.only else ["task", "project"]
+    mode = "DRY RUN - " if args.dry_run else ""
+
+    for entity_type in entity_types:
+        collection = db[ENTITY_COLLECTIONS[entity_type]]
+        documents = 0
+        entries = 0
+        oversized = 0
+
+        for doc in collection.find({"activity_migrated": {"$ne": True}}, {"activity_log": 1}):
+            count = migrate_entity(db, entity_type, doc, args.tail_size, dry_run=args.dry_run)
+            documents += 1
+            entries += count
+            oversized += count > args.tail_size
+
+        logger.info(
+            f"{mode}{entity_type}: {entries} activity entries from {documents} documents "
+            f"({oversized} trimmed to the last {args.tail_size})"
+        )
+
+    if not args.dry_run:
+        logger.info("Run scripts/setup/init_db.py to create the activity_events indexes if you haven't")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,11 @@ Database Initialization Script for Flow Companion.
 Creates all MongoDB collections and indexes required for the application.
 Reviews the codebase to ensure all collections and indexes are properly set up.
 
+This is the only place indexes are created: the app does not issue index
+commands at startup. After a successful run the script records SCHEMA_VERSION
+(shared/db.py) in the schema_migrations collection; the app warns on first use
+when the recorded version is behind. Re-run it after upgrading.
+
 Usage:
     python scripts/init_db.py              # Create collections + indexes
     python scripts/init_db.py --drop-first # Drop collections and recreate (requires --force)
@@ -13,6 +18,7 @@ Usage:
 
 import sys
 import argparse
+import itertools
 import logging
 from pathlib import Path
 from typing import Dict, List, Set
@@ -20,10 +26,12 @@ from typing import Dict, List, Set
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT, UpdateOne
 from pymongo.errors import OperationFailure, CollectionInvalid
-from shared.db import MongoDB
+from shared.db import MongoDB, SCHEMA_COLLECTION, SCHEMA_VERSION, get_schema_version, record_schema_version
 from shared.config import settings
+from shared.models import normalize_project_name
 
 # Configure logging
 logging.basicConfig(
@@ -41,14 +49,24 @@ COLLECTIONS = {
     # Main application collections
     "tasks": "User tasks with activity logging",
     "projects": "User projects with activity tracking",
+    "activity_events": "Append-only task/project activity history",
 
     # Memory system collections
     "memory_episodic": "Immutable event log of actions and events",
     "memory_semantic": "Knowledge cache and user preferences",
+    "knowledge_payloads": "Full results of knowledge cache entries (headers in memory_semantic)",
     "memory_procedural": "Templates, workflows, and rules",
+    "memory_counters": "Per-user memory and tool discovery counters for the stats panels",
 
     # MCP Agent collections
     "tool_discoveries": "MCP tool usage learning and reuse",
+
+    # Caches
+    "embedding_cache": "Persistent embedding cache (EMBEDDING_CACHE_BACKEND=mongodb)",
+    "memory_working": "Shared working memory (WORKING_MEMORY_BACKEND=mongodb)",
+
+    # Bookkeeping
+    SCHEMA_COLLECTION: "Index schema version applied by this script",
 }
 
 # =============================================================================
@@ -89,7 +107,8 @@ def create_tasks_indexes(db, verify_only: bool = False) -> List[str]:
         # IndexModel([("priority", ASCENDING)], name="priority_1"),
         IndexModel([("created_at", DESCENDING)], name="created_at_-1"),
         IndexModel([("last_worked_on", DESCENDING)], name="last_worked_on_-1"),
-        IndexModel([("activity_log.timestamp", DESCENDING)], name="activity_log.timestamp_-1"),
+        IndexModel([("updated_at", DESCENDING)], name="updated_at_-1"),
+        # Note: activity_log.timestamp_-1 replaced by activity_events indexes (activity_log is now a capped tail)
 
         # Compound indexes for common queries
         IndexModel([("user_id", ASCENDING), ("project_id", ASCENDING)], name="user_id_1_project_id_1"),
@@ -132,6 +151,8 @@ def create_projects_indexes(db, verify_only: bool = False) -> List[str]:
         IndexModel([("last_activity", DESCENDING)], name="last_activity_-1"),
         IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_id_1_status_1"),
         IndexModel([("user_id", ASCENDING), ("last_activity", DESCENDING)], name="user_id_1_last_activity_-1"),
+        # Exact case-insensitive name lookups (shared/db.py resolve_project_ids)
+        IndexModel([("name_key", ASCENDING)], name="name_key_1"),
     ]
 
     if not verify_only:
@@ -141,6 +162,10 @@ def create_projects_indexes(db, verify_only: bool = False) -> List[str]:
         except OperationFailure:
             pass
 
+        backfilled = backfill_project_name_keys(db)
+        if backfilled:
+            logger.info(f"    ✅ Backfilled name_key on {backfilled} projects")
+
     # Text search index
     if not verify_only:
         try:
@@ -155,6 +180,17 @@ def create_projects_indexes(db, verify_only: bool = False) -> List[str]:
 
     return created
 
+def backfill_project_name_keys(db) -> int:
+    """Set name_key on projects created before it existed; returns the count updated."""
+    projects = db["projects"]
+    updates = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"name_key": normalize_project_name(doc["name"])}})
+        for doc in projects.find({"name_key": {"$exists": False}, "name": {"$type": "string"}}, {"name": 1})
+    ]
+    if not updates:
+        return 0
+    return projects.bulk_write(updates, ordered=False).modified_count
+
 def create_memory_indexes(db, verify_only: bool = False) -> Dict[str, List[str]]:
     """Create indexes for all memory collections.
 
@@ -178,6 +214,9 @@ def create_memory_indexes(db, verify_only: bool = False) -> Dict[str, List[str]]
         IndexModel([("user_id", ASCENDING), ("source_agent", ASCENDING)], name="user_id_1_source_agent_1"),
         IndexModel([("session_id", ASCENDING), ("timestamp", DESCENDING)], name="session_id_1_timestamp_-1"),
 
+        # For episodic summaries (latest summary per task/project)
+        IndexModel([("entity_type", ASCENDING), ("entity_id", ASCENDING), ("generated_at", DESCENDING)], name="entity_summary_lookup"),
+
         # For handoff tracking
         IndexModel([("handoff_id", ASCENDING)], name="handoff_id_1"),
     ]
@@ -204,6 +243,10 @@ def create_memory_indexes(db, verify_only: bool = False) -> Dict[str, List[str]]
         # For knowledge cache queries
         IndexModel([("user_id", ASCENDING), ("semantic_type", ASCENDING), ("query", ASCENDING)], name="knowledge_query"),
         IndexModel([("user_id", ASCENDING), ("semantic_type", ASCENDING), ("created_at", DESCENDING)], name="knowledge_recency"),
+        IndexModel([("user_id", ASCENDING), ("semantic_type", ASCENDING), ("query_hash", ASCENDING)], name="knowledge_query_hash"),
+
+        # TTL: knowledge entries are deleted at expires_at (preferences have no expires_at)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
     ]
 
     if not verify_only:
@@ -223,6 +266,7 @@ def create_memory_indexes(db, verify_only: bool = False) -> Dict[str, List[str]]
         IndexModel([("user_id", ASCENDING), ("rule_type", ASCENDING)], name="user_id_1_rule_type_1"),
         IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="user_id_1_name_1"),
         IndexModel([("user_id", ASCENDING), ("trigger_pattern", ASCENDING)], name="procedural_lookup"),
+        IndexModel([("user_id", ASCENDING), ("times_used", DESCENDING)], name="procedural_popularity"),
     ]
 
     if not verify_only:
@@ -234,8 +278,44 @@ def create_memory_indexes(db, verify_only: bool = False) -> Dict[str, List[str]]
 
     results["memory_procedural"] = procedural_created
 
+    if not verify_only:
+        backfilled = backfill_episodic_summary_pointers(db)
+        if backfilled:
+            logger.info(f"    ✅ Backfilled latest_episodic_summary on {backfilled} tasks/projects")
+
     return results
 
+def backfill_episodic_summary_pointers(db, batch_size: int = 500) -> int:
+    """Set latest_episodic_summary on tasks/projects summarized before it existed; returns the count updated."""
+    # Import here so --verify runs don't need the memory package
+    from memory.manager import MemoryManager
+
+    memory = MemoryManager(db=db)
+    updated = 0
+    for entity_type, collection_name in (("task", "tasks"), ("project", "projects")):
+        collection = db[collection_name]
+        entity_ids = (doc["_id"] for doc in collection.find({"latest_episodic_summary": {"$exists": False}}, {"_id": 1}))
+        while True:
+            batch = list(itertools.islice(entity_ids, batch_size))
+            if not batch:
+                break
+            # The app may have set a newer pointer meanwhile; only fill missing ones
+            updates = [
+                UpdateOne(
+                    {"_id": ObjectId(entity_id), "latest_episodic_summary": {"$exists": False}},
+                    {"$set": {"latest_episodic_summary": {
+                        "summary_id": ObjectId(doc["_id"]),
+                        "summary": doc["summary"],
+                        "activity_count": doc.get("activity_count", 0),
+                        "generated_at": doc["generated_at"]
+                    }}}
+                )
+                for entity_id, doc in memory.get_latest_episodic_summaries(entity_type, batch).items()
+            ]
+            if updates:
+                updated += collection.bulk_write(updates, ordered=False).modified_count
+    return updated
+
 def create_tool_discoveries_indexes(db, verify_only: bool = False) -> List[str]:
     """Create indexes for tool_discoveries collection."""
     tool_discoveries = db["tool_discoveries"]
@@ -261,6 +341,111 @@ def create_tool_discoveries_indexes(db, verify_only: bool = False) -> List[str]:
 
     return created
 
+def create_embedding_cache_indexes(db, verify_only: bool = False) -> List[str]:
+    """Create indexes for embedding_cache collection (entries keyed by content hash in _id)."""
+    embedding_cache = db["embedding_cache"]
+    created = []
+
+    indexes = []
+
+    # TTL: expire cached vectors after EMBEDDING_CACHE_TTL_SECONDS (0 = never expire)
+    if settings.embedding_cache_ttl_seconds:
+        indexes.append(IndexModel(
+            [("created_at", ASCENDING)],
+            name="created_at_ttl",
+            expireAfterSeconds=settings.embedding_cache_ttl_seconds
+        ))
+
+    if not verify_only:
+        if not indexes:
+            # A TTL index left over from an earlier setting would keep deleting entries
+            try:
+                embedding_cache.drop_index("created_at_ttl")
+            except OperationFailure:
+                pass
+            return created
+
+        try:
+            result = embedding_cache.create_indexes(indexes)
+            created.extend(result)
+        except OperationFailure:
+            pass
+
+    return created
+
+def create_activity_events_indexes(db, verify_only: bool = False) -> List[str]:
+    """Create indexes for activity_events collection (one document per activity entry)."""
+    activity_events = db["activity_events"]
+    created = []
+
+    indexes = [
+        # Temporal queries: "what did I do this week", "what did I complete today"
+        IndexModel([("entity_type", ASCENDING), ("timestamp", DESCENDING)], name="entity_type_1_timestamp_-1"),
+        IndexModel(
+            [("entity_type", ASCENDING), ("action", ASCENDING), ("timestamp", DESCENDING)],
+            name="entity_type_1_action_1_timestamp_-1"
+        ),
+        # Full history of one task/project
+        IndexModel(
+            [("entity_type", ASCENDING), ("entity_id", ASCENDING), ("timestamp", DESCENDING)],
+            name="entity_type_1_entity_id_1_timestamp_-1"
+        ),
+    ]
+
+    if not verify_only:
+        try:
+            result = activity_events.create_indexes(indexes)
+            created.extend(result)
+        except OperationFailure:
+            pass
+
+    return created
+
+def create_working_memory_indexes(db, verify_only: bool = False) -> List[str]:
+    """Create indexes for memory_working collection (one document per working-memory record)."""
+    memory_working = db["memory_working"]
+    created = []
+
+    indexes = [
+        # TTL: expires_at is pushed forward on every write to the session
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("session_id", ASCENDING), ("kind", ASCENDING)], name="session_id_1_kind_1"),
+        IndexModel(
+            [("kind", ASCENDING), ("session_id", ASCENDING), ("doc.target_agent", ASCENDING), ("doc.status", ASCENDING)],
+            name="handoffs_by_target"
+        ),
+        IndexModel([("kind", ASCENDING), ("doc.chain_id", ASCENDING)], name="handoffs_by_chain"),
+    ]
+
+    if not verify_only:
+        try:
+            result = memory_working.create_indexes(indexes)
+            created.extend(result)
+        except OperationFailure:
+            pass
+
+    return created
+
+def create_knowledge_payload_indexes(db, verify_only: bool = False) -> List[str]:
+    """Create indexes for knowledge_payloads collection (same _id as the memory_semantic header)."""
+    knowledge_payloads = db["knowledge_payloads"]
+    created = []
+
+    indexes = [
+        # TTL: deleted together with the header at expires_at
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("user_id", ASCENDING)], name="user_id_1"),
+    ]
+
+    if not verify_only:
+        try:
+            result = knowledge_payloads.create_indexes(indexes)
+            created.extend(result)
+        except OperationFailure:
+            pass
+
+    return created
+
 def get_existing_indexes(db) -> Dict[str, Set[str]]:
     """Get all existing indexes for each collection."""
     existing = {}
@@ -663,6 +848,20 @@ def main():
     else:
         logger.info(f"    ✅ {len(existing_semantic)} indexes exist")
 
+    logger.info("  knowledge_payloads:")
+    payload_indexes = create_knowledge_payload_indexes(db, verify_only=args.verify)
+    existing_payloads = existing_before.get("knowledge_payloads", set())
+
+    if not args.verify:
+        newly_created = [idx for idx in payload_indexes if idx not in existing_payloads]
+        if newly_created:
+            for idx_name in newly_created:
+                logger.info(f"    🆕 {idx_name} (created)")
+        if existing_payloads:
+            logger.info(f"    ✅ {len(existing_payloads)} indexes already exist")
+    else:
+        logger.info(f"    ✅ {len(existing_payloads)} indexes exist")
+
     logger.info("  memory_procedural:")
     existing_procedural = existing_before.get("memory_procedural", set())
 
@@ -691,6 +890,51 @@ def main():
     else:
         logger.info(f"    ✅ {len(existing_tool)} indexes exist")
 
+    # Embedding cache indexes
+    logger.info("  embedding_cache:")
+    cache_indexes = create_embedding_cache_indexes(db, verify_only=args.verify)
+    existing_cache = existing_before.get("embedding_cache", set())
+
+    if not args.verify:
+        newly_created = [idx for idx in cache_indexes if idx not in existing_cache]
+        if newly_created:
+            for idx_name in newly_created:
+                logger.info(f"    🆕 {idx_name} (created)")
+        if existing_cache:
+            logger.info(f"    ✅ {len(existing_cache)} indexes already exist")
+    else:
+        logger.info(f"    ✅ {len(existing_cache)} indexes exist")
+
+    # Activity event indexes
+    logger.info("  activity_events:")
+    activity_indexes = create_activity_events_indexes(db, verify_only=args.verify)
+    existing_activity = existing_before.get("activity_events", set())
+
+    if not args.verify:
+        newly_created = [idx for idx in activity_indexes if idx not in existing_activity]
+        if newly_created:
+            for idx_name in newly_created:
+                logger.info(f"    🆕 {idx_name} (created)")
+        if existing_activity:
+            logger.info(f"    ✅ {len(existing_activity)} indexes already exist")
+    else:
+        logger.info(f"    ✅ {len(existing_activity)} indexes exist")
+
+    # Working memory indexes
+    logger.info("  memory_working:")
+    working_indexes = create_working_memory_indexes(db, verify_only=args.verify)
+    existing_working = existing_before.get("memory_working", set())
+
+    if not args.verify:
+        newly_created = [idx for idx in working_indexes if idx not in existing_working]
+        if newly_created:
+            for idx_name in newly_created:
+                logger.info(f"    🆕 {idx_name} (created)")
+        if existing_working:
+            logger.info(f"    ✅ {len(existing_working)} indexes already exist")
+    else:
+        logger.info(f"    ✅ {len(existing_working)} indexes exist")
+
     # Vector search indexes (Atlas Search)
     logger.info("")
     logger.info("🔍 Vector Search Indexes (Atlas Search):")
@@ -740,6 +984,18 @@ def main():
         elif status == "error":
             logger.info(f"  ❌ {index_name} (error during creation)")
 
+    # Schema version (read once by the app on first use of the memory manager)
+    logger.info("")
+    logger.info("🏷️  Index schema version:")
+    recorded_version = get_schema_version(db)
+    if args.verify:
+        status = "✅" if recorded_version >= SCHEMA_VERSION else "❌"
+        logger.info(f"  {status} recorded {recorded_version}, code expects {SCHEMA_VERSION}")
+    else:
+        record_schema_version(db)
+        logger.info(f"  🆕 {recorded_version} → {SCHEMA_VERSION}" if recorded_version < SCHEMA_VERSION
+                    else f"  ✅ {SCHEMA_VERSION} (current)")
+
     # Summary
     logger.info("")
     if args.verify:
@@ -750,7 +1006,7 @@ def main():
                         len(memory_results.get("memory_episodic", [])) +
                         len(memory_results.get("memory_semantic", [])) +
                         len(memory_results.get("memory_procedural", [])) +
-                        len(tool_indexes))
+                        len(payload_indexes) + len(tool_indexes) + len(cache_indexes))
 
         if args.drop_first:
             logger.info(f"✅ Database reinitialized! ({len(COLLECTIONS)} collections, {total_indexes} indexes)")
@@ -36,10 +36,86 @@ class Settings(BaseSettings):
     # Experimental mode toggle (can be overridden at runtime)
     mcp_mode_enabled: bool = Field(default=False, alias="MCP_MODE_ENABLED")
 
+    # Embedding cache (see shared/embedding_cache.py)
+    embedding_cache_enabled: bool = Field(default=True, alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_max_entries: int = Field(default=2048, alias="EMBEDDING_CACHE_MAX_ENTRIES")
+    embedding_cache_ttl_seconds: int = Field(default=86400, alias="EMBEDDING_CACHE_TTL_SECONDS")
+    embedding_cache_backend: str = Field(default="memory", alias="EMBEDDING_CACHE_BACKEND")  # memory | mongodb | disk
+    embedding_cache_path: str = Field(default=".cache/embeddings.sqlite3", alias="EMBEDDING_CACHE_PATH")
+
+    # Embedding micro-batching (see shared/embedding_batcher.py)
+    embedding_batch_enabled: bool = Field(default=True, alias="EMBEDDING_BATCH_ENABLED")
+    embedding_batch_max_size: int = Field(default=64, alias="EMBEDDING_BATCH_MAX_SIZE")
+    embedding_batch_max_wait_ms: float = Field(default=5.0, alias="EMBEDDING_BATCH_MAX_WAIT_MS")
+    embedding_batch_max_concurrent: int = Field(default=4, alias="EMBEDDING_BATCH_MAX_CONCURRENT")
+    embedding_batch_timeout_seconds: float = Field(default=60.0, alias="EMBEDDING_BATCH_TIMEOUT_SECONDS")  # 0 = no limit
+
+    # Pooled HTTP connections shared by all LLM clients (see shared/llm.py)
+    llm_http_max_connections: int = Field(default=20, alias="LLM_HTTP_MAX_CONNECTIONS")
+    llm_http_max_keepalive: int = Field(default=10, alias="LLM_HTTP_MAX_KEEPALIVE")
+
+    # Concurrent read-only tool calls per LLM response (1 disables fan-out)
+    tool_max_parallel: int = Field(default=4, alias="TOOL_MAX_PARALLEL")
+
+    # Background episodic summary generation (see shared/episodic_queue.py)
+    episodic_queue_enabled: bool = Field(default=True, alias="EPISODIC_QUEUE_ENABLED")
+    episodic_queue_workers: int = Field(default=2, alias="EPISODIC_QUEUE_WORKERS")
+    episodic_queue_max_retries: int = Field(default=3, alias="EPISODIC_QUEUE_MAX_RETRIES")
+
+    # Hash-checked, debounced task/project re-embedding (see shared/reembed.py)
+    reembed_async: bool = Field(default=True, alias="REEMBED_ASYNC")
+    reembed_debounce_seconds: float = Field(default=2.0, alias="REEMBED_DEBOUNCE_SECONDS")
+    reembed_workers: int = Field(default=1, alias="REEMBED_WORKERS")
+    reembed_max_retries: int = Field(default=3, alias="REEMBED_MAX_RETRIES")
+
+    # Recent activity entries kept on each task/project; full history is in activity_events
+    activity_tail_size: int = Field(default=20, alias="ACTIVITY_TAIL_SIZE")
+
+    # In-process vector index used alongside Atlas $vectorSearch (see shared/vector_index.py)
+    vector_index_enabled: bool = Field(default=True, alias="VECTOR_INDEX_ENABLED")
+    vector_index_mode: str = Field(default="fallback", alias="VECTOR_INDEX_MODE")  # fallback, auto, local
+    vector_index_small_corpus: int = Field(default=2000, alias="VECTOR_INDEX_SMALL_CORPUS")
+    vector_index_max_docs: int = Field(default=200000, alias="VECTOR_INDEX_MAX_DOCS")
+    vector_index_max_age_seconds: float = Field(default=300.0, alias="VECTOR_INDEX_MAX_AGE_SECONDS")
+    vector_index_ann: str = Field(default="exact", alias="VECTOR_INDEX_ANN")  # exact, ivf, hnsw
+    vector_index_ann_min_size: int = Field(default=20000, alias="VECTOR_INDEX_ANN_MIN_SIZE")
+    vector_index_ivf_probes: int = Field(default=8, alias="VECTOR_INDEX_IVF_PROBES")
+
+    # Compiled rule/workflow trigger matchers (see memory/trigger_matcher.py)
+    trigger_cache_ttl_seconds: float = Field(default=60.0, alias="TRIGGER_CACHE_TTL_SECONDS")
+
+    # Memoized per-user preferences/rules/workflows for context injection (see MemoryManager.get_memory_snapshot)
+    memory_snapshot_ttl_seconds: float = Field(default=60.0, alias="MEMORY_SNAPSHOT_TTL_SECONDS")
+
+    # Materialized memory/discovery counters for the stats panels (see memory/counters.py)
+    memory_counters_reconcile_seconds: float = Field(default=3600.0, alias="MEMORY_COUNTERS_RECONCILE_SECONDS")
+
+    # Working memory store (see memory/working_store.py)
+    working_memory_backend: str = Field(default="memory", alias="WORKING_MEMORY_BACKEND")  # memory | mongodb
+    working_memory_ttl_seconds: float = Field(default=7200.0, alias="WORKING_MEMORY_TTL_SECONDS")
+    working_memory_max_sessions: int = Field(default=1000, alias="WORKING_MEMORY_MAX_SESSIONS")
+    working_memory_max_handoffs_per_session: int = Field(default=200, alias="WORKING_MEMORY_MAX_HANDOFFS_PER_SESSION")
+
+    # Per-turn tracing (see shared/tracing.py)
+    trace_enabled: bool = Field(default=True, alias="TRACE_ENABLED")
+    trace_export_path: str = Field(default="", alias="TRACE_EXPORT_PATH")  # empty disables export
+    trace_export_format: str = Field(default="jsonl", alias="TRACE_EXPORT_FORMAT")  # jsonl | otlp
+
+    # Eval comparison runs (see evals/runner.py)
+    eval_workers: int = Field(default=4, alias="EVAL_WORKERS")
+    eval_max_retries: int = Field(default=5, alias="EVAL_MAX_RETRIES")
+    eval_retry_backoff_seconds: float = Field(default=2.0, alias="EVAL_RETRY_BACKOFF_SECONDS")
+
+    # Logging (see shared/logger.py)
+    log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_format: str = Field(default="text", alias="LOG_FORMAT")  # text | json
+    log_queue: bool = Field(default=True, alias="LOG_QUEUE")
+    log_sample_rates: str = Field(default="", alias="LOG_SAMPLE_RATES")  # e.g. "retrieval=0.1,mcp_agent=0.25"
+
     class Config:
         env_file = ".env"
         case_sensitive = False
-        extra = "ignore"  # Ignore extra fields in .env (LOG_LEVEL, DEBUG, etc.)
+        extra = "ignore"  # Ignore extra fields in .env (DEBUG, etc.)
 
     @property
     def mcp_available(self) -> bool:
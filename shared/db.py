@@ -1,14 +1,23 @@
 """MongoDB database connection and utilities."""
 
+import re
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, Iterator, List
 from bson import ObjectId
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
 
 from shared.config import settings
-from shared.models import Task, Project, Settings, ActivityLogEntry, ProjectUpdate
+from shared.logger import get_logger
+from shared.models import Task, Project, Settings, ActivityLogEntry, ProjectUpdate, normalize_project_name
+from shared.tracing import build_command_listener
+from shared.vector_index import sync_vector_write
+
+logger = get_logger("db")
 
 
 class MongoDB:
@@ -26,7 +35,9 @@ class MongoDB:
             Database instance
         """
         if self._client is None:
-            self._client = MongoClient(settings.mongodb_uri)
+            # Each command becomes a span under the tool or memory call that issued it
+            listeners = [build_command_listener()] if settings.trace_enabled else []
+            self._client = MongoClient(settings.mongodb_uri, event_listeners=listeners)
             self._db = self._client[settings.mongodb_database]
             print(f"Connected to MongoDB database: {settings.mongodb_database}")
 
@@ -56,6 +67,32 @@ class MongoDB:
         db = self.get_database()
         return db[collection_name]
 
+    @contextmanager
+    def use_database(self, db: Database) -> Iterator[Database]:
+        """
+        Route get_db() and get_collection() to another database inside a block.
+
+        Used by the offline benchmark (evals/benchmark.py) to run the agents
+        against mongomock or a throwaway local database. Read caches are
+        dropped on entry and exit.
+
+        Args:
+            db: Database handle to use
+
+        Yields:
+            The database
+        """
+        saved = (self._client, self._db)
+        self._db = db
+        invalidate_projects_with_tasks_cache()
+        invalidate_project_name_cache()
+        try:
+            yield db
+        finally:
+            self._client, self._db = saved
+            invalidate_projects_with_tasks_cache()
+            invalidate_project_name_cache()
+
     def close(self):
         """Close the MongoDB connection."""
         if self._client:
@@ -96,6 +133,274 @@ def get_collection(collection_name: str) -> Collection:
 TASKS_COLLECTION = "tasks"
 PROJECTS_COLLECTION = "projects"
 SETTINGS_COLLECTION = "settings"
+ACTIVITY_COLLECTION = "activity_events"
+SCHEMA_COLLECTION = "schema_migrations"
+
+
+# Schema version
+#
+# Collections and indexes are created once by scripts/setup/init_db.py, which
+# records the version it applied in schema_migrations. The app only reads that
+# record (once, on first use of the memory manager) and warns when it is behind.
+# Bump SCHEMA_VERSION whenever init_db.py gains an index the app relies on.
+
+SCHEMA_VERSION = 3
+SCHEMA_VERSION_ID = "indexes"
+
+
+def get_schema_version(db: Database) -> int:
+    """
+    Get the index schema version recorded by init_db.py.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        Recorded version, or 0 if init_db.py has never recorded one
+    """
+    doc = db[SCHEMA_COLLECTION].find_one({"_id": SCHEMA_VERSION_ID})
+    return doc.get("version", 0) if doc else 0
+
+
+def record_schema_version(db: Database, version: int = SCHEMA_VERSION) -> None:
+    """
+    Record that the indexes for a schema version have been created.
+
+    Args:
+        db: Database instance
+        version: Version applied (default: SCHEMA_VERSION)
+    """
+    db[SCHEMA_COLLECTION].update_one(
+        {"_id": SCHEMA_VERSION_ID},
+        {"$set": {"version": version, "applied_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def check_schema_version(db: Database) -> int:
+    """
+    Warn if the database's indexes are older than this code expects.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        Recorded version
+
+    Raises:
+        PyMongoError: If the database is unreachable
+    """
+    version = get_schema_version(db)
+    if version < SCHEMA_VERSION:
+        logger.warning(
+            f"Database index schema is at version {version}, expected {SCHEMA_VERSION}; "
+            f"run scripts/setup/init_db.py to create missing indexes"
+        )
+    return version
+
+
+# Read caches invalidated by the write helpers below
+
+_read_cache_lock = threading.Lock()
+_projects_with_tasks_cache: Dict[str, tuple] = {}  # key -> (expires_at, result)
+
+PROJECTS_WITH_TASKS_TTL_SECONDS = 5.0
+
+
+def _on_write(collection_name: str) -> None:
+    """Invalidate read caches after a write to tasks or projects."""
+    if collection_name in (TASKS_COLLECTION, PROJECTS_COLLECTION):
+        invalidate_projects_with_tasks_cache()
+
+
+def invalidate_projects_with_tasks_cache() -> None:
+    """Drop cached get_projects_with_tasks results (e.g. after a direct collection write)."""
+    with _read_cache_lock:
+        _projects_with_tasks_cache.clear()
+
+
+# Project name_key -> (expires_at, project_id), in front of the indexed name_key
+# lookup. Dropped on project create/rename; the TTL picks up other processes' renames.
+_project_ids_by_name: Dict[str, tuple] = {}
+
+PROJECT_NAME_CACHE_TTL_SECONDS = 300.0
+
+
+def invalidate_project_name_cache() -> None:
+    """Drop cached project name -> id resolutions (e.g. after a direct collection write)."""
+    with _read_cache_lock:
+        _project_ids_by_name.clear()
+
+
+# Activity events
+#
+# Every activity entry is also stored as its own document in activity_events,
+# indexed by (entity_type, timestamp) and (entity_type, action, timestamp), so
+# temporal queries are index range scans. Tasks and projects keep only the last
+# ACTIVITY_TAIL_SIZE entries in activity_log (for display) and a running
+# activity_count.
+#
+# Only entities marked activity_migrated (created by this code, or copied by
+# scripts/maintenance/migrate_activity_events.py) are trimmed; older documents
+# keep their full activity_log until the migration has copied it.
+
+def _activity_tail(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """$push modifier that appends to activity_log and keeps the recent tail."""
+    return {"$each": entries, "$slice": -settings.activity_tail_size}
+
+
+def _update_with_activity(collection, entity_id: ObjectId, update: Dict[str, Any], entries: List[Dict[str, Any]]):
+    """
+    Apply an update that also appends activity entries to activity_log.
+
+    Migrated entities get the capped tail; unmigrated ones are appended to
+    without $slice so history not yet in activity_events is never trimmed.
+
+    Args:
+        collection: Tasks or projects collection
+        entity_id: ObjectId of the task or project
+        update: Update document ($set, other $push fields, ...)
+        entries: ActivityLogEntry dicts to append
+
+    Returns:
+        pymongo UpdateResult
+    """
+    def with_activity(push: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **update,
+            "$push": {**update.get("$push", {}), "activity_log": push},
+            "$inc": {**update.get("$inc", {}), "activity_count": len(entries)}
+        }
+
+    migrated = {"_id": entity_id, "activity_migrated": True}
+    result = collection.update_one(migrated, with_activity(_activity_tail(entries)))
+    if result.matched_count:
+        return result
+
+    result = collection.update_one(
+        {"_id": entity_id, "activity_migrated": {"$ne": True}},
+        with_activity({"$each": entries})
+    )
+    if result.matched_count:
+        return result
+
+    # Migrated between the two updates (or missing)
+    return collection.update_one(migrated, with_activity(_activity_tail(entries)))
+
+
+def _record_activity(entity_type: str, entity_id: ObjectId, entries: List[Dict[str, Any]]) -> None:
+    """
+    Append activity entries to the activity_events collection.
+
+    Args:
+        entity_type: "task" or "project"
+        entity_id: ObjectId of the task or project
+        entries: ActivityLogEntry dicts
+    """
+    events = [{"entity_type": entity_type, "entity_id": entity_id, **entry} for entry in entries]
+    try:
+        get_collection(ACTIVITY_COLLECTION).insert_many(events)
+    except Exception as e:
+        # The entity write already succeeded; the migration script can backfill events
+        logger.warning(f"Failed to record activity for {entity_type} {entity_id}: {e}")
+
+
+def build_activity_pipeline(
+    entity_type: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    action: Optional[str] = None,
+    entity_match: Optional[Dict[str, Any]] = None,
+    include_events: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Build aggregation stages, run on activity_events, that return entities with matching activity.
+
+    Each output document is the task/project (without its embedding) plus
+    first_activity_at and last_activity_at for the matching events, sorted by
+    last_activity_at descending. Callers append their own stages
+    ($lookup, $sort, $limit, ...).
+
+    Args:
+        entity_type: "task" or "project"
+        since: Earliest event timestamp (inclusive)
+        until: Latest event timestamp (exclusive)
+        action: Only events with this action (created, started, completed, ...)
+        entity_match: Filter on the task/project fields (e.g. {"status": "todo"})
+        include_events: Add matching events (oldest first) as activity_events
+
+    Returns:
+        List of pipeline stages
+    """
+    event_match: Dict[str, Any] = {"entity_type": entity_type}
+    if action:
+        event_match["action"] = action
+    if since or until:
+        timestamp_query = {}
+        if since:
+            timestamp_query["$gte"] = since
+        if until:
+            timestamp_query["$lt"] = until
+        event_match["timestamp"] = timestamp_query
+
+    group: Dict[str, Any] = {
+        "_id": "$entity_id",
+        "first_activity_at": {"$min": "$timestamp"},
+        "last_activity_at": {"$max": "$timestamp"},
+    }
+    pipeline: List[Dict[str, Any]] = [{"$match": event_match}]
+    if include_events:
+        pipeline.append({"$sort": {"timestamp": 1}})
+        group["activity_events"] = {"$push": {
+            "timestamp": "$timestamp",
+            "action": "$action",
+            "note": "$note",
+            "summary": "$summary"
+        }}
+
+    extra_fields = {field: f"${field}" for field in group if field != "_id"}
+    pipeline.extend([
+        {"$group": group},
+        {
+            "$lookup": {
+                "from": TASKS_COLLECTION if entity_type == "task" else PROJECTS_COLLECTION,
+                "localField": "_id",
+                "foreignField": "_id",
+                "as": "entity"
+            }
+        },
+        {"$unwind": "$entity"},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": ["$entity", extra_fields]}}},
+        {"$project": {"embedding": 0}},
+    ])
+    if entity_match:
+        pipeline.append({"$match": entity_match})
+    pipeline.append({"$sort": {"last_activity_at": -1}})
+    return pipeline
+
+
+def get_activity_events(
+    entity_type: str,
+    entity_id: ObjectId,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Get the full activity history of a task or project, newest first.
+
+    Args:
+        entity_type: "task" or "project"
+        entity_id: ObjectId of the task or project
+        limit: Maximum events
+
+    Returns:
+        Activity event documents
+    """
+    collection = get_collection(ACTIVITY_COLLECTION)
+    return list(
+        collection.find({"entity_type": entity_type, "entity_id": entity_id})
+        .sort("timestamp", -1)
+        .limit(limit)
+    )
 
 
 # Task helper functions
@@ -121,6 +426,10 @@ def create_task(task: Task, action_note: str = "Task created") -> ObjectId:
         action="created",
         note=action_note
     ))
+    entries = [entry.model_dump() for entry in task.activity_log]
+    task.activity_count = len(entries)
+    task.activity_log = task.activity_log[-settings.activity_tail_size:]
+    task.activity_migrated = True
 
     # Convert to MongoDB document
     task_doc = task.to_mongo()
@@ -128,6 +437,9 @@ def create_task(task: Task, action_note: str = "Task created") -> ObjectId:
     # Insert into database
     collection = get_collection(TASKS_COLLECTION)
     result = collection.insert_one(task_doc)
+    _on_write(TASKS_COLLECTION)
+    sync_vector_write(TASKS_COLLECTION, result.inserted_id, task_doc)
+    _record_activity("task", result.inserted_id, entries)
 
     # Auto-generate episodic summary for new task (activity_count = 1)
     _maybe_generate_task_episodic_summary(result.inserted_id)
@@ -139,7 +451,8 @@ def update_task(
     task_id: ObjectId,
     updates: Dict[str, Any],
     action: str,
-    action_note: Optional[str] = None
+    action_note: Optional[str] = None,
+    activity_fields: Optional[Dict[str, Any]] = None
 ) -> bool:
     """
     Update a task with automatic activity logging and timestamp management.
@@ -149,6 +462,7 @@ def update_task(
         updates: Dictionary of fields to update
         action: Action description for activity log
         action_note: Optional note for the activity log entry
+        activity_fields: Extra ActivityLogEntry fields (e.g. voice summary/transcript)
 
     Returns:
         True if update was successful, False otherwise
@@ -157,7 +471,7 @@ def update_task(
     collection = get_collection(TASKS_COLLECTION)
 
     # Get current task to check for status changes
-    current_task = collection.find_one({"_id": task_id})
+    current_task = collection.find_one({"_id": task_id}, {"status": 1})
     if not current_task:
         return False
 
@@ -182,19 +496,18 @@ def update_task(
     activity_entry = ActivityLogEntry(
         timestamp=now,
         action=action,
-        note=action_note
+        note=action_note,
+        **(activity_fields or {})
     ).model_dump()
 
     # Update document
-    result = collection.update_one(
-        {"_id": task_id},
-        {
-            "$set": updates,
-            "$push": {"activity_log": activity_entry}
-        }
-    )
+    result = _update_with_activity(collection, task_id, {"$set": updates}, [activity_entry])
+    _on_write(TASKS_COLLECTION)
+    sync_vector_write(TASKS_COLLECTION, task_id, updates)
 
     if result.modified_count > 0:
+        _record_activity("task", task_id, [activity_entry])
+
         # Auto-generate episodic summary if conditions met
         _maybe_generate_task_episodic_summary(task_id)
 
@@ -222,18 +535,20 @@ def add_task_note(task_id: ObjectId, note: str) -> bool:
         note=note
     ).model_dump()
 
-    result = collection.update_one(
-        {"_id": task_id},
+    result = _update_with_activity(
+        collection,
+        task_id,
         {
-            "$push": {
-                "notes": note,
-                "activity_log": activity_entry
-            },
+            "$push": {"notes": note},
             "$set": {"updated_at": now}
-        }
+        },
+        [activity_entry]
     )
+    _on_write(TASKS_COLLECTION)
 
     if result.modified_count > 0:
+        _record_activity("task", task_id, [activity_entry])
+
         # Auto-generate episodic summary if conditions met
         _maybe_generate_task_episodic_summary(task_id)
 
@@ -282,6 +597,10 @@ def create_project(project: Project, action_note: str = "Project created") -> Ob
         action="created",
         note=action_note
     ))
+    entries = [entry.model_dump() for entry in project.activity_log]
+    project.activity_count = len(entries)
+    project.activity_log = project.activity_log[-settings.activity_tail_size:]
+    project.activity_migrated = True
 
     # Convert to MongoDB document
     project_doc = project.to_mongo()
@@ -289,6 +608,10 @@ def create_project(project: Project, action_note: str = "Project created") -> Ob
     # Insert into database
     collection = get_collection(PROJECTS_COLLECTION)
     result = collection.insert_one(project_doc)
+    _on_write(PROJECTS_COLLECTION)
+    invalidate_project_name_cache()
+    sync_vector_write(PROJECTS_COLLECTION, result.inserted_id, project_doc)
+    _record_activity("project", result.inserted_id, entries)
 
     return result.inserted_id
 
@@ -297,7 +620,8 @@ def update_project(
     project_id: ObjectId,
     updates: Dict[str, Any],
     action: str,
-    action_note: Optional[str] = None
+    action_note: Optional[str] = None,
+    activity_fields: Optional[Dict[str, Any]] = None
 ) -> bool:
     """
     Update a project with automatic activity logging.
@@ -307,6 +631,7 @@ def update_project(
         updates: Dictionary of fields to update
         action: Action description for activity log
         action_note: Optional note for the activity log entry
+        activity_fields: Extra ActivityLogEntry fields (e.g. voice summary/transcript)
 
     Returns:
         True if update was successful, False otherwise
@@ -317,22 +642,26 @@ def update_project(
     # Update timestamps
     updates["updated_at"] = now
     updates["last_activity"] = now
+    if updates.get("name"):
+        updates["name_key"] = normalize_project_name(updates["name"])
 
     # Create activity log entry
     activity_entry = ActivityLogEntry(
         timestamp=now,
         action=action,
-        note=action_note
+        note=action_note,
+        **(activity_fields or {})
     ).model_dump()
 
     # Update document
-    result = collection.update_one(
-        {"_id": project_id},
-        {
-            "$set": updates,
-            "$push": {"activity_log": activity_entry}
-        }
-    )
+    result = _update_with_activity(collection, project_id, {"$set": updates}, [activity_entry])
+    _on_write(PROJECTS_COLLECTION)
+    if "name_key" in updates:
+        invalidate_project_name_cache()
+    sync_vector_write(PROJECTS_COLLECTION, project_id, updates)
+
+    if result.modified_count > 0:
+        _record_activity("project", project_id, [activity_entry])
 
     return result.modified_count > 0
 
@@ -352,11 +681,11 @@ def add_project_note(project_id: ObjectId, note: str) -> bool:
     now = datetime.utcnow()
 
     # Get current project for episodic summary trigger
-    current_project = collection.find_one({"_id": project_id})
+    current_project = collection.find_one({"_id": project_id}, {"activity_count": 1, "activity_log": 1})
     if not current_project:
         return False
 
-    old_activity_count = len(current_project.get("activity_log", []))
+    old_activity_count = max(current_project.get("activity_count", 0), len(current_project.get("activity_log", [])))
 
     # Create activity log entry
     activity_entry = ActivityLogEntry(
@@ -371,21 +700,23 @@ def add_project_note(project_id: ObjectId, note: str) -> bool:
         content=note
     ).model_dump()
 
-    result = collection.update_one(
-        {"_id": project_id},
+    result = _update_with_activity(
+        collection,
+        project_id,
         {
-            "$push": {
-                "activity_log": activity_entry,
-                "updates": project_update
-            },
+            "$push": {"updates": project_update},
             "$set": {
                 "updated_at": now,
                 "last_activity": now
             }
-        }
+        },
+        [activity_entry]
     )
+    _on_write(PROJECTS_COLLECTION)
 
     if result.modified_count > 0:
+        _record_activity("project", project_id, [activity_entry])
+
         # Auto-generate episodic summary if conditions met
         new_activity_count = old_activity_count + 1
         _maybe_generate_project_episodic_summary(
@@ -419,6 +750,7 @@ def add_project_method(project_id: ObjectId, method: str) -> bool:
             }
         }
     )
+    _on_write(PROJECTS_COLLECTION)
     return result.modified_count > 0
 
 
@@ -444,6 +776,7 @@ def add_project_decision(project_id: ObjectId, decision: str) -> bool:
             }
         }
     )
+    _on_write(PROJECTS_COLLECTION)
     return result.modified_count > 0
 
 
@@ -465,6 +798,61 @@ def get_project(project_id: ObjectId) -> Optional[Project]:
     return None
 
 
+def resolve_project_ids(project_names: Iterable[str]) -> Dict[str, Optional[ObjectId]]:
+    """
+    Resolve project names to IDs by exact, case-insensitive name.
+
+    Names are compared by name_key (see normalize_project_name). Names in
+    the process-local map are answered without a query; the rest are looked
+    up together on the indexed name_key field. Non-test projects win over
+    test projects with the same name.
+
+    Args:
+        project_names: Project names as given by the user or the LLM
+
+    Returns:
+        {project name: project ObjectId, or None if no project has that name}
+    """
+    keys = {name: normalize_project_name(name) for name in project_names if name}
+    now = time.monotonic()
+
+    resolved: Dict[str, ObjectId] = {}
+    with _read_cache_lock:
+        for key in keys.values():
+            cached = _project_ids_by_name.get(key)
+            if cached and cached[0] > now:
+                resolved[key] = cached[1]
+
+    missing = sorted(set(keys.values()) - set(resolved))
+    if missing:
+        found: Dict[str, dict] = {}
+        collection = get_collection(PROJECTS_COLLECTION)
+        for doc in collection.find({"name_key": {"$in": missing}}, {"name_key": 1, "is_test": 1}):
+            current = found.get(doc["name_key"])
+            if current is None or (current.get("is_test") and not doc.get("is_test")):
+                found[doc["name_key"]] = doc
+
+        with _read_cache_lock:
+            for key, doc in found.items():
+                _project_ids_by_name[key] = (now + PROJECT_NAME_CACHE_TTL_SECONDS, doc["_id"])
+        resolved.update({key: doc["_id"] for key, doc in found.items()})
+
+    return {name: resolved.get(key) for name, key in keys.items()}
+
+
+def resolve_project_id(project_name: str) -> Optional[ObjectId]:
+    """
+    Resolve one project name to its ID by exact, case-insensitive name.
+
+    Args:
+        project_name: Project name as given by the user or the LLM
+
+    Returns:
+        Project ObjectId, or None if no project has that name
+    """
+    return resolve_project_ids([project_name]).get(project_name)
+
+
 def get_project_by_name(project_name: str) -> Optional[Project]:
     """
     Get a project by name (case-insensitive match).
@@ -480,16 +868,16 @@ def get_project_by_name(project_name: str) -> Optional[Project]:
     """
     collection = get_collection(PROJECTS_COLLECTION)
 
-    # Try exact match first
-    project_doc = collection.find_one({
-        "name": {"$regex": f"^{project_name}$", "$options": "i"},
-        "is_test": {"$ne": True}
-    })
+    # Try exact match first (name -> id map, then indexed name_key)
+    project_doc = None
+    project_id = resolve_project_id(project_name)
+    if project_id:
+        project_doc = collection.find_one({"_id": project_id, "is_test": {"$ne": True}})
 
     # If no exact match, try partial match (case-insensitive word boundary)
     if not project_doc:
         project_doc = collection.find_one({
-            "name": {"$regex": f"\\b{project_name}\\b", "$options": "i"},
+            "name": {"$regex": f"\\b{re.escape(project_name)}\\b", "$options": "i"},
             "is_test": {"$ne": True}
         })
 
@@ -498,6 +886,84 @@ def get_project_by_name(project_name: str) -> Optional[Project]:
     return None
 
 
+# Sidebar helper functions
+
+# Only the fields the sidebars render - no embeddings or activity logs
+SIDEBAR_PROJECT_FIELDS = {
+    "name": 1, "description": 1, "status": 1, "stakeholders": 1,
+    "updates": 1, "created_at": 1, "last_activity": 1, "latest_episodic_summary": 1,
+}
+SIDEBAR_TASK_FIELDS = {
+    "title": 1, "status": 1, "priority": 1, "project_id": 1, "context": 1,
+    "notes": 1, "assignee": 1, "blockers": 1, "due_date": 1, "created_at": 1,
+    "started_at": 1, "completed_at": 1, "last_worked_on": 1, "latest_episodic_summary": 1,
+}
+
+
+def get_projects_with_tasks(
+    project_query: Optional[Dict[str, Any]] = None,
+    project_sort: Optional[List[tuple]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get projects with their tasks for sidebar display.
+
+    Uses two queries regardless of project count (projects, then one bulk
+    $in fetch for their tasks plus unassigned tasks) and projects only the
+    fields the sidebar shows. Results are cached briefly and invalidated by
+    the write helpers in this module.
+
+    Args:
+        project_query: Filter for projects (default: all)
+        project_sort: Sort spec for projects (default: last_activity desc)
+
+    Returns:
+        List of {"project": Project | None, "tasks": [Task]} dicts, with
+        unassigned tasks (project None) last
+    """
+    project_query = project_query or {}
+    project_sort = project_sort or [("last_activity", -1)]
+    cache_key = repr((sorted(project_query.items()), project_sort))
+
+    now = time.monotonic()
+    with _read_cache_lock:
+        cached = _projects_with_tasks_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    project_docs = list(
+        get_collection(PROJECTS_COLLECTION)
+        .find(project_query, SIDEBAR_PROJECT_FIELDS)
+        .sort(project_sort)
+    )
+    project_ids = [doc["_id"] for doc in project_docs]
+
+    tasks_by_project: Dict[Any, List[Task]] = {pid: [] for pid in project_ids}
+    orphan_tasks: List[Task] = []
+    task_cursor = get_collection(TASKS_COLLECTION).find(
+        {"$or": [{"project_id": {"$in": project_ids}}, {"project_id": None}]},
+        SIDEBAR_TASK_FIELDS
+    ).sort([("status", 1), ("created_at", -1)])
+
+    for task_doc in task_cursor:
+        project_id = task_doc.get("project_id")
+        if project_id is None:
+            orphan_tasks.append(Task(**task_doc))
+        elif project_id in tasks_by_project:
+            tasks_by_project[project_id].append(Task(**task_doc))
+
+    projects_with_tasks = [
+        {"project": Project(**doc), "tasks": tasks_by_project[doc["_id"]]}
+        for doc in project_docs
+    ]
+    if orphan_tasks:
+        projects_with_tasks.append({"project": None, "tasks": orphan_tasks})
+
+    with _read_cache_lock:
+        _projects_with_tasks_cache[cache_key] = (now + PROJECTS_WITH_TASKS_TTL_SECONDS, projects_with_tasks)
+
+    return projects_with_tasks
+
+
 # Settings helper functions
 
 def get_settings(user_id: str = "default") -> Optional[Settings]:
@@ -571,44 +1037,16 @@ def set_current_context(
 
 def _maybe_generate_task_episodic_summary(task_id: ObjectId) -> None:
     """
-    Auto-generate episodic memory summary for a task if conditions are met.
+    Schedule an episodic memory summary for a task if conditions are met.
 
     Generates every 3-5 activity log entries (specifically at counts 1, 5, 9, 13, etc.).
+    The check and generation run on the background episodic queue, so the
+    write path doesn't wait for the LLM; repeated triggers are coalesced.
 
     Args:
         task_id: ObjectId of the task
     """
-    try:
-        # Import here to avoid circular imports
-        from shared.episodic import should_generate_task_summary, generate_task_episodic_summary
-        from agents.coordinator import memory_manager
-
-        # Get updated task
-        task = get_task(task_id)
-        if not task:
-            return
-
-        # Check if we should generate a summary
-        activity_count = len(task.activity_log)
-        if should_generate_task_summary(activity_count):
-            # Generate summary
-            summary = generate_task_episodic_summary(task)
-
-            # Store in memory_episodic collection
-            memory_manager.store_episodic_summary(
-                user_id="default",  # TODO: Get from context
-                entity_type="task",
-                entity_id=task_id,
-                summary=summary,
-                activity_count=activity_count,
-                entity_title=task.title,
-                entity_status=task.status
-            )
-
-    except Exception as e:
-        # Silently fail - episodic summary generation is optional
-        # Don't break the task update if this fails
-        pass
+    _submit_episodic_job(("task", task_id), lambda: _generate_task_episodic_summary(task_id))
 
 
 def _maybe_generate_project_episodic_summary(
@@ -619,9 +1057,10 @@ def _maybe_generate_project_episodic_summary(
     new_activity_count: Optional[int] = None
 ) -> None:
     """
-    Auto-generate episodic memory summary for a project if conditions are met.
+    Schedule an episodic memory summary for a project if conditions are met.
 
     Generates when description changes or activity count crosses thresholds.
+    Generation runs on the background episodic queue.
 
     Args:
         project_id: ObjectId of the project
@@ -630,41 +1069,109 @@ def _maybe_generate_project_episodic_summary(
         old_activity_count: Previous activity count (if known)
         new_activity_count: New activity count (if known)
     """
-    try:
-        # Import here to avoid circular imports
-        from shared.episodic import should_generate_project_summary, generate_project_episodic_summary
-        from agents.coordinator import memory_manager
-
-        # Check if we should generate a summary (if we have before/after state)
-        if old_description is not None or old_activity_count is not None:
-            if not should_generate_project_summary(old_description, new_description, old_activity_count, new_activity_count):
-                return
-
-        # Get updated project
-        project = get_project(project_id)
-        if not project:
+    from shared.episodic import should_generate_project_summary
+
+    # Check if we should generate a summary (if we have before/after state)
+    if old_description is not None or old_activity_count is not None:
+        if not should_generate_project_summary(old_description, new_description, old_activity_count, new_activity_count):
             return
 
-        # Get tasks for this project
-        tasks_collection = get_collection(TASKS_COLLECTION)
-        task_docs = tasks_collection.find({"project_id": project_id})
-        tasks = [Task(**doc) for doc in task_docs]
-
-        # Generate summary
-        summary = generate_project_episodic_summary(project, tasks)
-
-        # Store in memory_episodic collection
-        activity_count = len(project.activity_log)
-        memory_manager.store_episodic_summary(
-            user_id="default",  # TODO: Get from context
-            entity_type="project",
-            entity_id=project_id,
-            summary=summary,
-            activity_count=activity_count,
-            entity_title=project.name,
-            entity_status=project.status
-        )
+    _submit_episodic_job(("project", project_id), lambda: _generate_project_episodic_summary(project_id))
+
+
+def _submit_episodic_job(key: tuple, job) -> None:
+    """Run an episodic summary job on the background queue (or inline if disabled)."""
+    from shared.episodic_queue import get_episodic_queue
 
+    queue = get_episodic_queue()
+    if queue is not None:
+        queue.submit(key, job)
+        return
+
+    try:
+        job()
     except Exception as e:
-        # Silently fail - episodic summary generation is optional
-        pass
+        # Episodic summary generation is optional - don't break the write
+        logger.warning(f"Episodic summary for {key[0]} {key[1]} failed: {e}")
+
+
+def _generate_task_episodic_summary(task_id: ObjectId) -> None:
+    """
+    Generate and store a task summary if a threshold was crossed.
+
+    Because triggers are coalesced, every activity count since the last stored
+    summary is checked, not just the current one.
+
+    Args:
+        task_id: ObjectId of the task
+    """
+    # Import here to avoid circular imports
+    from shared.episodic import should_generate_task_summary, generate_task_episodic_summary
+    from agents.coordinator import memory_manager
+
+    # Get updated task
+    task = get_task(task_id)
+    if not task or not memory_manager:
+        return
+
+    # Check if we should generate a summary
+    activity_count = task.total_activity
+    if task.latest_episodic_summary:
+        last_count = task.latest_episodic_summary.activity_count
+    else:
+        # Summaries stored before the pointer existed
+        latest = memory_manager.get_latest_episodic_summary("task", task_id)
+        last_count = latest.get("activity_count", 0) if latest else 0
+    if not any(should_generate_task_summary(count) for count in range(last_count + 1, activity_count + 1)):
+        return
+
+    # Generate summary
+    summary = generate_task_episodic_summary(task)
+
+    # Store in memory_episodic collection
+    memory_manager.store_episodic_summary(
+        user_id="default",  # TODO: Get from context
+        entity_type="task",
+        entity_id=task_id,
+        summary=summary,
+        activity_count=activity_count,
+        entity_title=task.title,
+        entity_status=task.status
+    )
+
+
+def _generate_project_episodic_summary(project_id: ObjectId) -> None:
+    """
+    Generate and store a project summary from the project and its tasks.
+
+    Args:
+        project_id: ObjectId of the project
+    """
+    # Import here to avoid circular imports
+    from shared.episodic import generate_project_episodic_summary
+    from agents.coordinator import memory_manager
+
+    # Get updated project
+    project = get_project(project_id)
+    if not project or not memory_manager:
+        return
+
+    # Get tasks for this project
+    tasks_collection = get_collection(TASKS_COLLECTION)
+    task_docs = tasks_collection.find({"project_id": project_id}, {"embedding": 0})
+    tasks = [Task(**doc) for doc in task_docs]
+
+    # Generate summary
+    summary = generate_project_episodic_summary(project, tasks)
+
+    # Store in memory_episodic collection
+    activity_count = project.total_activity
+    memory_manager.store_episodic_summary(
+        user_id="default",  # TODO: Get from context
+        entity_type="project",
+        entity_id=project_id,
+        summary=summary,
+        activity_count=activity_count,
+        entity_title=project.name,
+        entity_status=project.status
+    )
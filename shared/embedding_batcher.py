@@ -0,0 +1,279 @@
+"""Micro-batching dispatcher for embedding requests.
+
+Many callers (Streamlit sessions, record_action, episodic summaries) embed one
+string at a time, so throughput is capped by per-request Voyage latency. The
+dispatcher collects requests from any number of threads or coroutines over a
+short window and sends them as a single embed_texts call, then hands each
+caller its own vector back.
+
+A request that arrives while the dispatcher is idle (nothing queued, no batch
+in flight) is sent immediately, so uncontended callers never pay the window.
+Otherwise batches are flushed when either limit is reached:
+- max_batch_size requests are waiting
+- max_wait_ms has elapsed since the first request of the batch arrived
+
+Flushed batches run on a small worker pool so a slow batch does not stop the
+next one from being collected.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, List, Optional
+
+from shared.logger import get_logger
+
+logger = get_logger("embedding_batcher")
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """Collects single-text embedding requests into batched calls."""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str], str], List[List[float]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+        timeout: Optional[float] = 60.0
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            embed_fn: Batched embedding function (texts, input_type) -> vectors
+            max_batch_size: Maximum texts per embed_fn call
+            max_wait_ms: Maximum time to hold the first request of a batch
+            max_concurrent_batches: Batches allowed in flight at once
+            timeout: Seconds embed/aembed wait for a result (None = no limit)
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.timeout = timeout
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "max_batch": 0}
+        self._in_flight = 0
+
+    # ═══════════════════════════════════════════════════════════════════
+    # PUBLIC API
+    # ═══════════════════════════════════════════════════════════════════
+
+    def submit(self, text: str, input_type: str = "document") -> Future:
+        """
+        Queue a text for embedding.
+
+        Args:
+            text: Text to embed
+            input_type: "document" or "query"
+
+        Returns:
+            Future resolving to the embedding vector
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, input_type, future))
+        return future
+
+    def embed(self, text: str, input_type: str = "document") -> List[float]:
+        """
+        Embed a single text, blocking until its batch completes.
+
+        Args:
+            text: Text to embed
+            input_type: "document" or "query"
+
+        Returns:
+            Embedding vector
+
+        Raises:
+            concurrent.futures.TimeoutError: If no result arrives within timeout
+        """
+        future = self.submit(text, input_type)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def aembed(self, text: str, input_type: str = "document") -> List[float]:
+        """
+        Embed a single text without blocking the event loop.
+
+        Args:
+            text: Text to embed
+            input_type: "document" or "query"
+
+        Returns:
+            Embedding vector
+
+        Raises:
+            asyncio.TimeoutError: If no result arrives within timeout
+        """
+        return await asyncio.wait_for(
+            asyncio.wrap_future(self.submit(text, input_type)),
+            self.timeout
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get dispatcher statistics.
+
+        Returns:
+            Dict with requests, batches, max_batch, avg_batch and queue_depth
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_batch"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+    def close(self) -> None:
+        """Flush pending requests and stop the dispatcher thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._thread = None
+        self._executor = None
+
+    # ═══════════════════════════════════════════════════════════════════
+    # DISPATCH LOOP
+    # ═══════════════════════════════════════════════════════════════════
+
+    def _ensure_started(self) -> None:
+        """Start the collector thread on first use."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent_batches,
+                    thread_name_prefix="embedding-batch"
+                )
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="embedding-batcher",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Collect requests into batches and hand them to the worker pool."""
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+
+            with self._stats_lock:
+                idle = self._in_flight == 0
+            if idle and self._queue.empty():
+                deadline = 0.0  # Uncontended: don't hold the caller for the window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            with self._stats_lock:
+                self._in_flight += 1
+            self._executor.submit(self._dispatch, batch)
+
+            if stop:
+                return
+
+    def _dispatch(self, batch: list) -> None:
+        """Embed one collected batch and resolve every caller's future."""
+        try:
+            self._embed_batch(batch)
+        finally:
+            with self._stats_lock:
+                self._in_flight -= 1
+
+    def _embed_batch(self, batch: list) -> None:
+        """Embed each input type's unique texts once and fan results out."""
+        by_type: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+        for text, input_type, future in batch:
+            if future.set_running_or_notify_cancel():
+                by_type[input_type][text].append(future)
+
+        for input_type, futures_by_text in by_type.items():
+            texts = list(futures_by_text)
+            items = sum(len(futures) for futures in futures_by_text.values())
+            try:
+                embeddings = list(self.embed_fn(texts, input_type))
+            except Exception as e:
+                logger.warning(f"Batched embedding of {len(texts)} text(s) failed: {e}")
+                for futures in futures_by_text.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+
+            if len(embeddings) != len(texts):
+                logger.warning(
+                    f"Batched embedding returned {len(embeddings)} vector(s) for {len(texts)} text(s)"
+                )
+
+            for index, text in enumerate(texts):
+                for future in futures_by_text[text]:
+                    if index < len(embeddings):
+                        future.set_result(embeddings[index])
+                    else:
+                        future.set_exception(RuntimeError(
+                            f"embed_fn returned {len(embeddings)} vector(s) for {len(texts)} text(s)"
+                        ))
+
+            with self._stats_lock:
+                self._stats["requests"] += items
+                self._stats["batches"] += 1
+                self._stats["max_batch"] = max(self._stats["max_batch"], items)
+
+
+def build_embedding_batcher(
+    embed_fn: Callable[[List[str], str], List[List[float]]]
+) -> Optional[EmbeddingBatcher]:
+    """
+    Build the process-wide embedding dispatcher from settings.
+
+    Args:
+        embed_fn: Batched embedding function (texts, input_type) -> vectors
+
+    Returns:
+        EmbeddingBatcher, or None when EMBEDDING_BATCH_ENABLED is false
+    """
+    from shared.config import settings
+
+    if not settings.embedding_batch_enabled:
+        return None
+
+    return EmbeddingBatcher(
+        embed_fn,
+        max_batch_size=settings.embedding_batch_max_size,
+        max_wait_ms=settings.embedding_batch_max_wait_ms,
+        max_concurrent_batches=settings.embedding_batch_max_concurrent,
+        timeout=settings.embedding_batch_timeout_seconds or None
+    )
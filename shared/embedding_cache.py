@@ -0,0 +1,373 @@
+"""Content-addressed cache for Voyage AI embeddings.
+
+The same strings get embedded many times per turn (the MCP agent embeds one
+request for the knowledge cache lookup, the discovery lookup and again when
+caching the result; fuzzy task matching re-embeds the project hint). This
+module memoizes vectors keyed by (model, input_type, normalized text hash).
+
+Two tiers:
+- In-process LRU with size and TTL bounds (always on)
+- Optional persistent store shared across processes/restarts
+  (MongoDB collection or an on-disk SQLite file)
+
+Hit/miss/latency counters are kept so the debug panel can show how many
+Voyage round-trips were saved per turn.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from shared.logger import get_logger
+
+logger = get_logger("embedding_cache")
+
+EMBEDDING_CACHE_COLLECTION = "embedding_cache"
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before hashing so trivially different inputs share a key.
+
+    Applies Unicode NFC normalization, trims the ends and collapses runs of
+    whitespace. Case is preserved because it can change the embedding.
+
+    Args:
+        text: Raw input text
+
+    Returns:
+        Normalized text
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def make_cache_key(model: str, input_type: str, text: str) -> str:
+    """
+    Build the content-addressed cache key for an embedding.
+
+    Args:
+        model: Voyage model name (e.g., "voyage-3")
+        input_type: "document" or "query"
+        text: Text being embedded
+
+    Returns:
+        Hex SHA-256 digest of model, input type and normalized text
+    """
+    payload = f"{model}\x00{input_type}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# PERSISTENT STORES
+# ═══════════════════════════════════════════════════════════════════
+
+class MongoEmbeddingStore:
+    """Persistent embedding store backed by a MongoDB collection."""
+
+    def __init__(self, collection=None, ttl_seconds: Optional[int] = None):
+        """
+        Initialize the MongoDB store.
+
+        Args:
+            collection: Collection to use (default: resolved lazily from shared.db)
+            ttl_seconds: Optional expiry; enforced by a TTL index on created_at
+        """
+        self._collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def collection(self):
+        """Resolve the collection on first use so construction never connects."""
+        if self._collection is None:
+            from shared.db import get_collection
+            self._collection = get_collection(EMBEDDING_CACHE_COLLECTION)
+        return self._collection
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the stored vector for key, or None."""
+        doc = self.collection.find_one({"_id": key}, {"embedding": 1, "created_at": 1})
+        if not doc:
+            return None
+        if self.ttl_seconds and doc.get("created_at"):
+            # TTL monitor only runs once a minute - don't serve stale entries meanwhile
+            if doc["created_at"] < datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+                return None
+        return doc.get("embedding")
+
+    def set(self, key: str, embedding: List[float], model: str, input_type: str) -> None:
+        """Store a vector under key (upsert)."""
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {
+                "embedding": embedding,
+                "model": model,
+                "input_type": input_type,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+
+class DiskEmbeddingStore:
+    """Persistent embedding store backed by a local SQLite file."""
+
+    def __init__(self, path: str, ttl_seconds: Optional[int] = None):
+        """
+        Initialize the on-disk store.
+
+        Args:
+            path: SQLite file path (parent directories are created on first use)
+            ttl_seconds: Optional expiry for stored entries
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, embedding TEXT NOT NULL, "
+                "model TEXT, input_type TEXT, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the stored vector for key, or None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT embedding, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        if self.ttl_seconds and row[1] < time.time() - self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, embedding: List[float], model: str, input_type: str) -> None:
+        """Store a vector under key (upsert)."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, model, input_type, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(embedding), model, input_type, time.time())
+            )
+            conn.commit()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# TWO-TIER CACHE
+# ═══════════════════════════════════════════════════════════════════
+
+class EmbeddingCache:
+    """Two-tier (LRU + optional persistent store) embedding cache."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: Optional[int] = 86400,
+        store=None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum vectors held in process memory
+            ttl_seconds: Max age of in-memory entries (None = no expiry)
+            store: Optional persistent store with get(key) / set(key, embedding, model, input_type)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (embedding, stored_at)
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "api_calls": 0,
+            "api_texts": 0,
+            "api_ms": 0.0,
+            "lookup_ms": 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, model: str, input_type: str, text: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+
+        Checks the in-process LRU first, then the persistent store (promoting
+        store hits into the LRU).
+
+        Args:
+            model: Voyage model name
+            input_type: "document" or "query"
+            text: Text to look up
+
+        Returns:
+            Cached embedding or None on miss
+        """
+        start = time.perf_counter()
+        key = make_cache_key(model, input_type, text)
+        embedding = None
+        tier = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl_seconds and time.monotonic() - entry[1] > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    embedding = list(entry[0])  # Callers may mutate their copy
+                    tier = "hits"
+
+        if embedding is None and self.store is not None:
+            try:
+                embedding = self.store.get(key)
+            except Exception as e:
+                logger.warning(f"Embedding store lookup failed: {e}")
+                embedding = None
+            if embedding is not None:
+                tier = "store_hits"
+                self._remember(key, embedding)
+
+        with self._lock:
+            self._stats[tier or "misses"] += 1
+            self._stats["lookup_ms"] += (time.perf_counter() - start) * 1000
+
+        return embedding
+
+    def put(self, model: str, input_type: str, text: str, embedding: List[float]) -> None:
+        """
+        Store an embedding in both tiers.
+
+        Args:
+            model: Voyage model name
+            input_type: "document" or "query"
+            text: Text that was embedded
+            embedding: Resulting vector
+        """
+        key = make_cache_key(model, input_type, text)
+        self._remember(key, embedding)
+
+        if self.store is not None:
+            try:
+                self.store.set(key, embedding, model, input_type)
+            except Exception as e:
+                logger.warning(f"Embedding store write failed: {e}")
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        """Insert into the LRU tier, evicting the least recently used entries."""
+        # Stored as a tuple so neither the caller's list nor a returned copy aliases it
+        entry = (tuple(embedding), time.monotonic())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_api_call(self, num_texts: int, duration_ms: float) -> None:
+        """
+        Record a round-trip to the embedding API (for saved-latency estimates).
+
+        Args:
+            num_texts: Number of texts sent in the request
+            duration_ms: Request latency
+        """
+        with self._lock:
+            self._stats["api_calls"] += 1
+            self._stats["api_texts"] += num_texts
+            self._stats["api_ms"] += duration_ms
+
+    def clear(self) -> None:
+        """Drop all in-process entries (the persistent store is left intact)."""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get a copy of the cumulative counters.
+
+        Returns:
+            Dict of counters plus the current in-memory size
+        """
+        with self._lock:
+            snap = dict(self._stats)
+            snap["size"] = len(self._entries)
+        return snap
+
+    def stats_since(self, before: Optional[Dict[str, float]]) -> Dict[str, float]:
+        """
+        Counters accumulated since an earlier snapshot (e.g., one turn).
+
+        Args:
+            before: Result of an earlier snapshot() call (None = since startup)
+
+        Returns:
+            Dict with hits, store_hits, misses, api_calls, api_ms,
+            round_trips_saved, est_saved_ms and hit_rate
+        """
+        now = self.snapshot()
+        before = before or {}
+        delta = {
+            k: now[k] - before.get(k, 0)
+            for k in ("hits", "store_hits", "misses", "api_calls", "api_texts", "api_ms", "lookup_ms")
+        }
+
+        saved = delta["hits"] + delta["store_hits"]
+        lookups = saved + delta["misses"]
+        avg_api_ms = (now["api_ms"] / now["api_calls"]) if now["api_calls"] else 0.0
+
+        delta["round_trips_saved"] = saved
+        delta["est_saved_ms"] = round(saved * avg_api_ms, 1)
+        delta["hit_rate"] = round(saved / lookups, 3) if lookups else 0.0
+        delta["api_ms"] = round(delta["api_ms"], 1)
+        delta["lookup_ms"] = round(delta["lookup_ms"], 2)
+        return delta
+
+
+def build_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Build the process-wide embedding cache from settings.
+
+    Returns:
+        EmbeddingCache, or None when EMBEDDING_CACHE_ENABLED is false
+    """
+    from shared.config import settings
+
+    if not settings.embedding_cache_enabled:
+        return None
+
+    ttl = settings.embedding_cache_ttl_seconds or None
+    backend = (settings.embedding_cache_backend or "memory").lower()
+
+    store = None
+    if backend == "mongodb":
+        store = MongoEmbeddingStore(ttl_seconds=ttl)
+    elif backend == "disk":
+        store = DiskEmbeddingStore(settings.embedding_cache_path, ttl_seconds=ttl)
+    elif backend != "memory":
+        logger.warning(f"Unknown EMBEDDING_CACHE_BACKEND '{backend}', using in-memory only")
+
+    return EmbeddingCache(
+        max_entries=settings.embedding_cache_max_entries,
+        ttl_seconds=ttl,
+        store=store
+    )
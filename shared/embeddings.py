@@ -1,24 +1,52 @@
 """Embedding generation using Voyage AI."""
 
-from typing import List, Union
-import voyageai
+import hashlib
+import time
+from typing import Any, List, Optional, Union
 
 from shared.config import settings
+from shared.embedding_batcher import EmbeddingBatcher, build_embedding_batcher
+from shared.embedding_cache import EmbeddingCache, build_embedding_cache
+from shared.services import services
+from shared.tracing import span, traced
 
 
 class EmbeddingService:
     """Service for generating embeddings using Voyage AI."""
 
-    def __init__(self, model: str = "voyage-3"):
+    def __init__(
+        self,
+        model: str = "voyage-3",
+        cache: Optional[EmbeddingCache] = None,
+        batcher: Optional[EmbeddingBatcher] = None,
+        client: Optional[Any] = None,
+        async_client: Optional[Any] = None
+    ):
         """
         Initialize the embedding service.
 
         Args:
             model: Voyage AI model to use (default: voyage-3)
+            cache: Optional embedding cache consulted before calling Voyage
+            batcher: Optional dispatcher that coalesces single-text cache
+                misses from concurrent callers into one _embed_uncached call
+            client: Optional client with Voyage's embed(texts, model, input_type)
+                interface (default: voyageai.Client), e.g. evals.fakes.HashEmbedder
+            async_client: Optional async counterpart (default: voyageai.AsyncClient)
         """
-        self.client = voyageai.Client(api_key=settings.voyage_api_key)
+        if client is None or async_client is None:
+            import voyageai  # Deferred: only needed once a service is built
+
+            client = client or voyageai.Client(api_key=settings.voyage_api_key)
+            async_client = async_client or voyageai.AsyncClient(api_key=settings.voyage_api_key)
+
+        self.client = client
+        self.async_client = async_client
         self.model = model
+        self.cache = cache
+        self.batcher = batcher
 
+    @traced("embedding.embed_text", kind="embedding")
     def embed_text(self, text: str, input_type: str = "document") -> List[float]:
         """
         Generate embedding for a single text.
@@ -30,13 +58,39 @@ class EmbeddingService:
         Returns:
             Embedding vector as list of floats
         """
-        result = self.client.embed(
-            texts=[text],
-            model=self.model,
-            input_type=input_type
-        )
-        return result.embeddings[0]
+        if self.cache is not None:
+            cached = self.cache.get(self.model, input_type, text)
+            if cached is not None:
+                return cached
+
+        if self.batcher is not None:
+            return self.batcher.embed(text, input_type)
+
+        return self._embed_uncached([text], input_type)[0]
+
+    @traced("embedding.embed_text", kind="embedding")
+    async def aembed_text(self, text: str, input_type: str = "document") -> List[float]:
+        """
+        Generate embedding for a single text without blocking the event loop.
+
+        Args:
+            text: Text to embed
+            input_type: Type of input - "document" or "query"
 
+        Returns:
+            Embedding vector as list of floats
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.model, input_type, text)
+            if cached is not None:
+                return cached
+
+        if self.batcher is not None:
+            return await self.batcher.aembed(text, input_type)
+
+        return (await self._aembed_uncached([text], input_type))[0]
+
+    @traced("embedding.embed_texts", kind="embedding")
     def embed_texts(
         self,
         texts: List[str],
@@ -45,6 +99,44 @@ class EmbeddingService:
         """
         Generate embeddings for multiple texts.
 
+        Cached texts are served locally; only the misses (deduplicated) are
+        sent to Voyage, in a single request.
+
+        Args:
+            texts: List of texts to embed
+            input_type: Type of input - "document" or "query"
+
+        Returns:
+            List of embedding vectors
+        """
+        if self.cache is None:
+            return self._embed_uncached(texts, input_type)
+
+        embeddings: List[Optional[List[float]]] = [
+            self.cache.get(self.model, input_type, text) for text in texts
+        ]
+        missing = list(dict.fromkeys(
+            text for text, embedding in zip(texts, embeddings) if embedding is None
+        ))
+
+        if missing:
+            fetched = dict(zip(missing, self._embed_uncached(missing, input_type)))
+            embeddings = [
+                embedding if embedding is not None else fetched[text]
+                for text, embedding in zip(texts, embeddings)
+            ]
+
+        return embeddings
+
+    @traced("embedding.embed_texts", kind="embedding")
+    async def aembed_texts(
+        self,
+        texts: List[str],
+        input_type: str = "document"
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts without blocking the event loop.
+
         Args:
             texts: List of texts to embed
             input_type: Type of input - "document" or "query"
@@ -52,11 +144,57 @@ class EmbeddingService:
         Returns:
             List of embedding vectors
         """
-        result = self.client.embed(
-            texts=texts,
-            model=self.model,
-            input_type=input_type
-        )
+        if self.cache is None:
+            return await self._aembed_uncached(texts, input_type)
+
+        embeddings: List[Optional[List[float]]] = [
+            self.cache.get(self.model, input_type, text) for text in texts
+        ]
+        missing = list(dict.fromkeys(
+            text for text, embedding in zip(texts, embeddings) if embedding is None
+        ))
+
+        if missing:
+            fetched = dict(zip(missing, await self._aembed_uncached(missing, input_type)))
+            embeddings = [
+                embedding if embedding is not None else fetched[text]
+                for text, embedding in zip(texts, embeddings)
+            ]
+
+        return embeddings
+
+    def _embed_uncached(self, texts: List[str], input_type: str) -> List[List[float]]:
+        """Call Voyage for texts and populate the cache with the results."""
+        start = time.perf_counter()
+        with span("voyage.embed", kind="embedding", texts=len(texts), input_type=input_type):
+            result = self.client.embed(
+                texts=texts,
+                model=self.model,
+                input_type=input_type
+            )
+
+        if self.cache is not None:
+            self.cache.record_api_call(len(texts), (time.perf_counter() - start) * 1000)
+            for text, embedding in zip(texts, result.embeddings):
+                self.cache.put(self.model, input_type, text, embedding)
+
+        return result.embeddings
+
+    async def _aembed_uncached(self, texts: List[str], input_type: str) -> List[List[float]]:
+        """Async variant of _embed_uncached using the Voyage async client."""
+        start = time.perf_counter()
+        with span("voyage.embed", kind="embedding", texts=len(texts), input_type=input_type):
+            result = await self.async_client.embed(
+                texts=texts,
+                model=self.model,
+                input_type=input_type
+            )
+
+        if self.cache is not None:
+            self.cache.record_api_call(len(texts), (time.perf_counter() - start) * 1000)
+            for text, embedding in zip(texts, result.embeddings):
+                self.cache.put(self.model, input_type, text, embedding)
+
         return result.embeddings
 
     def embed_query(self, query: str) -> List[float]:
@@ -71,6 +209,18 @@ class EmbeddingService:
         """
         return self.embed_text(query, input_type="query")
 
+    async def aembed_query(self, query: str) -> List[float]:
+        """
+        Generate embedding for a search query without blocking the event loop.
+
+        Args:
+            query: Query text to embed
+
+        Returns:
+            Embedding vector as list of floats
+        """
+        return await self.aembed_text(query, input_type="query")
+
     def embed_document(self, document: str) -> List[float]:
         """
         Generate embedding for a document.
@@ -84,8 +234,32 @@ class EmbeddingService:
         return self.embed_text(document, input_type="document")
 
 
-# Global embedding service instance
-embedding_service = EmbeddingService()
+def _build_embedding_service() -> EmbeddingService:
+    """Build the global embedding service with its configured cache and batcher."""
+    service = EmbeddingService(cache=build_embedding_cache())
+    # Callers check the cache before queuing, so the batcher goes straight to Voyage
+    service.batcher = build_embedding_batcher(service._embed_uncached)
+    return service
+
+
+# Global embedding service instance (client built on first use)
+embedding_service = services.register("embedding_service", _build_embedding_service)
+
+
+def get_embedding_cache_stats(since: Optional[dict] = None) -> Optional[dict]:
+    """
+    Get embedding cache counters for the global service.
+
+    Args:
+        since: Optional earlier snapshot (from embedding_service.cache.snapshot())
+            to report only the activity since then, e.g. a single turn
+
+    Returns:
+        Counter dict, or None when the cache is disabled
+    """
+    if embedding_service.cache is None:
+        return None
+    return embedding_service.cache.stats_since(since)
 
 
 def embed_query(query: str) -> List[float]:
@@ -101,6 +275,19 @@ def embed_query(query: str) -> List[float]:
     return embedding_service.embed_query(query)
 
 
+async def aembed_query(query: str) -> List[float]:
+    """
+    Generate embedding for a search query without blocking the event loop.
+
+    Args:
+        query: Query text to embed
+
+    Returns:
+        Embedding vector as list of floats
+    """
+    return await embedding_service.aembed_query(query)
+
+
 def embed_document(document: str) -> List[float]:
     """
     Generate embedding for a document.
@@ -127,6 +314,19 @@ def embed_documents(documents: List[str]) -> List[List[float]]:
     return embedding_service.embed_texts(documents, input_type="document")
 
 
+async def aembed_documents(documents: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for multiple documents without blocking the event loop.
+
+    Args:
+        documents: List of document texts to embed
+
+    Returns:
+        List of embedding vectors
+    """
+    return await embedding_service.aembed_texts(documents, input_type="document")
+
+
 # =============================================================================
 # TASK AND PROJECT EMBEDDING HELPERS
 # =============================================================================
@@ -242,3 +442,35 @@ def build_project_embedding_text(project_doc: dict) -> str:
         parts.append(f"decisions: {decisions_text}")
 
     return " ".join(parts)
+
+
+def build_embedding_text(entity_type: str, doc: dict) -> str:
+    """
+    Build the canonical embedding text for a task or project document.
+
+    Args:
+        entity_type: "task" or "project"
+        doc: Task or project document
+
+    Returns:
+        Combined text string for embedding
+    """
+    if entity_type == "task":
+        return build_task_embedding_text(doc)
+    return build_project_embedding_text(doc)
+
+
+def embedding_text_hash(text: str) -> str:
+    """
+    Hash canonical embedding text.
+
+    Stored next to a task/project embedding as embedding_hash, so writes that
+    don't change the text can skip re-embedding.
+
+    Args:
+        text: Text returned by build_task_embedding_text/build_project_embedding_text
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
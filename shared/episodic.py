@@ -134,6 +134,11 @@ Focus on: current momentum, what's being worked on, recent completions, and proj
         return f"Unable to generate summary: {str(e)}"
 
 
+# Lowest activity count at which each entity type gets its first summary
+# (should_generate_task_summary / should_generate_project_summary)
+FIRST_SUMMARY_ACTIVITY = {"task": 1, "project": 5}
+
+
 def should_generate_task_summary(task_activity_count: int) -> bool:
     """Determine if a new episodic summary should be generated for a task.
 
@@ -0,0 +1,58 @@
+"""Background queue for episodic summary generation.
+
+Generating an episodic summary means re-reading the entity (and, for projects,
+all of its tasks), an LLM call and an embedding. Running that inline made every
+task/project write pay for it. Writes now only enqueue a job on a
+KeyedJobQueue (see shared/job_queue.py), keyed by entity so repeated triggers
+coalesce, and a small worker pool generates summaries in the background.
+"""
+
+import atexit
+import threading
+from typing import Any, Dict, Optional
+
+from shared.job_queue import KeyedJobQueue
+
+# Kept for callers that predate the generic queue
+EpisodicSummaryQueue = KeyedJobQueue
+
+
+_queue: Optional[KeyedJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_episodic_queue() -> Optional[KeyedJobQueue]:
+    """
+    Get the process-wide episodic summary queue.
+
+    Returns:
+        KeyedJobQueue, or None when EPISODIC_QUEUE_ENABLED is false
+        (summaries are then generated inline)
+    """
+    global _queue
+    from shared.config import settings
+
+    if not settings.episodic_queue_enabled:
+        return None
+
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = KeyedJobQueue(
+                    workers=settings.episodic_queue_workers,
+                    max_retries=settings.episodic_queue_max_retries,
+                    name="episodic-summary"
+                )
+                # Give queued summaries a chance to finish when scripts exit
+                atexit.register(_queue.close)
+    return _queue
+
+
+def get_episodic_queue_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get metrics for the process-wide queue.
+
+    Returns:
+        Stats dict, or None if the queue is disabled or has not been used
+    """
+    return _queue.stats() if _queue is not None else None
@@ -0,0 +1,217 @@
+"""Keyed, coalescing background job queue.
+
+Shared by the background pipelines (episodic summaries, re-embedding) that
+turn a write into deferred per-entity work.
+
+- Coalescing: jobs are keyed (e.g. by entity), so repeated triggers for the
+  same key while a job is pending collapse into one run. A trigger that
+  arrives while the key's job is running schedules exactly one re-run.
+- Debouncing: submit(delay=...) holds a job until no new trigger for its key
+  has arrived for that long, so a burst of edits runs once at the end.
+- Retries: failed jobs are retried with exponential backoff, then logged.
+- Metrics: stats() reports queue depth, in-flight jobs and enqueue-to-start lag.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from shared.logger import get_logger
+
+logger = get_logger("job_queue")
+
+
+@dataclass
+class _Job:
+    """A pending unit of work for one key."""
+    key: Hashable
+    fn: Callable[[], Any]
+    enqueued_at: float
+    attempts: int = 0
+    not_before: float = 0.0
+
+
+class KeyedJobQueue:
+    """Keyed, coalescing background job queue with retries."""
+
+    def __init__(self, workers: int = 2, max_retries: int = 3, retry_backoff_seconds: float = 1.0,
+                 name: str = "job-queue"):
+        """
+        Initialize the queue. Worker threads start on first submit.
+
+        Args:
+            workers: Number of worker threads
+            max_retries: Retries after the first failed attempt
+            retry_backoff_seconds: Initial retry delay (doubles per attempt)
+            name: Worker thread name prefix, also used in job failure logs
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._pending: "OrderedDict[Hashable, _Job]" = OrderedDict()
+        self._running: set = set()
+        self._cond = threading.Condition()
+        self._threads: list = []
+        self._closed = False
+        self._stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "processed": 0,
+            "failed": 0,
+            "retries": 0,
+            "last_lag_ms": 0,
+            "max_lag_ms": 0,
+        }
+
+    # ═══════════════════════════════════════════════════════════════════
+    # PUBLIC API
+    # ═══════════════════════════════════════════════════════════════════
+
+    def submit(self, key: Hashable, fn: Callable[[], Any], delay: float = 0.0) -> None:
+        """
+        Queue a job, coalescing with any pending job for the same key.
+
+        Args:
+            key: Coalescing key, e.g. ("task", task_id)
+            fn: Zero-argument callable doing the work
+            delay: Seconds to hold the job; a later submit for the same key
+                restarts the wait (debounce)
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._stats["submitted"] += 1
+
+            now = time.monotonic()
+            not_before = now + delay if delay > 0 else 0.0
+            existing = self._pending.get(key)
+            if existing is not None:
+                # Keep the original enqueue time so lag reflects the oldest trigger
+                existing.fn = fn
+                existing.attempts = 0
+                existing.not_before = not_before
+                self._stats["coalesced"] += 1
+            else:
+                self._pending[key] = _Job(key=key, fn=fn, enqueued_at=now, not_before=not_before)
+
+            self._ensure_workers()
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue metrics.
+
+        Returns:
+            Dict with depth, in_flight, oldest_pending_ms, lag and counters
+        """
+        now = time.monotonic()
+        with self._cond:
+            stats = dict(self._stats)
+            stats["depth"] = len(self._pending)
+            stats["in_flight"] = len(self._running)
+            stats["oldest_pending_ms"] = int(
+                (now - min(job.enqueued_at for job in self._pending.values())) * 1000
+            ) if self._pending else 0
+        return stats
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no jobs are pending or running.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.5)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Finish queued work (up to timeout) and stop the workers."""
+        self.drain(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    # ═══════════════════════════════════════════════════════════════════
+    # WORKERS
+    # ═══════════════════════════════════════════════════════════════════
+
+    def _ensure_workers(self) -> None:
+        """Start worker threads on first use (caller holds the lock)."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"{self.name}-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pop the oldest runnable job (caller holds the lock)."""
+        now = time.monotonic()
+        for key, job in self._pending.items():
+            if key not in self._running and job.not_before <= now:
+                del self._pending[key]
+                return job
+        return None
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Seconds until the earliest backed-off job becomes runnable."""
+        waits = [job.not_before - time.monotonic() for job in self._pending.values() if job.not_before]
+        return max(0.01, min(waits)) if waits else None
+
+    def _worker(self) -> None:
+        """Run jobs until the queue is closed."""
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._cond.wait(self._next_wakeup())
+                    job = self._next_job()
+
+                self._running.add(job.key)
+                if job.attempts == 0:
+                    lag_ms = int((time.monotonic() - job.enqueued_at) * 1000)
+                    self._stats["last_lag_ms"] = lag_ms
+                    self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], lag_ms)
+
+            error = None
+            try:
+                job.fn()
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._running.discard(job.key)
+                if error is None:
+                    self._stats["processed"] += 1
+                elif job.key in self._pending:
+                    # A newer trigger for this key supersedes the failed run
+                    logger.debug("%s job %s failed, newer job pending: %s", self.name, job.key, error)
+                elif job.attempts < self.max_retries:
+                    job.attempts += 1
+                    job.not_before = time.monotonic() + self.retry_backoff_seconds * (2 ** (job.attempts - 1))
+                    self._pending[job.key] = job
+                    self._stats["retries"] += 1
+                    logger.warning("%s job %s failed (attempt %s), retrying: %s", self.name, job.key, job.attempts, error)
+                else:
+                    self._stats["failed"] += 1
+                    logger.error("%s job %s failed after %s attempts: %s", self.name, job.key, job.attempts + 1, error)
+                self._cond.notify_all()
@@ -1,27 +1,146 @@
 """LLM service using Claude API (Anthropic)."""
 
-from typing import List, Dict, Any, Optional
-from anthropic import Anthropic
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import httpx
+from anthropic import Anthropic, AsyncAnthropic, DefaultAsyncHttpxClient, DefaultHttpxClient
 
 from shared.config import settings
+from shared.services import services
 from shared.logger import get_logger
+from shared.prompt_cache import PromptLayer, build_cached_prompt
+from shared.tracing import record_span, span
 
 logger = get_logger("llm")
 
 
+# =============================================================================
+# SHARED CONNECTION POOLS
+# =============================================================================
+# Every LLMService instance (the coordinator, MCP agent, ad-hoc fast models)
+# reuses the same pooled HTTP connections instead of opening its own. Async
+# pools are bound to the event loop that created them, so there is one per loop,
+# closed when that loop shuts down (e.g. at the end of asyncio.run).
+
+_pool_lock = threading.Lock()
+_sync_http_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic]" = weakref.WeakKeyDictionary()
+_async_client_closers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _http_limits() -> httpx.Limits:
+    """Connection pool limits from settings."""
+    return httpx.Limits(
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_keepalive
+    )
+
+
+def _get_sync_http_client() -> httpx.Client:
+    """Get the process-wide pooled HTTP client for synchronous calls."""
+    global _sync_http_client
+    if _sync_http_client is None:
+        with _pool_lock:
+            if _sync_http_client is None:
+                _sync_http_client = DefaultHttpxClient(limits=_http_limits())
+    return _sync_http_client
+
+
+def _get_async_client() -> AsyncAnthropic:
+    """Get the pooled async Anthropic client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _pool_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                http_client=DefaultAsyncHttpxClient(limits=_http_limits())
+            )
+            _async_clients[loop] = client
+            _close_with_loop(loop, client)
+    return client
+
+
+def _close_with_loop(loop: asyncio.AbstractEventLoop, client: AsyncAnthropic) -> None:
+    """
+    Close client's connection pool when loop shuts down.
+
+    The loop tracks started async generators and closes them in
+    shutdown_asyncgens() (which asyncio.run calls before closing the loop),
+    so a generator parked at its yield runs its finally block at that point.
+    """
+    async def closer():
+        try:
+            yield
+        finally:
+            await client.close()
+
+    gen = closer()
+    _async_client_closers[loop] = gen  # The loop only holds started generators weakly
+
+    # Step to the yield synchronously: registers gen with the running loop's
+    # asyncgen hooks without a task that could be cancelled before it starts
+    try:
+        gen.__anext__().send(None)
+    except StopIteration:
+        pass
+
+
 class LLMService:
     """Service for interacting with Claude API."""
 
-    def __init__(self, model: str = "claude-sonnet-4-5-20250929"):
+    def __init__(self, model: str = "claude-sonnet-4-5-20250929", client: Optional[Any] = None):
         """
         Initialize the LLM service.
 
         Args:
             model: Claude model to use (default: claude-sonnet-4-5-20250929)
+            client: Optional client with Anthropic's messages.create interface
+                (default: pooled Anthropic client), e.g. evals.fakes.ScriptedLLM
         """
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
+        self.client = client or Anthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=_get_sync_http_client()
+        )
         self.model = model
 
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        """Async client sharing the connection pool of the running event loop."""
+        return _get_async_client()
+
+    def _build_params(
+        self,
+        messages: List[Dict[str, str]],
+        system: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build messages.create parameters, stripping non-API message fields."""
+        # Strip non-API fields from messages (e.g., input_type)
+        clean_messages = [
+            {"role": m["role"], "content": m["content"]}
+            for m in messages
+        ]
+
+        params = {
+            "model": self.model,
+            "messages": clean_messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            **kwargs
+        }
+
+        if system:
+            params["system"] = system
+
+        return params
+
     def generate(
         self,
         messages: List[Dict[str, str]],
@@ -47,25 +166,42 @@ class LLMService:
         if messages:
             logger.debug(f"Last message preview: {messages[-1]['content'][:100]}...")
 
-        # Strip non-API fields from messages (e.g., input_type)
-        clean_messages = [
-            {"role": m["role"], "content": m["content"]}
-            for m in messages
-        ]
+        params = self._build_params(messages, system, max_tokens, temperature, **kwargs)
 
-        params = {
-            "model": self.model,
-            "messages": clean_messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            **kwargs
-        }
+        logger.debug(f"Calling Anthropic API with model={self.model}")
+        with span("anthropic.messages", kind="llm", model=self.model):
+            response = self.client.messages.create(**params)
+        response_text = response.content[0].text
+        logger.debug(f"LLM response preview: {response_text[:200]}...")
+        return response_text
 
-        if system:
-            params["system"] = system
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        **kwargs
+    ) -> str:
+        """
+        Generate a response from Claude without blocking the event loop.
 
-        logger.debug(f"Calling Anthropic API with model={self.model}")
-        response = self.client.messages.create(**params)
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            system: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            **kwargs: Additional parameters to pass to the API
+
+        Returns:
+            Generated text response
+        """
+        logger.debug(f"LLM agenerate: {len(messages)} message(s), max_tokens={max_tokens}, temp={temperature}")
+
+        params = self._build_params(messages, system, max_tokens, temperature, **kwargs)
+
+        with span("anthropic.messages", kind="llm", model=self.model):
+            response = await self.async_client.messages.create(**params)
         response_text = response.content[0].text
         logger.debug(f"LLM response preview: {response_text[:200]}...")
         return response_text
@@ -95,28 +231,19 @@ class LLMService:
         if messages:
             logger.debug(f"Last message preview: {messages[-1]['content'][:100]}...")
 
-        # Strip non-API fields from messages
-        clean_messages = [
-            {"role": m["role"], "content": m["content"]}
-            for m in messages
-        ]
-
-        params = {
-            "model": self.model,
-            "messages": clean_messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            **kwargs
-        }
-
-        if system:
-            params["system"] = system
+        params = self._build_params(messages, system, max_tokens, temperature, **kwargs)
 
         logger.debug(f"Calling Anthropic API (streaming) with model={self.model}")
 
-        with self.client.messages.stream(**params) as stream:
-            for text in stream.text_stream:
-                yield text
+        # A generator can't hold a span open across yields (the consumer would
+        # run inside it), so the call is recorded once the stream ends
+        start_ns = time.perf_counter_ns()
+        try:
+            with self.client.messages.stream(**params) as stream:
+                for text in stream.text_stream:
+                    yield text
+        finally:
+            record_span("anthropic.messages.stream", "llm", time.perf_counter_ns() - start_ns, model=self.model)
 
     def chat(
         self,
@@ -160,6 +287,7 @@ class LLMService:
         max_tokens: int = 4096,
         temperature: float = 1.0,
         cache_prompts: bool = True,
+        system_layers: Optional[Sequence[PromptLayer]] = None,
         **kwargs
     ) -> Any:
         """
@@ -172,27 +300,129 @@ class LLMService:
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             cache_prompts: Enable prompt caching for system and tools (default: True)
+            system_layers: Optional system layers after the static system prompt,
+                each with its own cache breakpoint (see shared/prompt_cache.py)
             **kwargs: Additional parameters to pass to the API
 
         Returns:
             Full API response object with tool calls
         """
-        # Strip non-API fields from messages (e.g., input_type)
-        clean_messages = [
-            {"role": m["role"], "content": m["content"]}
-            for m in messages
-        ]
+        params = self._build_tool_params(
+            messages, tools, system, max_tokens, temperature, cache_prompts,
+            system_layers=system_layers, **kwargs
+        )
+        with span("anthropic.messages", kind="llm", model=self.model, tools=len(tools)) as llm_span:
+            response = self.client.messages.create(**params)
+        self._record_usage(llm_span, response)
+        self._log_cache_usage(response, cache_prompts and bool(system or system_layers))
+        return response
 
-        params = {
-            "model": self.model,
-            "messages": clean_messages,
-            "tools": tools,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            **kwargs
-        }
+    def generate_with_tools_stream(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]],
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        cache_prompts: bool = True,
+        system_layers: Optional[Sequence[PromptLayer]] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Generate a tool-use response, forwarding text deltas as they arrive.
 
-        if system:
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            tools: List of tool definitions
+            system: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            cache_prompts: Enable prompt caching for system and tools (default: True)
+            system_layers: Optional system layers after the static system prompt,
+                each with its own cache breakpoint (see shared/prompt_cache.py)
+            on_text: Optional callback invoked with each text chunk
+            **kwargs: Additional parameters to pass to the API
+
+        Returns:
+            Final API response object (same shape as generate_with_tools)
+        """
+        params = self._build_tool_params(
+            messages, tools, system, max_tokens, temperature, cache_prompts,
+            system_layers=system_layers, **kwargs
+        )
+
+        with span("anthropic.messages.stream", kind="llm", model=self.model, tools=len(tools)) as llm_span:
+            with self.client.messages.stream(**params) as stream:
+                for text in stream.text_stream:
+                    if on_text is not None:
+                        on_text(text)
+                response = stream.get_final_message()
+        self._record_usage(llm_span, response)
+
+        self._log_cache_usage(response, cache_prompts and bool(system or system_layers))
+        return response
+
+    async def agenerate_with_tools(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]],
+        system: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 1.0,
+        cache_prompts: bool = True,
+        system_layers: Optional[Sequence[PromptLayer]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Generate a response with tool use support without blocking the event loop.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            tools: List of tool definitions
+            system: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            cache_prompts: Enable prompt caching for system and tools (default: True)
+            system_layers: Optional system layers after the static system prompt,
+                each with its own cache breakpoint (see shared/prompt_cache.py)
+            **kwargs: Additional parameters to pass to the API
+
+        Returns:
+            Full API response object with tool calls
+        """
+        params = self._build_tool_params(
+            messages, tools, system, max_tokens, temperature, cache_prompts,
+            system_layers=system_layers, **kwargs
+        )
+        with span("anthropic.messages", kind="llm", model=self.model, tools=len(tools)) as llm_span:
+            response = await self.async_client.messages.create(**params)
+        self._record_usage(llm_span, response)
+        self._log_cache_usage(response, cache_prompts and bool(system or system_layers))
+        return response
+
+    def _build_tool_params(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]],
+        system: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        cache_prompts: bool,
+        system_layers: Optional[Sequence[PromptLayer]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build messages.create parameters for a tool-use call."""
+        params = self._build_params(messages, None, max_tokens, temperature, tools=tools, **kwargs)
+
+        if system_layers:
+            # Layered prompt: breakpoints after the tools and each stable layer
+            params["tools"], layered_system = build_cached_prompt(tools, system, system_layers, cache_prompts)
+            if layered_system:
+                params["system"] = layered_system
+            if cache_prompts:
+                params["extra_headers"] = {"anthropic-beta": "prompt-caching-2024-07-31"}
+        elif system:
             if cache_prompts:
                 # Use prompt caching - structure system as list with cache control
                 params["system"] = [
@@ -207,10 +437,23 @@ class LLMService:
             else:
                 params["system"] = system
 
-        response = self.client.messages.create(**params)
+        return params
+
+    @staticmethod
+    def _record_usage(llm_span: Any, response: Any) -> None:
+        """Attach token usage to the span of a tool-use call."""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        llm_span.set(
+            input_tokens=getattr(usage, 'input_tokens', 0),
+            output_tokens=getattr(usage, 'output_tokens', 0),
+            cache_read_input_tokens=getattr(usage, 'cache_read_input_tokens', 0) or 0
+        )
 
-        # Log cache performance
-        if cache_prompts and system and hasattr(response, 'usage'):
+    def _log_cache_usage(self, response: Any, cache_enabled: bool) -> None:
+        """Log prompt cache performance for a tool-use response."""
+        if cache_enabled and hasattr(response, 'usage'):
             cache_read = getattr(response.usage, 'cache_read_input_tokens', 0)
             cache_creation = getattr(response.usage, 'cache_creation_input_tokens', 0)
             if cache_read > 0:
@@ -218,11 +461,9 @@ class LLMService:
             elif cache_creation > 0:
                 logger.info(f"💾 Cache MISS: {cache_creation} tokens cached for next call")
 
-        return response
-
 
-# Global LLM service instance
-llm_service = LLMService()
+# Global LLM service instance (client built on first use)
+llm_service = services.register("llm_service", LLMService)
 
 
 def generate(
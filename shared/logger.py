@@ -1,37 +1,294 @@
 """Logging configuration for Flow Companion.
 
 Provides centralized logging with both console and file output for debugging.
+
+Handlers are installed on the first get_logger() call, and the daily log file
+(and the logs/ directory) is only created when the first record is written,
+so importing a module that merely declares a logger touches no files.
+
+Request threads never do log I/O: records are put on a queue and a background
+listener thread formats and writes them (LOG_QUEUE=false writes inline). The
+level comes from LOG_LEVEL, chatty loggers can be sampled with
+LOG_SAMPLE_RATES, and LOG_FORMAT=json writes one JSON object per line carrying
+the turn/session IDs set with set_log_context().
+
+Log with %-style arguments, not f-strings, so messages below the configured
+level (or dropped by sampling) are never formatted:
+
+    logger.debug("Vector search returned %s candidate(s)", len(candidates))
 """
 
+import atexit
+import contextvars
+import copy
+import json
 import logging
-from datetime import datetime
+import logging.handlers
 import os
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
 
-# Create logs directory if it doesn't exist
-os.makedirs('logs', exist_ok=True)
+LOG_DIR = 'logs'
 
 # Configure logging format
 LOG_FORMAT = '%(asctime)s | %(name)-15s | %(levelname)-7s | %(message)s'
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-# Configure root logger
-logging.basicConfig(
-    level=logging.DEBUG,
-    format=LOG_FORMAT,
-    datefmt=DATE_FORMAT,
-    handlers=[
-        logging.StreamHandler(),  # Print to terminal
-        logging.FileHandler(f'logs/flow_companion_{datetime.now().strftime("%Y%m%d")}.log')  # Daily log file
-    ]
-)
-
-# Set external libraries to WARNING to reduce noise
-logging.getLogger('anthropic').setLevel(logging.WARNING)
-logging.getLogger('openai').setLevel(logging.WARNING)
-logging.getLogger('voyageai').setLevel(logging.WARNING)
-logging.getLogger('pymongo').setLevel(logging.WARNING)
-logging.getLogger('urllib3').setLevel(logging.WARNING)
-logging.getLogger('httpx').setLevel(logging.WARNING)
+# External libraries logged at WARNING to reduce noise
+QUIET_LOGGERS = ('anthropic', 'openai', 'voyageai', 'pymongo', 'urllib3', 'httpx')
+
+# Fields set with set_log_context() and attached to every record
+CONTEXT_FIELDS = ('turn_id', 'turn', 'session_id')
+
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar('log_context', default={})
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CONTEXT (turn / session IDs)
+# ═══════════════════════════════════════════════════════════════════
+
+def set_log_context(**fields: Any) -> contextvars.Token:
+    """
+    Attach fields (turn_id, turn, session_id) to subsequent records in this context.
+
+    Fields are merged into the current context. Threads started from here
+    inherit nothing unless run via contextvars.copy_context().run.
+
+    Args:
+        **fields: Values to attach; None removes a field
+
+    Returns:
+        Token for contextvars reset (see log_context)
+    """
+    merged = {**_log_context.get(), **fields}
+    return _log_context.set({key: value for key, value in merged.items() if value is not None})
+
+
+def get_log_context() -> Dict[str, Any]:
+    """Get the fields currently attached to records."""
+    return dict(_log_context.get())
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    Attach fields to records logged inside the block.
+
+    Args:
+        **fields: Values to attach (see set_log_context)
+    """
+    token = set_log_context(**fields)
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current log context onto each record (runs in the logging thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, context.get(field))
+        return True
+
+
+# ═══════════════════════════════════════════════════════════════════
+# SAMPLING
+# ═══════════════════════════════════════════════════════════════════
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    Parse LOG_SAMPLE_RATES, e.g. "retrieval=0.1,mcp_agent=0.25".
+
+    Args:
+        spec: Comma-separated logger=rate pairs (rate between 0 and 1)
+
+    Returns:
+        Logger name -> rate
+    """
+    rates = {}
+    for item in (spec or "").split(","):
+        name, sep, rate = item.strip().partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG/INFO records from selected loggers.
+
+    A rate applies to the named logger and its children. WARNING and above
+    are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+# ═══════════════════════════════════════════════════════════════════
+# HANDLERS AND FORMATTERS
+# ═══════════════════════════════════════════════════════════════════
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including turn/session IDs when set."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DailyFileHandler(logging.FileHandler):
+    """File handler that opens logs/flow_companion_YYYYMMDD.log on first emit."""
+
+    def __init__(self):
+        path = os.path.join(LOG_DIR, f'flow_companion_{datetime.now().strftime("%Y%m%d")}.log')
+        super().__init__(path, delay=True)
+
+    def _open(self):
+        # Create logs directory if it doesn't exist
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    The stock QueueHandler formats the whole record in the calling thread.
+    Only the message arguments are merged here (they may be mutated after
+    the call returns); timestamps, layout and JSON encoding happen in the
+    listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _build_formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
+
+def configure_logging(force: bool = False) -> None:
+    """
+    Install logging handlers on the root logger (once).
+
+    Args:
+        force: Reconfigure even if already configured (replaces the handlers)
+    """
+    global _configured, _listener
+    if _configured and not force:
+        return
+
+    with _configure_lock:
+        if _configured and not force:
+            return
+
+        from shared.config import settings
+
+        root = logging.getLogger()
+        if root.handlers and not force:
+            # Like logging.basicConfig: leave a host's handlers (pytest, scripts) alone
+            _configured = True
+            return
+
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+        formatter = _build_formatter(settings.log_format.lower())
+        outputs = [
+            logging.StreamHandler(),  # Print to terminal
+            _DailyFileHandler()  # Daily log file
+        ]
+        for handler in outputs:
+            handler.setFormatter(formatter)
+
+        # Context and sampling run in the logging thread, before the queue
+        filters = [ContextFilter()]
+        rates = parse_sample_rates(settings.log_sample_rates)
+        if rates:
+            filters.append(SamplingFilter(rates))
+
+        if settings.log_queue:
+            entry = _DeferredQueueHandler(queue.SimpleQueue())
+            _listener = logging.handlers.QueueListener(entry.queue, *outputs, respect_handler_level=True)
+            _listener.start()
+            entry_handlers = [entry]
+        else:
+            entry_handlers = outputs
+
+        for handler in entry_handlers:
+            for log_filter in filters:
+                handler.addFilter(log_filter)
+            root.addHandler(handler)
+
+        root.setLevel(getattr(logging, settings.log_level.upper(), logging.INFO))
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _configured = True
+
+
+def flush_logging() -> None:
+    """Write out queued records (stops and restarts the listener)."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+@atexit.register
+def _stop_listener() -> None:
+    # Drain the queue so records logged just before exit are written
+    if _listener is not None:
+        _listener.stop()
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -44,4 +301,5 @@ def get_logger(name: str) -> logging.Logger:
     Returns:
         Configured logger instance
     """
+    configure_logging()
     return logging.getLogger(name)
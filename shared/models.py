@@ -19,6 +19,11 @@ def validate_object_id(v: Any) -> ObjectId:
 PyObjectId = Annotated[ObjectId, BeforeValidator(validate_object_id)]
 
 
+def normalize_project_name(name: str) -> str:
+    """Project name_key for exact lookups: whitespace-collapsed and case-folded."""
+    return " ".join(name.split()).casefold()
+
+
 class ActivityLogEntry(BaseModel):
     """Activity log entry for tracking changes."""
 
@@ -45,6 +50,22 @@ class ProjectUpdate(BaseModel):
         json_encoders = {datetime: lambda v: v.isoformat()}
 
 
+class EpisodicSummaryPointer(BaseModel):
+    """Newest episodic summary, denormalized onto its task or project."""
+
+    summary_id: Optional[PyObjectId] = None  # memory_episodic document
+    summary: str
+    activity_count: int = 0
+    generated_at: datetime
+
+    class Config:
+        arbitrary_types_allowed = True
+        json_encoders = {
+            ObjectId: str,
+            datetime: lambda v: v.isoformat()
+        }
+
+
 class Task(BaseModel):
     """Task data model."""
 
@@ -55,7 +76,10 @@ class Task(BaseModel):
     project_id: Optional[PyObjectId] = None
     context: str = ""
     notes: List[str] = Field(default_factory=list)
-    activity_log: List[ActivityLogEntry] = Field(default_factory=list)
+    activity_log: List[ActivityLogEntry] = Field(default_factory=list)  # Recent tail; full history in activity_events
+    activity_count: int = 0  # Total activity events (activity_log is capped)
+    activity_migrated: bool = False  # Full history is in activity_events, so activity_log may be capped
+    latest_episodic_summary: Optional[EpisodicSummaryPointer] = None  # Set by MemoryManager.store_episodic_summary
 
     # New enrichment fields
     assignee: Optional[str] = None  # Who's responsible
@@ -71,6 +95,8 @@ class Task(BaseModel):
 
     # Vector embedding (1024 dimensions for voyage-3)
     embedding: Optional[List[float]] = None
+    embedding_hash: Optional[str] = None  # SHA-256 of the text the embedding was built from
+    embedding_stale: bool = False  # Re-embedding queued (see shared/reembed.py)
 
     # Test data flag (for filtering test data from production queries)
     is_test: bool = False
@@ -83,6 +109,11 @@ class Task(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+    @property
+    def total_activity(self) -> int:
+        """Activity event count (documents from before activity_count only have the log)."""
+        return max(self.activity_count, len(self.activity_log))
+
     def to_mongo(self) -> dict:
         """Convert to MongoDB document format."""
         data = self.model_dump(by_alias=True, exclude_none=True)
@@ -101,7 +132,10 @@ class Project(BaseModel):
     context: str = ""
     methods: List[str] = Field(default_factory=list)  # Technologies/approaches
     decisions: List[str] = Field(default_factory=list)
-    activity_log: List[ActivityLogEntry] = Field(default_factory=list)
+    activity_log: List[ActivityLogEntry] = Field(default_factory=list)  # Recent tail; full history in activity_events
+    activity_count: int = 0  # Total activity events (activity_log is capped)
+    activity_migrated: bool = False  # Full history is in activity_events, so activity_log may be capped
+    latest_episodic_summary: Optional[EpisodicSummaryPointer] = None  # Set by MemoryManager.store_episodic_summary
 
     # New enrichment fields
     stakeholders: List[str] = Field(default_factory=list)  # Who's involved
@@ -114,6 +148,8 @@ class Project(BaseModel):
 
     # Vector embedding (1024 dimensions for voyage-3)
     embedding: Optional[List[float]] = None
+    embedding_hash: Optional[str] = None  # SHA-256 of the text the embedding was built from
+    embedding_stale: bool = False  # Re-embedding queued (see shared/reembed.py)
 
     # Test data flag (for filtering test data from production queries)
     is_test: bool = False
@@ -126,11 +162,17 @@ class Project(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+    @property
+    def total_activity(self) -> int:
+        """Activity event count (documents from before activity_count only have the log)."""
+        return max(self.activity_count, len(self.activity_log))
+
     def to_mongo(self) -> dict:
-        """Convert to MongoDB document format."""
+        """Convert to MongoDB document format (with the indexed name_key)."""
         data = self.model_dump(by_alias=True, exclude_none=True)
         if self.id is None and "_id" in data:
             del data["_id"]
+        data["name_key"] = normalize_project_name(self.name)
         return data
 
 
@@ -0,0 +1,273 @@
+"""Layered system prompts with one prompt-cache breakpoint per layer.
+
+The coordinator's request prefix is built from parts that change at very
+different rates:
+
+- tools:        COORDINATOR_TOOLS schemas (static)
+- instructions: base system prompt (static per prompt variant)
+- user_memory:  preferences, rules and workflows (change on memory writes)
+- session:      working memory, pending disambiguation, triggered rules (per turn)
+
+The API caches prefixes in the order tools -> system -> messages, and a
+cache_control marker caches everything up to it. With a single marker on the
+whole system prompt, any change in session context invalidated the static
+instructions and tool schemas too. Each stable layer now gets its own
+breakpoint, so a session change only re-sends the session layer and a memory
+write only re-creates the memory layer.
+
+Usage is reported for the request as a whole; attribute_cache_usage() spreads
+the cache read / creation / uncached totals over the layers using where the
+breakpoints fall and each layer's estimated size.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+CACHE_CONTROL = {"type": "ephemeral"}
+MAX_CACHE_BREAKPOINTS = 4  # API limit per request
+
+LAYER_TOOLS = "tools"
+LAYER_INSTRUCTIONS = "instructions"
+LAYER_USER_MEMORY = "user_memory"
+LAYER_SESSION = "session"
+LAYER_MESSAGES = "messages"
+
+USAGE_FIELDS = ("cache_read", "cache_creation", "input")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt text (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class PromptLayer:
+    """One block of the system prompt."""
+    name: str
+    text: str
+    cache: bool = True
+
+
+def _plan(
+    tools: Optional[Sequence[Dict[str, Any]]],
+    system: Optional[str],
+    layers: Sequence[PromptLayer],
+    cache_prompts: bool
+) -> List[Tuple[str, Optional[str], int, bool]]:
+    """
+    Decide the layer order and breakpoints for a request.
+
+    Returns:
+        (name, text, estimated_tokens, breakpoint) in prefix order; text is
+        None for the tools layer
+    """
+    plan = []
+    budget = MAX_CACHE_BREAKPOINTS if cache_prompts else 0
+
+    if tools:
+        plan.append((LAYER_TOOLS, None, estimate_tokens(json.dumps(list(tools), default=str)), budget > 0))
+        budget -= 1
+
+    all_layers = ([PromptLayer(LAYER_INSTRUCTIONS, system)] if system else []) + list(layers)
+    for layer in all_layers:
+        if not layer.text:
+            continue
+        breakpoint = layer.cache and budget > 0
+        if breakpoint:
+            budget -= 1
+        plan.append((layer.name, layer.text, estimate_tokens(layer.text), breakpoint))
+
+    return plan
+
+
+def build_cached_prompt(
+    tools: Optional[List[Dict[str, Any]]],
+    system: Optional[str],
+    layers: Sequence[PromptLayer],
+    cache_prompts: bool = True
+) -> Tuple[Optional[List[Dict[str, Any]]], Union[str, List[Dict[str, Any]], None]]:
+    """
+    Build the tools and system parameters for a layered prompt.
+
+    Args:
+        tools: Tool definitions (not modified)
+        system: Static instructions (first system layer)
+        layers: Further system layers, most stable first
+        cache_prompts: Add cache_control breakpoints
+
+    Returns:
+        (tools, system) ready for messages.create; system is a plain string
+        when caching is disabled
+    """
+    plan = _plan(tools, system, layers, cache_prompts)
+
+    if not cache_prompts:
+        text = "".join(layer_text for _, layer_text, _, _ in plan if layer_text)
+        return tools, text or None
+
+    blocks = []
+    for name, text, _, breakpoint in plan:
+        if name == LAYER_TOOLS:
+            if breakpoint:
+                tools = list(tools[:-1]) + [{**tools[-1], "cache_control": CACHE_CONTROL}]
+            continue
+        block = {"type": "text", "text": text}
+        if breakpoint:
+            block["cache_control"] = CACHE_CONTROL
+        blocks.append(block)
+
+    return tools, blocks or None
+
+
+def layer_breakdown(
+    tools: Optional[Sequence[Dict[str, Any]]],
+    system: Optional[str],
+    layers: Sequence[PromptLayer],
+    cache_prompts: bool = True
+) -> List[Tuple[str, int, bool]]:
+    """
+    Describe a request's prefix for attribute_cache_usage().
+
+    Returns:
+        (name, estimated_tokens, breakpoint) in prefix order
+    """
+    return [(name, tokens, breakpoint) for name, _, tokens, breakpoint in _plan(tools, system, layers, cache_prompts)]
+
+
+def _usage_int(usage: Any, field: str) -> int:
+    value = getattr(usage, field, 0)
+    return value if isinstance(value, int) else 0
+
+
+def _spread(total: int, sizes: List[int]) -> List[int]:
+    """Split total over sizes proportionally; the parts sum to total."""
+    if not sizes:
+        return []
+    if not sum(sizes):
+        sizes = [1] * len(sizes)
+    weight = sum(sizes)
+    parts = [total * size // weight for size in sizes]
+    parts[-1] += total - sum(parts)
+    return parts
+
+
+def attribute_cache_usage(usage: Any, breakdown: List[Tuple[str, int, bool]]) -> Dict[str, Dict[str, int]]:
+    """
+    Attribute one response's token usage to prompt layers.
+
+    Cache reads cover the prefix up to some breakpoint and cache creation the
+    prefix from there up to a later breakpoint; everything after is uncached
+    input. The breakpoints whose estimated offsets are closest to the reported
+    totals decide which layers fall in each region, and each region's tokens
+    are split over its layers by estimated size. Uncached tokens beyond the
+    layers' estimates are attributed to the messages.
+
+    Args:
+        usage: Response usage (input_tokens, cache_read_input_tokens,
+            cache_creation_input_tokens)
+        breakdown: Output of layer_breakdown() for the request
+
+    Returns:
+        {layer: {"cache_read": n, "cache_creation": n, "input": n}}
+    """
+    read = _usage_int(usage, "cache_read_input_tokens")
+    creation = _usage_int(usage, "cache_creation_input_tokens")
+    uncached = _usage_int(usage, "input_tokens")
+
+    # Candidate region ends: 0 and the index after every breakpoint
+    ends = [(0, 0)]
+    offset = 0
+    for i, (_, tokens, breakpoint) in enumerate(breakdown):
+        offset += tokens
+        if breakpoint:
+            ends.append((i + 1, offset))
+
+    def closest(target: int, after: int) -> int:
+        candidates = [(end, off) for end, off in ends if end >= after]
+        return min(candidates, key=lambda c: (abs(c[1] - target), c[0]))[0]
+
+    read_end = closest(read, 0) if read else 0
+    creation_end = closest(read + creation, read_end) if creation else read_end
+
+    result = {name: dict.fromkeys(USAGE_FIELDS, 0) for name, _, _ in breakdown}
+    result[LAYER_MESSAGES] = dict.fromkeys(USAGE_FIELDS, 0)
+
+    regions = [
+        ("cache_read", breakdown[:read_end], read),
+        ("cache_creation", breakdown[read_end:creation_end], creation),
+    ]
+    for field, region, total in regions:
+        if not region:
+            result[LAYER_MESSAGES][field] += total
+            continue
+        for (name, _, _), part in zip(region, _spread(total, [tokens for _, tokens, _ in region])):
+            result[name][field] += part
+
+    remaining = uncached
+    for name, tokens, _ in breakdown[creation_end:]:
+        part = min(tokens, remaining)
+        result[name]["input"] += part
+        remaining -= part
+    result[LAYER_MESSAGES]["input"] += remaining
+
+    return result
+
+
+class PromptCacheStats:
+    """Accumulates per-layer prompt cache usage across LLM calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.layers: Dict[str, Dict[str, int]] = {}
+
+    def record(self, usage: Any, breakdown: List[Tuple[str, int, bool]]) -> Dict[str, Dict[str, int]]:
+        """
+        Attribute a response's usage to layers and add it to the totals.
+
+        Args:
+            usage: Response usage object
+            breakdown: Output of layer_breakdown() for the request
+
+        Returns:
+            Per-layer usage for this call
+        """
+        per_layer = attribute_cache_usage(usage, breakdown)
+        self.calls += 1
+        for name, counts in per_layer.items():
+            totals = self.layers.setdefault(name, dict.fromkeys(USAGE_FIELDS, 0))
+            for field in USAGE_FIELDS:
+                totals[field] += counts[field]
+        return per_layer
+
+    def merge(self, other: "PromptCacheStats") -> None:
+        """Add another accumulator's totals to this one."""
+        self.calls += other.calls
+        for name, counts in other.layers.items():
+            totals = self.layers.setdefault(name, dict.fromkeys(USAGE_FIELDS, 0))
+            for field in USAGE_FIELDS:
+                totals[field] += counts[field]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the totals.
+
+        Returns:
+            Dict with calls, per-field token totals, hit_rate (share of prompt
+            tokens read from cache) and per-layer counts with their own hit_rate
+        """
+        totals = {field: sum(counts[field] for counts in self.layers.values()) for field in USAGE_FIELDS}
+        prompt_tokens = sum(totals.values())
+        layers = {}
+        for name, counts in self.layers.items():
+            layer_tokens = sum(counts.values())
+            layers[name] = {
+                **counts,
+                "hit_rate": round(counts["cache_read"] / layer_tokens, 3) if layer_tokens else 0.0
+            }
+        return {
+            "calls": self.calls,
+            **{f"{field}_tokens": totals[field] for field in USAGE_FIELDS},
+            "hit_rate": round(totals["cache_read"] / prompt_tokens, 3) if prompt_tokens else 0.0,
+            "layers": layers
+        }
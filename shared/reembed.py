@@ -0,0 +1,307 @@
+"""
+Incremental re-embedding for tasks and projects.
+
+Every task/project document stores embedding_hash, the SHA-256 of the
+canonical text its embedding was built from (build_task_embedding_text /
+build_project_embedding_text). Writes go through this module instead of
+calling embed_document directly:
+
+- plan_reembed() compares the hash of the post-write text with the stored one
+  and skips the Voyage call when nothing that feeds the embedding changed
+  (status, priority-only, due date, ... edits).
+- When the text did change, the write sets embedding_stale=True and
+  schedule_reembed() queues a background job. Jobs are keyed by entity and
+  debounced, so a burst of edits to one task embeds once, after the last edit.
+- reembed_entity() re-reads the document, embeds the current canonical text
+  and writes the vector only if the document wasn't edited meanwhile.
+- backfill_embeddings() re-embeds every document whose stored hash doesn't
+  match its text (missing vectors, legacy documents without a hash, documents
+  edited by scripts that bypass the app).
+
+With REEMBED_ASYNC=false, re-embedding happens inline on the write path.
+"""
+
+import atexit
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.embeddings import build_embedding_text, embed_document, embed_documents, embedding_text_hash
+from shared.job_queue import KeyedJobQueue
+from shared.logger import get_logger
+
+logger = get_logger("reembed")
+
+ENTITY_COLLECTIONS = {"task": "tasks", "project": "projects"}
+
+# Attempts at writing a vector before giving up because the document keeps changing
+MAX_WRITE_ATTEMPTS = 3
+
+_stats_lock = threading.Lock()
+_stats = {"skipped": 0, "scheduled": 0, "embedded": 0, "unchanged": 0, "superseded": 0}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _collection(entity_type: str):
+    from shared.db import get_collection
+    return get_collection(ENTITY_COLLECTIONS[entity_type])
+
+
+# ═══════════════════════════════════════════════════════════════════
+# WRITE PATH
+# ═══════════════════════════════════════════════════════════════════
+
+def compute_embedding(entity_type: str, doc: Dict[str, Any]) -> Tuple[List[float], str]:
+    """
+    Embed a document's canonical text inline.
+
+    Used for new documents, which need a vector before they are searchable.
+
+    Args:
+        entity_type: "task" or "project"
+        doc: Task or project document
+
+    Returns:
+        Tuple of (embedding, embedding_hash)
+    """
+    text = build_embedding_text(entity_type, doc)
+    _count("embedded")
+    return embed_document(text), embedding_text_hash(text)
+
+
+def plan_reembed(entity_type: str, current_doc: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Decide which embedding fields to write alongside a content update.
+
+    Args:
+        entity_type: "task" or "project"
+        current_doc: Document before the update
+        updates: Fields the update will $set
+
+    Returns:
+        {} when the canonical text is unchanged, {"embedding_stale": True}
+        when re-embedding is queued (call schedule_reembed after the write),
+        or the new embedding, embedding_hash and embedding_stale=False when
+        re-embedding runs inline
+    """
+    text = build_embedding_text(entity_type, {**current_doc, **updates})
+    text_hash = embedding_text_hash(text)
+
+    if text_hash == current_doc.get("embedding_hash") and current_doc.get("embedding"):
+        _count("skipped")
+        return {}
+
+    if get_reembed_queue() is not None:
+        return {"embedding_stale": True}
+
+    _count("embedded")
+    return {"embedding": embed_document(text), "embedding_hash": text_hash, "embedding_stale": False}
+
+
+def schedule_reembed(entity_type: str, entity_id: Any, mark_stale: bool = False) -> None:
+    """
+    Re-embed a task or project in the background, debounced per entity.
+
+    Args:
+        entity_type: "task" or "project"
+        entity_id: ObjectId of the document
+        mark_stale: Set embedding_stale now (for writes that didn't go
+            through plan_reembed, e.g. appending notes)
+    """
+    queue = get_reembed_queue()
+    if queue is None:
+        try:
+            reembed_entity(entity_type, entity_id)
+        except Exception as e:
+            # The write already succeeded; backfill picks up the stale vector
+            logger.warning("Re-embedding %s %s failed: %s", entity_type, entity_id, e)
+        return
+
+    from shared.config import settings
+
+    if mark_stale:
+        _collection(entity_type).update_one({"_id": entity_id}, {"$set": {"embedding_stale": True}})
+
+    _count("scheduled")
+    queue.submit(
+        (entity_type, entity_id),
+        lambda: reembed_entity(entity_type, entity_id),
+        delay=settings.reembed_debounce_seconds
+    )
+
+
+def reembed_entity(entity_type: str, entity_id: Any, force: bool = False) -> str:
+    """
+    Bring a document's embedding up to date with its current text.
+
+    The vector is written conditionally on updated_at, so an edit that lands
+    while the embedding call is in flight causes a retry with the new text
+    instead of storing a vector for the old one.
+
+    Args:
+        entity_type: "task" or "project"
+        entity_id: ObjectId of the document
+        force: Re-embed even if the stored hash matches
+
+    Returns:
+        "embedded", "unchanged", "missing" or "superseded"
+    """
+    from shared.vector_index import sync_vector_write
+
+    collection = _collection(entity_type)
+
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        doc = collection.find_one({"_id": entity_id}, {"activity_log": 0})
+        if not doc:
+            return "missing"
+
+        text = build_embedding_text(entity_type, doc)
+        text_hash = embedding_text_hash(text)
+        unchanged_since = {"_id": entity_id, "updated_at": doc.get("updated_at")}
+
+        if not force and text_hash == doc.get("embedding_hash") and doc.get("embedding"):
+            if doc.get("embedding_stale"):
+                collection.update_one(unchanged_since, {"$set": {"embedding_stale": False}})
+            _count("unchanged")
+            return "unchanged"
+
+        fields = {"embedding": embed_document(text), "embedding_hash": text_hash, "embedding_stale": False}
+        result = collection.update_one(unchanged_since, {"$set": fields})
+        if result.matched_count:
+            sync_vector_write(ENTITY_COLLECTIONS[entity_type], entity_id, fields)
+            _count("embedded")
+            return "embedded"
+
+    _count("superseded")
+    logger.info("%s %s kept changing while re-embedding; left stale", entity_type, entity_id)
+    return "superseded"
+
+
+# ═══════════════════════════════════════════════════════════════════
+# BACKFILL
+# ═══════════════════════════════════════════════════════════════════
+
+def backfill_embeddings(
+    entity_types: Iterable[str] = ("task", "project"),
+    force: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 64
+) -> Dict[str, Dict[str, int]]:
+    """
+    Re-embed every document whose stored embedding_hash doesn't match its text.
+
+    Vectors are not read back; the scan projects them down to a has_embedding
+    flag. Mismatched documents are embedded in batches and written with one
+    bulk_write per batch.
+
+    Args:
+        entity_types: Which of "task" / "project" to scan
+        force: Re-embed everything regardless of hash
+        dry_run: Only count what would be re-embedded
+        batch_size: Documents per embedding call
+
+    Returns:
+        Counts per entity type: scanned, current, mismatched, embedded
+    """
+    from pymongo import UpdateOne
+    from shared.vector_index import invalidate_vector_index
+
+    results = {}
+    for entity_type in entity_types:
+        collection = _collection(entity_type)
+        counts = {"scanned": 0, "current": 0, "mismatched": 0, "embedded": 0}
+        pending: List[Tuple[Dict, str, str]] = []
+
+        def flush():
+            if not pending:
+                return
+            vectors = embed_documents([text for _, text, _ in pending])
+            operations = [
+                UpdateOne(
+                    {"_id": doc["_id"], "updated_at": doc.get("updated_at")},
+                    {"$set": {"embedding": vector, "embedding_hash": text_hash, "embedding_stale": False}}
+                )
+                for (doc, _, text_hash), vector in zip(pending, vectors)
+            ]
+            result = collection.bulk_write(operations, ordered=False)
+            counts["embedded"] += result.matched_count
+            pending.clear()
+
+        cursor = collection.aggregate([
+            {"$addFields": {"has_embedding": {"$gt": [{"$size": {"$ifNull": ["$embedding", []]}}, 0]}}},
+            {"$project": {"embedding": 0, "activity_log": 0}},
+        ])
+        for doc in cursor:
+            counts["scanned"] += 1
+            text = build_embedding_text(entity_type, doc)
+            text_hash = embedding_text_hash(text)
+            if not force and doc["has_embedding"] and doc.get("embedding_hash") == text_hash:
+                counts["current"] += 1
+                continue
+
+            counts["mismatched"] += 1
+            if dry_run or not text:
+                continue
+            pending.append((doc, text, text_hash))
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+
+        if counts["embedded"]:
+            _count("embedded", counts["embedded"])
+            invalidate_vector_index(ENTITY_COLLECTIONS[entity_type])
+        results[entity_type] = counts
+
+    return results
+
+
+# ═══════════════════════════════════════════════════════════════════
+# QUEUE
+# ═══════════════════════════════════════════════════════════════════
+
+_queue: Optional[KeyedJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_reembed_queue() -> Optional[KeyedJobQueue]:
+    """
+    Get the process-wide re-embedding queue.
+
+    Returns:
+        Queue, or None when REEMBED_ASYNC is false (re-embedding runs inline)
+    """
+    global _queue
+    from shared.config import settings
+
+    if not settings.reembed_async:
+        return None
+
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = KeyedJobQueue(
+                    workers=settings.reembed_workers,
+                    max_retries=settings.reembed_max_retries,
+                    name="reembed"
+                )
+                # Debounced jobs are still waiting when scripts exit
+                atexit.register(_queue.close)
+    return _queue
+
+
+def get_reembed_stats() -> Dict[str, Any]:
+    """
+    Get re-embedding counters and queue metrics.
+
+    Returns:
+        Dict with skipped/scheduled/embedded/unchanged/superseded counts and,
+        once the queue has been used, its stats under "queue"
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    if _queue is not None:
+        stats["queue"] = _queue.stats()
+    return stats
@@ -0,0 +1,171 @@
+"""
+Lazy service container for process-wide singletons.
+
+API clients (Anthropic, Voyage AI), the memory manager and the coordinator are
+registered here as factories instead of being built at import time. Each
+registration returns a LazyService proxy that modules keep exposing under
+their old names (llm_service, embedding_service, coordinator, ...); the real
+object is built on first attribute access and shared from then on.
+
+Importing the agents, the UI or a CLI script therefore opens no connections,
+creates no clients and issues no index commands. Streamlit reruns and test
+collection only pay for what they use.
+
+Usage:
+    from shared.services import services
+
+    llm_service = services.register("llm_service", LLMService)
+    llm_service.generate(...)           # LLMService() is built here
+    services.get("llm_service")         # The built instance itself
+
+    with services.override(llm_service=fake_llm):
+        ...                             # Every llm_service user sees fake_llm
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+
+class LazyService:
+    """Proxy that builds its object on first use and forwards attribute access to it."""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Initialize the proxy.
+
+        Args:
+            name: Service name (for repr and error messages)
+            factory: Zero-argument callable that builds the service
+        """
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_built", False)
+        object.__setattr__(self, "_instance", None)
+
+    def _resolve(self) -> Any:
+        """Build the service once (thread-safe) and return it."""
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    # A failing factory is retried on the next access
+                    object.__setattr__(self, "_instance", self._factory())
+                    object.__setattr__(self, "_built", True)
+        return self._instance
+
+    def _reset(self) -> None:
+        """Drop the built instance; the next access builds a new one."""
+        with self._lock:
+            object.__setattr__(self, "_instance", None)
+            object.__setattr__(self, "_built", False)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._resolve(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._resolve(), attr)
+
+    def __bool__(self) -> bool:
+        # Factories may return None (e.g. memory manager without a database)
+        return bool(self._resolve())
+
+    def __repr__(self) -> str:
+        if not self._built:
+            return f"<LazyService {self._name} (not built)>"
+        return f"<LazyService {self._name}: {self._instance!r}>"
+
+
+class ServiceContainer:
+    """Registry of lazily built services."""
+
+    def __init__(self):
+        self._services: Dict[str, LazyService] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> LazyService:
+        """
+        Register a service factory.
+
+        Registering a name again replaces the previous factory.
+
+        Args:
+            name: Service name
+            factory: Zero-argument callable that builds the service
+
+        Returns:
+            Proxy that builds the service on first use
+        """
+        proxy = LazyService(name, factory)
+        with self._lock:
+            self._services[name] = proxy
+        return proxy
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service, building it if needed.
+
+        Args:
+            name: Service name
+
+        Returns:
+            The built service (not the proxy)
+
+        Raises:
+            KeyError: If no service is registered under name
+        """
+        return self._services[name]._resolve()
+
+    def reset(self, name: str = None) -> None:
+        """
+        Discard built services so they are rebuilt on next use.
+
+        Args:
+            name: Service to reset (default: all)
+        """
+        targets = [self._services[name]] if name else list(self._services.values())
+        for proxy in targets:
+            proxy._reset()
+
+    @contextmanager
+    def override(self, **instances: Any) -> Iterator[None]:
+        """
+        Substitute built services inside a block (benchmarks, tests).
+
+        Every proxy registered under a name returns the given instance until
+        the block exits; the previous state (built or not) is then restored.
+
+        Args:
+            **instances: Service name -> instance to use
+        """
+        saved = {}
+        for name, instance in instances.items():
+            proxy = self._services[name]
+            with proxy._lock:
+                saved[name] = (proxy._built, proxy._instance)
+                object.__setattr__(proxy, "_instance", instance)
+                object.__setattr__(proxy, "_built", True)
+        try:
+            yield
+        finally:
+            for name, (built, instance) in saved.items():
+                proxy = self._services[name]
+                with proxy._lock:
+                    object.__setattr__(proxy, "_instance", instance)
+                    object.__setattr__(proxy, "_built", built)
+
+    def built(self) -> List[str]:
+        """
+        Get the names of services that have been built.
+
+        Returns:
+            Service names, in registration order
+        """
+        return [name for name, proxy in self._services.items() if proxy._built]
+
+
+# Global service container
+services = ServiceContainer()
@@ -0,0 +1,528 @@
+"""
+Per-turn tracing with nested spans.
+
+A trace covers one coordinator turn. Work inside it is timed with spans that
+nest through a context variable, so a MongoDB command issued by a tool issued
+by the turn ends up as a grandchild of the turn span:
+
+    with start_trace("coordinator.process", session_id=...) as trace:
+        with span("tool.search_tasks", kind="tool"):
+            with span("voyage.embed", kind="embedding", texts=1):
+                ...
+
+    @traced("memory.get_snapshot", kind="memory")
+    def get_memory_snapshot(...): ...
+
+Spans are timed with perf_counter_ns and appended to the trace under a lock,
+so tools running concurrently in a thread pool (submitted with
+contextvars.copy_context().run) record into the same trace. Outside a trace,
+span() still times the block (span.duration_ms) but records nothing.
+
+Every span has a kind (turn, tool, llm, embedding, mongodb, mcp, memory).
+Trace.breakdown() sums time per kind below a span for the debug panel.
+Finished traces can be exported as JSONL or as OpenTelemetry OTLP/JSON (see
+TRACE_EXPORT_PATH / TRACE_EXPORT_FORMAT). Export runs on a background writer
+thread, like the queue logger, so turns never wait on file I/O.
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from shared.logger import get_logger
+
+logger = get_logger("tracing")
+
+# Debug panel breakdown keys per span kind (see Trace.breakdown)
+BREAKDOWN_KEYS = {
+    "embedding": "embedding_generation",
+    "mongodb": "mongodb_query",
+    "llm": "llm",
+    "mcp": "mcp",
+    "memory": "memory",
+}
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(num_bytes: int) -> str:
+    return os.urandom(num_bytes).hex()
+
+
+class Span:
+    """A timed unit of work."""
+
+    __slots__ = ("name", "kind", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "thread", "_token")
+
+    def __init__(self, name: str, kind: str = "internal", parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+        self._token: Optional[contextvars.Token] = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes (e.g. result counts) to the span."""
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+    @property
+    def duration_ms(self) -> int:
+        return self.duration_ns // 1_000_000
+
+
+class Trace:
+    """Spans recorded during one turn."""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = _new_id(16)
+        # Wall-clock anchor for exporting perf_counter timestamps
+        self._epoch_unix_ns = time.time_ns()
+        self._epoch_perf_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.root = Span(name, kind="turn", attributes=attributes)
+        self.add(self.root)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def unix_ns(self, perf_ns: int) -> int:
+        """Convert a perf_counter_ns timestamp to Unix nanoseconds."""
+        return self._epoch_unix_ns + (perf_ns - self._epoch_perf_ns)
+
+    def children(self) -> Dict[Optional[str], List[Span]]:
+        """Spans grouped by parent_id, each group in start order."""
+        with self._lock:
+            spans = list(self.spans)
+        tree: Dict[Optional[str], List[Span]] = {}
+        for s in sorted(spans, key=lambda s: s.start_ns):
+            tree.setdefault(s.parent_id, []).append(s)
+        return tree
+
+    def breakdown(self, span: Optional[Span] = None) -> Dict[str, int]:
+        """
+        Sum the time spent per kind below a span.
+
+        Only the outermost span of each kind on a path is counted, so a
+        "mongodb" span wrapping the driver's command spans isn't counted twice.
+
+        Args:
+            span: Span to summarize (default: the root)
+
+        Returns:
+            Breakdown key (see BREAKDOWN_KEYS) -> milliseconds
+        """
+        tree = self.children()
+        totals: Dict[str, int] = {}
+
+        def walk(parent: Span, inside: frozenset):
+            for child in tree.get(parent.span_id, []):
+                key = BREAKDOWN_KEYS.get(child.kind)
+                if key and child.kind not in inside:
+                    totals[key] = totals.get(key, 0) + child.duration_ns
+                walk(child, inside | {child.kind})
+
+        walk(span or self.root, frozenset())
+        return {key: ns // 1_000_000 for key, ns in totals.items()}
+
+    def to_debug(self) -> List[Dict[str, Any]]:
+        """
+        Flatten the span tree for the debug panel.
+
+        Returns:
+            Spans in depth-first order with depth, offset_ms and duration_ms
+        """
+        tree = self.children()
+        rows = []
+
+        def walk(s: Span, depth: int):
+            rows.append({
+                "name": s.name,
+                "kind": s.kind,
+                "depth": depth,
+                "offset_ms": round((s.start_ns - self.root.start_ns) / 1e6, 1),
+                "duration_ms": round(s.duration_ns / 1e6, 1),
+                "attributes": s.attributes,
+                "error": s.error,
+                "thread": s.thread,
+            })
+            for child in tree.get(s.span_id, []):
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        return rows
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """One flat dict per span (the JSONL export format)."""
+        with self._lock:
+            spans = list(self.spans)
+        return [{
+            "trace_id": self.trace_id,
+            "span_id": s.span_id,
+            "parent_id": s.parent_id,
+            "name": s.name,
+            "kind": s.kind,
+            "start_unix_ns": self.unix_ns(s.start_ns),
+            "duration_ms": round(s.duration_ns / 1e6, 3),
+            "thread": s.thread,
+            "attributes": s.attributes,
+            "error": s.error,
+        } for s in spans]
+
+    def to_otlp(self, service_name: str = "flow-companion") -> Dict[str, Any]:
+        """
+        Encode the trace as an OTLP/JSON ExportTraceServiceRequest.
+
+        The output can be POSTed to an OpenTelemetry collector's /v1/traces
+        endpoint or loaded by tools that read OTLP JSON files.
+
+        Args:
+            service_name: service.name resource attribute
+
+        Returns:
+            Dict with resourceSpans
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "flow_companion.tracing"},
+                "spans": [{
+                    "traceId": self.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    # SPAN_KIND_CLIENT for calls leaving the process, INTERNAL otherwise
+                    "kind": 3 if s.kind in ("llm", "embedding", "mongodb", "mcp") else 1,
+                    "startTimeUnixNano": str(self.unix_ns(s.start_ns)),
+                    "endTimeUnixNano": str(self.unix_ns(s.end_ns or s.start_ns)),
+                    "attributes": [_otlp_attribute("flow.kind", s.kind)] + [
+                        _otlp_attribute(key, value) for key, value in s.attributes.items()
+                    ],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                } for s in spans],
+            }],
+        }]}
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# SPAN API
+# ═══════════════════════════════════════════════════════════════════
+
+def current_trace() -> Optional[Trace]:
+    """Get the trace active in this context, if any."""
+    return _current_trace.get()
+
+
+def current_span() -> Optional[Span]:
+    """Get the innermost open span in this context, if any."""
+    return _current_span.get()
+
+
+def start_span(name: str, kind: str = "internal", **attributes: Any) -> Span:
+    """
+    Open a span as the current span, for code that can't use a with-block.
+
+    Must be closed with end_span() in the same thread (typically in a finally).
+
+    Args:
+        name: Span name (e.g. "mongodb.aggregate", "tool.search_tasks")
+        kind: turn, tool, llm, embedding, mongodb, mcp, memory or internal
+        **attributes: Span attributes
+
+    Returns:
+        The open span
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    s = Span(name, kind, parent_id=parent.span_id if parent else None, attributes=attributes)
+    if trace is not None:
+        trace.add(s)
+    s._token = _current_span.set(s)
+    return s
+
+
+def end_span(s: Span, error: Optional[BaseException] = None) -> None:
+    """
+    Close a span opened with start_span() and restore its parent as current.
+
+    Args:
+        s: The span
+        error: Exception that ended the span, if any
+    """
+    if error is not None:
+        s.error = f"{type(error).__name__}: {error}"
+    s.finish()
+    if s._token is not None:
+        _current_span.reset(s._token)
+        s._token = None
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+    """
+    Time a block as a child of the current span.
+
+    Args:
+        name: Span name (e.g. "mongodb.aggregate", "tool.search_tasks")
+        kind: turn, tool, llm, embedding, mongodb, mcp, memory or internal
+        **attributes: Span attributes
+
+    Yields:
+        The span (duration_ms is final once the block exits)
+    """
+    s = start_span(name, kind, **attributes)
+    try:
+        yield s
+    except BaseException as e:
+        end_span(s, e)
+        raise
+    else:
+        end_span(s)
+
+
+def record_span(name: str, kind: str, duration_ns: int, error: Optional[str] = None, **attributes: Any) -> None:
+    """
+    Record an already-finished operation (ending now) under the current span.
+
+    Used for timings reported by callbacks, e.g. pymongo command events.
+
+    Args:
+        name: Span name
+        kind: Span kind
+        duration_ns: How long the operation took
+        error: Failure description, if it failed
+        **attributes: Span attributes
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    s = Span(name, kind, parent_id=parent.span_id if parent else trace.root.span_id, attributes=attributes)
+    s.end_ns = s.start_ns
+    s.start_ns -= duration_ns
+    s.error = error
+    trace.add(s)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal") -> Callable:
+    """
+    Decorator form of span() for sync and async functions.
+
+    Args:
+        name: Span name (default: the function's qualified name)
+        kind: Span kind
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Optional[Trace]]:
+    """
+    Open a trace for one turn; nested calls reuse the active trace.
+
+    The finished trace is handed to the background writer per
+    TRACE_EXPORT_PATH / TRACE_EXPORT_FORMAT.
+
+    Args:
+        name: Root span name
+        **attributes: Root span attributes (session_id, turn, ...)
+
+    Yields:
+        The trace, or None when TRACE_ENABLED is false
+    """
+    from shared.config import settings
+
+    active = _current_trace.get()
+    if active is not None or not settings.trace_enabled:
+        yield active
+        return
+
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        trace.root.finish()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if settings.trace_export_path:
+            enqueue_trace_export(trace, settings.trace_export_path, settings.trace_export_format)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# EXPORT
+# ═══════════════════════════════════════════════════════════════════
+
+_export_lock = threading.Lock()
+_export_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_export_thread: Optional[threading.Thread] = None
+_export_thread_lock = threading.Lock()
+
+
+def enqueue_trace_export(trace: Trace, path: str, fmt: str = "jsonl") -> None:
+    """
+    Queue a finished trace for export_trace on the background writer thread.
+
+    Args:
+        trace: Finished trace
+        path: Output file
+        fmt: "jsonl" or "otlp"
+    """
+    global _export_thread
+    if _export_thread is None:
+        with _export_thread_lock:
+            if _export_thread is None:
+                _export_thread = threading.Thread(target=_export_worker, name="trace-export", daemon=True)
+                _export_thread.start()
+    _export_queue.put((trace, path, fmt))
+
+
+def flush_trace_exports(timeout: Optional[float] = 5.0) -> bool:
+    """
+    Wait until every queued trace has been written.
+
+    Args:
+        timeout: Seconds to wait (None = no limit)
+
+    Returns:
+        True if the queue drained in time
+    """
+    if _export_thread is None:
+        return True
+    done = threading.Event()
+    _export_queue.put(done)
+    return done.wait(timeout)
+
+
+def _export_worker() -> None:
+    """Write queued traces until the process exits."""
+    while True:
+        item = _export_queue.get()
+        if isinstance(item, threading.Event):
+            item.set()
+            continue
+        try:
+            export_trace(*item)
+        except Exception as e:
+            logger.warning("Trace export failed: %s", e)
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    """Write traces still queued when the interpreter exits."""
+    flush_trace_exports(timeout=2.0)
+
+
+def export_trace(trace: Trace, path: str, fmt: str = "jsonl") -> None:
+    """
+    Append a finished trace to a file.
+
+    Args:
+        trace: Finished trace
+        path: Output file (directories are created)
+        fmt: "jsonl" (one line per span) or "otlp" (one OTLP/JSON request per line)
+    """
+    if fmt == "otlp":
+        lines = [trace.to_otlp()]
+    else:
+        lines = trace.to_records()
+
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _export_lock, open(path, "a", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, default=str) + "\n")
+    except OSError as e:
+        # Tracing must never fail a turn
+        logger.warning("Could not export trace to %s: %s", path, e)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# MONGODB COMMAND LISTENER
+# ═══════════════════════════════════════════════════════════════════
+
+def build_command_listener():
+    """
+    Build a pymongo CommandListener that records every command as a span.
+
+    Sync pymongo publishes command events on the thread that runs the
+    command, so each span lands under whatever span issued it.
+
+    Returns:
+        pymongo.monitoring.CommandListener instance
+    """
+    from pymongo import monitoring
+
+    class _SpanCommandListener(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            record_span(f"mongodb.{event.command_name}", "mongodb", event.duration_micros * 1000,
+                        database=event.database_name)
+
+        def failed(self, event):
+            record_span(f"mongodb.{event.command_name}", "mongodb", event.duration_micros * 1000,
+                        error=str(event.failure), database=event.database_name)
+
+    return _SpanCommandListener()
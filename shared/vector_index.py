@@ -0,0 +1,1019 @@
+"""In-process vector index used alongside Atlas $vectorSearch.
+
+Task fuzzy matching, action history, the knowledge cache, workflows and tool
+discoveries all run Atlas $vectorSearch. On a local MongoDB the stage does not
+exist, and for a user with a few hundred memories the Atlas round trip costs
+more than the search itself. LocalVectorIndex keeps the stored vectors of one
+collection field in a normalized float32 matrix and answers cosine top-k for a
+batch of queries with one matrix product.
+
+- Exact search by default. For large candidate sets an IVF mode (NumPy k-means
+  buckets) or HNSW (hnswlib, if installed) can be enabled with VECTOR_INDEX_ANN.
+- Scores use the Atlas cosine scale, (1 + cos) / 2, so existing similarity
+  thresholds keep their meaning.
+- The write helpers push inserts, updates and deletes into loaded indexes.
+  Indexes are rebuilt after VECTOR_INDEX_MAX_AGE_SECONDS to pick up writes
+  made by other processes.
+
+vector_search(collection, pipeline) replaces list(collection.aggregate(pipeline))
+for pipelines starting with $vectorSearch. VECTOR_INDEX_MODE selects when the
+local index answers:
+- fallback (default): only after Atlas has rejected $vectorSearch, so nothing
+  is loaded while Atlas is healthy
+- auto: filtered corpora up to VECTOR_INDEX_SMALL_CORPUS vectors, and any
+  query once Atlas has rejected $vectorSearch for that index
+- local: always
+
+Indexes load outside the registry lock, one load per collection field; writes
+that arrive during a load are buffered and replayed onto the new index.
+Collections whose estimated size exceeds VECTOR_INDEX_MAX_DOCS are counted
+before any vectors are read, so oversized collections are rejected cheaply.
+"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from shared.logger import get_logger
+
+logger = get_logger("vector_index")
+
+try:
+    import hnswlib
+except ImportError:  # Optional: only needed for VECTOR_INDEX_ANN=hnsw
+    hnswlib = None
+
+# Field holding the local score while the follow-up pipeline stages run
+SCORE_FIELD = "_vectorSearchScore"
+
+_LOAD_BATCH_SIZE = 1000
+_MISSING = object()
+
+
+def _lookup(doc: Dict[str, Any], path: str) -> Any:
+    """Read a field by literal key ("entity.project_name" in $set) or dotted path."""
+    if path in doc:
+        return doc[path]
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows; zero rows are left as zeros."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _to_score(cosine: float) -> float:
+    """Map cosine similarity to the Atlas vectorSearchScore scale."""
+    return float((1.0 + cosine) / 2.0)
+
+
+def _equals(column: np.ndarray, value: Any) -> np.ndarray:
+    return np.fromiter((item == value for item in column), dtype=bool, count=len(column))
+
+
+def _isin(column: np.ndarray, values: Iterable[Any]) -> np.ndarray:
+    values = list(values)
+    return np.fromiter(
+        (any(item == value for value in values) for item in column),
+        dtype=bool,
+        count=len(column)
+    )
+
+
+def _match_condition(column: np.ndarray, condition: Any) -> np.ndarray:
+    """Evaluate one $vectorSearch filter clause against a metadata column."""
+    if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+        mask = np.ones(len(column), dtype=bool)
+        for op, value in condition.items():
+            if op == "$eq":
+                mask &= _equals(column, value)
+            elif op == "$ne":
+                mask &= ~_equals(column, value)
+            elif op == "$in":
+                mask &= _isin(column, value)
+            elif op == "$nin":
+                mask &= ~_isin(column, value)
+            else:
+                raise ValueError(f"Unsupported filter operator for local vector index: {op}")
+        return mask
+    return _equals(column, condition)
+
+
+class LocalVectorIndex:
+    """Cosine top-k over a growable float32 matrix with metadata filters."""
+
+    def __init__(
+        self,
+        filter_fields: Sequence[str] = (),
+        ann: str = "exact",
+        ann_min_size: int = 20000,
+        ivf_probes: int = 8
+    ):
+        """
+        Initialize an empty index. The dimension is fixed by the first vector.
+
+        Args:
+            filter_fields: Document fields kept per vector for filtering
+            ann: "exact", "ivf" or "hnsw" (falls back to ivf without hnswlib)
+            ann_min_size: Candidate count from which the ANN mode is used
+            ivf_probes: Buckets scanned per query in ivf mode
+        """
+        if ann == "hnsw" and hnswlib is None:
+            logger.warning("hnswlib is not installed; using ivf for the local vector index")
+            ann = "ivf"
+        if ann not in ("exact", "ivf", "hnsw"):
+            raise ValueError(f"Unknown ANN mode: {ann}")
+
+        self.filter_fields = tuple(filter_fields)
+        self.ann = ann
+        self.ann_min_size = max(1, ann_min_size)
+        self.ivf_probes = max(1, ivf_probes)
+        self.dimensions: Optional[int] = None
+
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[Hashable] = []
+        self._rows: Dict[Hashable, int] = {}
+        self._meta: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=object) for name in self.filter_fields
+        }
+
+        # IVF state, trained on first ANN search
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+
+        # HNSW state, built on first ANN search
+        self._hnsw = None
+        self._labels = np.empty(0, dtype=np.int64)
+        self._label_rows: Dict[int, int] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._rows
+
+    # ═══════════════════════════════════════════════════════════════════
+    # WRITES
+    # ═══════════════════════════════════════════════════════════════════
+
+    def upsert(self, doc_id: Hashable, vector: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Insert or replace the vector for a document.
+
+        Args:
+            doc_id: Document ID
+            vector: Embedding vector
+            metadata: Filter field values; fields left out keep their
+                previous value for an existing document
+        """
+        self.upsert_many([doc_id], [vector], [metadata or {}])
+
+    def upsert_many(
+        self,
+        doc_ids: Sequence[Hashable],
+        vectors: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Insert or replace vectors for several documents.
+
+        Args:
+            doc_ids: Document IDs
+            vectors: One embedding per document
+            metadatas: Optional filter field values per document
+        """
+        if not doc_ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(doc_ids):
+            raise ValueError("Expected one vector per document")
+        metadatas = metadatas or [{} for _ in doc_ids]
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = matrix.shape[1]
+                self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+            elif matrix.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dim vectors, got {matrix.shape[1]}")
+
+            matrix = _normalize(matrix)
+            new_count = sum(1 for doc_id in doc_ids if doc_id not in self._rows)
+            self._reserve(len(self._ids) + new_count)
+
+            rows = []
+            for doc_id, vector, metadata in zip(doc_ids, matrix, metadatas):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._rows[doc_id] = row
+                    for name in self.filter_fields:
+                        self._meta[name][row] = None
+                self._matrix[row] = vector
+                for name, value in metadata.items():
+                    if name in self._meta:
+                        self._meta[name][row] = value
+                rows.append(row)
+
+            self._index_rows(np.asarray(rows, dtype=np.int64))
+
+    def update_metadata(self, doc_id: Hashable, metadata: Dict[str, Any]) -> bool:
+        """
+        Update filter field values without touching the vector.
+
+        Returns:
+            True if the document is in the index
+        """
+        with self._lock:
+            row = self._rows.get(doc_id)
+            if row is None:
+                return False
+            for name, value in metadata.items():
+                if name in self._meta:
+                    self._meta[name][row] = value
+            return True
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """
+        Remove a document's vector.
+
+        Returns:
+            True if the document was in the index
+        """
+        with self._lock:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                return False
+
+            if self._hnsw is not None:
+                label = int(self._labels[row])
+                self._hnsw.mark_deleted(label)
+                self._label_rows.pop(label, None)
+
+            # Move the last row into the freed slot to keep rows contiguous
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+                self._matrix[row] = self._matrix[last]
+                self._assign[row] = self._assign[last]
+                self._labels[row] = self._labels[last]
+                for column in self._meta.values():
+                    column[row] = column[last]
+                if self._hnsw is not None:
+                    self._label_rows[int(self._labels[row])] = row
+            self._ids.pop()
+            return True
+
+    # ═══════════════════════════════════════════════════════════════════
+    # QUERIES
+    # ═══════════════════════════════════════════════════════════════════
+
+    def count(self, filter: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Count indexed vectors matching a filter.
+
+        Args:
+            filter: $vectorSearch-style filter ($eq, $ne, $in, $nin or a value)
+
+        Returns:
+            Number of matching vectors
+        """
+        with self._lock:
+            if not filter:
+                return len(self._ids)
+            return int(self._filter_mask(filter).sum())
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k most similar vectors.
+
+        Args:
+            query_vector: Query embedding
+            k: Number of results
+            filter: Optional $vectorSearch-style filter
+
+        Returns:
+            (doc_id, score) pairs, best first; score is (1 + cosine) / 2
+        """
+        return self.search_batch([query_vector], k, filter)[0]
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Hashable, float]]]:
+        """
+        Find the k most similar vectors for each of several queries.
+
+        Args:
+            query_vectors: Query embeddings
+            k: Number of results per query
+            filter: Optional $vectorSearch-style filter applied to every query
+
+        Returns:
+            One list of (doc_id, score) pairs per query, best first
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+
+        with self._lock:
+            size = len(self._ids)
+            if size == 0 or k <= 0:
+                return [[] for _ in queries]
+            if queries.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dim query, got {queries.shape[1]}")
+
+            mask = self._filter_mask(filter) if filter else None
+            candidates = np.arange(size) if mask is None else np.flatnonzero(mask)
+            if candidates.size == 0:
+                return [[] for _ in queries]
+
+            if self.ann != "exact" and candidates.size >= self.ann_min_size:
+                if self.ann == "hnsw":
+                    return [self._hnsw_search(query, k, mask, candidates) for query in queries]
+                return [self._ivf_search(query, k, candidates) for query in queries]
+            return self._exact_search(queries, k, candidates)
+
+    # ═══════════════════════════════════════════════════════════════════
+    # INTERNALS
+    # ═══════════════════════════════════════════════════════════════════
+
+    def _reserve(self, size: int) -> None:
+        """Grow the backing arrays to hold at least size rows (caller holds the lock)."""
+        capacity = self._matrix.shape[0]
+        if size <= capacity:
+            return
+        capacity = max(16, capacity * 2, size)
+        used = len(self._ids)
+
+        matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        matrix[:used] = self._matrix[:used]
+        self._matrix = matrix
+
+        for name, column in self._meta.items():
+            grown = np.empty(capacity, dtype=object)
+            grown[:used] = column[:used]
+            self._meta[name] = grown
+
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:used] = self._assign[:used]
+        self._assign = assign
+
+        labels = np.full(capacity, -1, dtype=np.int64)
+        labels[:used] = self._labels[:used]
+        self._labels = labels
+
+    def _filter_mask(self, filter: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask of rows matching a filter (caller holds the lock)."""
+        size = len(self._ids)
+        mask = np.ones(size, dtype=bool)
+        for name, condition in filter.items():
+            if name not in self._meta:
+                raise KeyError(f"Field '{name}' is not indexed for filtering")
+            mask &= _match_condition(self._meta[name][:size], condition)
+        return mask
+
+    def _exact_search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        rows: np.ndarray
+    ) -> List[List[Tuple[Hashable, float]]]:
+        """Brute-force top-k over the given rows."""
+        matrix = self._matrix[:len(self._ids)] if rows.size == len(self._ids) else self._matrix[rows]
+        similarities = queries @ matrix.T
+        k = min(k, rows.size)
+
+        results = []
+        for scores in similarities:
+            top = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            results.append([(self._ids[rows[i]], _to_score(scores[i])) for i in top])
+        return results
+
+    def _index_rows(self, rows: np.ndarray) -> None:
+        """Keep trained ANN structures current for new or changed rows."""
+        if self._centroids is not None:
+            self._assign[rows] = self._nearest_centroid(self._matrix[rows])
+        if self._hnsw is not None:
+            self._hnsw_add(rows)
+
+    # IVF ------------------------------------------------------------------
+
+    def _nearest_centroid(self, vectors: np.ndarray) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + 8192] @ self._centroids.T, axis=1)
+            for start in range(0, len(vectors), 8192)
+        ]).astype(np.int32) if len(vectors) else np.empty(0, dtype=np.int32)
+
+    def _train_ivf(self) -> None:
+        """Spherical k-means over a sample; retrained once the index doubles."""
+        size = len(self._ids)
+        n_lists = int(min(4096, max(16, np.sqrt(size))))
+        rng = np.random.default_rng(0)
+        sample = self._matrix[rng.choice(size, size=min(size, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(10):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            centroids = _normalize(centroids)
+
+        self._centroids = centroids
+        self._assign[:size] = self._nearest_centroid(self._matrix[:size])
+        self._trained_size = size
+
+    def _ivf_search(self, query: np.ndarray, k: int, candidates: np.ndarray) -> List[Tuple[Hashable, float]]:
+        if self._centroids is None or len(self._ids) >= 2 * self._trained_size:
+            self._train_ivf()
+
+        probes = min(self.ivf_probes, len(self._centroids))
+        lists = np.argpartition(-(self._centroids @ query), probes - 1)[:probes]
+        rows = candidates[np.isin(self._assign[candidates], lists)]
+        if rows.size < k:
+            # Too few vectors in the probed buckets; scan all candidates
+            rows = candidates
+        return self._exact_search(query[None, :], k, rows)[0]
+
+    # HNSW -----------------------------------------------------------------
+
+    def _build_hnsw(self) -> None:
+        size = len(self._ids)
+        index = hnswlib.Index(space="ip", dim=self.dimensions)
+        index.init_index(max_elements=max(1024, size * 2), ef_construction=200, M=16)
+        self._labels[:size] = np.arange(size)
+        self._label_rows = {label: label for label in range(size)}
+        self._next_label = size
+        index.add_items(self._matrix[:size], self._labels[:size])
+        self._hnsw = index
+
+    def _hnsw_add(self, rows: np.ndarray) -> None:
+        for row in rows:
+            old = int(self._labels[row])
+            if old in self._label_rows:
+                self._hnsw.mark_deleted(old)
+                del self._label_rows[old]
+        labels = np.arange(self._next_label, self._next_label + len(rows))
+        self._next_label += len(rows)
+
+        needed = self._hnsw.get_current_count() + len(rows)
+        if needed > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(needed * 2)
+        self._hnsw.add_items(self._matrix[rows], labels)
+        for row, label in zip(rows, labels):
+            self._labels[row] = label
+            self._label_rows[int(label)] = int(row)
+
+    def _hnsw_search(
+        self,
+        query: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray],
+        candidates: np.ndarray
+    ) -> List[Tuple[Hashable, float]]:
+        if self._hnsw is None:
+            self._build_hnsw()
+
+        # Oversample when filtering, since HNSW cannot apply the filter itself
+        want = min(len(self._label_rows), k if mask is None else max(k * 10, 100))
+        self._hnsw.set_ef(max(want, 50))
+        labels, distances = self._hnsw.knn_query(query, k=want)
+
+        hits = []
+        for label, distance in zip(labels[0], distances[0]):
+            row = self._label_rows.get(int(label))
+            if row is None or (mask is not None and not mask[row]):
+                continue
+            hits.append((self._ids[row], _to_score(1.0 - float(distance))))
+            if len(hits) == k:
+                break
+
+        if len(hits) < min(k, candidates.size):
+            return self._exact_search(query[None, :], k, candidates)[0]
+        return hits
+
+
+@dataclass
+class _LoadedIndex:
+    """A collection field's index and when it was loaded."""
+    index: Optional[LocalVectorIndex]  # None: collection too large to load
+    loaded_at: float
+    filter_fields: frozenset = field(default_factory=frozenset)
+
+
+@dataclass
+class _PendingLoad:
+    """An index being loaded, and the writes made to its collection meanwhile."""
+    filter_fields: frozenset
+    done: threading.Event = field(default_factory=threading.Event)
+    writes: List[Tuple[Hashable, Optional[Dict[str, Any]]]] = field(default_factory=list)  # None fields: delete
+    index: Optional[LocalVectorIndex] = None
+
+
+def _replace_score_meta(value: Any) -> Any:
+    """Point {"$meta": "vectorSearchScore"} references at the local score field."""
+    if isinstance(value, dict):
+        if value == {"$meta": "vectorSearchScore"}:
+            return f"${SCORE_FIELD}"
+        return {key: _replace_score_meta(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_score_meta(item) for item in value]
+    return value
+
+
+class VectorIndexRegistry:
+    """Process-wide local indexes keyed by (collection, vector field)."""
+
+    def __init__(
+        self,
+        mode: str = "fallback",
+        small_corpus: int = 2000,
+        max_docs: int = 200000,
+        max_age_seconds: float = 300.0,
+        ann: str = "exact",
+        ann_min_size: int = 20000,
+        ivf_probes: int = 8,
+        local_runner: Optional[Callable[[Any, List[Tuple[Hashable, float]], List[dict]], List[dict]]] = None
+    ):
+        """
+        Initialize the registry. Indexes are loaded on first use.
+
+        Args:
+            mode: "auto", "fallback" or "local" (see module docstring)
+            small_corpus: Largest filtered corpus answered locally in auto mode
+            max_docs: Collections with more vectors are never loaded
+            max_age_seconds: Reload indexes (and retry Atlas) after this long
+            ann: ANN mode for LocalVectorIndex
+            ann_min_size: Candidate count from which the ANN mode is used
+            ivf_probes: Buckets scanned per query in ivf mode
+            local_runner: Replaces the MongoDB follow-up pipeline of local
+                searches: (collection, hits, stages) -> results, where hits are
+                (_id, score) pairs best first and stages read the score from
+                SCORE_FIELD (e.g. evals.fakes.mongomock_local_runner)
+        """
+        if mode not in ("auto", "fallback", "local"):
+            raise ValueError(f"Unknown vector index mode: {mode}")
+        self.mode = mode
+        self.small_corpus = small_corpus
+        self.max_docs = max_docs
+        self.max_age_seconds = max_age_seconds
+        self.ann = ann
+        self.ann_min_size = ann_min_size
+        self.ivf_probes = ivf_probes
+        self.local_runner = local_runner
+
+        self._lock = threading.RLock()
+        self._indexes: Dict[Tuple[str, str], _LoadedIndex] = {}
+        self._loading: Dict[Tuple[str, str], _PendingLoad] = {}
+        self._atlas_unavailable: Dict[Tuple[str, str], float] = {}
+        self._stats = {"local": 0, "atlas": 0, "fallbacks": 0, "loads": 0}
+
+    # ═══════════════════════════════════════════════════════════════════
+    # SEARCH
+    # ═══════════════════════════════════════════════════════════════════
+
+    def search(self, collection, pipeline: List[dict]) -> List[dict]:
+        """
+        Run a $vectorSearch pipeline, locally or on Atlas.
+
+        Args:
+            collection: pymongo Collection
+            pipeline: Aggregation pipeline starting with a $vectorSearch stage;
+                {"$meta": "vectorSearchScore"} works in the later stages either way
+
+        Returns:
+            Aggregation results
+
+        Raises:
+            The Atlas error if $vectorSearch fails and no local index can answer
+        """
+        search = pipeline[0]["$vectorSearch"]
+        filter = search.get("filter") or {}
+        atlas_key = (collection.name, search.get("index", ""))
+
+        if self.mode != "fallback" or self._is_atlas_unavailable(atlas_key):
+            # Only wait for a load in progress when Atlas can't answer instead
+            wait = self.mode == "local" or self._is_atlas_unavailable(atlas_key)
+            index = self._get_index_safely(collection, search["path"], filter, wait=wait)
+            try:
+                use_local = index is not None and (
+                    self.mode == "local"
+                    or (len(index) > 0 and self._is_atlas_unavailable(atlas_key))
+                    or (len(index) > 0 and self.mode == "auto" and index.count(filter) <= self.small_corpus)
+                )
+            except ValueError as e:
+                # Filter the local index cannot evaluate; let Atlas handle it
+                logger.debug("Local vector index skipped for %s: %s", collection.name, e)
+                use_local = False
+            if use_local:
+                return self._local_search(collection, index, search, pipeline[1:])
+
+        try:
+            results = list(collection.aggregate(pipeline))
+            self._count("atlas")
+            return results
+        except Exception as e:
+            index = self._get_index_safely(collection, search["path"], filter)
+            if index is None or not len(index):
+                raise
+            logger.info("$vectorSearch unavailable on %s (%s); using local vector index", collection.name, e)
+            try:
+                results = self._local_search(collection, index, search, pipeline[1:])
+            except ValueError:
+                raise e
+            with self._lock:
+                self._atlas_unavailable[atlas_key] = time.monotonic()
+            self._count("fallbacks")
+            return results
+
+    def _local_search(
+        self,
+        collection,
+        index: LocalVectorIndex,
+        search: Dict[str, Any],
+        pipeline: List[dict]
+    ) -> List[dict]:
+        """Rank locally, then fetch the hits and run the follow-up stages in MongoDB."""
+        self._count("local")
+        hits = index.search(search["queryVector"], search.get("limit", 10), search.get("filter"))
+        if not hits:
+            return []
+
+        stages = _replace_score_meta(pipeline)
+        if self.local_runner is not None:
+            return self.local_runner(collection, hits, stages)
+
+        ids = [doc_id for doc_id, _ in hits]
+        scores = [score for _, score in hits]
+        local_pipeline = [
+            {"$match": {"_id": {"$in": ids}}},
+            {"$addFields": {SCORE_FIELD: {"$arrayElemAt": [scores, {"$indexOfArray": [ids, "$_id"]}]}}},
+            {"$sort": {SCORE_FIELD: -1}},
+            *stages,
+            {"$unset": SCORE_FIELD},
+        ]
+        return list(collection.aggregate(local_pipeline))
+
+    def _is_atlas_unavailable(self, key: Tuple[str, str]) -> bool:
+        with self._lock:
+            failed_at = self._atlas_unavailable.get(key)
+            if failed_at is None:
+                return False
+            if time.monotonic() - failed_at > self.max_age_seconds:
+                # Retry Atlas now and then in case the index has been created
+                del self._atlas_unavailable[key]
+                return False
+            return True
+
+    # ═══════════════════════════════════════════════════════════════════
+    # LOADING
+    # ═══════════════════════════════════════════════════════════════════
+
+    def get_index(
+        self,
+        collection,
+        path: str,
+        filter_fields: Iterable[str] = (),
+        wait: bool = True
+    ) -> Optional[LocalVectorIndex]:
+        """
+        Get the local index for a collection field, loading it if needed.
+
+        Only one thread loads a given index; others wait for it (or, with
+        wait=False, get the previous index if it covers their filter fields,
+        else None). A stale index keeps serving while it is reloaded.
+
+        Args:
+            collection: pymongo Collection
+            path: Vector field, e.g. "embedding"
+            filter_fields: Fields the caller will filter on
+            wait: Block until a load in progress completes
+
+        Returns:
+            LocalVectorIndex, or None if the collection exceeds VECTOR_INDEX_MAX_DOCS
+            (or is still loading and wait is False)
+        """
+        key = (collection.name, path)
+        filter_fields = frozenset(filter_fields)
+
+        while True:
+            with self._lock:
+                entry = self._indexes.get(key)
+                covered = entry is not None and filter_fields <= entry.filter_fields
+                if covered and time.monotonic() - entry.loaded_at < self.max_age_seconds:
+                    return entry.index
+
+                pending = self._loading.get(key)
+                if pending is None:
+                    fields = filter_fields | (entry.filter_fields if entry else frozenset())
+                    pending = _PendingLoad(filter_fields=fields)
+                    self._loading[key] = pending
+                    break
+
+            # Another thread is loading this index
+            if covered:
+                return entry.index
+            if not wait:
+                return None
+            pending.done.wait()
+            if filter_fields <= pending.filter_fields:
+                return pending.index
+
+        try:
+            index = self._load(collection, path, pending.filter_fields)
+        except Exception:
+            with self._lock:
+                del self._loading[key]
+            pending.done.set()
+            raise
+
+        with self._lock:
+            if index is not None:
+                for doc_id, fields in pending.writes:
+                    if not self._apply_to_index(index, path, doc_id, fields):
+                        index = None
+                        break
+            self._indexes[key] = _LoadedIndex(index=index, loaded_at=time.monotonic(), filter_fields=pending.filter_fields)
+            del self._loading[key]
+        pending.index = index
+        pending.done.set()
+        return index
+
+    def _get_index_safely(
+        self,
+        collection,
+        path: str,
+        filter: Dict[str, Any],
+        wait: bool = True
+    ) -> Optional[LocalVectorIndex]:
+        try:
+            return self.get_index(collection, path, filter.keys(), wait=wait)
+        except Exception as e:
+            logger.warning("Local vector index unavailable for %s.%s: %s", collection.name, path, e)
+            return None
+
+    def _exceeds_max_docs(self, collection, path: str) -> bool:
+        """Check the vector count without reading any vectors."""
+        if collection.estimated_document_count() <= self.max_docs:
+            return False
+        count = collection.count_documents({path: {"$type": "array"}}, limit=self.max_docs + 1)
+        return count > self.max_docs
+
+    def _load(self, collection, path: str, fields: frozenset) -> Optional[LocalVectorIndex]:
+        """Read every stored vector (and its filter fields) from MongoDB."""
+        start = time.perf_counter()
+        if self._exceeds_max_docs(collection, path):
+            logger.info(
+                "%s.%s has more than %s vectors; not loading a local index",
+                collection.name, path, self.max_docs
+            )
+            return None
+
+        projection = {path: 1, **{name: 1 for name in fields}}
+        cursor = collection.find({path: {"$type": "array"}}, projection).limit(self.max_docs + 1)
+
+        index = LocalVectorIndex(fields, ann=self.ann, ann_min_size=self.ann_min_size, ivf_probes=self.ivf_probes)
+        batch: List[Tuple[Hashable, Any, Dict[str, Any]]] = []
+        loaded = 0
+        skipped = 0
+
+        def flush():
+            nonlocal skipped
+            if not batch:
+                return
+            # Vectors from a different model (other dimension) cannot be compared
+            dims = index.dimensions or Counter(len(vector) for _, vector, _ in batch).most_common(1)[0][0]
+            usable = [item for item in batch if len(item[1]) == dims]
+            skipped += len(batch) - len(usable)
+            index.upsert_many(
+                [doc_id for doc_id, _, _ in usable],
+                [vector for _, vector, _ in usable],
+                [metadata for _, _, metadata in usable]
+            )
+            batch.clear()
+
+        for doc in cursor:
+            loaded += 1
+            if loaded > self.max_docs:
+                logger.info(
+                    "%s.%s has more than %s vectors; not loading a local index",
+                    collection.name, path, self.max_docs
+                )
+                return None
+            metadata = {}
+            for name in fields:
+                value = _lookup(doc, name)
+                metadata[name] = None if value is _MISSING else value
+            batch.append((doc["_id"], _lookup(doc, path), metadata))
+            if len(batch) >= _LOAD_BATCH_SIZE:
+                flush()
+        flush()
+
+        self._count("loads")
+        logger.debug(
+            "Loaded local vector index %s.%s: %s vectors, %s skipped in %.0fms",
+            collection.name, path, len(index), skipped, (time.perf_counter() - start) * 1000
+        )
+        return index
+
+    # ═══════════════════════════════════════════════════════════════════
+    # WRITE SYNC
+    # ═══════════════════════════════════════════════════════════════════
+
+    def apply_write(self, collection_name: str, doc_id: Hashable, fields: Dict[str, Any]) -> None:
+        """
+        Apply an insert or $set to the loaded indexes of a collection.
+
+        Args:
+            collection_name: Collection written to
+            doc_id: Document ID
+            fields: Inserted document or $set fields
+        """
+        with self._lock:
+            self._buffer_write(collection_name, doc_id, fields)
+            for (name, path), entry in list(self._indexes.items()):
+                if name != collection_name or entry.index is None:
+                    continue
+                if not self._apply_to_index(entry.index, path, doc_id, fields):
+                    logger.warning("Dropping local vector index %s.%s", name, path)
+                    del self._indexes[(name, path)]
+
+    def apply_delete(self, collection_name: str, doc_id: Hashable) -> None:
+        """Remove a deleted document from the loaded indexes of a collection."""
+        with self._lock:
+            self._buffer_write(collection_name, doc_id, None)
+            for (name, _), entry in self._indexes.items():
+                if name == collection_name and entry.index is not None:
+                    entry.index.remove(doc_id)
+
+    def _buffer_write(self, collection_name: str, doc_id: Hashable, fields: Optional[Dict[str, Any]]) -> None:
+        """Record a write for indexes of the collection that are still loading."""
+        for (name, _), pending in self._loading.items():
+            if name == collection_name:
+                pending.writes.append((doc_id, fields))
+
+    def _apply_to_index(
+        self,
+        index: LocalVectorIndex,
+        path: str,
+        doc_id: Hashable,
+        fields: Optional[Dict[str, Any]]
+    ) -> bool:
+        """Apply one write (fields None: delete) to an index; False if it no longer fits."""
+        if fields is None:
+            index.remove(doc_id)
+            return True
+
+        metadata = {}
+        for field_name in index.filter_fields:
+            value = _lookup(fields, field_name)
+            if value is not _MISSING:
+                metadata[field_name] = value
+
+        vector = _lookup(fields, path)
+        try:
+            if vector is _MISSING:
+                if metadata:
+                    index.update_metadata(doc_id, metadata)
+            elif vector:
+                index.upsert(doc_id, vector, metadata)
+            else:
+                index.remove(doc_id)
+        except ValueError as e:
+            logger.warning("Local vector index write rejected for %s: %s", doc_id, e)
+            return False
+        return True
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """Drop loaded indexes (all, or one collection's) so they reload on next use."""
+        with self._lock:
+            for key in list(self._indexes):
+                if collection_name is None or key[0] == collection_name:
+                    del self._indexes[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get registry counters.
+
+        Returns:
+            Dict with local/atlas/fallback search counts, loads and index sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["indexes"] = {
+                f"{name}.{path}": len(entry.index) if entry.index is not None else None
+                for (name, path), entry in self._indexes.items()
+            }
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+_registry: Optional[VectorIndexRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_vector_index_registry() -> Optional[VectorIndexRegistry]:
+    """
+    Get the process-wide vector index registry.
+
+    Returns:
+        VectorIndexRegistry, or None when VECTOR_INDEX_ENABLED is false
+    """
+    global _registry
+    from shared.config import settings
+
+    if not settings.vector_index_enabled:
+        return None
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VectorIndexRegistry(
+                    mode=settings.vector_index_mode,
+                    small_corpus=settings.vector_index_small_corpus,
+                    max_docs=settings.vector_index_max_docs,
+                    max_age_seconds=settings.vector_index_max_age_seconds,
+                    ann=settings.vector_index_ann,
+                    ann_min_size=settings.vector_index_ann_min_size,
+                    ivf_probes=settings.vector_index_ivf_probes
+                )
+    return _registry
+
+
+def vector_search(collection, pipeline: List[dict]) -> List[dict]:
+    """
+    Run a $vectorSearch pipeline, using the local index when it applies.
+
+    Drop-in for list(collection.aggregate(pipeline)).
+
+    Args:
+        collection: pymongo Collection
+        pipeline: Aggregation pipeline starting with a $vectorSearch stage
+
+    Returns:
+        Aggregation results
+    """
+    registry = get_vector_index_registry()
+    if registry is None:
+        return list(collection.aggregate(pipeline))
+    return registry.search(collection, pipeline)
+
+
+def sync_vector_write(collection_name: str, doc_id: Hashable, fields: Dict[str, Any]) -> None:
+    """
+    Keep loaded local indexes current after an insert or update.
+
+    Args:
+        collection_name: Collection written to
+        doc_id: Document ID
+        fields: Inserted document or $set fields
+    """
+    if _registry is not None:
+        _registry.apply_write(collection_name, doc_id, fields)
+
+
+def sync_vector_delete(collection_name: str, doc_id: Hashable) -> None:
+    """Remove a deleted document from loaded local indexes."""
+    if _registry is not None:
+        _registry.apply_delete(collection_name, doc_id)
+
+
+def reset_vector_index_registry() -> None:
+    """Discard the registry and its loaded indexes; the next search rebuilds it from settings."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+def invalidate_vector_index(collection_name: Optional[str] = None) -> None:
+    """Drop loaded local indexes after bulk writes; they reload on next use."""
+    if _registry is not None:
+        _registry.invalidate(collection_name)
@@ -0,0 +1,141 @@
+"""Tests for the activity_events collection and capped activity_log tails"""
+
+from collections import defaultdict
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from bson import ObjectId
+
+import agents.retrieval as retrieval_module
+import shared.db as db
+from agents.retrieval import RetrievalAgent
+from shared.config import settings
+from shared.models import ActivityLogEntry, Task
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    """Mocked collections by name, with episodic summaries and vector sync disabled"""
+    mocks = defaultdict(MagicMock)
+    monkeypatch.setattr(db, "get_collection", lambda name: mocks[name])
+    monkeypatch.setattr(db, "sync_vector_write", lambda *args: None)
+    monkeypatch.setattr(db, "_maybe_generate_task_episodic_summary", lambda task_id: None)
+    return mocks
+
+
+class TestActivityWrites:
+    """Writes append events and keep a bounded tail"""
+
+    def test_update_pushes_capped_tail_and_records_event(self, collections):
+        task_id = ObjectId()
+        tasks = collections[db.TASKS_COLLECTION]
+        tasks.find_one.return_value = {"_id": task_id, "status": "todo"}
+        tasks.update_one.return_value.modified_count = 1
+
+        db.update_task(task_id, {"status": "in_progress"}, "started", "Started",
+                       activity_fields={"summary": "voice summary"})
+
+        update = tasks.update_one.call_args[0][1]
+        assert update["$push"]["activity_log"]["$slice"] == -settings.activity_tail_size
+        assert update["$inc"] == {"activity_count": 1}
+        assert "activity_log" not in update["$set"]
+
+        event = collections[db.ACTIVITY_COLLECTION].insert_many.call_args[0][0][0]
+        assert event["entity_type"] == "task" and event["entity_id"] == task_id
+        assert event["action"] == "started" and event["summary"] == "voice summary"
+
+    def test_unmigrated_entity_is_not_trimmed(self, collections):
+        task_id = ObjectId()
+        tasks = collections[db.TASKS_COLLECTION]
+        tasks.update_one.side_effect = [
+            MagicMock(matched_count=0, modified_count=0),
+            MagicMock(matched_count=1, modified_count=1),
+        ]
+
+        assert db.add_task_note(task_id, "note") is True
+
+        (migrated_filter, _), (legacy_filter, legacy_update) = [c[0] for c in tasks.update_one.call_args_list]
+        assert migrated_filter == {"_id": task_id, "activity_migrated": True}
+        assert legacy_filter == {"_id": task_id, "activity_migrated": {"$ne": True}}
+        assert "$slice" not in legacy_update["$push"]["activity_log"]
+        assert legacy_update["$push"]["notes"] == "note"
+
+    def test_no_event_when_nothing_modified(self, collections):
+        tasks = collections[db.TASKS_COLLECTION]
+        tasks.find_one.return_value = {"status": "todo"}
+        tasks.update_one.return_value.modified_count = 0
+
+        db.update_task(ObjectId(), {"title": "x"}, "updated")
+
+        collections[db.ACTIVITY_COLLECTION].insert_many.assert_not_called()
+
+    def test_create_records_every_entry_and_trims(self, collections, monkeypatch):
+        monkeypatch.setattr(settings, "activity_tail_size", 2)
+        collections[db.TASKS_COLLECTION].insert_one.return_value.inserted_id = ObjectId()
+        task = Task(title="t", activity_log=[ActivityLogEntry(action="created_from_voice") for _ in range(2)])
+
+        db.create_task(task)
+
+        inserted = collections[db.TASKS_COLLECTION].insert_one.call_args[0][0]
+        assert len(inserted["activity_log"]) == 2
+        assert inserted["activity_count"] == 3
+        assert inserted["activity_migrated"] is True
+        assert len(collections[db.ACTIVITY_COLLECTION].insert_many.call_args[0][0]) == 3
+
+    def test_event_failure_does_not_fail_write(self, collections):
+        from pymongo.errors import PyMongoError
+
+        tasks = collections[db.TASKS_COLLECTION]
+        tasks.update_one.return_value.modified_count = 1
+        collections[db.ACTIVITY_COLLECTION].insert_many.side_effect = PyMongoError("down")
+
+        assert db.add_task_note(ObjectId(), "note") is True
+
+
+class TestActivityPipeline:
+    """Temporal queries start from the activity_events index"""
+
+    def test_event_match_then_entity_match(self):
+        since, until = datetime(2026, 1, 5), datetime(2026, 1, 12)
+        pipeline = db.build_activity_pipeline(
+            "task", since=since, until=until, action="completed", entity_match={"status": "done"}
+        )
+
+        assert pipeline[0] == {"$match": {
+            "entity_type": "task",
+            "action": "completed",
+            "timestamp": {"$gte": since, "$lt": until}
+        }}
+        assert pipeline[2]["$lookup"]["from"] == db.TASKS_COLLECTION
+        assert {"$match": {"status": "done"}} in pipeline
+        assert pipeline[-1] == {"$sort": {"last_activity_at": -1}}
+
+    def test_include_events_sorts_and_collects(self):
+        pipeline = db.build_activity_pipeline("project", include_events=True)
+
+        assert pipeline[1] == {"$sort": {"timestamp": 1}}
+        group = pipeline[2]["$group"]
+        assert "activity_events" in group
+        assert pipeline[3]["$lookup"]["from"] == db.PROJECTS_COLLECTION
+
+    def test_retrieval_queries_events_collection(self, monkeypatch):
+        mocks = defaultdict(MagicMock)
+        monkeypatch.setattr(retrieval_module, "get_collection", lambda name: mocks[name])
+        mocks[db.ACTIVITY_COLLECTION].aggregate.return_value = [{"_id": "t1"}]
+
+        results = RetrievalAgent().get_tasks_by_activity(since=datetime(2026, 1, 5), status="done", limit=5)
+
+        assert results == [{"_id": "t1"}]
+        pipeline = mocks[db.ACTIVITY_COLLECTION].aggregate.call_args[0][0]
+        assert pipeline[-1] == {"$limit": 5}
+        assert {"$match": {"status": "done"}} in pipeline
+        mocks[db.TASKS_COLLECTION].find.assert_not_called()
+
+
+class TestTotalActivity:
+    """Episodic thresholds count all events, not the capped tail"""
+
+    def test_counter_and_legacy_log(self):
+        assert Task(title="t", activity_count=40, activity_log=[ActivityLogEntry(action="x")]).total_activity == 40
+        assert Task(title="t", activity_log=[ActivityLogEntry(action="x")] * 3).total_activity == 3
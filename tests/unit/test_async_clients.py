@@ -0,0 +1,106 @@
+"""Tests for the async LLM and embedding client variants"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import shared.llm as llm_module
+from shared.embedding_cache import EmbeddingCache
+from shared.embeddings import EmbeddingService
+from shared.llm import LLMService
+
+
+@pytest.fixture
+def async_anthropic(monkeypatch):
+    """Replace the per-loop async Anthropic client with a mock"""
+    client = MagicMock()
+    client.messages.create = AsyncMock(
+        return_value=MagicMock(
+            content=[MagicMock(text="async answer")],
+            usage=MagicMock(cache_read_input_tokens=0, cache_creation_input_tokens=0)
+        )
+    )
+    monkeypatch.setattr(llm_module, "_get_async_client", lambda: client)
+    return client
+
+
+class TestAsyncLLM:
+    """LLMService async variants"""
+
+    def test_agenerate_strips_non_api_fields(self, async_anthropic):
+        service = LLMService()
+        result = asyncio.run(service.agenerate(
+            messages=[{"role": "user", "content": "hi", "input_type": "text"}],
+            system="be brief",
+            max_tokens=10
+        ))
+
+        assert result == "async answer"
+        params = async_anthropic.messages.create.call_args.kwargs
+        assert params["messages"] == [{"role": "user", "content": "hi"}]
+        assert params["system"] == "be brief"
+
+    def test_agenerate_with_tools_uses_cached_system(self, async_anthropic):
+        service = LLMService()
+        asyncio.run(service.agenerate_with_tools(
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[{"name": "t"}],
+            system="instructions"
+        ))
+
+        params = async_anthropic.messages.create.call_args.kwargs
+        assert params["tools"] == [{"name": "t"}]
+        assert params["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+    def test_services_share_sync_connection_pool(self):
+        assert LLMService().client._client is LLMService(model="other").client._client
+
+    def test_async_pool_is_closed_with_its_loop(self):
+        async def run():
+            client = LLMService().async_client
+            assert LLMService(model="other").async_client is client
+            return client
+
+        client = asyncio.run(run())
+        assert client.is_closed()
+        assert asyncio.run(run()) is not client
+
+
+class TestAsyncEmbeddings:
+    """EmbeddingService async variants"""
+
+    def test_aembed_texts_only_sends_misses(self):
+        service = EmbeddingService(cache=EmbeddingCache(max_entries=10))
+        service.async_client = MagicMock()
+        service.async_client.embed = AsyncMock(
+            side_effect=lambda texts, model, input_type: MagicMock(
+                embeddings=[[float(len(t))] for t in texts]
+            )
+        )
+        service.cache.put(service.model, "document", "alpha", [9.0])
+
+        vectors = asyncio.run(service.aembed_texts(["alpha", "be", "be"]))
+
+        assert vectors == [[9.0], [2.0], [2.0]]
+        assert service.async_client.embed.call_args.kwargs["texts"] == ["be"]
+
+    def test_concurrent_aembed_queries_overlap(self):
+        service = EmbeddingService()
+        active = {"now": 0, "peak": 0}
+
+        async def slow_embed(texts, model, input_type):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return MagicMock(embeddings=[[1.0] for _ in texts])
+
+        service.async_client = MagicMock()
+        service.async_client.embed = slow_embed
+
+        async def run():
+            return await asyncio.gather(*(service.aembed_query(q) for q in ["a", "b", "c"]))
+
+        assert asyncio.run(run()) == [[1.0]] * 3
+        assert active["peak"] == 3
@@ -0,0 +1,109 @@
+"""Tests for the offline benchmark and its local stand-ins"""
+
+import pytest
+
+from evals.benchmark import BenchmarkReport, StageResult, compare_to_baseline, percentile, run_benchmark, STAGES
+from evals.fakes import HashEmbedder, ScriptedLLM, mongomock_local_runner
+
+TRANSCRIPT = {
+    "name": "lookup",
+    "user_message": "Show me Project Alpha",
+    "responses": [
+        {"content": [{"type": "tool_use", "name": "get_project_by_name", "input": {"project_name": "Project Alpha"}}],
+         "stop_reason": "tool_use", "usage": {"input_tokens": 100, "output_tokens": 10}},
+        {"content": [{"type": "text", "text": "Here it is."}], "stop_reason": "end_turn"},
+    ],
+}
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class TestStatistics:
+    """Percentiles and baseline comparison"""
+
+    def test_nearest_rank_percentiles(self):
+        samples = list(range(1, 101))
+
+        assert percentile(samples, 50) == 50
+        assert percentile(samples, 95) == 95
+        assert percentile(samples, 99) == 99
+        assert percentile([7.0], 99) == 7.0
+        assert percentile([], 50) == 0.0
+
+    def test_regression_beyond_tolerance_is_reported(self):
+        report = BenchmarkReport(stages={
+            "retrieval": StageResult("retrieval", 50, p50_ms=10.0, p95_ms=20.0, p99_ms=90.0, mean_ms=12.0),
+            "turn": StageResult("turn", 50, p50_ms=5.0, p95_ms=6.0, p99_ms=6.0, mean_ms=5.0),
+        })
+        baseline = {"stages": {
+            "retrieval": {"p50_ms": 10.0, "p95_ms": 12.0, "p99_ms": 13.0, "alloc_peak_kb": 0.0},
+            "turn": {"p50_ms": 4.5, "p95_ms": 5.5, "p99_ms": 5.5, "alloc_peak_kb": 0.0},
+        }}
+
+        regressions = compare_to_baseline(report, baseline, tolerance=0.25)
+
+        # p99 isn't gated; turn is within 25% + slack
+        assert regressions == ["retrieval p95_ms: 20.00ms vs baseline 12.00ms (+67%)"]
+
+
+class TestFakes:
+    """Stand-ins are deterministic and API-compatible"""
+
+    def test_hash_embedder_is_deterministic_and_ranks_by_overlap(self):
+        embedder = HashEmbedder(dimensions=256)
+        query, near, far = embedder.embed(["voice agent latency", "voice agent demo", "quarterly budget"]).embeddings
+
+        assert embedder.embed_one("voice agent latency") == query
+        assert cosine(query, near) > cosine(query, far)
+        assert abs(cosine(query, query) - 1.0) < 1e-9
+
+    def test_scripted_llm_steps_through_transcript(self):
+        llm = ScriptedLLM([TRANSCRIPT])
+        messages = [{"role": "user", "content": "Show me Project Alpha"}]
+
+        first = llm.messages.create(messages=messages, tools=[{"name": "x"}])
+        messages += [
+            {"role": "assistant", "content": first.content},
+            {"role": "user", "content": [{"type": "tool_result", "tool_use_id": first.content[0].id, "content": "{}"}]},
+        ]
+        second = llm.messages.create(messages=messages, tools=[{"name": "x"}])
+
+        assert first.stop_reason == "tool_use" and first.content[0].name == "get_project_by_name"
+        assert first.usage.input_tokens == 100
+        assert second.content[0].text == "Here it is."
+
+    def test_scripted_llm_without_tools_and_unknown_message(self):
+        llm = ScriptedLLM([TRANSCRIPT], completion='{"steps": []}')
+
+        assert llm.messages.create(messages=[{"role": "user", "content": "parse"}]).content[0].text == '{"steps": []}'
+        with pytest.raises(KeyError):
+            llm.messages.create(messages=[{"role": "user", "content": "unknown"}], tools=[{"name": "x"}])
+
+    def test_mongomock_local_runner_scores_in_python(self):
+        mongomock = pytest.importorskip("mongomock")
+        from shared.vector_index import SCORE_FIELD
+
+        collection = mongomock.MongoClient().db.tasks
+        collection.insert_many([{"_id": i, "title": f"t{i}"} for i in range(4)])
+        stages = [
+            {"$match": {SCORE_FIELD: {"$gte": 0.6}}},
+            {"$project": {"title": 1, "score": f"${SCORE_FIELD}"}},
+        ]
+
+        results = mongomock_local_runner(collection, [(2, 0.9), (0, 0.7), (3, 0.5)], stages)
+
+        assert results == [{"_id": 2, "title": "t2", "score": 0.9}, {"_id": 0, "title": "t0", "score": 0.7}]
+
+
+class TestOfflineBenchmark:
+    """The full harness runs without network access"""
+
+    def test_all_stages_report(self):
+        pytest.importorskip("mongomock")
+
+        report = run_benchmark(iterations=2, alloc_iterations=1, transcripts=["project_lookup"])
+
+        assert list(report.stages) == list(STAGES)
+        assert all(result.p50_ms > 0 for result in report.stages.values())
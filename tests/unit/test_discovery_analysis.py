@@ -0,0 +1,102 @@
+"""Tests for the aggregation-based tool discovery analysis"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from memory.discovery_analysis import RequestClusters, analyze_discoveries
+
+mongomock = pytest.importorskip("mongomock")
+
+NEWS = [1.0, 0.0, 0.0, 0.0]
+NEWS_AGAIN = [0.98, 0.1, 0.0, 0.0]
+WEATHER = [0.0, 0.0, 1.0, 0.0]
+
+
+def discovery(request, intent="web_search", success=True, times_used=1, embedding=None,
+              server="tavily", tool="tavily-search", arguments=None, days_ago=1):
+    return {
+        "user_request": request,
+        "intent": intent,
+        "request_embedding": embedding,
+        "solution": {"mcp_server": server, "tool_used": tool, "arguments": arguments or {}},
+        "success": success,
+        "times_used": times_used,
+        "execution_time_ms": 100 * times_used,
+        "first_used": datetime.now(timezone.utc) - timedelta(days=days_ago),
+        "user_id": "u1"
+    }
+
+
+@pytest.fixture
+def db():
+    """In-memory database with a week of discoveries"""
+    db = mongomock.MongoClient()["analysis_test"]
+    db.tool_discoveries.insert_many([
+        discovery("latest AI news", times_used=2, embedding=NEWS, arguments={"query": "AI news"}),
+        discovery("recent AI news please", times_used=2, embedding=NEWS_AGAIN, arguments={"query": "AI"}),
+        discovery("weather in Paris", times_used=1, embedding=WEATHER, arguments={"query": "weather"}),
+        discovery("count my tasks", intent="data_query", success=False, times_used=4, server="mongodb", tool="count"),
+        discovery("count done tasks", intent="data_query", success=False, server="mongodb", tool="count"),
+        discovery("old news", times_used=9, embedding=NEWS, days_ago=30),
+    ])
+    return db
+
+
+class TestAnalyzeDiscoveries:
+    """Summary and suggestions come from one $facet plus one streamed pass"""
+
+    def test_summary(self, db):
+        summary = analyze_discoveries(db, user_id="u1", days=7)["summary"]
+
+        assert summary["total_discoveries"] == 5
+        assert (summary["successful"], summary["failed"], summary["success_rate"]) == (3, 2, 60.0)
+        assert summary["by_intent"] == {"web_search": 3, "data_query": 2}
+        assert summary["by_server"] == {"tavily": 3, "mongodb": 2}
+        assert summary["total_reuses"] == 10
+        assert [d["times_used"] for d in summary["most_reused"]] == [4, 2, 2]
+
+    def test_similar_requests_form_one_tool_candidate(self, db):
+        analysis = analyze_discoveries(db, user_id="u1", days=7)
+
+        [tool] = analysis["suggested_tools"]
+        assert tool["times_used"] == 4 and tool["similar_requests"] == 2
+        assert tool["current_solution"] == {"mcp_server": "tavily", "tool": "tavily-search"}
+        assert tool["avg_latency_ms"] == 200
+
+        assert [o["field"] for o in analysis["atlas_optimizations"]] == ["text fields"]
+
+    def test_feature_gaps(self, db):
+        gaps = analyze_discoveries(db, user_id="u1", days=7)["feature_gaps"]
+
+        assert [(g["intent"], g["severity"]) for g in gaps] == [("data_query", "medium"), ("data_query", "critical")]
+        assert len(gaps[0]["example_requests"]) == 2
+
+    def test_failures_only(self, db):
+        db.tool_discoveries.delete_many({"success": True})
+        analysis = analyze_discoveries(db, user_id="u1", days=7)
+
+        assert analysis["suggested_tools"] == [] and analysis["summary"]["total_discoveries"] == 2
+
+    def test_empty_period(self, db):
+        analysis = analyze_discoveries(db, user_id="someone-else", days=7)
+        assert analysis["summary"]["total_discoveries"] == 0
+
+
+class TestRequestClusters:
+    """Greedy clustering is bounded and keyed by server/tool"""
+
+    def test_same_request_on_other_tool_is_separate(self):
+        clusters = RequestClusters()
+        clusters.add_batch([discovery("a", embedding=NEWS), discovery("b", embedding=NEWS, tool="tavily-extract")])
+        clusters.add_batch([discovery("c", embedding=NEWS_AGAIN), discovery("c", embedding=None)])
+
+        assert [(c["tool"], c["discoveries"]) for c in clusters.clusters] == [
+            ("tavily-search", 2), ("tavily-extract", 1), ("tavily-search", 1)
+        ]
+
+    def test_cluster_cap(self):
+        clusters = RequestClusters(max_clusters=2)
+        clusters.add_batch([discovery(str(i), embedding=v) for i, v in enumerate([NEWS, WEATHER, [0, 1.0, 0, 0]])])
+
+        assert len(clusters.clusters) == 2
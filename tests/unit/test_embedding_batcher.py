@@ -0,0 +1,148 @@
+"""Tests for the micro-batching embedding dispatcher"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from shared.embedding_batcher import EmbeddingBatcher
+from shared.embedding_cache import EmbeddingCache
+from shared.embeddings import EmbeddingService
+
+
+class RecordingEmbedder:
+    """Batched embed_fn that records every call it receives"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, input_type):
+        with self._lock:
+            self.calls.append((list(texts), input_type))
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return [[float(len(t)), 1.0 if input_type == "query" else 0.0] for t in texts]
+
+
+@pytest.fixture
+def embedder():
+    return RecordingEmbedder()
+
+
+@pytest.fixture
+def batcher(embedder):
+    b = EmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=50)
+    yield b
+    b.close()
+
+
+class TestEmbeddingBatcher:
+    """Request coalescing"""
+
+    def test_concurrent_callers_share_one_call(self):
+        embedder = RecordingEmbedder(delay=0.05)
+        batcher = EmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=50)
+        texts = [f"text-{'x' * i}" for i in range(6)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            vectors = list(pool.map(lambda t: batcher.embed(t, "document"), texts))
+
+        assert vectors == [[float(len(t)), 0.0] for t in texts]
+        assert len(embedder.calls) < len(texts)
+        assert sum(len(call[0]) for call in embedder.calls) == len(texts)
+        batcher.close()
+
+    def test_idle_request_skips_the_window(self, embedder):
+        batcher = EmbeddingBatcher(embedder, max_wait_ms=5000)
+        assert batcher.submit("solo").result(timeout=1) == [4.0, 0.0]
+        batcher.close()
+
+    def test_duplicate_texts_are_embedded_once(self):
+        embedder = RecordingEmbedder(delay=0.05)
+        batcher = EmbeddingBatcher(embedder, max_wait_ms=50)
+        batcher.submit("warmup")
+        futures = [batcher.submit("same") for _ in range(3)]
+
+        assert [f.result(timeout=2) for f in futures] == [[4.0, 0.0]] * 3
+        assert sum(texts.count("same") for texts, _ in embedder.calls) == 1
+        batcher.close()
+
+    def test_short_result_fails_unmatched_callers(self):
+        short = MagicMock(side_effect=lambda texts, input_type: [[1.0]] * (len(texts) - 1))
+        batcher = EmbeddingBatcher(short, max_wait_ms=50)
+        futures = [batcher.submit(t) for t in ["a", "b", "c"]]
+
+        outcomes = [f.exception(timeout=2) for f in futures]
+        assert any(isinstance(e, RuntimeError) for e in outcomes)
+        batcher.close()
+
+    def test_embed_times_out(self):
+        batcher = EmbeddingBatcher(RecordingEmbedder(delay=1.0), timeout=0.05)
+        with pytest.raises(TimeoutError):
+            batcher.embed("slow")
+        batcher.close()
+
+    def test_batch_size_is_capped(self, embedder):
+        batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=50)
+        futures = [batcher.submit(f"t{i}") for i in range(5)]
+        assert [f.result(timeout=2) for f in futures] == [[2.0, 0.0]] * 5
+        batcher.close()
+
+        assert all(len(texts) <= 2 for texts, _ in embedder.calls)
+
+    def test_input_types_are_sent_separately(self, batcher, embedder):
+        query = batcher.submit("same", "query")
+        document = batcher.submit("same", "document")
+
+        assert query.result(timeout=2) == [4.0, 1.0]
+        assert document.result(timeout=2) == [4.0, 0.0]
+        assert {input_type for _, input_type in embedder.calls} == {"query", "document"}
+
+    def test_errors_reach_every_caller(self):
+        failing = MagicMock(side_effect=RuntimeError("voyage down"))
+        batcher = EmbeddingBatcher(failing, max_wait_ms=20)
+        futures = [batcher.submit("a"), batcher.submit("b")]
+
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=2)
+        batcher.close()
+
+    def test_async_callers(self, batcher, embedder):
+        async def run():
+            return await asyncio.gather(*(batcher.aembed(t, "query") for t in ["a", "bb", "ccc"]))
+
+        assert asyncio.run(run()) == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+        assert batcher.stats()["requests"] == 3
+
+
+class TestEmbeddingServiceBatching:
+    """EmbeddingService routes single-text cache misses through the dispatcher"""
+
+    def test_cache_misses_are_batched(self):
+        service = EmbeddingService(cache=EmbeddingCache(max_entries=10))
+        service.client = MagicMock()
+
+        def slow_embed(texts, model, input_type):
+            threading.Event().wait(0.05)
+            return MagicMock(embeddings=[[float(len(t))] for t in texts])
+
+        service.client.embed.side_effect = slow_embed
+        service.batcher = EmbeddingBatcher(service._embed_uncached, max_wait_ms=50)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            vectors = list(pool.map(service.embed_query, ["a", "bb", "ccc", "dddd"]))
+
+        assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+        assert service.client.embed.call_count < 4
+        # Each miss is looked up once, by embed_text, not again by the batcher
+        assert service.cache.stats_since(None)["misses"] == 4
+
+        # Served from cache afterwards without another dispatch
+        service.client.embed.reset_mock()
+        assert service.embed_query("bb") == [2.0]
+        service.client.embed.assert_not_called()
+        service.batcher.close()
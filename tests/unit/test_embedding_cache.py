@@ -0,0 +1,169 @@
+"""Tests for the content-addressed embedding cache"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from shared.embedding_cache import (
+    EmbeddingCache,
+    DiskEmbeddingStore,
+    make_cache_key,
+    normalize_text,
+)
+from shared.embeddings import EmbeddingService
+
+
+def fake_embed_response(texts):
+    """Voyage-like response with one distinct vector per text"""
+    response = MagicMock()
+    response.embeddings = [[float(len(t)), 0.5] for t in texts]
+    return response
+
+
+@pytest.fixture
+def service():
+    """EmbeddingService with a mocked Voyage client and fresh cache"""
+    svc = EmbeddingService(cache=EmbeddingCache(max_entries=10))
+    svc.client = MagicMock()
+    svc.client.embed.side_effect = lambda texts, model, input_type: fake_embed_response(texts)
+    return svc
+
+
+class TestCacheKey:
+    """Key normalization"""
+
+    def test_whitespace_is_normalized(self):
+        assert normalize_text("  latest   AI\nnews ") == "latest AI news"
+        assert make_cache_key("voyage-3", "query", "latest AI news") == \
+            make_cache_key("voyage-3", "query", " latest  AI news ")
+
+    def test_key_depends_on_model_and_input_type(self):
+        key = make_cache_key("voyage-3", "query", "memory")
+        assert key != make_cache_key("voyage-3", "document", "memory")
+        assert key != make_cache_key("voyage-3-lite", "query", "memory")
+
+
+class TestEmbeddingCache:
+    """In-process LRU tier"""
+
+    def test_miss_then_hit(self):
+        cache = EmbeddingCache()
+        assert cache.get("m", "query", "hello") is None
+        cache.put("m", "query", "hello", [1.0, 2.0])
+        assert cache.get("m", "query", "hello") == [1.0, 2.0]
+
+        stats = cache.stats_since(None)
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_hits_are_copies(self):
+        cache = EmbeddingCache(max_entries=10)
+        vector = [0.1, 0.2]
+        cache.put("voyage-3", "query", "q", vector)
+        vector.append(9.0)
+
+        hit = cache.get("voyage-3", "query", "q")
+        hit[0] = 5.0
+
+        assert cache.get("voyage-3", "query", "q") == [0.1, 0.2]
+
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("m", "query", "a", [1.0])
+        cache.put("m", "query", "b", [2.0])
+        cache.get("m", "query", "a")  # a becomes most recently used
+        cache.put("m", "query", "c", [3.0])
+
+        assert len(cache) == 2
+        assert cache.get("m", "query", "b") is None
+        assert cache.get("m", "query", "a") == [1.0]
+
+    def test_ttl_expiry(self, monkeypatch):
+        import shared.embedding_cache as module
+        clock = [1000.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+
+        cache = EmbeddingCache(ttl_seconds=60)
+        cache.put("m", "query", "a", [1.0])
+        clock[0] += 61
+        assert cache.get("m", "query", "a") is None
+
+    def test_persistent_store_hit_is_promoted(self):
+        store = MagicMock()
+        store.get.return_value = [9.0]
+        cache = EmbeddingCache(store=store)
+
+        assert cache.get("m", "query", "a") == [9.0]
+        assert cache.get("m", "query", "a") == [9.0]
+        assert store.get.call_count == 1  # second lookup served from LRU
+
+        stats = cache.stats_since(None)
+        assert stats["store_hits"] == 1
+        assert stats["hits"] == 1
+
+    def test_store_errors_degrade_to_miss(self):
+        store = MagicMock()
+        store.get.side_effect = RuntimeError("down")
+        cache = EmbeddingCache(store=store)
+        assert cache.get("m", "query", "a") is None
+
+    def test_disk_store_roundtrip(self, tmp_path):
+        store = DiskEmbeddingStore(str(tmp_path / "emb.sqlite3"))
+        store.set("k", [0.25, 0.5], "voyage-3", "query")
+        assert store.get("k") == [0.25, 0.5]
+        assert store.get("missing") is None
+
+
+class TestEmbeddingServiceCaching:
+    """EmbeddingService consults the cache before calling Voyage"""
+
+    def test_repeated_query_makes_one_api_call(self, service):
+        first = service.embed_query("what's new in AI")
+        second = service.embed_query("what's new in AI ")
+
+        assert first == second
+        assert service.client.embed.call_count == 1
+
+    def test_embed_texts_only_sends_misses(self, service):
+        service.embed_text("alpha", input_type="document")
+        service.client.embed.reset_mock()
+
+        vectors = service.embed_texts(["alpha", "beta", "beta"], input_type="document")
+
+        assert len(vectors) == 3
+        service.client.embed.assert_called_once()
+        assert service.client.embed.call_args.kwargs["texts"] == ["beta"]
+
+    def test_turn_stats_report_saved_round_trips(self, service):
+        service.embed_query("one")
+        before = service.cache.snapshot()
+        service.embed_query("one")
+        service.embed_query("one")
+
+        stats = service.cache.stats_since(before)
+        assert stats["round_trips_saved"] == 2
+        assert stats["api_calls"] == 0
+
+
+class TestEmbeddingCacheIndexes:
+    """init_db TTL index follows EMBEDDING_CACHE_TTL_SECONDS"""
+
+    def test_zero_ttl_creates_no_ttl_index(self, monkeypatch):
+        from scripts.setup import init_db
+
+        db = MagicMock()
+        monkeypatch.setattr(init_db.settings, "embedding_cache_ttl_seconds", 0)
+
+        assert init_db.create_embedding_cache_indexes(db) == []
+        db["embedding_cache"].create_indexes.assert_not_called()
+        db["embedding_cache"].drop_index.assert_called_once_with("created_at_ttl")
+
+    def test_ttl_index_uses_setting(self, monkeypatch):
+        from scripts.setup import init_db
+
+        db = MagicMock()
+        monkeypatch.setattr(init_db.settings, "embedding_cache_ttl_seconds", 600)
+        init_db.create_embedding_cache_indexes(db)
+
+        (indexes,), _ = db["embedding_cache"].create_indexes.call_args
+        assert indexes[0].document["expireAfterSeconds"] == 600
@@ -0,0 +1,42 @@
+"""Tests for background episodic summary generation"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from bson import ObjectId
+
+import shared.db as db
+from shared.models import ActivityLogEntry, Task
+
+
+class TestTaskSummaryThresholds:
+    """Coalesced task jobs still generate when a threshold was skipped over"""
+
+    @pytest.fixture
+    def memory(self, monkeypatch):
+        import agents.coordinator
+        manager = MagicMock()
+        monkeypatch.setattr(agents.coordinator, "memory_manager", manager, raising=False)
+        monkeypatch.setattr("shared.episodic.generate_task_episodic_summary", lambda task: "summary")
+        return manager
+
+    def task_with_activity(self, count):
+        return Task(title="t", activity_log=[ActivityLogEntry(action="x") for _ in range(count)])
+
+    def test_threshold_between_runs_generates(self, memory, monkeypatch):
+        # Last summary at 1; triggers for 4, 5, 6 were coalesced into one run at 6
+        monkeypatch.setattr(db, "get_task", lambda task_id: self.task_with_activity(6))
+        memory.get_latest_episodic_summary.return_value = {"activity_count": 1}
+
+        db._generate_task_episodic_summary(ObjectId())
+
+        memory.store_episodic_summary.assert_called_once()
+        assert memory.store_episodic_summary.call_args.kwargs["activity_count"] == 6
+
+    def test_no_threshold_skips(self, memory, monkeypatch):
+        monkeypatch.setattr(db, "get_task", lambda task_id: self.task_with_activity(7))
+        memory.get_latest_episodic_summary.return_value = {"activity_count": 5}
+
+        db._generate_task_episodic_summary(ObjectId())
+
+        memory.store_episodic_summary.assert_not_called()
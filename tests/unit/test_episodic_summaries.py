@@ -0,0 +1,104 @@
+"""Tests for batched episodic summary reads and the latest-summary pointer"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from memory.manager import MemoryManager
+from shared.models import Task
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def memory():
+    """MemoryManager over an in-memory database with two tasks"""
+    db = mongomock.MongoClient()["episodic_test"]
+    db.tasks.insert_many([{"_id": ObjectId(), "title": "Write docs"}, {"_id": ObjectId(), "title": "Fix bug"}])
+    return MemoryManager(db)
+
+
+def store(memory, task_id, summary, count):
+    return memory.store_episodic_summary("u1", "task", task_id, summary, count)
+
+
+class TestBatchedSummaries:
+    """One aggregation returns the newest summary per entity"""
+
+    def test_latest_per_entity(self, memory):
+        docs_id, bug_id = [t["_id"] for t in memory.db.tasks.find()]
+        first_id = store(memory, docs_id, "first", 1)
+        memory.episodic.update_one(
+            {"_id": ObjectId(first_id)},
+            {"$set": {"generated_at": datetime.utcnow() - timedelta(hours=1)}}
+        )
+        store(memory, docs_id, "second", 5)
+        store(memory, bug_id, "only", 1)
+
+        summaries = memory.get_latest_episodic_summaries("task", [docs_id, str(bug_id), ObjectId()])
+
+        assert {k: v["summary"] for k, v in summaries.items()} == {str(docs_id): "second", str(bug_id): "only"}
+        assert summaries[str(docs_id)]["entity_id"] == str(docs_id)
+
+    def test_other_entity_type_excluded(self, memory):
+        docs_id = memory.db.tasks.find_one()["_id"]
+        memory.store_episodic_summary("u1", "project", docs_id, "project summary", 1)
+
+        assert memory.get_latest_episodic_summaries("task", [docs_id]) == {}
+        assert memory.get_latest_episodic_summaries("task", []) == {}
+
+
+class TestSummaryPointer:
+    """Storing a summary denormalizes it onto the entity"""
+
+    def test_pointer_tracks_newest_summary(self, memory):
+        docs_id = memory.db.tasks.find_one()["_id"]
+        store(memory, docs_id, "first", 1)
+        memory.db.tasks.update_one(
+            {"_id": docs_id},
+            {"$set": {"latest_episodic_summary.generated_at": datetime.utcnow() - timedelta(hours=1)}}
+        )
+        summary_id = store(memory, docs_id, "second", 5)
+
+        task = Task(**memory.db.tasks.find_one({"_id": docs_id}))
+
+        assert task.latest_episodic_summary.summary == "second"
+        assert task.latest_episodic_summary.activity_count == 5
+        assert str(task.latest_episodic_summary.summary_id) == summary_id
+
+    def test_older_summary_does_not_replace_pointer(self, memory):
+        docs_id = memory.db.tasks.find_one()["_id"]
+        store(memory, docs_id, "newest", 5)
+        memory.db.tasks.update_one(
+            {"_id": docs_id},
+            {"$set": {"latest_episodic_summary.generated_at": datetime.utcnow() + timedelta(hours=1)}}
+        )
+
+        store(memory, docs_id, "late arrival", 3)
+
+        assert memory.db.tasks.find_one({"_id": docs_id})["latest_episodic_summary"]["summary"] == "newest"
+
+    def test_init_db_backfills_missing_pointers(self, memory, monkeypatch):
+        from scripts.setup import init_db
+
+        # mongomock's bulk_write predates the pymongo UpdateOne it is handed
+        def bulk_write(collection, requests, ordered=True):
+            modified = sum(collection.update_one(r._filter, r._doc).modified_count for r in requests)
+            return SimpleNamespace(modified_count=modified)
+
+        monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
+        docs_id, bug_id = [t["_id"] for t in memory.db.tasks.find()]
+        older_id = store(memory, docs_id, "older", 1)
+        memory.episodic.update_one(
+            {"_id": ObjectId(older_id)},
+            {"$set": {"generated_at": datetime.utcnow() - timedelta(hours=1)}}
+        )
+        store(memory, docs_id, "newest", 5)
+        memory.db.tasks.update_many({}, {"$unset": {"latest_episodic_summary": ""}})
+
+        assert init_db.backfill_episodic_summary_pointers(memory.db, batch_size=1) == 1
+        assert memory.db.tasks.find_one({"_id": docs_id})["latest_episodic_summary"]["summary"] == "newest"
+        assert "latest_episodic_summary" not in memory.db.tasks.find_one({"_id": bug_id})
+        assert init_db.backfill_episodic_summary_pointers(memory.db) == 0
@@ -0,0 +1,169 @@
+"""Tests for the concurrent, resumable eval comparison runner"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from evals.runner import ComparisonRunner, build_chains, is_rate_limited, retry_after_seconds
+from evals.test_suite import get_test_by_id
+
+CONFIGS = ["baseline", "all_context"]
+TEST_IDS = [11, 12, 19, 20, 29, 30, 31]
+
+
+class FakeCoordinator:
+    """Answers every message with a canned reply and records what it was sent"""
+
+    def __init__(self, fail_on=None, rate_limits=0):
+        self.calls = []
+        self.fail_on = fail_on
+        self.rate_limits = rate_limits
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def process_stream(self, user_message, conversation_history=None, optimizations=None, session_id=None):
+        with self.lock:
+            self.calls.append((user_message, list(conversation_history), session_id))
+            if self.rate_limits:
+                self.rate_limits -= 1
+                raise RateLimitError()
+        if user_message == self.fail_on:
+            raise RuntimeError("boom")
+        yield ("Let me check. ", None)
+        yield (f"reply to {user_message}", None)
+        yield ("", {"tokens_in": 10, "tools_called": ["search_tasks"], "response": f"reply to {user_message}"})
+
+
+class RateLimitError(Exception):
+    status_code = 429
+    response = SimpleNamespace(headers={"retry-after": "0"})
+
+
+class TestChains:
+    """Dependent tests share a chain; everything else runs on its own"""
+
+    def test_depends_on_builds_chains(self):
+        tests = [get_test_by_id(tid) for tid in TEST_IDS]
+        assert [[t.id for t in chain] for chain in build_chains(tests)] == [[11], [12], [19, 20], [29, 30, 31]]
+
+    def test_missing_dependency_starts_new_chain(self):
+        tests = [get_test_by_id(tid) for tid in (20, 30, 31)]
+        assert [[t.id for t in chain] for chain in build_chains(tests)] == [[20], [30, 31]]
+
+
+class TestParallelRun:
+    """Chains fan out across worker coordinators with isolated history"""
+
+    def test_workers_isolate_history_and_sessions(self):
+        built = []
+
+        def factory():
+            built.append(FakeCoordinator())
+            return built[-1]
+
+        runner = ComparisonRunner(None, coordinator_factory=factory)
+        run = runner.run_comparison(CONFIGS, test_ids=TEST_IDS, workers=3)
+
+        calls = [call for coordinator in built for call in coordinator.calls]
+        assert 1 <= len(built) <= 3
+        assert len(calls) == len(TEST_IDS) * len(CONFIGS)
+
+        # "Yes" only ever sees the turn it confirms, never another config's or chain's
+        confirmations = [history for message, history, _ in calls if message == "Yes"]
+        assert confirmations == [[
+            {"role": "user", "content": "I finished the debugging doc"},
+            {"role": "assistant", "content": "reply to I finished the debugging doc"},
+        ]] * 2
+        assert len({session for _, _, session in calls}) == 4 * len(CONFIGS)
+
+        assert [t.test_id for t in run.tests] == TEST_IDS
+        assert all(list(t.results_by_config) == CONFIGS for t in run.tests)
+        assert run.summary_by_config["baseline"]["pass_rate"] == 1.0
+        assert all(coordinator.closed for coordinator in built)
+
+    def test_progress_reported_on_calling_thread(self):
+        caller = threading.current_thread()
+        seen = []
+
+        def progress(current, total, message):
+            seen.append((current, total, threading.current_thread() is caller))
+
+        runner = ComparisonRunner(None, progress_callback=progress, coordinator_factory=FakeCoordinator)
+        runner.run_comparison(CONFIGS, test_ids=TEST_IDS, workers=2)
+
+        assert [current for current, _, _ in seen] == list(range(1, len(TEST_IDS) * len(CONFIGS) + 1))
+        assert all(on_caller for _, _, on_caller in seen)
+
+
+class TestBackoff:
+    """Rate-limited tests are retried; other errors fail immediately"""
+
+    def test_rate_limit_detection(self):
+        assert is_rate_limited(RateLimitError())
+        assert not is_rate_limited(RuntimeError("boom"))
+        assert retry_after_seconds(RateLimitError()) == 0.0
+        assert retry_after_seconds(RuntimeError()) is None
+
+    def test_rate_limited_test_is_retried(self):
+        coordinator = FakeCoordinator(rate_limits=2)
+        runner = ComparisonRunner(coordinator, max_retries=3, retry_backoff_seconds=0)
+
+        run = runner.run_comparison(["baseline"], test_ids=[11], workers=1)
+
+        result = run.tests[0].results_by_config["baseline"]
+        assert result.result == "pass" and result.retries == 2
+        assert len(coordinator.calls) == 3
+
+    def test_other_errors_are_not_retried(self):
+        coordinator = FakeCoordinator(fail_on="What are my tasks?")
+        runner = ComparisonRunner(coordinator, max_retries=3, retry_backoff_seconds=0)
+
+        run = runner.run_comparison(["baseline"], test_ids=[11], workers=1)
+
+        result = run.tests[0].results_by_config["baseline"]
+        assert result.error == "boom" and result.retries == 0
+        assert len(coordinator.calls) == 1
+
+
+@pytest.fixture
+def evals_db():
+    """Point evals storage at an in-memory database"""
+    mongomock = pytest.importorskip("mongomock")
+    from shared.db import mongodb
+
+    with mongodb.use_database(mongomock.MongoClient()["evals_test"]) as db:
+        yield db
+
+
+class TestResume:
+    """Results are saved as they finish so an interrupted run can resume"""
+
+    def test_resume_reruns_only_unfinished_chains(self, evals_db):
+        from evals import storage
+
+        # First attempt: the confirmation chain errors out
+        first = ComparisonRunner(FakeCoordinator(fail_on="Yes"))
+        run = first.run_comparison(CONFIGS, test_ids=TEST_IDS, workers=1, persist=True)
+
+        assert [r["run_id"] for r in storage.list_incomplete_runs()] == [run.run_id]
+        assert len(storage.load_partial_results(run.run_id)) == len(TEST_IDS)
+
+        # Resume: only the failed chain runs again, once per config
+        coordinator = FakeCoordinator()
+        resumed = ComparisonRunner(coordinator).run_comparison(
+            CONFIGS, test_ids=TEST_IDS, workers=1, resume_run_id=run.run_id
+        )
+
+        assert [message for message, _, _ in coordinator.calls] == [
+            "I finished the debugging doc", "Yes", "I finished the debugging doc", "Yes"
+        ]
+        assert all(r.error is None for t in resumed.tests for r in t.results_by_config.values())
+
+        storage.save_comparison_run(resumed)
+        assert storage.list_incomplete_runs() == []
+        assert evals_db.eval_comparison_runs.count_documents({}) == 1
+        assert "partial_results" not in storage.load_comparison_run(run.run_id)
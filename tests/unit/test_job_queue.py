@@ -0,0 +1,73 @@
+"""Tests for the keyed, coalescing background job queue"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from shared.job_queue import KeyedJobQueue
+
+
+@pytest.fixture
+def queue():
+    q = KeyedJobQueue(workers=2, max_retries=2, retry_backoff_seconds=0.01)
+    yield q
+    q.close(timeout=2)
+
+
+class TestKeyedJobQueue:
+    """Coalescing, retries and metrics"""
+
+    def test_pending_triggers_are_coalesced(self, queue):
+        gate = threading.Event()
+        started = threading.Event()
+        runs = []
+
+        # Occupy the key so later submissions stay pending
+        queue.submit(("task", 1), lambda: (started.set(), gate.wait(2), runs.append("first")))
+        assert started.wait(2)
+        queue.submit(("task", 1), lambda: runs.append("second"))
+        queue.submit(("task", 1), lambda: runs.append("third"))
+        gate.set()
+
+        assert queue.drain(timeout=2)
+        assert runs == ["first", "third"]
+        stats = queue.stats()
+        assert stats["coalesced"] == 1
+        assert stats["processed"] == 2
+        assert stats["depth"] == 0
+
+    def test_failures_are_retried(self, queue):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("llm timeout")
+
+        queue.submit(("project", 1), flaky)
+
+        assert queue.drain(timeout=2)
+        assert len(attempts) == 3
+        assert queue.stats()["retries"] == 2
+        assert queue.stats()["failed"] == 0
+
+    def test_permanent_failure_is_counted(self, queue):
+        queue.submit(("project", 2), MagicMock(side_effect=RuntimeError("down")))
+
+        assert queue.drain(timeout=2)
+        assert queue.stats()["failed"] == 1
+
+    def test_failure_logs_name_the_queue(self, monkeypatch):
+        import shared.job_queue as module
+
+        logger = MagicMock()
+        monkeypatch.setattr(module, "logger", logger)
+        queue = KeyedJobQueue(workers=1, max_retries=0, name="reembed")
+        queue.submit(("task", 3), MagicMock(side_effect=RuntimeError("voyage down")))
+
+        assert queue.drain(timeout=2)
+        queue.close(timeout=2)
+        message, name, key = logger.error.call_args[0][:3]
+        assert message.startswith("%s job %s failed")
+        assert (name, key) == ("reembed", ("task", 3))
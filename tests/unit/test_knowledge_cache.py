@@ -0,0 +1,88 @@
+"""Tests for the two-stage (header + payload) knowledge cache"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from bson import ObjectId
+
+from evals.fakes import HashEmbedder, mongomock_local_runner
+from memory.manager import MemoryManager, knowledge_query_hash
+from shared.vector_index import get_vector_index_registry, reset_vector_index_registry
+
+mongomock = pytest.importorskip("mongomock")
+
+PAYLOAD = "raw search results " * 500
+
+
+@pytest.fixture
+def memory():
+    """MemoryManager over an in-memory database with the local vector index"""
+    embed = MagicMock(side_effect=HashEmbedder(dimensions=64).embed_one)
+    with patch("shared.config.settings.vector_index_mode", "local"):
+        reset_vector_index_registry()
+        get_vector_index_registry().local_runner = mongomock_local_runner
+        yield MemoryManager(mongomock.MongoClient()["knowledge_test"], embedding_fn=embed)
+    reset_vector_index_registry()
+
+
+class TestStorage:
+    """Lookups read a small header; the payload lives in its own collection"""
+
+    def test_header_and_payload_share_id(self, memory):
+        knowledge_id = memory.cache_knowledge("u1", "MongoDB 8 release notes", PAYLOAD, summary="Faster")
+
+        header = memory.semantic.find_one({"_id": ObjectId(knowledge_id)})
+        payload = memory.knowledge_payloads.find_one({"_id": ObjectId(knowledge_id)})
+
+        assert "result" not in header
+        assert header["query_hash"] == knowledge_query_hash("mongodb 8  release notes ")
+        assert payload["result"] == PAYLOAD and payload["expires_at"] == header["expires_at"]
+
+    def test_legacy_inline_result_is_still_readable(self, memory):
+        legacy_id = memory.semantic.insert_one({"semantic_type": "knowledge", "result": "old"}).inserted_id
+        assert memory.get_knowledge_payload(legacy_id) == "old"
+
+    def test_clear_removes_payloads(self, memory):
+        memory.cache_knowledge("u1", "query", PAYLOAD)
+        memory.clear_knowledge_cache("u1")
+        assert memory.knowledge_payloads.count_documents({}) == 0
+
+
+class TestLookup:
+    """Exact hash first, then vector search, payload only for the chosen hit"""
+
+    def test_exact_query_skips_embedding(self, memory):
+        memory.cache_knowledge("u1", "What's new in MongoDB 8?", PAYLOAD, embedding=[0.0] * 64)
+
+        hit = memory.find_cached_knowledge("u1", "  what's new in  mongodb 8? ")
+
+        assert hit["match"] == "exact" and hit["score"] == 1.0
+        assert "result" not in hit and "embedding" not in hit
+        memory.embed.assert_not_called()
+
+    def test_similar_query_uses_vector_search(self, memory):
+        memory.cache_knowledge("u1", "latest MongoDB vector search features", PAYLOAD)
+
+        hit = memory.find_cached_knowledge("u1", "MongoDB vector search features")
+
+        assert hit["match"] == "vector" and 0 < hit["score"] < 1
+        assert "result" not in hit and "embedding" not in hit
+
+    def test_get_cached_knowledge_attaches_payload(self, memory):
+        memory.cache_knowledge("u1", "MongoDB 8 release notes", PAYLOAD)
+
+        doc = memory.get_cached_knowledge("u1", "MongoDB 8 release notes")
+
+        assert doc["result"] == PAYLOAD
+        assert memory.semantic.find_one({"_id": doc["_id"]})["times_accessed"] == 1
+
+    def test_expired_entries_are_ignored(self, memory):
+        knowledge_id = memory.cache_knowledge("u1", "MongoDB 8 release notes", PAYLOAD)
+        memory.semantic.update_one(
+            {"_id": ObjectId(knowledge_id)},
+            {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(days=1)}}
+        )
+
+        assert memory.find_cached_knowledge("u1", "MongoDB 8 release notes") is None
+        assert memory.find_cached_knowledge("u1", "MongoDB 8 release notes", fresh_only=False)["match"] == "exact"
@@ -0,0 +1,127 @@
+"""Tests for lazy, side-effect-free startup"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from memory.manager import MemoryManager
+from shared.services import LazyService, ServiceContainer
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+IMPORT_PROBE = """
+import json
+import pymongo
+from pymongo.collection import Collection
+
+counts = {"clients": 0, "create_index": 0}
+client_init = pymongo.MongoClient.__init__
+
+def counting_init(self, *args, **kwargs):
+    counts["clients"] += 1
+    client_init(self, *args, **kwargs)
+
+def counting_create_index(self, *args, **kwargs):
+    counts["create_index"] += 1
+
+pymongo.MongoClient.__init__ = counting_init
+Collection.create_index = counting_create_index
+Collection.create_indexes = counting_create_index
+
+import agents.coordinator
+import shared.db
+
+from shared.services import services
+counts["built"] = services.built()
+print(json.dumps(counts))
+"""
+
+
+class TestLazyService:
+    """Proxies build their object once, on first use"""
+
+    def test_builds_on_first_access_only(self):
+        calls = []
+        proxy = LazyService("thing", lambda: calls.append(1) or MagicMock(value=3))
+
+        assert calls == []
+        assert proxy.value == 3 and proxy.value == 3
+        assert calls == [1]
+
+    def test_setattr_forwards_to_instance(self):
+        instance = MagicMock()
+        proxy = LazyService("thing", lambda: instance)
+
+        proxy.llm = "mock"
+
+        assert instance.llm == "mock"
+
+    def test_failed_factory_is_retried(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("down")
+            return MagicMock(ok=True)
+
+        proxy = LazyService("thing", factory)
+        with pytest.raises(ConnectionError):
+            proxy.ok
+        assert proxy.ok is True
+
+    def test_none_service_is_falsy(self):
+        assert not LazyService("memory", lambda: None)
+
+    def test_container_tracks_and_resets(self):
+        container = ServiceContainer()
+        proxy = container.register("a", object)
+        container.register("b", object)
+
+        first = container.get("a")
+        assert container.built() == ["a"]
+
+        container.reset()
+        assert container.built() == []
+        assert proxy._resolve() is not first
+
+    def test_override_restores_previous_state(self):
+        container = ServiceContainer()
+        proxy = container.register("llm", lambda: "real")
+        fake = MagicMock()
+
+        with container.override(llm=fake):
+            assert container.get("llm") is fake
+        assert container.built() == []
+        assert proxy._resolve() == "real"
+
+
+class TestNoStartupIO:
+    """Construction and import issue no database commands"""
+
+    def test_memory_manager_creates_no_indexes(self):
+        db = MagicMock()
+
+        MemoryManager(db=db)
+
+        for collection in (db.memory_episodic, db.memory_semantic, db.memory_procedural):
+            collection.create_index.assert_not_called()
+
+    def test_import_coordinator_is_side_effect_free(self, tmp_path):
+        env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+        )
+        assert result.returncode == 0, result.stderr
+
+        counts = json.loads(result.stdout.strip().splitlines()[-1])
+        assert counts["clients"] == 0
+        assert counts["create_index"] == 0
+        assert counts["built"] == []
+        assert not (tmp_path / "logs").exists()
@@ -0,0 +1,105 @@
+"""Tests for queued, sampled and structured logging"""
+
+import json
+import logging
+import logging.handlers
+import queue
+
+import pytest
+
+import shared.logger as logger_module
+from shared.logger import (
+    ContextFilter,
+    JsonFormatter,
+    SamplingFilter,
+    _DeferredQueueHandler,
+    get_log_context,
+    log_context,
+    parse_sample_rates,
+    set_log_context,
+)
+
+
+def make_record(name="retrieval", level=logging.DEBUG, msg="hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestSampling:
+    """Chatty loggers keep a fraction of DEBUG/INFO records"""
+
+    def test_parse_rates(self):
+        assert parse_sample_rates("retrieval=0.1, mcp_agent=2,bad,x=abc") == {"retrieval": 0.1, "mcp_agent": 1.0}
+        assert parse_sample_rates("") == {}
+
+    def test_rate_applies_to_logger_and_children(self):
+        sampler = SamplingFilter({"retrieval": 0.0})
+
+        assert not sampler.filter(make_record("retrieval"))
+        assert not sampler.filter(make_record("retrieval.fuzzy", level=logging.INFO))
+        assert sampler.filter(make_record("coordinator"))
+
+    def test_warnings_always_kept(self):
+        sampler = SamplingFilter({"retrieval": 0.0})
+        assert sampler.filter(make_record(level=logging.WARNING))
+
+
+@pytest.fixture
+def clean_context():
+    """Start from an empty log context (earlier tests may have run a turn)"""
+    token = logger_module._log_context.set({})
+    yield
+    logger_module._log_context.reset(token)
+
+
+@pytest.mark.usefixtures("clean_context")
+class TestContext:
+    """Records carry the turn/session IDs of the current request"""
+
+    def test_json_record_includes_context(self):
+        record = make_record()
+        with log_context(turn_id="t-1", session_id="s-1"):
+            ContextFilter().filter(record)
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "hello world"
+        assert entry["turn_id"] == "t-1" and entry["session_id"] == "s-1"
+        assert "turn" not in entry
+
+    def test_context_is_restored(self):
+        with log_context(session_id="outer"):
+            with log_context(turn_id="inner"):
+                assert get_log_context() == {"session_id": "outer", "turn_id": "inner"}
+            assert get_log_context() == {"session_id": "outer"}
+        assert get_log_context() == {}
+
+    def test_none_removes_field(self):
+        set_log_context(turn_id="t-1", session_id="s-1")
+        set_log_context(turn_id=None)
+        assert get_log_context() == {"session_id": "s-1"}
+
+
+class TestQueueHandler:
+    """Request threads enqueue; the listener formats and writes"""
+
+    def test_args_are_merged_at_call_time(self):
+        output = ListHandler()
+        handler = _DeferredQueueHandler(queue.SimpleQueue())
+        listener = logging.handlers.QueueListener(handler.queue, output)
+        listener.start()
+
+        items = ["a"]
+        handler.handle(make_record(msg="items=%s", args=(items,)))
+        items.append("b")
+        listener.stop()
+
+        assert output.records[0].getMessage() == "items=['a']"
@@ -0,0 +1,99 @@
+"""Tests for reusing one request embedding across MCPAgent.handle_request"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from agents.mcp_agent import MCPAgent
+
+
+VECTOR = [0.1] * 8
+
+
+@pytest.fixture
+def agent():
+    """MCPAgent with mocked memory, discovery store and MCP execution"""
+    embed = MagicMock(return_value=VECTOR)
+    memory = MagicMock()
+    memory.find_cached_knowledge.return_value = None
+
+    agent = MCPAgent(db=MagicMock(), memory_manager=memory, embedding_fn=embed)
+    agent._initialized = True
+    agent.available_tools = {"tavily": [{"name": "tavily-search"}]}
+    agent.discovery_store = MagicMock()
+    agent.discovery_store.find_similar_discovery.return_value = None
+    agent.discovery_store.log_discovery.return_value = "discovery-1"
+    agent._figure_out_solution = AsyncMock(return_value={
+        "mcp_server": "tavily", "tool_used": "tavily-search", "arguments": {"query": "q"}
+    })
+    agent._execute_solution = AsyncMock(return_value={"success": True, "content": "results"})
+    agent._summarize_search_results = AsyncMock(return_value="summary")
+    return agent
+
+
+class TestSingleEmbedding:
+    """One embed call per request, threaded through every lookup and write"""
+
+    @pytest.mark.asyncio
+    async def test_new_discovery_embeds_once(self, agent):
+        result = await agent.handle_request("what's new in MongoDB 8", "web_search", user_id="u1")
+
+        assert result["success"] is True
+        agent.embed.assert_called_once_with("what's new in MongoDB 8")
+
+        search_kwargs = agent.memory.find_cached_knowledge.call_args.kwargs
+        assert search_kwargs["query_embedding"] is VECTOR
+        find_kwargs = agent.discovery_store.find_similar_discovery.call_args.kwargs
+        assert find_kwargs["query_embedding"] is VECTOR
+        assert find_kwargs["record_usage"] is False
+        assert agent.discovery_store.log_discovery.call_args.kwargs["request_embedding"] is VECTOR
+        assert agent.memory.cache_knowledge.call_args.kwargs["embedding"] is VECTOR
+        agent.discovery_store.record_usage.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_reused_discovery_records_usage(self, agent):
+        previous = {
+            "_id": "d1", "success": True, "times_used": 3,
+            "solution": {"mcp_server": "tavily", "tool_used": "tavily-search", "arguments": {}},
+        }
+        agent.discovery_store.find_similar_discovery.return_value = previous
+
+        result = await agent.handle_request("what's new in MongoDB 8", "web_search", user_id="u1")
+
+        assert result["source"] == "discovery_reuse"
+        agent.discovery_store.record_usage.assert_called_once_with(previous)
+        agent._figure_out_solution.assert_not_called()
+        agent.embed.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_falls_back(self, agent):
+        agent.embed.side_effect = RuntimeError("voyage down")
+
+        await agent.handle_request("query", "web_search", user_id="u1")
+
+        assert agent.memory.find_cached_knowledge.call_args.kwargs["query_embedding"] is None
+        assert agent.discovery_store.log_discovery.call_args.kwargs["request_embedding"] is None
+
+
+class TestKnowledgeCacheHit:
+    """Cache hits read the full payload only when there is no summary"""
+
+    @pytest.mark.asyncio
+    async def test_summary_hit_skips_payload(self, agent):
+        agent.memory.find_cached_knowledge.return_value = {"_id": "k1", "score": 1.0, "summary": "short"}
+
+        result = await agent.handle_request("query", "web_search", user_id="u1")
+
+        assert result["source"] == "knowledge_cache" and result["result"] == ["short"]
+        agent.memory.get_knowledge_payload.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unsummarized_hit_reads_payload(self, agent):
+        agent.memory.find_cached_knowledge.return_value = {"_id": "k1", "score": 0.9, "summary": None}
+        agent.memory.get_knowledge_payload.return_value = "full results"
+
+        result = await agent.handle_request("query", "web_search", user_id="u1")
+
+        assert result["result"] == ["full results"]
+        agent.memory.get_knowledge_payload.assert_called_once_with("k1")
+        agent._execute_solution.assert_not_called()
@@ -0,0 +1,143 @@
+"""Tests for the materialized memory and tool discovery counters"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from memory.counters import COUNTERS_COLLECTION, decode_counter_key, encode_counter_key
+from memory.manager import MemoryManager
+from memory.tool_discoveries import ToolDiscoveryStore
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def db():
+    """In-memory database"""
+    return mongomock.MongoClient()["counters_test"]
+
+
+@pytest.fixture
+def memory(db):
+    """MemoryManager over the in-memory database"""
+    return MemoryManager(db)
+
+
+def record(memory, action_type):
+    return memory.record_action("u1", "s1", action_type, "task", {"task_title": "Docs"},
+                                generate_embedding=False)
+
+
+def without_timestamps(counts):
+    return {k: v for k, v in counts.items() if k not in ("_id", "reconciled_at", "stale_at")}
+
+
+class TestMemoryCounters:
+    """Writes $inc the user's counters; stats read them back"""
+
+    def test_writes_maintain_counts(self, memory):
+        record(memory, "complete")
+        record(memory, "complete")
+        record(memory, "create")
+        memory.record_preference("u1", "focus_project", "Voice Agent")
+        memory.record_preference("u1", "focus_project", "AgentOps")  # update, not a new doc
+        memory.record_rule("u1", "done", "complete_current_task")
+        memory.cache_knowledge("u1", "MongoDB 8 release notes", "results")
+
+        stats = memory.get_memory_stats("s1", "u1")
+
+        assert stats["by_type"]["episodic_memory"] == 3
+        assert stats["by_type"]["semantic_memory"] == 2
+        assert stats["by_type"]["procedural_memory"] == 1
+        assert stats["action_counts"] == {"complete": 2, "create": 1}
+        assert stats["knowledge_cache"] == {"total": 1, "fresh": 1, "expired": 0}
+
+        # The maintained counters match a full recount
+        maintained = without_timestamps(memory.get_memory_counts("u1"))
+        assert maintained == without_timestamps(memory.reconcile_memory_counts("u1"))
+
+    def test_deletes_decrement(self, memory):
+        memory.record_preference("u1", "focus_project", "Voice Agent")
+        memory.record_rule("u1", "done", "complete_current_task")
+        memory.cache_knowledge("u1", "query one", "results")
+        memory.cache_knowledge("u1", "query two", "results")
+        memory.get_memory_stats("s1", "u1")
+
+        memory.delete_preference("u1", "focus_project")
+        memory.delete_rule("u1", "done")
+        memory.clear_knowledge_cache("u1")
+
+        stats = memory.get_memory_stats("s1", "u1")
+        assert stats["long_term_count"] == 0
+        assert stats["knowledge_cache"] == {"total": 0, "fresh": 0, "expired": 0}
+
+    def test_fresh_counters_skip_collection_scans(self, memory):
+        record(memory, "complete")
+        memory.get_memory_stats("s1", "u1")
+
+        # Written around the manager: invisible until the next reconcile
+        memory.episodic.insert_one({"user_id": "u1", "action_type": "start"})
+        assert memory.get_memory_stats("s1", "u1")["by_type"]["episodic_memory"] == 1
+
+        memory.db[COUNTERS_COLLECTION].update_one(
+            {"_id": "user:u1"},
+            {"$set": {"reconciled_at": datetime.utcnow() - timedelta(days=1)}}
+        )
+        stats = memory.get_memory_stats("s1", "u1")
+        assert stats["by_type"]["episodic_memory"] == 2
+        assert stats["action_counts"] == {"complete": 1, "start": 1}
+
+    def test_knowledge_expiry_triggers_reconcile(self, memory):
+        knowledge_id = memory.cache_knowledge("u1", "MongoDB 8 release notes", "results")
+        memory.get_knowledge_stats("u1")
+
+        past = datetime.utcnow() - timedelta(minutes=1)
+        memory.semantic.update_one({"_id": ObjectId(knowledge_id)}, {"$set": {"expires_at": past}})
+        memory.db[COUNTERS_COLLECTION].update_one({"_id": "user:u1"}, {"$set": {"stale_at": past}})
+
+        assert memory.get_knowledge_stats("u1") == {"total": 1, "fresh": 0, "expired": 1}
+        assert "stale_at" not in memory.get_memory_counts("u1")
+
+
+class TestDiscoveryCounters:
+    """Discovery stats come from one counters document"""
+
+    def test_counts_follow_writes(self, db):
+        store = ToolDiscoveryStore(db)
+        first = store.log_discovery(
+            "latest AI news", "web_search",
+            {"mcp_server": "tavily", "tool_used": "tavily-search", "arguments": {}},
+            "...", True, 120
+        )
+        store.log_discovery(
+            "count my docs", "data_query",
+            {"mcp_server": "mongo.db", "tool_used": "find", "arguments": {}},
+            "...", False, 80
+        )
+        store.record_usage(store.collection.find_one({"_id": ObjectId(first)}))
+        store.record_usage(store.collection.find_one({"_id": ObjectId(first)}))
+        assert store.mark_as_promoted(first, notes="static tool")
+        assert not store.mark_as_promoted(first, notes="static tool")
+
+        stats = store.get_stats()
+
+        assert stats == {
+            "total_discoveries": 2,
+            "successful": 1,
+            "failed": 1,
+            "promoted": 1,
+            "avg_uses": 2.0,
+            "most_used_server": "tavily",
+            "most_used_tool": "tavily-search"
+        }
+        assert without_timestamps(store.counters.read("tool_discoveries", None)) == \
+            without_timestamps(store.reconcile_stats())
+
+        store.delete_discovery(first)
+        stats = store.get_stats()
+        assert (stats["total_discoveries"], stats["promoted"], stats["most_used_server"]) == (1, 0, "mongo.db")
+
+    def test_counter_keys_escape_dots(self):
+        assert "." not in encode_counter_key("mongo.db$1")
+        assert decode_counter_key(encode_counter_key("mongo.db$1")) == "mongo.db$1"
@@ -0,0 +1,106 @@
+"""Tests for the memoized per-user memory snapshot"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.coordinator import CoordinatorAgent
+from memory.manager import MemoryManager
+
+
+@pytest.fixture
+def memory():
+    """MemoryManager over a mocked database"""
+    manager = MemoryManager(MagicMock())
+    manager.semantic.find.return_value.sort.return_value = [
+        {"_id": "p1", "key": "focus_project", "value": "Voice Agent", "confidence": 0.9}
+    ]
+    rules = [{"_id": "r1", "trigger_pattern": "done", "action_type": "complete_current_task", "confidence": 0.8}]
+    workflows = [{"_id": "w1", "name": "Create and start", "description": "Create a task then start it"}]
+    manager.procedural.find.side_effect = lambda query: MagicMock(
+        sort=MagicMock(return_value=workflows if query.get("rule_type") == "workflow" else rules)
+    )
+    manager.semantic.delete_one.return_value.deleted_count = 1
+    manager.procedural.delete_one.return_value.deleted_count = 1
+    return manager
+
+
+def read_count(memory):
+    return memory.semantic.find.call_count + memory.procedural.find.call_count
+
+
+class TestMemorySnapshot:
+    """Versioned snapshot caching and invalidation"""
+
+    def test_repeat_reads_hit_cache(self, memory):
+        first = memory.get_memory_snapshot("u1")
+        reads = read_count(memory)
+
+        second = memory.get_memory_snapshot("u1")
+
+        assert second is first
+        assert read_count(memory) == reads
+        assert first["preferences"][0]["key"] == "focus_project"
+
+    @pytest.mark.parametrize("write", [
+        lambda m: m.record_preference("u1", "priority_filter", "high"),
+        lambda m: m.delete_preference("u1", "focus_project"),
+        lambda m: m.record_rule("u1", "next", "start_next_task"),
+        lambda m: m.delete_rule("u1", "done"),
+    ])
+    def test_writes_bump_version(self, memory, write):
+        memory.semantic.find_one.return_value = None
+        memory.procedural.find_one.return_value = None
+        before = memory.get_memory_snapshot("u1")
+
+        write(memory)
+        after = memory.get_memory_snapshot("u1")
+
+        assert after is not before
+        assert after["version"] == before["version"] + 1
+
+    def test_usage_counter_bumps_keep_snapshot(self, memory):
+        memory.procedural.find_one.return_value = {"_id": "r1", "trigger": "done"}
+        before = memory.get_memory_snapshot("u1")
+
+        memory.get_procedural_rule("u1", trigger="done")
+
+        assert memory.procedural.update_one.called
+        assert memory.get_memory_snapshot("u1") is before
+
+    def test_other_users_unaffected(self, memory):
+        other = memory.get_memory_snapshot("u2")
+        memory.invalidate_memory_snapshot("u1")
+        assert memory.get_memory_snapshot("u2") is other
+
+    def test_expires_after_ttl(self, memory, monkeypatch):
+        from shared.config import settings
+        import memory.manager as module
+
+        clock = [100.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+
+        first = memory.get_memory_snapshot("u1")
+        clock[0] += settings.memory_snapshot_ttl_seconds + 1
+
+        assert memory.get_memory_snapshot("u1") is not first
+
+
+class TestContextInjectionSnapshot:
+    """Coordinator reads long-term memory from the snapshot"""
+
+    def test_steady_state_turns_skip_mongo(self, memory):
+        coordinator = CoordinatorAgent(memory_manager=memory)
+        coordinator.session_id = "s1"
+        coordinator.user_id = "u1"
+        coordinator.memory_ops = {}
+
+        first = coordinator._build_context_injection()
+        reads = read_count(memory)
+        second = coordinator._build_context_injection()
+
+        assert "focus_project: Voice Agent" in first
+        assert 'When user says "done"' in first
+        assert "Create and start" in first
+        assert second == first
+        assert read_count(memory) == reads
@@ -207,6 +207,7 @@ class TestMemoryStats:
         self.db.memory_episodic.delete_many({"user_id": self.user_id})
         self.db.memory_semantic.delete_many({"user_id": self.user_id})
         self.db.memory_procedural.delete_many({"user_id": self.user_id})
+        self.memory.reconcile_memory_counts(self.user_id)  # Counters skip direct deletes
         self.memory.clear_session(self.session_id)  # Clears in-memory working memory
 
     def test_memory_stats_by_type(self):
@@ -0,0 +1,110 @@
+"""Tests for concurrent execution of read-only tool calls"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.coordinator import CoordinatorAgent
+
+
+def tool_block(name, block_id):
+    return SimpleNamespace(type="tool_use", name=name, input={"id": block_id}, id=block_id)
+
+
+@pytest.fixture
+def coordinator():
+    """Coordinator whose tools sleep briefly and record what ran concurrently"""
+    agent = CoordinatorAgent()
+    agent.optimizations = {}
+    agent.current_turn = {"tool_calls": [], "tool_wall_ms": 0}
+    agent.events = []
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def fake_run_tool(tool_name, tool_input, pending_records=None):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            agent.events.append(("start", tool_input["id"]))
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+            agent.events.append(("end", tool_input["id"]))
+        record = {"name": tool_name, "duration_ms": 50}
+        return {"success": True, "id": tool_input["id"]}, {"tool_name": tool_name}, record
+
+    agent._run_tool = fake_run_tool
+    agent.active = active
+    return agent
+
+
+class TestParallelTools:
+    """_execute_tool_blocks fan-out"""
+
+    def test_read_only_tools_run_concurrently_in_order(self, coordinator):
+        blocks = [tool_block("search_tasks", "a"), tool_block("get_projects", "b"), tool_block("search_knowledge", "c")]
+
+        results = coordinator._execute_tool_blocks(blocks)
+
+        assert [r["id"] for r, _ in results] == ["a", "b", "c"]
+        assert coordinator.active["peak"] == 3
+        assert [tc["name"] for tc in coordinator.current_turn["tool_calls"]] == ["search_tasks", "get_projects", "search_knowledge"]
+        starts = [coordinator.events.index(("start", block_id)) for block_id in "abc"]
+        first_end = min(coordinator.events.index(("end", block_id)) for block_id in "abc")
+        assert max(starts) < first_end
+
+    def test_mutating_tool_is_a_barrier(self, coordinator):
+        blocks = [tool_block("get_tasks", "a"), tool_block("complete_task", "b"), tool_block("get_tasks", "c")]
+
+        coordinator._execute_tool_blocks(blocks)
+
+        assert coordinator.active["peak"] == 1
+        assert coordinator.events.index(("end", "a")) < coordinator.events.index(("start", "b"))
+        assert coordinator.events.index(("end", "b")) < coordinator.events.index(("start", "c"))
+
+    def test_parallel_tools_can_be_disabled(self, coordinator):
+        coordinator.optimizations = {"parallel_tools": False}
+        coordinator._execute_tool_blocks([tool_block("get_tasks", "a"), tool_block("get_projects", "b")])
+
+        assert coordinator.active["peak"] == 1
+
+    def test_parallel_searches_record_on_calling_thread_in_order(self):
+        agent = CoordinatorAgent()
+        agent.optimizations = {}
+        agent.current_turn = {"tool_calls": [], "tool_wall_ms": 0}
+        agent.session_id = "session-1"
+        agent.memory_config = {"long_term": True}
+        agent.memory = MagicMock()
+        agent.retrieval_agent = MagicMock()
+        agent.retrieval_agent.hybrid_search_tasks.return_value = []
+        agent.retrieval_agent.hybrid_search_projects.return_value = []
+        recorded = []
+        agent.memory.record_action.side_effect = lambda **kwargs: recorded.append(
+            (threading.current_thread(), kwargs["entity"]["query"])
+        )
+        blocks = [
+            SimpleNamespace(type="tool_use", name="search_tasks", input={"query": "first"}, id="a"),
+            SimpleNamespace(type="tool_use", name="search_projects", input={"query": "second"}, id="b"),
+            SimpleNamespace(type="tool_use", name="search_tasks", input={"query": "third"}, id="c"),
+        ]
+
+        try:
+            agent._execute_tool_blocks(blocks)
+        finally:
+            agent.close()
+
+        assert [query for _, query in recorded] == ["first", "second", "third"]
+        assert all(thread is threading.current_thread() for thread, _ in recorded)
+        assert agent.memory_ops["action_recorded"] is True
+
+    def test_close_shuts_down_tool_pool(self, coordinator):
+        coordinator._execute_tool_blocks([tool_block("get_tasks", "a"), tool_block("get_projects", "b")])
+        pool = coordinator._tool_pool
+
+        coordinator.close()
+
+        assert coordinator._tool_pool is None
+        assert pool._shutdown
@@ -0,0 +1,109 @@
+"""Tests for project name resolution through name_key and the name -> id map"""
+
+import pytest
+
+from shared import db as shared_db
+from shared.db import (
+    PROJECTS_COLLECTION,
+    create_project,
+    get_project_by_name,
+    mongodb,
+    resolve_project_id,
+    resolve_project_ids,
+    update_project,
+)
+from shared.models import Project, normalize_project_name
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def db():
+    """Point the shared helpers at an in-memory database"""
+    with mongodb.use_database(mongomock.MongoClient()["project_names_test"]) as db:
+        yield db
+
+
+def count_finds(db, monkeypatch):
+    """Count find() calls against the projects collection"""
+    calls = []
+    collection = db[PROJECTS_COLLECTION]
+    original = collection.find
+
+    def find(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(collection, "find", find)
+    monkeypatch.setattr(shared_db, "get_collection", lambda name: db[name])
+    return calls
+
+
+class TestNameKey:
+    """Projects store a normalized copy of their name"""
+
+    def test_normalize(self):
+        assert normalize_project_name("  Voice   Agent ") == "voice agent"
+        assert normalize_project_name("STRASSE") == normalize_project_name("straße")
+
+    def test_create_and_rename_maintain_name_key(self, db):
+        project_id = create_project(Project(name="Voice Agent"))
+        assert db.projects.find_one({"_id": project_id})["name_key"] == "voice agent"
+
+        update_project(project_id, {"name": "Voice Agent v2"}, "renamed")
+        assert db.projects.find_one({"_id": project_id})["name_key"] == "voice agent v2"
+
+
+class TestResolveProjectIds:
+    """Exact case-insensitive lookups, batched and cached"""
+
+    def test_resolves_case_and_whitespace_insensitively(self, db):
+        project_id = create_project(Project(name="Voice Agent"))
+
+        assert resolve_project_id("voice  AGENT") == project_id
+        assert resolve_project_id("Voice") is None
+
+    def test_bulk_lookup_is_one_query_then_cached(self, db, monkeypatch):
+        voice = create_project(Project(name="Voice Agent"))
+        agentops = create_project(Project(name="AgentOps"))
+        finds = count_finds(db, monkeypatch)
+
+        resolved = resolve_project_ids(["Voice Agent", "agentops", "Missing"])
+        assert resolved == {"Voice Agent": voice, "agentops": agentops, "Missing": None}
+        assert len(finds) == 1
+
+        assert resolve_project_ids(["voice agent", "AgentOps"]) == {"voice agent": voice, "AgentOps": agentops}
+        assert len(finds) == 1
+
+    def test_rename_invalidates(self, db):
+        project_id = create_project(Project(name="Voice Agent"))
+        assert resolve_project_id("Voice Agent") == project_id
+
+        update_project(project_id, {"name": "Speech Agent"}, "renamed")
+
+        assert resolve_project_id("Voice Agent") is None
+        assert resolve_project_id("speech agent") == project_id
+
+    def test_prefers_non_test_projects(self, db):
+        db.projects.insert_one({"name": "Demo", "name_key": "demo", "is_test": True})
+        real = create_project(Project(name="Demo"))
+
+        assert resolve_project_id("demo") == real
+
+
+class TestGetProjectByName:
+    """Exact match through the resolver, then an escaped partial match"""
+
+    def test_exact_then_partial(self, db):
+        exact = create_project(Project(name="Voice Agent"))
+        create_project(Project(name="Voice Agent Extras"))
+
+        assert get_project_by_name("voice agent").id == exact
+        assert get_project_by_name("Extras").name == "Voice Agent Extras"
+
+    def test_regex_characters_are_literal(self, db):
+        create_project(Project(name="C++ (legacy) tools"))
+
+        assert get_project_by_name("c++ (legacy) TOOLS").name == "C++ (legacy) tools"
+        assert get_project_by_name("legacy").name == "C++ (legacy) tools"
+        assert get_project_by_name(".*") is None
@@ -0,0 +1,76 @@
+"""Tests for the bulk sidebar loader in shared.db"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from bson import ObjectId
+
+import shared.db as db
+from shared.models import Task
+
+
+def cursor(docs):
+    """find() result whose sort() returns the same documents"""
+    result = MagicMock()
+    result.sort.return_value = iter(docs)
+    return result
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    """Mock projects/tasks collections with two projects and one orphan task"""
+    p1, p2 = ObjectId(), ObjectId()
+    projects = MagicMock()
+    projects.find.side_effect = lambda *a, **k: cursor([
+        {"_id": p1, "name": "Alpha"},
+        {"_id": p2, "name": "Beta"},
+    ])
+    tasks = MagicMock()
+    tasks.find.side_effect = lambda *a, **k: cursor([
+        {"_id": ObjectId(), "title": "a1", "project_id": p1},
+        {"_id": ObjectId(), "title": "loose", "project_id": None},
+        {"_id": ObjectId(), "title": "a2", "project_id": p1},
+    ])
+    by_name = {db.PROJECTS_COLLECTION: projects, db.TASKS_COLLECTION: tasks}
+    monkeypatch.setattr(db, "get_collection", lambda name: by_name[name])
+    db.invalidate_projects_with_tasks_cache()
+    yield projects, tasks
+    db.invalidate_projects_with_tasks_cache()
+
+
+class TestGetProjectsWithTasks:
+    """Bulk loading, projection and caching"""
+
+    def test_groups_tasks_with_two_queries(self, collections):
+        projects, tasks = collections
+
+        result = db.get_projects_with_tasks()
+
+        assert [item["project"].name if item["project"] else None for item in result] == ["Alpha", "Beta", None]
+        assert [t.title for t in result[0]["tasks"]] == ["a1", "a2"]
+        assert result[1]["tasks"] == []
+        assert [t.title for t in result[2]["tasks"]] == ["loose"]
+        assert projects.find.call_count == 1
+        assert tasks.find.call_count == 1
+
+    def test_embeddings_are_not_fetched(self, collections):
+        projects, tasks = collections
+        db.get_projects_with_tasks()
+
+        for collection in (projects, tasks):
+            projection = collection.find.call_args.args[1]
+            assert "embedding" not in projection
+            assert "activity_log" not in projection
+
+    def test_cached_until_write(self, collections, monkeypatch):
+        projects, tasks = collections
+        db.get_projects_with_tasks()
+        db.get_projects_with_tasks()
+        assert projects.find.call_count == 1
+
+        tasks.insert_one.return_value = MagicMock(inserted_id=ObjectId())
+        monkeypatch.setattr(db, "_maybe_generate_task_episodic_summary", lambda task_id: None)
+        db.create_task(Task(title="new"))
+
+        db.get_projects_with_tasks()
+        assert projects.find.call_count == 2
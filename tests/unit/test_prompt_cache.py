@@ -0,0 +1,138 @@
+"""Tests for layered system prompts and per-layer cache accounting"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from shared.llm import LLMService
+from shared.prompt_cache import (
+    LAYER_INSTRUCTIONS,
+    LAYER_MESSAGES,
+    LAYER_SESSION,
+    LAYER_TOOLS,
+    LAYER_USER_MEMORY,
+    PromptCacheStats,
+    PromptLayer,
+    attribute_cache_usage,
+    build_cached_prompt,
+    layer_breakdown,
+)
+
+TOOLS = [{"name": "get_tasks"}, {"name": "search_tasks"}]
+LAYERS = [
+    PromptLayer(LAYER_USER_MEMORY, "<memory_context>prefs</memory_context>"),
+    PromptLayer(LAYER_SESSION, "<session_context>current task</session_context>", cache=False),
+]
+
+
+def usage(read=0, creation=0, uncached=0):
+    return SimpleNamespace(
+        cache_read_input_tokens=read,
+        cache_creation_input_tokens=creation,
+        input_tokens=uncached
+    )
+
+
+class TestBuildCachedPrompt:
+    """Breakpoint placement"""
+
+    def test_breakpoint_per_stable_layer(self):
+        tools, system = build_cached_prompt(TOOLS, "instructions", LAYERS)
+
+        assert "cache_control" not in tools[0]
+        assert tools[-1]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in TOOLS[-1]  # caller's schemas untouched
+
+        assert [block["text"] for block in system] == ["instructions"] + [layer.text for layer in LAYERS]
+        assert ["cache_control" in block for block in system] == [True, True, False]
+
+    def test_empty_layers_skipped_and_breakpoints_capped(self):
+        layers = [PromptLayer(f"l{i}", f"text {i}") for i in range(5)] + [PromptLayer("empty", "")]
+        tools, system = build_cached_prompt(TOOLS, "instructions", layers)
+
+        assert len(system) == 6
+        marked = sum("cache_control" in block for block in system) + ("cache_control" in tools[-1])
+        assert marked == 4
+
+    def test_caching_disabled_joins_text(self):
+        tools, system = build_cached_prompt(TOOLS, "instructions", LAYERS, cache_prompts=False)
+
+        assert tools is TOOLS
+        assert system == "instructions" + LAYERS[0].text + LAYERS[1].text
+
+
+class TestAttributeCacheUsage:
+    """Spreading response totals over layers"""
+
+    breakdown = [
+        (LAYER_TOOLS, 1000, True),
+        (LAYER_INSTRUCTIONS, 500, True),
+        (LAYER_USER_MEMORY, 200, True),
+        (LAYER_SESSION, 50, False),
+    ]
+
+    def test_memory_change_reads_static_prefix(self):
+        result = attribute_cache_usage(usage(read=1480, creation=210, uncached=90), self.breakdown)
+
+        assert result[LAYER_TOOLS]["cache_read"] + result[LAYER_INSTRUCTIONS]["cache_read"] == 1480
+        assert result[LAYER_USER_MEMORY] == {"cache_read": 0, "cache_creation": 210, "input": 0}
+        assert result[LAYER_SESSION]["input"] == 50
+        assert result[LAYER_MESSAGES]["input"] == 40
+
+    def test_full_hit(self):
+        result = attribute_cache_usage(usage(read=1700, uncached=120), self.breakdown)
+
+        assert sum(result[name]["cache_read"] for name, _, _ in self.breakdown) == 1700
+        assert result[LAYER_USER_MEMORY]["cache_read"] > 0
+        assert result[LAYER_SESSION]["cache_read"] == 0
+
+    def test_no_caching_counts_everything_as_input(self):
+        result = attribute_cache_usage(usage(uncached=1800), self.breakdown)
+
+        assert result[LAYER_TOOLS]["input"] == 1000
+        assert result[LAYER_MESSAGES]["input"] == 50
+
+    def test_non_integer_usage_ignored(self):
+        result = attribute_cache_usage(MagicMock(), self.breakdown)
+        assert all(sum(counts.values()) == 0 for counts in result.values())
+
+
+class TestPromptCacheStats:
+    """Accumulated hit rates"""
+
+    def test_hit_rate_across_calls(self):
+        breakdown = layer_breakdown(TOOLS, "instructions", LAYERS)
+        stats = PromptCacheStats()
+        stats.record(usage(creation=30, uncached=10), breakdown)
+        stats.record(usage(read=30, uncached=10), breakdown)
+
+        summary = stats.to_dict()
+        assert summary["calls"] == 2
+        assert summary["cache_read_tokens"] == 30
+        assert summary["hit_rate"] == pytest.approx(30 / 80, abs=1e-3)
+
+        total = PromptCacheStats()
+        total.merge(stats)
+        total.merge(stats)
+        assert total.to_dict()["cache_read_tokens"] == 60
+
+
+class TestLLMServiceLayers:
+    """system_layers on tool-use calls"""
+
+    def test_layers_sent_as_cached_blocks(self):
+        service = LLMService()
+        service.client = MagicMock()
+        service.client.messages.create.return_value = MagicMock(usage=usage())
+
+        service.generate_with_tools(
+            messages=[{"role": "user", "content": "hi"}],
+            tools=TOOLS,
+            system="instructions",
+            system_layers=LAYERS
+        )
+
+        params = service.client.messages.create.call_args.kwargs
+        assert [block.get("cache_control") is not None for block in params["system"]] == [True, True, False]
+        assert params["tools"][-1]["cache_control"] == {"type": "ephemeral"}
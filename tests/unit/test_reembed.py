@@ -0,0 +1,175 @@
+"""Tests for hash-checked, debounced task/project re-embedding"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from bson import ObjectId
+
+import agents.worklog as worklog_module
+import shared.reembed as reembed
+from agents.worklog import WorklogAgent
+from shared.config import settings
+from shared.embeddings import build_task_embedding_text, embedding_text_hash
+from shared.job_queue import KeyedJobQueue
+from shared.models import Task
+
+
+def stored_task(**fields):
+    doc = {"_id": ObjectId(), "title": "Write docs", "context": "API reference", "notes": [], "updated_at": 1}
+    doc.update(fields)
+    doc.setdefault("embedding", [0.1])
+    doc.setdefault("embedding_hash", embedding_text_hash(build_task_embedding_text(doc)))
+    return doc
+
+
+@pytest.fixture
+def embed(monkeypatch):
+    """Count embedding calls instead of calling Voyage"""
+    calls = []
+
+    def fake_embed(text):
+        calls.append(text)
+        return [float(len(calls))]
+
+    monkeypatch.setattr(reembed, "embed_document", fake_embed)
+    monkeypatch.setattr(reembed, "embed_documents", lambda texts: [fake_embed(text) for text in texts])
+    monkeypatch.setattr("shared.vector_index.sync_vector_write", lambda *args: None)
+    return calls
+
+
+@pytest.fixture
+def inline(monkeypatch):
+    monkeypatch.setattr(settings, "reembed_async", False)
+
+
+class TestPlanReembed:
+    """Deciding whether a write needs a new vector"""
+
+    def test_unchanged_text_skips_embedding(self, embed):
+        doc = stored_task()
+        assert reembed.plan_reembed("task", doc, {"status": "done", "priority": None}) == {}
+        assert embed == []
+
+    def test_changed_text_marks_stale_when_async(self, embed, monkeypatch):
+        monkeypatch.setattr(settings, "reembed_async", True)
+        assert reembed.plan_reembed("task", stored_task(), {"context": "Tutorial"}) == {"embedding_stale": True}
+        assert embed == []
+
+    def test_changed_text_embeds_inline(self, embed, inline):
+        fields = reembed.plan_reembed("task", stored_task(), {"context": "Tutorial"})
+
+        assert embed == ["Write docs Tutorial"]
+        assert fields["embedding_hash"] == embedding_text_hash("Write docs Tutorial")
+        assert fields["embedding_stale"] is False
+
+    def test_missing_vector_is_embedded(self, embed, inline):
+        fields = reembed.plan_reembed("task", stored_task(embedding=None), {})
+        assert "embedding" in fields
+
+
+class TestDebounce:
+    """Bursts of edits to one entity run once"""
+
+    def test_burst_runs_latest_job_once(self):
+        queue = KeyedJobQueue(workers=1, name="test-reembed")
+        ran = []
+        for i in range(5):
+            queue.submit(("task", "t1"), lambda i=i: ran.append(i), delay=0.05)
+
+        assert queue.drain(timeout=5)
+        queue.close()
+        assert ran == [4]
+        assert queue.stats()["coalesced"] == 4
+
+
+class TestReembedEntity:
+    """Background job writes"""
+
+    def test_unchanged_clears_stale_marker(self, embed, monkeypatch):
+        collection = MagicMock()
+        collection.find_one.return_value = stored_task(embedding_stale=True)
+        monkeypatch.setattr(reembed, "_collection", lambda entity_type: collection)
+
+        assert reembed.reembed_entity("task", "t1") == "unchanged"
+        assert embed == []
+        assert collection.update_one.call_args[0][1] == {"$set": {"embedding_stale": False}}
+
+    def test_concurrent_edit_retries_with_new_text(self, embed, monkeypatch):
+        collection = MagicMock()
+        collection.find_one.side_effect = [
+            stored_task(context="First", embedding_hash="old"),
+            stored_task(context="Second", embedding_hash="old", updated_at=2),
+        ]
+        collection.update_one.side_effect = [SimpleNamespace(matched_count=0), SimpleNamespace(matched_count=1)]
+        monkeypatch.setattr(reembed, "_collection", lambda entity_type: collection)
+
+        assert reembed.reembed_entity("task", "t1") == "embedded"
+        assert embed == ["Write docs First", "Write docs Second"]
+        query, update = collection.update_one.call_args[0]
+        assert query["updated_at"] == 2
+        assert update["$set"]["embedding_hash"] == embedding_text_hash("Write docs Second")
+
+
+class TestBackfill:
+    """Bulk re-embedding of mismatched documents"""
+
+    def test_only_mismatched_documents_embedded(self, embed, monkeypatch):
+        current = stored_task()
+        legacy = stored_task(title="Legacy", embedding_hash=None)
+        missing = stored_task(title="No vector")
+        for doc in (current, legacy, missing):
+            doc["has_embedding"] = doc is not missing
+            doc.pop("embedding")
+
+        collection = MagicMock()
+        collection.aggregate.return_value = [current, legacy, missing]
+        collection.bulk_write.return_value = SimpleNamespace(matched_count=2)
+        monkeypatch.setattr(reembed, "_collection", lambda entity_type: collection)
+        monkeypatch.setattr("shared.vector_index.invalidate_vector_index", lambda name=None: None)
+
+        results = reembed.backfill_embeddings(entity_types=["task"], batch_size=10)
+
+        assert results["task"] == {"scanned": 3, "current": 1, "mismatched": 2, "embedded": 2}
+        assert len(embed) == 2
+        assert len(collection.bulk_write.call_args[0][0]) == 2
+
+    def test_dry_run_embeds_nothing(self, embed, monkeypatch):
+        doc = stored_task(embedding_hash=None, has_embedding=True)
+        collection = MagicMock()
+        collection.aggregate.return_value = [doc]
+        monkeypatch.setattr(reembed, "_collection", lambda entity_type: collection)
+
+        results = reembed.backfill_embeddings(entity_types=["task"], dry_run=True)
+
+        assert results["task"]["mismatched"] == 1
+        assert embed == []
+        collection.bulk_write.assert_not_called()
+
+
+class TestWorklogWrites:
+    """WorklogAgent write paths use the canonical text"""
+
+    def test_add_context_embeds_canonical_text(self, embed, inline, monkeypatch):
+        task = Task(**stored_task(notes=["Needs examples"], assignee="Mike"))
+        writes = []
+        monkeypatch.setattr(worklog_module, "db_get_task", lambda task_id: task)
+        monkeypatch.setattr(worklog_module, "db_update_task", lambda *args: writes.append(args) or True)
+
+        WorklogAgent()._add_context("task", str(task.id), "Tutorial")
+
+        expected = build_task_embedding_text({**task.model_dump(), "context": "Tutorial"})
+        assert embed == [expected]
+        assert "Needs examples" in expected and "assigned to Mike" in expected
+        assert writes[0][1]["embedding_hash"] == embedding_text_hash(expected)
+
+    def test_status_change_skips_embedding(self, embed, inline, monkeypatch):
+        task = Task(**stored_task())
+        writes = []
+        monkeypatch.setattr(worklog_module, "db_get_task", lambda task_id: task)
+        monkeypatch.setattr(worklog_module, "db_update_task", lambda *args: writes.append(args) or True)
+
+        WorklogAgent()._update_task(str(task.id), status="in_progress", title="Write docs")
+
+        assert embed == []
+        assert "embedding" not in writes[0][1]
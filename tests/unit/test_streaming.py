@@ -0,0 +1,82 @@
+"""Tests for token streaming through CoordinatorAgent.process_stream"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.coordinator import CoordinatorAgent
+from shared.llm import LLMService
+
+
+@pytest.fixture
+def coordinator():
+    return CoordinatorAgent()
+
+
+class TestProcessStream:
+    """Chunks are forwarded as process() produces them"""
+
+    def test_chunks_forwarded_with_debug_on_last(self, coordinator):
+        def fake_process(on_text=None, **kwargs):
+            for chunk in ["Hel", "lo ", "there"]:
+                on_text(chunk)
+            return {"response": "Hello there", "debug": {"tokens_out": 3}}
+
+        coordinator.process = fake_process
+        chunks = list(coordinator.process_stream("hi"))
+
+        assert "".join(c for c, _ in chunks) == "Hello there"
+        assert all(debug is None for _, debug in chunks[:-1])
+        final_debug = chunks[-1][1]
+        assert final_debug["tokens_out"] == 3
+        assert final_debug["ttft_ms"] >= 0
+        assert final_debug["response"] == "Hello there"
+
+    def test_final_response_excludes_pre_tool_text(self, coordinator):
+        def fake_process(on_text=None, **kwargs):
+            on_text("Let me look that up. ")
+            on_text("You have 3 tasks.")
+            return {"response": "You have 3 tasks.", "debug": {}}
+
+        coordinator.process = fake_process
+        chunks = list(coordinator.process_stream("hi"))
+
+        assert chunks[-1][1]["response"] == "You have 3 tasks."
+
+    def test_non_streaming_path_yields_full_response(self, coordinator):
+        coordinator.process = lambda on_text=None, **kwargs: {"response": "Done.", "debug": {}}
+
+        chunks = list(coordinator.process_stream("hi"))
+
+        assert chunks == [("Done.", {"ttft_ms": chunks[0][1]["ttft_ms"], "response": "Done."})]
+
+    def test_errors_propagate(self, coordinator):
+        def failing_process(on_text=None, **kwargs):
+            raise RuntimeError("boom")
+
+        coordinator.process = failing_process
+        with pytest.raises(RuntimeError):
+            list(coordinator.process_stream("hi"))
+
+
+class TestGenerateWithToolsStream:
+    """LLMService streams text deltas and returns the final message"""
+
+    def test_text_is_forwarded(self):
+        service = LLMService()
+        final = MagicMock(usage=MagicMock(cache_read_input_tokens=0, cache_creation_input_tokens=0))
+        stream = MagicMock()
+        stream.text_stream = iter(["a", "b"])
+        stream.get_final_message.return_value = final
+        service.client = MagicMock()
+        service.client.messages.stream.return_value.__enter__.return_value = stream
+
+        received = []
+        response = service.generate_with_tools_stream(
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[],
+            on_text=received.append
+        )
+
+        assert received == ["a", "b"]
+        assert response is final
@@ -171,10 +171,10 @@ class TestToolDiscoveryStore:
         assert result is not None
         assert result["solution"]["mcp_server"] == "tavily"
 
-        # Verify times_used was incremented
+        # Verify times_used was incremented (then the discovery counters)
         assert collection.update_one.called
-        update_call = collection.update_one.call_args[0]
-        assert "$inc" in update_call[1]
+        update_call = collection.update_one.call_args_list[0][0]
+        assert update_call[0] == {"_id": mock_discovery["_id"]}
         assert update_call[1]["$inc"]["times_used"] == 1
 
     def test_find_similar_discovery_no_match(self, store, mock_db):
@@ -253,7 +253,7 @@ class TestToolDiscoveryStore:
     def test_mark_as_promoted(self, store, mock_db):
         """Test marking discovery as promoted"""
         collection = mock_db["tool_discoveries"]
-        collection.update_one.return_value.modified_count = 1
+        collection.find_one_and_update.return_value = {"promoted_to_static": False, "developer_notes": ""}
 
         discovery_id = str(ObjectId())
         success = store.mark_as_promoted(
@@ -264,18 +264,23 @@ class TestToolDiscoveryStore:
         assert success is True
 
         # Verify update
-        update_call = collection.update_one.call_args[0]
+        update_call = collection.find_one_and_update.call_args[0]
         assert update_call[1]["$set"]["promoted_to_static"] is True
         assert update_call[1]["$set"]["developer_notes"] == "Promoted to static web_search tool"
 
+        # Verify promoted counter
+        counter_call = collection.update_one.call_args[0]
+        assert counter_call[1]["$inc"] == {"promoted": 1}
+
     def test_mark_as_promoted_not_found(self, store, mock_db):
         """Test marking non-existent discovery"""
         collection = mock_db["tool_discoveries"]
-        collection.update_one.return_value.modified_count = 0
+        collection.find_one_and_update.return_value = None
 
         success = store.mark_as_promoted(str(ObjectId()))
 
         assert success is False
+        assert not collection.update_one.called
 
     def test_add_developer_notes(self, store, mock_db):
         """Test adding developer notes"""
@@ -298,14 +303,15 @@ class TestToolDiscoveryStore:
         """Test getting discovery statistics"""
         collection = mock_db["tool_discoveries"]
 
-        # Mock count_documents
-        collection.count_documents.side_effect = [100, 85, 15, 5]  # total, success, fail, promoted
-
-        # Mock aggregation for avg_uses
-        collection.aggregate.side_effect = [
-            [{"_id": None, "avg_uses": 3.5}],  # avg_uses
-            [{"_id": "tavily", "count": 50}],  # most_used_server
-            [{"_id": "tavily-search", "count": 45}]  # most_used_tool
+        # No counters yet: rebuilt from one aggregation
+        collection.find_one.return_value = None
+        collection.aggregate.return_value = [
+            {"_id": {"server": "tavily", "tool": "tavily-search"},
+             "total": 60, "successful": 55, "failed": 5, "promoted": 4, "times_used": 250},
+            {"_id": {"server": "tavily", "tool": "tavily-extract"},
+             "total": 10, "successful": 10, "failed": 0, "promoted": 1, "times_used": 50},
+            {"_id": {"server": "mongodb", "tool": "find"},
+             "total": 30, "successful": 20, "failed": 10, "promoted": 0, "times_used": 50}
         ]
 
         stats = store.get_stats()
@@ -318,6 +324,27 @@ class TestToolDiscoveryStore:
         assert stats["most_used_server"] == "tavily"
         assert stats["most_used_tool"] == "tavily-search"
 
+        # Rebuilt counters are saved for the next read
+        saved = collection.replace_one.call_args[0][1]
+        assert saved["_id"] == "tool_discoveries" and "reconciled_at" in saved
+
+    def test_get_stats_reads_counters(self, store, mock_db):
+        """Test fresh counters are read without scanning discoveries"""
+        collection = mock_db["tool_discoveries"]
+        collection.find_one.return_value = {
+            "_id": "tool_discoveries",
+            "total": 4, "successful": 3, "failed": 1, "promoted": 0, "times_used": 10,
+            "servers": {"tavily": 10}, "tools": {"tavily-search": 7, "tavily-extract": 3},
+            "reconciled_at": datetime.utcnow()
+        }
+
+        stats = store.get_stats()
+
+        assert not collection.aggregate.called
+        assert not collection.count_documents.called
+        assert stats["avg_uses"] == 2.5
+        assert stats["most_used_tool"] == "tavily-search"
+
     def test_get_discoveries_by_server(self, store, mock_db):
         """Test getting discoveries for specific server"""
         collection = mock_db["tool_discoveries"]
@@ -363,18 +390,32 @@ class TestToolDiscoveryStore:
     def test_delete_discovery(self, store, mock_db):
         """Test deleting a discovery"""
         collection = mock_db["tool_discoveries"]
-        collection.delete_one.return_value.deleted_count = 1
+        collection.find_one_and_delete.return_value = {
+            "solution": {"mcp_server": "tavily", "tool_used": "tavily-search"},
+            "success": True,
+            "times_used": 3
+        }
 
         discovery_id = str(ObjectId())
         success = store.delete_discovery(discovery_id)
 
         assert success is True
-        assert collection.delete_one.called
+        assert collection.find_one_and_delete.called
+
+        # Verify counters were decremented
+        counter_call = collection.update_one.call_args[0]
+        assert counter_call[1]["$inc"] == {
+            "times_used": -3,
+            "servers.tavily": -3,
+            "tools.tavily-search": -3,
+            "total": -1,
+            "successful": -1
+        }
 
     def test_delete_discovery_not_found(self, store, mock_db):
         """Test deleting non-existent discovery"""
         collection = mock_db["tool_discoveries"]
-        collection.delete_one.return_value.deleted_count = 0
+        collection.find_one_and_delete.return_value = None
 
         success = store.delete_discovery(str(ObjectId()))
 
@@ -0,0 +1,140 @@
+"""Tests for per-turn tracing"""
+
+import contextvars
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from shared.tracing import (
+    current_trace,
+    export_trace,
+    flush_trace_exports,
+    record_span,
+    span,
+    start_trace,
+    traced,
+)
+
+
+@pytest.fixture
+def tracing_on():
+    """Tracing enabled, export disabled"""
+    with patch("shared.config.settings.trace_enabled", True), \
+            patch("shared.config.settings.trace_export_path", ""):
+        yield
+
+
+@pytest.mark.usefixtures("tracing_on")
+class TestSpans:
+    """Spans nest under the current span and land in the active trace"""
+
+    def test_nesting_sets_parent_ids(self):
+        with start_trace("turn") as trace:
+            with span("tool.search_tasks", kind="tool") as tool:
+                with span("voyage.embed", kind="embedding") as embed:
+                    pass
+
+        assert tool.parent_id == trace.root.span_id
+        assert embed.parent_id == tool.span_id
+        assert [row["depth"] for row in trace.to_debug()] == [0, 1, 2]
+        assert current_trace() is None
+
+    def test_breakdown_counts_outermost_span_per_kind(self):
+        with start_trace("turn") as trace:
+            with span("tool.search_tasks", kind="tool") as tool:
+                with span("retrieval.query", kind="mongodb"):
+                    record_span("mongodb.aggregate", "mongodb", 40_000_000)
+                record_span("mongodb.find", "mongodb", 10_000_000)
+
+        breakdown = trace.breakdown(tool)
+
+        # The aggregate command is inside the retrieval.query span, so only that span counts
+        assert breakdown == {"mongodb_query": 10}
+
+    def test_thread_pool_spans_share_the_trace(self):
+        @traced("tool.lookup", kind="tool")
+        def lookup():
+            record_span("mongodb.find", "mongodb", 1_000_000)
+
+        with start_trace("turn") as trace, ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, lookup) for _ in range(2)]
+            for future in futures:
+                future.result()
+
+        tools = [s for s in trace.spans if s.kind == "tool"]
+        commands = [s for s in trace.spans if s.kind == "mongodb"]
+        assert len(tools) == 2 and all(s.parent_id == trace.root.span_id for s in tools)
+        assert sorted(s.parent_id for s in commands) == sorted(s.span_id for s in tools)
+
+    def test_error_is_recorded(self):
+        with start_trace("turn") as trace:
+            with pytest.raises(ValueError):
+                with span("tool.bad", kind="tool"):
+                    raise ValueError("boom")
+
+        assert trace.spans[-1].error == "ValueError: boom"
+
+    def test_span_outside_trace_only_times(self):
+        with span("voyage.embed", kind="embedding") as s:
+            record_span("mongodb.find", "mongodb", 1_000)
+
+        assert s.duration_ns > 0
+        assert current_trace() is None
+
+    def test_disabled_tracing_yields_none(self):
+        with patch("shared.config.settings.trace_enabled", False):
+            with start_trace("turn") as trace:
+                assert trace is None
+
+
+@pytest.mark.usefixtures("tracing_on")
+class TestExport:
+    """Finished traces export as JSONL records or OTLP/JSON"""
+
+    def test_jsonl_one_line_per_span(self, tmp_path):
+        with start_trace("turn", session_id="s-1") as trace:
+            with span("tool.get_tasks", kind="tool", limit=5):
+                pass
+        path = tmp_path / "traces" / "spans.jsonl"
+
+        export_trace(trace, str(path), "jsonl")
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["name"] for r in records] == ["turn", "tool.get_tasks"]
+        assert {r["trace_id"] for r in records} == {trace.trace_id}
+        assert records[1]["attributes"] == {"limit": 5}
+
+    def test_turn_export_runs_off_the_request_path(self, tmp_path):
+        path = tmp_path / "spans.jsonl"
+        caller = []
+
+        def recording_export(trace, path, fmt):
+            caller.append(threading.current_thread().name)
+            export_trace(trace, path, fmt)
+
+        with patch("shared.config.settings.trace_export_path", str(path)), \
+                patch("shared.tracing.export_trace", recording_export):
+            with start_trace("turn"):
+                pass
+            assert flush_trace_exports()
+
+        assert caller == ["trace-export"]
+        assert json.loads(path.read_text().splitlines()[0])["name"] == "turn"
+
+    def test_otlp_shape(self):
+        with start_trace("turn") as trace:
+            with span("anthropic.messages", kind="llm", model="claude"):
+                pass
+
+        otlp = trace.to_otlp("flow-test")
+        spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root, llm = spans
+
+        assert "parentSpanId" not in root
+        assert llm["parentSpanId"] == root["spanId"]
+        assert llm["kind"] == 3
+        assert int(llm["endTimeUnixNano"]) >= int(llm["startTimeUnixNano"])
+        assert {"key": "model", "value": {"stringValue": "claude"}} in llm["attributes"]
@@ -0,0 +1,120 @@
+"""Tests for compiled rule/workflow trigger matching"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from bson import ObjectId
+
+from memory.manager import MemoryManager
+from memory.trigger_matcher import KeywordMatcher, PatternMatcher
+
+
+class TestKeywordMatcher:
+    """Aho-Corasick matching of literal rule triggers"""
+
+    def test_finds_contained_keyword_case_insensitively(self):
+        matcher = KeywordMatcher([("done", "complete"), ("take a break", "stop")])
+        assert matcher.match("I'm DONE with this") == "complete"
+        assert matcher.match("let me take a break now") == "stop"
+        assert matcher.match("nothing here") is None
+
+    def test_priority_order_wins_over_position(self):
+        matcher = KeywordMatcher([("next", "first"), ("done", "second")])
+        assert matcher.match("done, what's next?") == "first"
+
+    def test_overlapping_keywords(self):
+        matcher = KeywordMatcher([("hers", 0), ("she", 1), ("he", 2)])
+        assert matcher.match("ushers") == 0
+        assert matcher.match("ushe") == 1
+        assert matcher.match("the") == 2
+
+    def test_matches_same_as_substring_scan(self):
+        keywords = ["a", "ab", "bc", "abc", "cab", "ca", "xyz"]
+        matcher = KeywordMatcher([(k, k) for k in keywords])
+        for text in ["abcab", "zzcazz", "xy", "bcx", "xyzab", ""]:
+            expected = next((k for k in keywords if k in text), None)
+            assert matcher.match(text) == expected
+
+    def test_empty_keywords_ignored(self):
+        matcher = KeywordMatcher([("", "never"), (None, "never")])
+        assert len(matcher) == 0
+        assert matcher.match("anything") is None
+
+
+class TestPatternMatcher:
+    """Precompiled workflow regexes"""
+
+    def test_first_pattern_in_order_wins(self):
+        matcher = PatternMatcher([
+            (r"create.*task.*(?:then|and)\s+start", "create_and_start"),
+            (r"create.*tasks?.*and|create.*multiple.*task", "bulk_create"),
+        ])
+        assert matcher.match("Create a task and start it") == "create_and_start"
+        assert matcher.match("create tasks A and B") == "bulk_create"
+        assert matcher.match("show my tasks") is None
+
+    def test_invalid_patterns_skipped(self):
+        matcher = PatternMatcher([("([unclosed", "bad"), (r"note.*on.*task", "note")])
+        assert len(matcher) == 1
+        assert matcher.match("add a note on the task") == "note"
+
+    def test_backreferences_disable_prefilter(self):
+        matcher = PatternMatcher([(r"(\w+) and \1", "repeat"), (r"(x)y", "xy")])
+        assert matcher._combined is None
+        assert matcher.match("again and again") == "repeat"
+        assert matcher.match("again and later") is None
+
+
+@pytest.fixture
+def memory():
+    """MemoryManager over a mocked database"""
+    return MemoryManager(MagicMock())
+
+
+class TestMemoryManagerTriggers:
+    """Per-user matcher caching and invalidation"""
+
+    def test_rule_matcher_is_cached_until_record_rule(self, memory):
+        sort = memory.procedural.find.return_value.sort
+        sort.return_value = [{"_id": ObjectId(), "trigger_pattern": "done", "action_type": "complete_current_task"}]
+
+        assert memory.match_rule_trigger("u1", "I'm done")["action_type"] == "complete_current_task"
+        assert memory.match_rule_trigger("u1", "still going") is None
+        assert sort.call_count == 1
+
+        memory.procedural.find_one.return_value = None
+        memory.record_rule("u1", "break", "stop_current_task")
+        sort.return_value = [{"_id": ObjectId(), "trigger_pattern": "break", "action_type": "stop_current_task"}]
+
+        assert memory.match_rule_trigger("u1", "taking a break")["action_type"] == "stop_current_task"
+        assert sort.call_count == 2
+
+    def test_workflow_match_updates_usage(self, memory):
+        workflow_id = ObjectId()
+        memory.procedural.find.return_value = [
+            {"_id": workflow_id, "trigger_pattern": r"add.*note.*to", "rule_type": "workflow"}
+        ]
+
+        workflow = memory.get_workflow_for_pattern("u1", "Add a note to the login task")
+
+        assert workflow["_id"] == str(workflow_id)
+        update_filter = memory.procedural.update_one.call_args[0][0]
+        assert update_filter == {"_id": workflow_id}
+
+        # Second lookup is served from the compiled matcher
+        assert memory.search_workflows_semantic("u1", "add note to it")["match_type"] == "regex"
+        assert memory.procedural.find.call_count == 1
+
+    def test_cache_expires_after_ttl(self, memory, monkeypatch):
+        from shared.config import settings
+        import memory.manager as module
+
+        clock = [100.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+        memory.procedural.find.return_value = []
+
+        memory.get_workflow_for_pattern("u1", "hello")
+        clock[0] += settings.trigger_cache_ttl_seconds + 1
+        memory.get_workflow_for_pattern("u1", "hello")
+
+        assert memory.procedural.find.call_count == 2
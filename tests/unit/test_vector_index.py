@@ -0,0 +1,258 @@
+"""Tests for the in-process vector index and its $vectorSearch integration"""
+
+import threading
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from pymongo.errors import OperationFailure
+
+from shared.vector_index import LocalVectorIndex, SCORE_FIELD, VectorIndexRegistry
+
+
+def random_vectors(count, dims=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dims)).astype(np.float32)
+
+
+def brute_force(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+def fake_collection(name, docs):
+    """Collection mock whose find() yields stored vectors"""
+    collection = MagicMock()
+    collection.name = name
+    collection.find.return_value.limit.return_value = docs
+    collection.estimated_document_count.return_value = len(docs)
+    collection.count_documents.return_value = len(docs)
+    return collection
+
+
+class TestLocalVectorIndex:
+    """Exact top-k, filters and incremental updates"""
+
+    def test_exact_topk_matches_brute_force(self):
+        vectors = random_vectors(200)
+        index = LocalVectorIndex()
+        index.upsert_many(list(range(200)), vectors)
+
+        query = random_vectors(1, seed=1)[0]
+        hits = index.search(query, k=5)
+
+        assert [doc_id for doc_id, _ in hits] == brute_force(vectors, query, 5)
+        assert all(0.0 <= score <= 1.0 for _, score in hits)
+
+    def test_scores_use_atlas_cosine_scale(self):
+        index = LocalVectorIndex()
+        index.upsert("same", [1.0, 0.0])
+        index.upsert("opposite", [-1.0, 0.0])
+
+        scores = dict(index.search([2.0, 0.0], k=2))
+        assert scores["same"] == pytest.approx(1.0)
+        assert scores["opposite"] == pytest.approx(0.0)
+
+    def test_batch_search(self):
+        vectors = random_vectors(50)
+        index = LocalVectorIndex()
+        index.upsert_many(list(range(50)), vectors)
+
+        results = index.search_batch(vectors[:3], k=1)
+        assert [hits[0][0] for hits in results] == [0, 1, 2]
+
+    def test_filters(self):
+        index = LocalVectorIndex(filter_fields=("user_id", "is_test"))
+        index.upsert("a", [1.0, 0.0], {"user_id": "u1"})
+        index.upsert("b", [1.0, 0.1], {"user_id": "u2"})
+        index.upsert("c", [1.0, 0.2], {"user_id": "u1", "is_test": True})
+
+        assert [d for d, _ in index.search([1.0, 0.0], 5, {"user_id": "u1"})] == ["a", "c"]
+        assert [d for d, _ in index.search([1.0, 0.0], 5, {"is_test": {"$ne": True}})] == ["a", "b"]
+        assert index.count({"user_id": {"$in": ["u2", "u3"]}}) == 1
+
+        with pytest.raises(KeyError):
+            index.search([1.0, 0.0], 5, {"project_id": "x"})
+
+    def test_upsert_replaces_and_remove_keeps_rows_consistent(self):
+        index = LocalVectorIndex(filter_fields=("user_id",))
+        index.upsert("a", [1.0, 0.0], {"user_id": "u1"})
+        index.upsert("b", [0.0, 1.0], {"user_id": "u2"})
+        index.upsert("c", [-1.0, 0.0], {"user_id": "u3"})
+
+        index.upsert("a", [0.0, -1.0])  # metadata kept
+        assert index.search([0.0, -1.0], 1)[0][0] == "a"
+        assert index.count({"user_id": "u1"}) == 1
+
+        assert index.remove("a")
+        assert not index.remove("a")
+        assert len(index) == 2
+        # "c" moved into the freed row; its vector and metadata moved with it
+        assert index.search([-1.0, 0.0], 1, {"user_id": "u3"})[0][0] == "c"
+
+    def test_dimension_mismatch_rejected(self):
+        index = LocalVectorIndex()
+        index.upsert("a", [1.0, 0.0])
+        with pytest.raises(ValueError):
+            index.upsert("b", [1.0, 0.0, 0.0])
+
+    def test_ivf_mode_recall(self):
+        vectors = random_vectors(2000, dims=32)
+        index = LocalVectorIndex(ann="ivf", ann_min_size=100, ivf_probes=16)
+        index.upsert_many(list(range(2000)), vectors)
+
+        queries = random_vectors(20, dims=32, seed=2)
+        found = 0
+        for query in queries:
+            hits = [doc_id for doc_id, _ in index.search(query, k=10)]
+            found += len(set(hits) & set(brute_force(vectors, query, 10)))
+        assert found / 200 >= 0.8
+
+        # Rows added after training are assigned to a bucket
+        index.upsert("new", queries[0])
+        assert index.search(queries[0], k=1)[0][0] == "new"
+
+
+class TestVectorIndexRegistry:
+    """vector_search routing between Atlas and the local index"""
+
+    def pipeline(self, query, filter=None):
+        search = {"index": "vector_index", "path": "embedding", "queryVector": query, "limit": 2}
+        if filter:
+            search["filter"] = filter
+        return [
+            {"$vectorSearch": search},
+            {"$project": {"title": 1, "score": {"$meta": "vectorSearchScore"}}},
+        ]
+
+    def test_small_corpus_is_served_locally(self):
+        docs = [
+            {"_id": 1, "embedding": [1.0, 0.0], "user_id": "u1"},
+            {"_id": 2, "embedding": [0.0, 1.0], "user_id": "u1"},
+            {"_id": 3, "embedding": [1.0, 0.1], "user_id": "u2"},
+        ]
+        collection = fake_collection("memory", docs)
+        collection.aggregate.return_value = [{"_id": 1, "score": 1.0}]
+        registry = VectorIndexRegistry(mode="auto", small_corpus=10)
+
+        results = registry.search(collection, self.pipeline([1.0, 0.0], {"user_id": "u1"}))
+
+        assert results == [{"_id": 1, "score": 1.0}]
+        local_pipeline = collection.aggregate.call_args[0][0]
+        assert "$vectorSearch" not in local_pipeline[0]
+        assert local_pipeline[0]["$match"]["_id"]["$in"] == [1, 2]
+        assert {"$project": {"title": 1, "score": f"${SCORE_FIELD}"}} in local_pipeline
+        assert "$indexOfArray" in str(local_pipeline[1])
+        assert local_pipeline[-1] == {"$unset": SCORE_FIELD}
+        assert registry.stats()["local"] == 1
+
+    def test_large_corpus_uses_atlas(self):
+        docs = [{"_id": i, "embedding": [1.0, float(i)]} for i in range(5)]
+        collection = fake_collection("tasks", docs)
+        collection.aggregate.return_value = []
+        registry = VectorIndexRegistry(mode="auto", small_corpus=2)
+
+        registry.search(collection, self.pipeline([1.0, 0.0]))
+
+        assert "$vectorSearch" in collection.aggregate.call_args[0][0][0]
+        assert registry.stats()["atlas"] == 1
+
+    def test_atlas_failure_falls_back_and_is_remembered(self):
+        docs = [{"_id": i, "embedding": [1.0, float(i)]} for i in range(5)]
+        collection = fake_collection("tasks", docs)
+        collection.aggregate.side_effect = [
+            OperationFailure("Unrecognized pipeline stage name: '$vectorSearch'"),
+            [{"_id": 0}],
+            [{"_id": 0}],
+        ]
+        registry = VectorIndexRegistry(mode="fallback")
+
+        assert registry.search(collection, self.pipeline([1.0, 0.0])) == [{"_id": 0}]
+        assert registry.search(collection, self.pipeline([1.0, 0.0])) == [{"_id": 0}]
+        # Third aggregate call went straight to the local pipeline
+        assert "$match" in collection.aggregate.call_args[0][0][0]
+        assert registry.stats()["fallbacks"] == 1
+
+    def test_atlas_error_raised_without_local_vectors(self):
+        collection = fake_collection("tool_discoveries", [])
+        collection.aggregate.side_effect = OperationFailure("no $vectorSearch")
+        registry = VectorIndexRegistry(mode="auto")
+
+        with pytest.raises(OperationFailure):
+            registry.search(collection, self.pipeline([1.0, 0.0]))
+
+    def test_writes_update_loaded_indexes(self):
+        collection = fake_collection("memory", [{"_id": 1, "embedding": [1.0, 0.0], "user_id": "u1"}])
+        registry = VectorIndexRegistry(mode="local")
+        index = registry.get_index(collection, "embedding", ["user_id"])
+
+        registry.apply_write("memory", 2, {"embedding": [0.0, 1.0], "user_id": "u1"})
+        registry.apply_write("memory", 1, {"user_id": "u2"})
+        assert index.count({"user_id": "u1"}) == 1
+        assert index.search([0.0, 1.0], 1)[0][0] == 2
+
+        registry.apply_delete("memory", 2)
+        registry.apply_write("other", 3, {"embedding": [1.0, 1.0]})
+        assert len(index) == 1
+
+    def test_default_mode_loads_nothing_while_atlas_answers(self):
+        collection = fake_collection("tasks", [{"_id": 1, "embedding": [1.0, 0.0]}])
+        collection.aggregate.return_value = []
+        registry = VectorIndexRegistry()
+
+        registry.search(collection, self.pipeline([1.0, 0.0]))
+
+        assert registry.mode == "fallback"
+        collection.find.assert_not_called()
+
+    def test_oversized_collection_is_rejected_by_count(self):
+        collection = fake_collection("memory", [])
+        collection.estimated_document_count.return_value = 50
+        collection.count_documents.return_value = 11
+        registry = VectorIndexRegistry(mode="local", max_docs=10)
+
+        assert registry.get_index(collection, "embedding") is None
+        collection.find.assert_not_called()
+
+    def test_writes_during_load_are_replayed(self):
+        registry = VectorIndexRegistry(mode="local")
+        collection = fake_collection("memory", [])
+
+        def load_with_concurrent_writes(*args, **kwargs):
+            # Lands after the cursor has read document 1
+            registry.apply_write("memory", 2, {"embedding": [0.0, 1.0]})
+            registry.apply_delete("memory", 1)
+            return [{"_id": 1, "embedding": [1.0, 0.0]}]
+
+        collection.find.return_value.limit.side_effect = load_with_concurrent_writes
+        index = registry.get_index(collection, "embedding")
+
+        assert 2 in index and 1 not in index
+
+    def test_concurrent_callers_share_one_load(self):
+        release = threading.Event()
+        collection = fake_collection("memory", [])
+
+        def slow_load(*args, **kwargs):
+            release.wait(2)
+            return [{"_id": 1, "embedding": [1.0, 0.0]}]
+
+        collection.find.return_value.limit.side_effect = slow_load
+        registry = VectorIndexRegistry(mode="local")
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get_index(collection, "embedding")))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # A caller that won't wait is not blocked behind the load
+        threading.Event().wait(0.05)
+        assert registry.get_index(collection, "embedding", wait=False) is None
+
+        release.set()
+        for thread in threads:
+            thread.join(2)
+        assert len(results) == 3 and len({id(index) for index in results}) == 1
+        assert collection.find.call_count == 1
@@ -0,0 +1,194 @@
+"""Tests for the bounded working-memory store"""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+import memory.working_store as module
+from memory.manager import MemoryManager
+from memory.working_store import (
+    AGENT,
+    DISAMBIGUATION,
+    HANDOFF,
+    SESSION,
+    InProcessWorkingStore,
+    MongoWorkingStore,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def handoff(handoff_id, session_id="s1", target="worklog", status="pending", chain="c1", minutes=0):
+    return {
+        "handoff_id": handoff_id,
+        "session_id": session_id,
+        "target_agent": target,
+        "status": status,
+        "chain_id": chain,
+        "created_at": datetime(2026, 1, 1) + timedelta(minutes=minutes),
+    }
+
+
+class TestInProcessWorkingStore:
+    """TTL, LRU and handoff indexes"""
+
+    def test_idle_sessions_expire(self, clock):
+        store = InProcessWorkingStore(ttl_seconds=60)
+        store.put(SESSION, "s1", "s1", {"context": {}})
+        store.put(AGENT, ("s1", "retrieval"), "s1", {"working": {}})
+
+        clock[0] += 30
+        store.put(SESSION, "s2", "s2", {"context": {}})
+        clock[0] += 45
+
+        assert store.get(SESSION, "s1") is None
+        assert store.count(AGENT, "s1") == 0
+        assert store.get(SESSION, "s2") is not None
+        assert store.stats()["evicted"]["expired"] == 1
+
+    def test_writes_keep_session_alive(self, clock):
+        store = InProcessWorkingStore(ttl_seconds=60)
+        for _ in range(5):
+            store.put(SESSION, "s1", "s1", {"context": {}})
+            clock[0] += 50
+        assert store.get(SESSION, "s1") is not None
+
+    def test_least_recently_used_session_evicted(self, clock):
+        store = InProcessWorkingStore(max_sessions=2)
+        store.put(SESSION, "s1", "s1", {})
+        store.put(SESSION, "s2", "s2", {})
+        store.put(SESSION, "s1", "s1", {"touched": True})
+        store.put(SESSION, "s3", "s3", {})
+
+        assert store.get(SESSION, "s2") is None
+        assert store.get(SESSION, "s1") == {"touched": True}
+        assert store.stats()["sessions"] == 2
+
+    def test_handoff_cap_drops_resolved_first(self):
+        store = InProcessWorkingStore(max_handoffs_per_session=2)
+        store.put(HANDOFF, "h1", "s1", handoff("h1", minutes=1))
+        store.put(HANDOFF, "h2", "s1", handoff("h2", status="consumed", minutes=2))
+        store.put(HANDOFF, "h3", "s1", handoff("h3", minutes=3))
+
+        assert store.get(HANDOFF, "h2") is None
+        assert {h["handoff_id"] for h in store.find(HANDOFF, "s1")} == {"h1", "h3"}
+
+    def test_indexed_handoff_lookups(self):
+        store = InProcessWorkingStore()
+        store.put(HANDOFF, "h1", "s1", handoff("h1"))
+        store.put(HANDOFF, "h2", "s1", handoff("h2", target="retrieval"))
+        store.put(HANDOFF, "h3", "s2", handoff("h3", session_id="s2", chain="c2"))
+
+        assert [h["handoff_id"] for h in store.find(HANDOFF, "s1", target_agent="worklog", status="pending")] == ["h1"]
+        assert {h["handoff_id"] for h in store.find(HANDOFF, chain_id="c1")} == {"h1", "h2"}
+
+        store.update(HANDOFF, "h1", {"status": "consumed"})
+        assert store.count(HANDOFF, "s1", target_agent="worklog", status="pending") == 0
+
+        store.delete(HANDOFF, "h2")
+        assert store.find(HANDOFF, chain_id="c1") == [store.get(HANDOFF, "h1")]
+
+    def test_clear_session_counts(self):
+        store = InProcessWorkingStore()
+        store.put(SESSION, "s1", "s1", {})
+        store.put(HANDOFF, "h1", "s1", handoff("h1"))
+        store.put(HANDOFF, "h2", "s1", handoff("h2"))
+
+        deleted = store.clear_session("s1")
+
+        assert deleted[SESSION] == 1 and deleted[HANDOFF] == 2
+        assert store.find(HANDOFF, chain_id="c1") == []
+
+
+class TestMongoWorkingStore:
+    """Documents and queries sent to the TTL collection"""
+
+    def test_put_refreshes_session_expiry_and_find_filters_fields(self):
+        collection = MagicMock()
+        collection.find.return_value = [{"doc": {"handoff_id": "h1"}}]
+        store = MongoWorkingStore(collection=collection, ttl_seconds=60)
+
+        store.put(AGENT, ("s1", "retrieval"), "s1", {"working": {"x": 1}})
+        replaced = collection.replace_one.call_args[0]
+        assert replaced[0] == {"_id": "agent:s1\x1fretrieval"}
+        assert replaced[1]["session_id"] == "s1"
+        assert collection.update_many.call_args[0][0] == {"session_id": "s1"}
+
+        assert store.find(HANDOFF, "s1", target_agent="worklog") == [{"handoff_id": "h1"}]
+        query = collection.find.call_args[0][0]
+        assert query["doc.target_agent"] == "worklog"
+        assert "$gt" in query["expires_at"]
+        collection.create_index.assert_not_called()
+
+    def test_update_refreshes_session_expiry(self):
+        collection = MagicMock()
+        collection.find_one_and_update.return_value = {"_id": "disambiguation:s1", "session_id": "s1"}
+        store = MongoWorkingStore(collection=collection, ttl_seconds=60)
+
+        assert store.update(DISAMBIGUATION, "s1", {"resolved": True})
+        changes = collection.find_one_and_update.call_args[0][1]["$set"]
+        assert changes["doc.resolved"] is True and "expires_at" in changes
+        assert collection.update_many.call_args[0][0] == {"session_id": "s1"}
+
+        collection.find_one_and_update.return_value = None
+        collection.update_many.reset_mock()
+        assert not store.update(DISAMBIGUATION, "s2", {"resolved": True})
+        collection.update_many.assert_not_called()
+
+    def test_session_refresh_is_throttled_to_half_the_ttl(self, monkeypatch):
+        collection = MagicMock()
+        store = MongoWorkingStore(collection=collection, ttl_seconds=60)
+        now = [datetime(2026, 1, 1)]
+        monkeypatch.setattr(module, "datetime", MagicMock(utcnow=lambda: now[0]))
+
+        store.put(SESSION, "s1", "s1", {"a": 1})
+        store.put(AGENT, ("s1", "retrieval"), "s1", {"b": 2})
+        now[0] += timedelta(seconds=29)
+        store.put(SESSION, "s1", "s1", {"a": 2})
+        assert collection.update_many.call_count == 1
+        assert collection.replace_one.call_count == 3
+
+        now[0] += timedelta(seconds=2)
+        store.put(SESSION, "s1", "s1", {"a": 3})
+        assert collection.update_many.call_count == 2
+        assert collection.update_many.call_args[0][1]["$set"]["expires_at"] == now[0] + timedelta(seconds=60)
+
+
+class TestMemoryManagerWorkingMemory:
+    """MemoryManager working-memory API on the store"""
+
+    @pytest.fixture
+    def memory(self):
+        return MemoryManager(MagicMock(), working_store=InProcessWorkingStore())
+
+    def test_handoff_roundtrip_and_stats(self, memory):
+        first = memory.write_handoff("s1", "u1", "coordinator", "worklog", "task", {"a": 1}, priority="low")
+        memory.write_handoff("s1", "u1", "coordinator", "worklog", "task", {"b": 2}, priority="high")
+
+        assert memory.check_pending("s1", "worklog")
+        assert memory.get_memory_stats("s1", "u1")["handoff_pending"] == 2
+
+        top = memory.read_handoff("s1", "worklog")
+        assert top["payload"] == {"b": 2}
+        assert top["status"] == "consumed"
+        assert [h["handoff_id"] for h in memory.read_all_pending("s1", "worklog")] == [first]
+
+    def test_session_context_and_disambiguation(self, memory):
+        memory.update_session_context("s1", {"current_project": "Alpha"}, user_id="u1")
+        memory.update_session_context("s1", {"current_task": "Docs"})
+        memory.store_disambiguation("s1", "docs", [{"title": "A"}, {"title": "B"}], "retrieval")
+
+        assert memory.read_session_context("s1") == {"current_project": "Alpha", "current_task": "Docs"}
+        assert memory.resolve_disambiguation("s1", 1)["title"] == "B"
+        assert memory.get_pending_disambiguation("s1") is None
+
+        cleared = memory.clear_session("s1")
+        assert cleared["session_contexts_deleted"] == 1
+        assert cleared["disambiguation_deleted"] == 1
+        assert memory.read_session_context("s1") is None
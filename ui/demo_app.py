@@ -14,14 +14,14 @@ sys.path.insert(0, str(project_root))
 import streamlit as st
 import asyncio
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
 
 # Backend imports
 from agents.coordinator import coordinator, memory_manager
-from shared.db import get_collection, TASKS_COLLECTION, PROJECTS_COLLECTION
-from shared.models import Task, Project
+from shared.db import get_projects_with_tasks, invalidate_projects_with_tasks_cache
 from shared.config import settings
+from shared.episodic import FIRST_SUMMARY_ACTIVITY
 from ui.slash_commands import parse_slash_command, detect_natural_language_query, SlashCommandExecutor
 from ui.formatters import render_command_result
 
@@ -129,41 +129,11 @@ def init_session_state():
 
 def get_all_projects_with_tasks() -> List[Dict[str, Any]]:
     """Get all projects with their associated tasks from MongoDB."""
-    projects_collection = get_collection(PROJECTS_COLLECTION)
-    tasks_collection = get_collection(TASKS_COLLECTION)
-
     # Get all projects (not just active) and exclude test projects
-    projects_cursor = projects_collection.find(
-        {"is_test": {"$ne": True}}
-    ).sort([("status", 1), ("last_activity", -1)])
-
-    projects_with_tasks = []
-
-    for project_doc in projects_cursor:
-        project = Project(**project_doc)
-        tasks_cursor = tasks_collection.find(
-            {"project_id": project.id}
-        ).sort([("status", 1), ("created_at", -1)])
-        tasks = [Task(**task_doc) for task_doc in tasks_cursor]
-        projects_with_tasks.append({
-            "project": project,
-            "tasks": tasks
-        })
-
-    # Also get tasks without a project
-    orphan_tasks_cursor = tasks_collection.find(
-        {"project_id": None}
-    ).sort([("status", 1), ("created_at", -1)])
-
-    orphan_tasks = [Task(**task_doc) for task_doc in orphan_tasks_cursor]
-
-    if orphan_tasks:
-        projects_with_tasks.append({
-            "project": None,
-            "tasks": orphan_tasks
-        })
-
-    return projects_with_tasks
+    return get_projects_with_tasks(
+        project_query={"is_test": {"$ne": True}},
+        project_sort=[("status", 1), ("last_activity", -1)]
+    )
 
 
 @st.cache_data(ttl=5)  # Cache memory stats for 5 seconds
@@ -207,57 +177,63 @@ def get_priority_badge(priority: str) -> str:
 
 
 @st.cache_data(ttl=60)  # Cache for 60 seconds
-def get_task_episodic_summary(task_id: str, enabled: bool = True) -> Optional[str]:
-    """Retrieve latest episodic memory summary from Atlas for a task.
+def get_episodic_summaries(entity_type: str, entity_ids: Tuple[str, ...]) -> Dict[str, str]:
+    """Retrieve the latest episodic memory summaries for many tasks or projects in one query.
 
     Args:
-        task_id: Task ID as string
-        enabled: Whether episodic memory is enabled (included in cache key)
+        entity_type: "task" or "project"
+        entity_ids: Entity IDs as strings (a tuple, so it can be a cache key)
 
     Returns:
-        Summary string or None if not found
+        Summary text by entity ID; entities without a summary are left out
     """
-    if not task_id or not enabled:
-        return None
+    if not entity_ids:
+        return {}
 
     try:
-        from bson import ObjectId
-        summary_doc = memory_manager.get_latest_episodic_summary(
-            entity_type="task",
-            entity_id=ObjectId(task_id)
-        )
-        return summary_doc["summary"] if summary_doc else None
-    except Exception as e:
-        return None
+        docs = memory_manager.get_latest_episodic_summaries(entity_type, list(entity_ids))
+        return {entity_id: doc["summary"] for entity_id, doc in docs.items()}
+    except Exception:
+        return {}
 
 
-@st.cache_data(ttl=60)  # Cache for 60 seconds
-def get_project_episodic_summary(project_id: str, enabled: bool = True) -> Optional[str]:
-    """Retrieve latest episodic memory summary from Atlas for a project.
+def prefetch_episodic_summaries(entities: List[Any], entity_type: str) -> Dict[str, str]:
+    """Summaries for the entities about to be rendered.
+
+    Summaries denormalized onto the entity (latest_episodic_summary) are used
+    as is. scripts/setup/init_db.py backfills the pointer for entities
+    summarized before it existed; until it has run, entities with enough
+    activity to have been summarized are fetched together with one
+    get_episodic_summaries() call.
 
     Args:
-        project_id: Project ID as string
-        enabled: Whether episodic memory is enabled (included in cache key)
+        entities: Task or Project models
+        entity_type: "task" or "project"
 
     Returns:
-        Summary string or None if not found
+        Summary text by entity ID
     """
-    if not project_id or not enabled:
-        return None
+    summaries = {}
+    missing = []
+    for entity in entities:
+        if not entity.id:
+            continue
+        if entity.latest_episodic_summary:
+            summaries[str(entity.id)] = entity.latest_episodic_summary.summary
+        elif entity.total_activity >= FIRST_SUMMARY_ACTIVITY[entity_type]:
+            missing.append(str(entity.id))
+
+    summaries.update(get_episodic_summaries(entity_type, tuple(sorted(missing))))
+    return summaries
 
-    try:
-        from bson import ObjectId
-        summary_doc = memory_manager.get_latest_episodic_summary(
-            entity_type="project",
-            entity_id=ObjectId(project_id)
-        )
-        return summary_doc["summary"] if summary_doc else None
-    except Exception as e:
-        return None
 
+def render_task_with_metadata(task, episodic_summary: Optional[str] = None):
+    """Render a task as a collapsible expander with full metadata.
 
-def render_task_with_metadata(task):
-    """Render a task as a collapsible expander with full metadata."""
+    Args:
+        task: Task model
+        episodic_summary: Latest episodic summary to show (see prefetch_episodic_summaries)
+    """
     from datetime import datetime
 
     # Build header: status icon + priority + title + assignee badge
@@ -280,14 +256,11 @@ def render_task_with_metadata(task):
     header = f"{status_icon} {priority_badge} {task.title} {assignee_badge}{blocker_indicator}{due_indicator}"
 
     with st.expander(header, expanded=False):
-        # Fetch and display episodic memory summary if toggle is enabled
-        episodic_enabled = st.session_state.get("mem_episodic", True)
-        if episodic_enabled:
-            summary = get_task_episodic_summary(str(task.id), enabled=episodic_enabled) if task.id else None
-            if summary:
-                st.markdown("**🧠 Episodic Memory Summary**")
-                st.info(summary)
-                st.divider()
+        # Display episodic memory summary (only passed in when the toggle is enabled)
+        if episodic_summary:
+            st.markdown("**🧠 Episodic Memory Summary**")
+            st.info(episodic_summary)
+            st.divider()
 
         # Create two columns for metadata
         col1, col2 = st.columns(2)
@@ -512,6 +485,15 @@ def render_sidebar():
 
         projects_with_tasks = get_all_projects_with_tasks()
 
+        # Episodic summaries for every visible project and task, fetched up front
+        task_summaries: Dict[str, str] = {}
+        project_summaries: Dict[str, str] = {}
+        if st.session_state.get("mem_episodic", True):
+            visible_tasks = [task for item in projects_with_tasks for task in item["tasks"][:10]]
+            visible_projects = [item["project"] for item in projects_with_tasks if item["project"]]
+            task_summaries = prefetch_episodic_summaries(visible_tasks, "task")
+            project_summaries = prefetch_episodic_summaries(visible_projects, "project")
+
         if projects_with_tasks:
             for item in projects_with_tasks:
                 project = item["project"]
@@ -552,18 +534,16 @@ def render_sidebar():
                                     content = update.content
                                 st.caption(f"  • {update_date}: {content[:80]}...")
 
-                        # Fetch and display project episodic memory if toggle is enabled
-                        episodic_enabled = st.session_state.get("mem_episodic", True)
-                        if episodic_enabled:
-                            summary = get_project_episodic_summary(str(project.id), enabled=episodic_enabled) if project.id else None
-                            if summary:
-                                st.markdown("**🧠 Project Episodic Memory**")
-                                st.success(summary)
-                                st.divider()
+                        # Display project episodic memory if toggle is enabled
+                        summary = project_summaries.get(str(project.id))
+                        if summary:
+                            st.markdown("**🧠 Project Episodic Memory**")
+                            st.success(summary)
+                            st.divider()
 
                         if tasks:
                             for task in tasks[:10]:  # Show max 10 tasks per project
-                                render_task_with_metadata(task)
+                                render_task_with_metadata(task, task_summaries.get(str(task.id)))
 
                             if len(tasks) > 10:
                                 st.caption(f"... and {len(tasks) - 10} more tasks")
@@ -574,7 +554,7 @@ def render_sidebar():
                     if tasks:
                         with st.expander(f"📋 Other Tasks ({len(tasks)})", expanded=False):
                             for task in tasks[:10]:  # Show max 10 orphan tasks
-                                render_task_with_metadata(task)
+                                render_task_with_metadata(task, task_summaries.get(str(task.id)))
 
                             if len(tasks) > 10:
                                 st.caption(f"... and {len(tasks) - 10} more tasks")
@@ -587,6 +567,7 @@ def render_sidebar():
         # REFRESH BUTTON
         # ─────────────────────────────────────────────────────────────────
         if st.button("🔄 Refresh Tasks", use_container_width=True, help="Reload tasks and projects from database"):
+            invalidate_projects_with_tasks_cache()
             st.rerun()
 
         st.divider()
@@ -1048,7 +1029,9 @@ def handle_input_and_stream(prompt: str, chat_container):
                     if chunk_debug:
                         debug_info = chunk_debug
 
-                # Remove cursor and show final response
+                # Remove cursor and show the final response (streamed text can
+                # include narration emitted before tool calls)
+                full_response = debug_info.get("response", full_response)
                 response_placeholder.markdown(full_response)
 
         # Add assistant response to session state
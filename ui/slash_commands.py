@@ -588,7 +588,7 @@ class SlashCommandExecutor:
 
     def _get_temporal_tasks(self, timeframe, limit=50):
         """Get tasks with activity in a specific timeframe."""
-        from shared.db import get_collection, TASKS_COLLECTION
+        from shared.db import build_activity_pipeline, get_collection, ACTIVITY_COLLECTION
 
         now = datetime.utcnow()
 
@@ -608,20 +608,11 @@ class SlashCommandExecutor:
 
         self.logger.info(f"Temporal query: {timeframe}, Start: {start}, End: {end}")
 
-        # Query tasks with activity in the time range
-        query = {
-            "activity_log": {
-                "$elemMatch": {
-                    "timestamp": {"$gte": start, "$lte": end}
-                }
-            }
-        }
-
-        self.logger.info(f"MongoDB query: {query}")
+        # Tasks with activity in the time range, via the activity_events index
+        pipeline = build_activity_pipeline("task", since=start, until=end)
 
-        tasks_collection = get_collection(TASKS_COLLECTION)
-        tasks = list(tasks_collection.aggregate([
-            {"$match": query},
+        events_collection = get_collection(ACTIVITY_COLLECTION)
+        tasks = list(events_collection.aggregate(pipeline + [
             {
                 "$lookup": {
                     "from": "projects",
@@ -658,7 +649,7 @@ class SlashCommandExecutor:
 
     def _get_tasks_by_activity_type(self, activity_type, timeframe, limit=50):
         """Get tasks by activity type (completed, started, etc.) in a timeframe."""
-        from shared.db import get_collection, TASKS_COLLECTION
+        from shared.db import build_activity_pipeline, get_collection, ACTIVITY_COLLECTION
 
         now = datetime.utcnow()
 
@@ -674,20 +665,11 @@ class SlashCommandExecutor:
 
         self.logger.info(f"Getting tasks by activity: {activity_type} {timeframe}, Start: {start}")
 
-        query = {
-            "activity_log": {
-                "$elemMatch": {
-                    "action": activity_type,
-                    "timestamp": {"$gte": start}
-                }
-            }
-        }
-
-        self.logger.info(f"MongoDB query: {query}")
+        # Tasks with a matching activity event, via the activity_events index
+        pipeline = build_activity_pipeline("task", since=start, action=activity_type)
 
-        tasks_collection = get_collection(TASKS_COLLECTION)
-        tasks = list(tasks_collection.aggregate([
-            {"$match": query},
+        events_collection = get_collection(ACTIVITY_COLLECTION)
+        tasks = list(events_collection.aggregate(pipeline + [
             {
                 "$lookup": {
                     "from": "projects",
@@ -1020,25 +1002,29 @@ class SlashCommandExecutor:
 
     def _get_project_detail(self, project_name):
         """Get a single project with its tasks."""
-        from shared.db import get_collection, PROJECTS_COLLECTION, TASKS_COLLECTION
+        from shared.db import get_collection, resolve_project_id, PROJECTS_COLLECTION, TASKS_COLLECTION
         from bson import ObjectId
+        import re
 
-        # Find the project (case-insensitive exact match first)
+        # Find the project (case-insensitive exact match first, via the name -> id map)
         projects_collection = get_collection(PROJECTS_COLLECTION)
-        project = projects_collection.find_one(
-            {
-                "name": {"$regex": f"^{project_name}$", "$options": "i"},
-                "is_test": {"$ne": True}  # Exclude test projects
-            },
-            {"embedding": 0}
-        )
+        project = None
+        project_id = resolve_project_id(project_name)
+        if project_id:
+            project = projects_collection.find_one(
+                {
+                    "_id": project_id,
+                    "is_test": {"$ne": True}  # Exclude test projects
+                },
+                {"embedding": 0}
+            )
 
         if not project:
             # Try partial match
             self.logger.info(f"Exact match not found, trying partial match")
             project = projects_collection.find_one(
                 {
-                    "name": {"$regex": project_name, "$options": "i"},
+                    "name": {"$regex": re.escape(project_name), "$options": "i"},
                     "is_test": {"$ne": True}  # Exclude test projects
                 },
                 {"embedding": 0}
@@ -15,8 +15,7 @@ from typing import List, Dict, Any
 
 # Import the coordinator agent
 from agents.coordinator import coordinator
-from shared.db import get_collection, TASKS_COLLECTION, PROJECTS_COLLECTION
-from shared.models import Task, Project
+from shared.db import get_projects_with_tasks, invalidate_projects_with_tasks_cache
 from shared.config import settings
 from utils.audio import transcribe_audio
 
@@ -74,50 +73,15 @@ def init_session_state():
 
 def get_all_projects_with_tasks() -> List[Dict[str, Any]]:
     """
-    Get all projects with their associated tasks.
+    Get all active projects with their associated tasks.
 
     Returns:
         List of projects with tasks
     """
-    projects_collection = get_collection(PROJECTS_COLLECTION)
-    tasks_collection = get_collection(TASKS_COLLECTION)
-
-    # Get all active projects
-    projects_cursor = projects_collection.find(
-        {"status": "active"}
-    ).sort("last_activity", -1)
-
-    projects_with_tasks = []
-
-    for project_doc in projects_cursor:
-        project = Project(**project_doc)
-
-        # Get tasks for this project
-        tasks_cursor = tasks_collection.find(
-            {"project_id": project.id}
-        ).sort([("status", 1), ("created_at", -1)])
-
-        tasks = [Task(**task_doc) for task_doc in tasks_cursor]
-
-        projects_with_tasks.append({
-            "project": project,
-            "tasks": tasks
-        })
-
-    # Also get tasks without a project
-    orphan_tasks_cursor = tasks_collection.find(
-        {"project_id": None}
-    ).sort([("status", 1), ("created_at", -1)])
-
-    orphan_tasks = [Task(**task_doc) for task_doc in orphan_tasks_cursor]
-
-    if orphan_tasks:
-        projects_with_tasks.append({
-            "project": None,
-            "tasks": orphan_tasks
-        })
-
-    return projects_with_tasks
+    return get_projects_with_tasks(
+        project_query={"status": "active"},
+        project_sort=[("last_activity", -1)]
+    )
 
 
 def get_status_icon(status: str) -> str:
@@ -623,6 +587,7 @@ def render_task_list():
 
     # Add refresh button
     if st.sidebar.button("🔄 Refresh Tasks", use_container_width=True):
+        invalidate_projects_with_tasks_cache()
         st.rerun()
 
 
@@ -653,6 +618,7 @@ def render_debug_panel():
         - 🟢 **MongoDB Query**: Database read/write operations (typically 50-150ms)
         - 🟡 **Embedding Generation**: Voyage AI API for semantic vectors (typically 200-400ms)
         - ⚪ **Processing**: Python overhead and serialization (typically <50ms)
+        - 🧵 **Trace**: every span in the turn with its start offset and duration
 
         *MongoDB is fast! Most latency comes from LLM thinking and external API calls.*
         """)
@@ -677,7 +643,8 @@ def render_debug_panel():
         # Calculate time breakdown
         total_time = turn['total_duration_ms']
         llm_time = turn.get('llm_time_ms', 0)
-        tool_time = sum(tc["duration_ms"] for tc in turn["tool_calls"]) if turn["tool_calls"] else 0
+        tool_sum = sum(tc["duration_ms"] for tc in turn["tool_calls"]) if turn["tool_calls"] else 0
+        tool_time = turn.get('tool_wall_ms') or tool_sum  # Wall-clock; lower than the sum when tools ran concurrently
 
         # Calculate percentages (avoid division by zero)
         if total_time > 0:
@@ -702,6 +669,8 @@ def render_debug_panel():
             expander_label += f"        🔵 LLM: {llm_time}ms ({llm_pct}%)"
             if tool_time > 0:
                 expander_label += f" • 🛠️ Tools: {tool_time}ms ({tool_pct}%)"
+                if tool_sum > tool_time:
+                    expander_label += f" [{tool_sum}ms summed, parallel]"
 
         with st.expander(expander_label, expanded=is_most_recent):
             # Show timestamp
@@ -814,6 +783,9 @@ def render_debug_panel():
                         component_info = {
                             "embedding_generation": {"emoji": "🟡", "label": "Embedding (Voyage)"},
                             "mongodb_query": {"emoji": "🟢", "label": f"MongoDB ({mongodb_op_type})"},
+                            "llm": {"emoji": "🔵", "label": "LLM"},
+                            "mcp": {"emoji": "🟣", "label": "MCP server"},
+                            "memory": {"emoji": "🧠", "label": "Memory"},
                             "processing": {"emoji": "⚪", "label": "Processing (Python)"}
                         }
 
@@ -876,6 +848,50 @@ def render_debug_panel():
                     st.caption(f"⏱️ {llm_time}ms")
                     st.caption(f"({num_calls} call{'s' if num_calls > 1 else ''})")
 
+            # Show embedding cache savings if available
+            emb_cache = turn.get("embedding_cache")
+            if emb_cache and (emb_cache.get("round_trips_saved") or emb_cache.get("api_calls")):
+                st.caption(
+                    f"🟡 **Embedding cache:** {emb_cache['round_trips_saved']} Voyage round-trip(s) saved "
+                    f"(~{emb_cache['est_saved_ms']:.0f}ms) • {emb_cache['api_calls']} API call(s) • "
+                    f"hit rate {emb_cache['hit_rate'] * 100:.0f}%"
+                )
+
+            # Show prompt cache usage by layer
+            prompt_cache = turn.get("prompt_cache")
+            if prompt_cache and prompt_cache.get("calls"):
+                layer_rates = " • ".join(
+                    f"{name} {layer['hit_rate'] * 100:.0f}%"
+                    for name, layer in prompt_cache["layers"].items()
+                    if name != "messages"
+                )
+                st.caption(
+                    f"💾 **Prompt cache:** {prompt_cache['cache_read_tokens']} read • "
+                    f"{prompt_cache['cache_creation_tokens']} written • {prompt_cache['input_tokens']} uncached • "
+                    f"hit rate {prompt_cache['hit_rate'] * 100:.0f}% "
+                    f"(conversation {prompt_cache['session_hit_rate'] * 100:.0f}%) — {layer_rates}"
+                )
+
+            # Show background episodic summary queue if it has been used
+            episodic_queue = turn.get("episodic_queue")
+            if episodic_queue:
+                st.caption(
+                    f"🧠 **Episodic queue:** {episodic_queue['depth']} pending • "
+                    f"{episodic_queue['in_flight']} running • lag {episodic_queue['last_lag_ms']}ms • "
+                    f"{episodic_queue['failed']} failed"
+                )
+
+            # Show the turn's span waterfall (see shared/tracing.py)
+            spans = turn.get("spans")
+            if spans:
+                st.caption(f"🧵 **Trace** `{turn.get('trace_id', '')[:16]}` • {len(spans)} spans")
+                rows = []
+                for s in spans:
+                    label = f"{'  ' * s['depth']}{s['name']}"
+                    error = " ✗" if s.get("error") else ""
+                    rows.append(f"{label:<48} +{s['offset_ms']:>8.1f}ms {s['duration_ms']:>8.1f}ms{error}")
+                st.code("\n".join(rows), language=None)
+
             # Show memory operations if available
             render_memory_debug(turn)
 